@@ -200,7 +200,8 @@ class QueryBenchmark:
         for i in range(n):
             _, codes, qtime = dendrite.forward_text( 
                 endpoints = endpoint, 
-                inputs = next(dataset) 
+                inputs = next(dataset),
+                requires_grad = False
             )
             results.append([ qtime.item(), codes.item(), time.time()])
 
@@ -234,7 +235,8 @@ class QueryBenchmark:
             for i in  track(range(ncalls), description="Querying endpoint..."):
                 _, codes, qtime = self.dendrite.forward_text( 
                     endpoints = self.endpoint, 
-                    inputs = next( dataset ) 
+                    inputs = next( dataset ),
+                    requires_grad = False
                 )
                 results.append( [ qtime.item(), codes.item(), time.time() - start_time ])
                 time.sleep( self.conf.delay )
@@ -0,0 +1,253 @@
+#!/bin/python3
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+""" Open loop load generator for axon capacity testing.
+
+Simulates virtual validators with distinct hotkeys sending forward requests to one axon at Poisson
+arrival times, over a ramp of offered rates. Unlike the closed loop QueryBenchmark, requests are sent
+on schedule whatever the server latency, so saturation and tail latencies show up. Reports the
+achieved QPS, the shed rate and the p50/p99/p999 latencies of each step of the ramp.
+
+By default the axon is started in process with a stub nucleus taking --load.service_time seconds per
+request, and sized with the usual --axon.* flags. Pass --load.endpoint to load an external axon instead.
+
+Example:
+    $ python3 benchmarks/load.py --load.rates 10 50 100 200 --axon.max_workers 4 --load.priority --axon.priority.maxsize 64
+    $ python3 benchmarks/load.py --load.endpoint 127.0.0.1:8091 --load.validators 32 --load.rates 5 10 20
+
+"""
+import argparse
+import json
+import platform
+import socket
+import threading
+import time
+from concurrent import futures
+from typing import List
+
+import numpy as np
+import torch
+import bittensor
+import bittensor.utils.stats as stat_utils
+from rich.table import Table
+
+# Return codes of requests the server refused or dropped under load.
+SHED_CODES = [
+    bittensor.proto.ReturnCode.Timeout,
+    bittensor.proto.ReturnCode.Backoff,
+    bittensor.proto.ReturnCode.Unavailable,
+    bittensor.proto.ReturnCode.NucleusTimeout,
+    bittensor.proto.ReturnCode.NucleusFull,
+]
+
+def config() -> 'bittensor.Config':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--load.rates', type=float, nargs='+', help='''Offered request rates per second of the ramp steps, summed over the validators.''', default=[10, 20, 50, 100])
+    parser.add_argument('--load.step_seconds', type=float, help='''Duration of each step of the ramp.''', default=10)
+    parser.add_argument('--load.validators', type=int, help='''Number of virtual validators, each with its own hotkey and receptor.''', default=16)
+    parser.add_argument('--load.batch_sizes', type=int, nargs='+', help='''Batch sizes of the requests.''', default=[1, 4, 16])
+    parser.add_argument('--load.batch_weights', type=float, nargs='+', help='''Relative frequencies of the batch sizes, uniform if not set.''', default=None)
+    parser.add_argument('--load.sequence_lengths', type=int, nargs='+', help='''Sequence lengths of the requests.''', default=[20, 64, 256])
+    parser.add_argument('--load.sequence_weights', type=float, nargs='+', help='''Relative frequencies of the sequence lengths, uniform if not set.''', default=None)
+    parser.add_argument('--load.timeout', type=int, help='''Timeout of the requests in seconds.''', default=12)
+    parser.add_argument('--load.max_in_flight', type=int, help='''Maximum number of requests in flight, arrivals past it are counted as client drops.''', default=1024)
+    parser.add_argument('--load.max_shed', type=float, help='''The ramp stops after a step shedding more than this fraction of the requests.''', default=0.5)
+    parser.add_argument('--load.seed', type=int, help='''Seed of the arrival times and request shapes.''', default=0)
+    parser.add_argument('--load.endpoint', type=str, help='''ip:port of an external axon to load. If not set, a stub axon is started in process.''', default=None)
+    parser.add_argument('--load.service_time', type=float, help='''Seconds the stub nucleus spends on each request.''', default=0.01)
+    parser.add_argument('--load.priority', action='store_true', help='''If set, the stub axon queues requests in the priority threadpool, with a fixed priority per validator hotkey.''', default=False)
+    parser.add_argument('--load.output', type=str, help='''Json file the results are written to.''', default='load_benchmark.json')
+    bittensor.axon.add_args( parser )
+    return bittensor.config( parser )
+
+def free_port() -> int:
+    with socket.socket( socket.AF_INET, socket.SOCK_STREAM ) as sock:
+        sock.bind( ( '127.0.0.1', 0 ) )
+        return sock.getsockname()[1]
+
+def virtual_wallet() -> 'bittensor.Wallet':
+    r""" Returns a mock wallet with a fresh hotkey, nothing is written to disk.
+    """
+    wallet = bittensor.wallet.mock()
+    wallet._hotkey = bittensor.Keypair.create_from_mnemonic( bittensor.Keypair.generate_mnemonic() )
+    return wallet
+
+def weights( values: List, weights: List[float] ) -> np.ndarray:
+    if weights == None:
+        return np.full( len( values ), 1 / len( values ) )
+    assert len( weights ) == len( values ), 'Expected {} weights, got {}'.format( len( values ), len( weights ) )
+    return np.array( weights ) / np.sum( weights )
+
+class LoadGenerator():
+    r""" Sends forward requests from virtual validators to an endpoint at Poisson arrival times.
+
+        Args:
+            config (:obj:`bittensor.Config`, `required`):
+                load benchmark config.
+            endpoint (:obj:`bittensor.Endpoint`, `required`):
+                Endpoint of the loaded axon.
+    """
+    def __init__( self, config: 'bittensor.Config', endpoint: 'bittensor.Endpoint' ):
+        self.config = config
+        self.rng = np.random.default_rng( config.load.seed )
+        self.receptors = [ bittensor.receptor( endpoint = endpoint, wallet = virtual_wallet() ) for _ in range( config.load.validators ) ]
+        self.shapes = [ ( batch_size, sequence_length ) for batch_size in config.load.batch_sizes for sequence_length in config.load.sequence_lengths ]
+        self.shape_weights = np.outer( weights( config.load.batch_sizes, config.load.batch_weights ), weights( config.load.sequence_lengths, config.load.sequence_weights ) ).flatten()
+        self.inputs = { shape: torch.randint( 0, bittensor.__vocab_size__, shape ) for shape in self.shapes }
+        self.executor = futures.ThreadPoolExecutor( max_workers = config.load.max_in_flight )
+        self.in_flight = 0
+        self.lock = threading.Lock()
+
+    def step( self, rate: float, seconds: float ) -> dict:
+        r""" Offers rate requests per second for seconds, then waits for the sent requests to complete.
+            Returns the stats of the step.
+        """
+        latency = stat_utils.LatencyHistogram()
+        codes = {}
+        dropped = 0
+        sent = 0
+        step_futures = []
+
+        def call( receptor, inputs ):
+            start_time = time.time()
+            try:
+                _, code, _ = receptor.forward( inputs, bittensor.proto.Modality.TEXT, timeout = self.config.load.timeout )
+            except Exception:
+                code = bittensor.proto.ReturnCode.UnknownException
+            elapsed = time.time() - start_time
+            with self.lock:
+                self.in_flight -= 1
+                codes[ code ] = codes.get( code, 0 ) + 1
+            if code == bittensor.proto.ReturnCode.Success:
+                latency.record( elapsed )
+
+        start_time = time.time()
+        next_arrival = start_time + self.rng.exponential( 1 / rate )
+        while next_arrival < start_time + seconds:
+            wait = next_arrival - time.time()
+            if wait > 0:
+                time.sleep( wait )
+            receptor = self.receptors[ self.rng.integers( len( self.receptors ) ) ]
+            inputs = self.inputs[ self.shapes[ self.rng.choice( len( self.shapes ), p = self.shape_weights ) ] ]
+            with self.lock:
+                admitted = self.in_flight < self.config.load.max_in_flight
+                if admitted:
+                    self.in_flight += 1
+            if admitted:
+                step_futures.append( self.executor.submit( call, receptor, inputs ) )
+                sent += 1
+            else:
+                dropped += 1
+            next_arrival += self.rng.exponential( 1 / rate )
+        futures.wait( step_futures )
+
+        successes = codes.get( bittensor.proto.ReturnCode.Success, 0 )
+        shed = sum( codes.get( code, 0 ) for code in SHED_CODES )
+        total = sent + dropped
+        percentiles = latency.percentiles( ( 50, 99, 99.9 ) )
+        return {
+            'offered_rate': rate,
+            'sent': sent,
+            'client_dropped': dropped,
+            'success': successes,
+            'achieved_qps': successes / seconds,
+            'shed_rate': shed / total if total > 0 else 0.0,
+            'error_rate': ( sent - successes - shed ) / total if total > 0 else 0.0,
+            'p50': percentiles[50],
+            'p99': percentiles[99],
+            'p999': percentiles[99.9],
+            'codes': { bittensor.proto.ReturnCode.Name( code ): count for code, count in codes.items() },
+        }
+
+    def ramp( self ) -> List[dict]:
+        r""" Runs the steps of the ramp, stopping after the first step over the shed limit.
+        """
+        steps = []
+        for rate in self.config.load.rates:
+            steps.append( self.step( rate, self.config.load.step_seconds ) )
+            if steps[-1]['shed_rate'] > self.config.load.max_shed:
+                break
+        return steps
+
+def table( steps: List[dict] ) -> Table:
+    table = Table( title = 'Load ramp' )
+    for column in [ 'offered/s', 'achieved/s', 'sent', 'dropped', 'shed', 'errors', 'p50 ms', 'p99 ms', 'p999 ms' ]:
+        table.add_column( column )
+    for step in steps:
+        table.add_row( '{:.1f}'.format( step['offered_rate'] ), '{:.1f}'.format( step['achieved_qps'] ), str( step['sent'] ), str( step['client_dropped'] ),
+            '{:.1%}'.format( step['shed_rate'] ), '{:.1%}'.format( step['error_rate'] ),
+            '{:.1f}'.format( step['p50'] * 1000 ), '{:.1f}'.format( step['p99'] * 1000 ), '{:.1f}'.format( step['p999'] * 1000 ) )
+    return table
+
+def main():
+    config_ = config()
+    axon = None
+    if config_.load.endpoint != None:
+        ip, port = config_.load.endpoint.rsplit( ':', 1 )
+        port = int( port )
+        wallet = virtual_wallet()
+    else:
+        ip, port = '127.0.0.1', free_port()
+        wallet = bittensor.wallet.mock()
+
+        def forward_text( inputs_x ):
+            time.sleep( config_.load.service_time )
+            return torch.zeros( inputs_x.shape[0], inputs_x.shape[1], bittensor.__network_dim__ )
+
+        def priority( pubkey: str, request_type: bittensor.proto.RequestType, inputs_x ) -> float:
+            return float( hash( pubkey ) % config_.load.validators )
+
+        axon = bittensor.axon(
+            config = config_,
+            wallet = wallet,
+            forward_text = forward_text,
+            ip = ip,
+            port = port,
+            priority = priority if config_.load.priority else None,
+        ).start()
+
+    endpoint = bittensor.endpoint(
+        version = bittensor.__version_as_int__,
+        uid = 0,
+        ip = ip,
+        ip_type = 4,
+        port = port,
+        hotkey = wallet.hotkey.ss58_address,
+        coldkey = wallet.coldkeypub.ss58_address,
+        modality = bittensor.proto.Modality.TEXT
+    )
+    try:
+        steps = LoadGenerator( config_, endpoint ).ramp()
+    finally:
+        if axon != None:
+            axon.stop()
+
+    bittensor.__console__.print( table( steps ) )
+    report = {
+        'version': bittensor.__version__,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.time(),
+        'config': { 'load': config_.load, 'axon': config_.axon },
+        'steps': steps,
+    }
+    with open( config_.load.output, 'w' ) as file:
+        json.dump( report, file, indent = 2 )
+    bittensor.__console__.print( 'Results written to {}'.format( config_.load.output ) )
+
+if __name__ == "__main__":
+    main()
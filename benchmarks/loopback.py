@@ -0,0 +1,254 @@
+#!/bin/python3
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+""" In process benchmark of the full RPC path, without chain, registered wallet or miner.
+
+Stands up an axon on localhost with a stub nucleus and drives it through a receptor, a receptor pool
+and a dendrite. Reports the latency and throughput of serialization, signing, signature verification
+and round trips across batch sizes, sequence lengths and serializers, plus the stage breakdown of the
+round trips traced on both sides. Results are written to a json file, and compared against a
+baseline file when one is passed.
+
+Example:
+    $ python3 benchmarks/loopback.py --loopback.batch_sizes 1 16 --loopback.sequence_lengths 20 256
+    $ python3 benchmarks/loopback.py --loopback.baseline master.json --loopback.tolerance 0.25
+
+"""
+import argparse
+import json
+import platform
+import socket
+import sys
+import time
+from collections import namedtuple
+from typing import Callable, List
+
+import torch
+import bittensor
+import bittensor.utils.stats as stat_utils
+from rich.table import Table
+
+# Stands in for the grpc metadata items read by the axon interceptor.
+Metadatum = namedtuple( 'Metadatum', [ 'key', 'value' ] )
+
+def config() -> 'bittensor.Config':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--loopback.batch_sizes', type=int, nargs='+', help='''Batch sizes of the requests.''', default=[1, 8, 32])
+    parser.add_argument('--loopback.sequence_lengths', type=int, nargs='+', help='''Sequence lengths of the requests.''', default=[20, 128])
+    parser.add_argument('--loopback.serializers', type=str, nargs='+', choices=['MSGPACK', 'CMPPACK'], help='''Serializers benchmarked by the serialization stages.''', default=['MSGPACK', 'CMPPACK'])
+    parser.add_argument('--loopback.iterations', type=int, help='''Timed iterations per stage and size.''', default=50)
+    parser.add_argument('--loopback.warmup', type=int, help='''Untimed iterations run before each stage.''', default=5)
+    parser.add_argument('--loopback.timeout', type=int, help='''Timeout of the round trips in seconds.''', default=10)
+    parser.add_argument('--loopback.asyncio', action='store_true', help='''If set, the axon is served by the grpc.aio server.''', default=False)
+    parser.add_argument('--loopback.output', type=str, help='''Json file the results are written to.''', default='loopback_benchmark.json')
+    parser.add_argument('--loopback.baseline', type=str, help='''If set, results are compared to this results file and the run fails on regressions.''', default=None)
+    parser.add_argument('--loopback.tolerance', type=float, help='''Allowed relative increase of the median latencies over the baseline.''', default=0.2)
+    return bittensor.config( parser )
+
+def free_port() -> int:
+    with socket.socket( socket.AF_INET, socket.SOCK_STREAM ) as sock:
+        sock.bind( ( '127.0.0.1', 0 ) )
+        return sock.getsockname()[1]
+
+def time_stage( fn: Callable, iterations: int, warmup: int ) -> 'stat_utils.LatencyHistogram':
+    r""" Runs fn warmup times then times it iterations times. fn returns False on failure.
+        Returns the histogram of the successful calls and the number of failed ones.
+    """
+    for _ in range( warmup ):
+        fn()
+    histogram = stat_utils.LatencyHistogram()
+    failures = 0
+    for _ in range( iterations ):
+        start_time = time.perf_counter()
+        success = fn()
+        if success is False:
+            failures += 1
+        else:
+            histogram.record( time.perf_counter() - start_time )
+    return histogram, failures
+
+class Results():
+    r""" Rows of the benchmark, one per stage, serializer and size.
+    """
+    def __init__( self ):
+        self.rows = []
+
+    def add( self, stage: str, histogram: 'stat_utils.LatencyHistogram', failures: int = 0, serializer: str = None, batch_size: int = None, sequence_length: int = None, nbytes: int = None ):
+        percentiles = histogram.percentiles( ( 50, 90, 99 ) )
+        self.rows.append({
+            'stage': stage,
+            'serializer': serializer,
+            'batch_size': batch_size,
+            'sequence_length': sequence_length,
+            'count': histogram.count(),
+            'failures': failures,
+            'mean': histogram.mean(),
+            'p50': percentiles[50],
+            'p90': percentiles[90],
+            'p99': percentiles[99],
+            'throughput': 1 / histogram.mean() if histogram.mean() > 0 else 0.0,
+            'bytes': nbytes,
+        })
+
+    @staticmethod
+    def key( row: dict ) -> tuple:
+        return ( row['stage'], row['serializer'], row['batch_size'], row['sequence_length'] )
+
+    def regressions( self, baseline: List[dict], tolerance: float ) -> List[dict]:
+        r""" Returns the rows whose median latency grew over the baseline by more than tolerance.
+        """
+        baseline = { self.key( row ): row for row in baseline }
+        regressions = []
+        for row in self.rows:
+            previous = baseline.get( self.key( row ) )
+            if previous != None and previous['p50'] > 0 and row['p50'] > previous['p50'] * ( 1 + tolerance ):
+                regressions.append( { **row, 'baseline_p50': previous['p50'] } )
+        return regressions
+
+    def table( self ) -> Table:
+        table = Table( title = 'Loopback benchmark' )
+        for column in [ 'stage', 'serializer', 'batch', 'sequence', 'count', 'failures', 'p50 ms', 'p99 ms', 'ops/s' ]:
+            table.add_column( column )
+        for row in self.rows:
+            table.add_row( row['stage'], str( row['serializer'] or '' ), str( row['batch_size'] or '' ), str( row['sequence_length'] or '' ), str( row['count'] ), str( row['failures'] ),
+                '{:.3f}'.format( row['p50'] * 1000 ), '{:.3f}'.format( row['p99'] * 1000 ), '{:.1f}'.format( row['throughput'] ) )
+        return table
+
+def benchmark_serialization( config: 'bittensor.Config', results: Results ):
+    r""" Serialization and deserialization of the request inputs and of the response outputs.
+    """
+    for serializer_name in config.loopback.serializers:
+        serializer = bittensor.serializer( bittensor.proto.Serializer.Value( serializer_name ) )
+        for batch_size in config.loopback.batch_sizes:
+            for sequence_length in config.loopback.sequence_lengths:
+                tensors = {
+                    'inputs': ( torch.randint( 0, bittensor.__vocab_size__, ( batch_size, sequence_length ) ), bittensor.proto.Modality.TEXT ),
+                    'outputs': ( torch.rand( batch_size, sequence_length, bittensor.__network_dim__ ), bittensor.proto.Modality.TENSOR ),
+                }
+                for name, ( tensor, modality ) in tensors.items():
+                    serialized = serializer.serialize( tensor, modality = modality, from_type = bittensor.proto.TensorType.TORCH )
+                    sizes = dict( serializer = serializer_name, batch_size = batch_size, sequence_length = sequence_length, nbytes = len( serialized.buffer ) )
+                    histogram, failures = time_stage( lambda: serializer.serialize( tensor, modality = modality, from_type = bittensor.proto.TensorType.TORCH ), config.loopback.iterations, config.loopback.warmup )
+                    results.add( 'serialize.' + name, histogram, failures, **sizes )
+                    histogram, failures = time_stage( lambda: serializer.deserialize( serialized, to_type = bittensor.proto.TensorType.TORCH ), config.loopback.iterations, config.loopback.warmup )
+                    results.add( 'deserialize.' + name, histogram, failures, **sizes )
+
+def benchmark_auth( config: 'bittensor.Config', results: Results, receptor: 'bittensor.Receptor' ):
+    r""" Signing of the request metadata by the receptor and its verification by the axon interceptor.
+    """
+    histogram, failures = time_stage( receptor.sign, config.loopback.iterations, config.loopback.warmup )
+    results.add( 'sign', histogram, failures )
+
+    interceptor = bittensor._axon.AuthInterceptor()
+    signatures = iter( [ receptor.sign() for _ in range( config.loopback.iterations + config.loopback.warmup ) ] )
+    def verify():
+        meta = ( Metadatum( 'rpc-auth-header', 'Bittensor' ), Metadatum( 'bittensor-signature', next( signatures ) ) )
+        return interceptor.vertification( meta )
+    histogram, failures = time_stage( verify, config.loopback.iterations, config.loopback.warmup )
+    results.add( 'verify', histogram, failures )
+
+def benchmark_round_trips( config: 'bittensor.Config', results: Results, wallet: 'bittensor.Wallet', endpoint: 'bittensor.Endpoint' ):
+    r""" Forward round trips through the receptor, the receptor pool and the dendrite, with the stages
+        of the receptor calls traced on both sides.
+    """
+    tracer = bittensor.utils.tracing.Tracer()
+    receptor = bittensor.receptor( endpoint = endpoint, wallet = wallet, tracer = tracer )
+    receptor_pool = bittensor.receptor_pool( wallet = wallet )
+    dendrite = bittensor.dendrite( wallet = wallet, receptor_pool = receptor_pool, cache_bytes = 0 )
+    timeout = config.loopback.timeout
+    for batch_size in config.loopback.batch_sizes:
+        for sequence_length in config.loopback.sequence_lengths:
+            inputs = torch.randint( 0, bittensor.__vocab_size__, ( batch_size, sequence_length ) )
+            sizes = dict( serializer = 'MSGPACK', batch_size = batch_size, sequence_length = sequence_length )
+            paths = {
+                'round_trip.receptor': lambda: receptor.forward( inputs, bittensor.proto.Modality.TEXT, timeout = timeout )[1] == bittensor.proto.ReturnCode.Success,
+                'round_trip.receptor_pool': lambda: receptor_pool.forward( [ endpoint ], [ inputs ], bittensor.proto.Modality.TEXT, timeout = timeout )[1][0] == bittensor.proto.ReturnCode.Success,
+                'round_trip.dendrite': lambda: dendrite.forward_text( [ endpoint ], [ inputs ], timeout = timeout )[1][0].item() == bittensor.proto.ReturnCode.Success,
+            }
+            for stage, fn in paths.items():
+                tracer.clear()
+                histogram, failures = time_stage( fn, config.loopback.iterations, config.loopback.warmup )
+                results.add( stage, histogram, failures, **sizes )
+
+                # Stage breakdown of the traced receptor calls, the server stages come back in the trailing metadata.
+                if stage == 'round_trip.receptor':
+                    stages = {}
+                    for span in tracer.snapshot():
+                        for name, _, duration in span.stages:
+                            stages.setdefault( name, stat_utils.LatencyHistogram() ).record( duration )
+                    for name, stage_histogram in stages.items():
+                        results.add( 'rpc.' + name, stage_histogram, 0, **sizes )
+
+def main():
+    config_ = config()
+    wallet = bittensor.wallet.mock()
+    port = free_port()
+
+    def forward_text( inputs_x ):
+        return torch.zeros( inputs_x.shape[0], inputs_x.shape[1], bittensor.__network_dim__ )
+
+    axon = bittensor.axon(
+        wallet = wallet,
+        forward_text = forward_text,
+        ip = '127.0.0.1',
+        port = port,
+        asyncio = config_.loopback.asyncio,
+        tracing = True,
+    ).start()
+    endpoint = bittensor.endpoint(
+        version = bittensor.__version_as_int__,
+        uid = 0,
+        ip = '127.0.0.1',
+        ip_type = 4,
+        port = port,
+        hotkey = wallet.hotkey.ss58_address,
+        coldkey = wallet.coldkeypub.ss58_address,
+        modality = bittensor.proto.Modality.TEXT
+    )
+
+    results = Results()
+    try:
+        benchmark_serialization( config_, results )
+        benchmark_auth( config_, results, bittensor.receptor( endpoint = endpoint, wallet = wallet ) )
+        benchmark_round_trips( config_, results, wallet, endpoint )
+    finally:
+        axon.stop()
+
+    bittensor.__console__.print( results.table() )
+    report = {
+        'version': bittensor.__version__,
+        'python': platform.python_version(),
+        'torch': torch.__version__,
+        'platform': platform.platform(),
+        'timestamp': time.time(),
+        'config': { key: value for key, value in config_.loopback.items() },
+        'results': results.rows,
+    }
+    with open( config_.loopback.output, 'w' ) as file:
+        json.dump( report, file, indent = 2 )
+    bittensor.__console__.print( 'Results written to {}'.format( config_.loopback.output ) )
+
+    if config_.loopback.baseline != None:
+        with open( config_.loopback.baseline ) as file:
+            regressions = results.regressions( json.load( file )['results'], config_.loopback.tolerance )
+        for row in regressions:
+            bittensor.__console__.print( '[red]Regression[/red] {}: p50 {:.3f}ms, baseline {:.3f}ms'.format( Results.key( row ), row['p50'] * 1000, row['baseline_p50'] * 1000 ) )
+        if len( regressions ) > 0:
+            sys.exit( 1 )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/bin/python3
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+""" Replays a request capture into the template server nucleus, without network or chain.
+
+Capture the requests of a running server with --axon.capture_dir, then replay them at original
+or accelerated speed against model, batching or scheduler changes.
+
+Example:
+    $ python3 benchmarks/replay.py --replay.log_dir ~/.bittensor/capture --replay.speed 4 --neuron.model_name gpt2
+    $ python3 benchmarks/replay.py --replay.log_dir ~/.bittensor/capture --replay.target axon --axon.priority.max_workers 4
+
+"""
+import argparse
+import json
+
+import torch
+import bittensor
+from bittensor._axon.request_log import RequestLog, Replayer
+from bittensor._neuron.text.template_server import server
+
+def replay_config() -> 'bittensor.Config':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--replay.log_dir', type=str, help='''Directory of the request capture written with --axon.capture_dir.''', required=True)
+    parser.add_argument('--replay.speed', type=float, help='''Replay speed relative to the capture. If 0, requests are sent as fast as possible.''', default=1.0)
+    parser.add_argument('--replay.target', type=str, choices=['nucleus', 'axon'], help='''Replay into the nucleus callbacks or through the handlers of a local, unserved axon.''', default='nucleus')
+    parser.add_argument('--replay.max_workers', type=int, help='''Number of threads sending the requests.''', default=10)
+    parser.add_argument('--replay.max_pending', type=int, help='''Maximum number of requests in flight.''', default=1000)
+    parser.add_argument('--replay.limit', type=int, help='''Maximum number of requests replayed.''', default=None)
+    parser.add_argument('--replay.output', type=str, help='''If set, the replay summary is written to this json file.''', default=None)
+    replay = bittensor.config( parser ).replay
+    config = server.config()
+    config.replay = replay
+    return config
+
+def main():
+    config = replay_config()
+    model = server( config = config ).to( config.neuron.device )
+
+    def forward_text( inputs_x ):
+        with torch.no_grad():
+            return model.encode_forward( inputs_x.to( model.device ) )
+
+    def backward_text( inputs_x, grads_dy ):
+        with torch.enable_grad():
+            outputs_y = model.encode_forward( inputs_x.to( model.device ) )
+            torch.autograd.backward( tensors = [ outputs_y ], grad_tensors = [ grads_dy.to( model.device ) ] )
+        model.zero_grad()
+
+    if config.replay.target == 'axon':
+        axon = bittensor.axon(
+            config = config,
+            wallet = bittensor.wallet.mock(),
+            forward_text = forward_text,
+            backward_text = backward_text,
+            capture_dir = '',
+        )
+        replayer = Replayer( axon = axon, speed = config.replay.speed, max_workers = config.replay.max_workers, max_pending = config.replay.max_pending )
+    else:
+        replayer = Replayer( forward = forward_text, backward = backward_text, speed = config.replay.speed, max_workers = config.replay.max_workers, max_pending = config.replay.max_pending )
+
+    stats = replayer.run( RequestLog( config.replay.log_dir ), limit = config.replay.limit )
+    summary = {
+        'requests': stats.requests,
+        'forward': stats.forward,
+        'backward': stats.backward,
+        'duration': stats.duration,
+        'qps': stats.qps,
+        'codes': stats.codes,
+        **stats.latency.summary( 'latency' ),
+        **stats.lag.summary( 'lag' ),
+    }
+    bittensor.__console__.print( summary )
+    if config.replay.output != None:
+        with open( config.replay.output, 'w' ) as file:
+            json.dump( summary, file, indent = 2 )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+#!/bin/python3
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+""" Simulated network for validator step time benchmarking.
+
+Starts --simnet.n fake axons in process, each answering forward requests after a latency drawn from
+--simnet.latency, failing with probability --simnet.failure_rate and answering garbage (NaN, inf,
+unit noise, wrong shape or oversized tensors) with probability --simnet.garbage_rate. The axons are
+registered and served on an in process chain, and the core validator runs its forward, Shapley
+scoring and update against them for --simnet.steps steps, on seeded random token batches of the
+chain batch size and sequence length, for reproducibility.
+
+Reports the wall time, the validator thread CPU time, the process CPU time and the resident memory
+of each stage: sync, query, forward (including the query and the backward pass), shapley, update and
+the whole step. The validator forward is called directly, without the one second polling of its
+forward thread queue.
+
+Example:
+    $ python3 benchmarks/simnet.py --simnet.n 64 --simnet.steps 20 --nucleus.topk 20
+    $ python3 benchmarks/simnet.py --simnet.latency lognormal --simnet.latency_mean 0.5 --simnet.failure_rate 0.1 --simnet.garbage_rate 0.05
+
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import socket
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import numpy as np
+import psutil
+import torch
+import bittensor
+import bittensor.utils.stats as stat_utils
+from bittensor._neuron.text.core_validator import neuron as core_validator
+from bittensor._subtensor.subtensor_inprocess import InProcessSubtensor
+from rich.table import Table
+from torch.nn.utils import clip_grad_norm_
+
+LATENCY_DISTRIBUTIONS = [ 'constant', 'uniform', 'exponential', 'lognormal' ]
+GARBAGE_KINDS = [ 'nan', 'inf', 'noise', 'shape', 'oversized' ]
+
+def config() -> 'bittensor.Config':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--simnet.n', type=int, help='''Number of fake axons.''', default=32)
+    parser.add_argument('--simnet.steps', type=int, help='''Number of measured validator steps.''', default=10)
+    parser.add_argument('--simnet.warmup', type=int, help='''Number of validator steps run before measuring.''', default=1)
+    parser.add_argument('--simnet.latency', type=str, choices=LATENCY_DISTRIBUTIONS, help='''Distribution of the fake axon latencies.''', default='exponential')
+    parser.add_argument('--simnet.latency_mean', type=float, help='''Mean latency of the fake axons in seconds.''', default=0.1)
+    parser.add_argument('--simnet.latency_std', type=float, help='''Standard deviation of the uniform and lognormal latencies in seconds.''', default=0.05)
+    parser.add_argument('--simnet.failure_rate', type=float, help='''Probability of a fake axon request raising in the nucleus.''', default=0.0)
+    parser.add_argument('--simnet.garbage_rate', type=float, help='''Probability of a fake axon answering garbage.''', default=0.0)
+    parser.add_argument('--simnet.garbage_kinds', type=str, nargs='+', choices=GARBAGE_KINDS, help='''Kinds of garbage answered, picked uniformly.''', default=GARBAGE_KINDS)
+    parser.add_argument('--simnet.oversize_factor', type=int, help='''Factor on the sequence length of the oversized garbage responses.''', default=8)
+    parser.add_argument('--simnet.stake', type=float, help='''Stake in tao of each fake axon.''', default=1.0)
+    parser.add_argument('--simnet.seed', type=int, help='''Seed of the latencies, failures, responses and validator.''', default=0)
+    parser.add_argument('--simnet.verbose', action='store_true', help='''If set, the validator step logs are printed.''', default=False)
+    parser.add_argument('--simnet.output', type=str, help='''Json file the results are written to.''', default='simnet_benchmark.json')
+    core_validator.add_args( parser )
+    bittensor.neurons.text.core_validator.nucleus.add_args( parser )
+    bittensor.wallet.add_args( parser )
+    bittensor.dendrite.add_args( parser )
+    bittensor.subtensor.add_args( parser )
+    bittensor.metagraph.add_args( parser )
+    bittensor.logging.add_args( parser )
+    bittensor.dataset.add_args( parser )
+    bittensor.wandb.add_args( parser )
+    bittensor.prometheus.add_args( parser )
+    bittensor.profiler.add_args( parser )
+    bittensor.axon.add_args( parser )
+    return bittensor.config( parser )
+
+def free_port() -> int:
+    with socket.socket( socket.AF_INET, socket.SOCK_STREAM ) as sock:
+        sock.bind( ( '127.0.0.1', 0 ) )
+        return sock.getsockname()[1]
+
+def virtual_wallet() -> 'bittensor.Wallet':
+    r""" Returns a mock wallet with a fresh hotkey, nothing is written to disk.
+    """
+    wallet = bittensor.wallet.mock()
+    wallet._hotkey = bittensor.Keypair.create_from_mnemonic( bittensor.Keypair.generate_mnemonic() )
+    return wallet
+
+class FakeNucleus():
+    r""" Forward callback of a fake axon. Answers a deterministic function of the tokens, mixed with noise by the
+        quality of the peer, after a random latency. Fails or answers garbage at the configured rates.
+
+        Args:
+            config (:obj:`bittensor.Config`, `required`):
+                simnet benchmark config.
+            seed (:type:`int`, `required`):
+                Seed of the peer latencies, failures and responses.
+    """
+    def __init__( self, config: 'bittensor.Config', seed: int ):
+        self.config = config
+        self.rng = np.random.default_rng( seed )
+        self.quality = self.rng.random()
+        generator = torch.Generator().manual_seed( seed )
+        self.frequencies = torch.rand( bittensor.__network_dim__, generator = generator ) * 0.1
+        self.phases = torch.rand( bittensor.__network_dim__, generator = generator ) * 2 * np.pi
+
+    def latency( self ) -> float:
+        mean, std = self.config.simnet.latency_mean, self.config.simnet.latency_std
+        if self.config.simnet.latency == 'constant':
+            return mean
+        elif self.config.simnet.latency == 'uniform':
+            return max( 0.0, self.rng.uniform( mean - std * np.sqrt( 3 ), mean + std * np.sqrt( 3 ) ) )
+        elif self.config.simnet.latency == 'exponential':
+            return self.rng.exponential( mean )
+        else:
+            # Lognormal with the given mean and standard deviation.
+            sigma2 = np.log( 1 + ( std / mean ) ** 2 )
+            return self.rng.lognormal( np.log( mean ) - sigma2 / 2, np.sqrt( sigma2 ) )
+
+    def garbage( self, inputs_x: torch.LongTensor ) -> torch.FloatTensor:
+        kind = self.config.simnet.garbage_kinds[ self.rng.integers( len( self.config.simnet.garbage_kinds ) ) ]
+        batch_size, sequence_length = inputs_x.shape
+        if kind == 'nan':
+            return torch.full( ( batch_size, sequence_length, bittensor.__network_dim__ ), float('nan') )
+        elif kind == 'inf':
+            return torch.full( ( batch_size, sequence_length, bittensor.__network_dim__ ), float('inf') )
+        elif kind == 'noise':
+            return torch.randn( batch_size, sequence_length, bittensor.__network_dim__ )
+        elif kind == 'shape':
+            return torch.zeros( batch_size, sequence_length, bittensor.__network_dim__ // 2 )
+        else:
+            return torch.zeros( batch_size, sequence_length * self.config.simnet.oversize_factor, bittensor.__network_dim__ )
+
+    def __call__( self, inputs_x: torch.LongTensor ) -> torch.FloatTensor:
+        time.sleep( self.latency() )
+        if self.rng.random() < self.config.simnet.failure_rate:
+            raise RuntimeError( 'Simulated failure' )
+        if self.rng.random() < self.config.simnet.garbage_rate:
+            return self.garbage( inputs_x )
+        signal = torch.sin( inputs_x.unsqueeze( -1 ).float() * self.frequencies + self.phases )
+        noise = torch.randn( signal.shape ) * 0.5
+        return self.quality * signal + ( 1 - self.quality ) * noise
+
+class TokenDataset():
+    r""" Seeded random token batches standing in for the validator dataset, no tokenizer or download needed.
+    """
+    def __init__( self, batch_size: int, block_size: int, seed: int ):
+        self.batch_size = batch_size
+        self.block_size = block_size
+        self.generator = torch.Generator().manual_seed( seed )
+
+    def __next__( self ) -> torch.LongTensor:
+        return torch.randint( 0, bittensor.__vocab_size__, ( self.batch_size, self.block_size ), generator = self.generator )
+
+    def set_data_size( self, batch_size: int, block_size: int ):
+        self.batch_size = batch_size
+        self.block_size = block_size
+
+    def close( self ):
+        pass
+
+class Stages():
+    r""" Records the wall time, validator thread CPU time, process CPU time and resident memory of named stages.
+    """
+    def __init__( self ):
+        self.process = psutil.Process( os.getpid() )
+        self.stats = {}
+
+    @contextmanager
+    def stage( self, name: str ):
+        stats = self.stats.setdefault( name, SimpleNamespace( wall = stat_utils.LatencyHistogram(), thread_cpu = [], process_cpu = [], rss_delta = [], rss_max = 0 ) )
+        rss = self.process.memory_info().rss
+        thread_cpu = time.thread_time()
+        process_cpu = time.process_time()
+        start_time = time.time()
+        try:
+            yield
+        finally:
+            stats.wall.record( time.time() - start_time )
+            stats.thread_cpu.append( time.thread_time() - thread_cpu )
+            stats.process_cpu.append( time.process_time() - process_cpu )
+            end_rss = self.process.memory_info().rss
+            stats.rss_delta.append( end_rss - rss )
+            stats.rss_max = max( stats.rss_max, end_rss )
+
+    def clear( self ):
+        self.stats = {}
+
+    def summary( self ) -> dict:
+        summary = {}
+        for name, stats in self.stats.items():
+            percentiles = stats.wall.percentiles( ( 50, 99 ) )
+            summary[ name ] = {
+                'count': stats.wall.count(),
+                'wall_mean': stats.wall.mean(),
+                'wall_p50': percentiles[50],
+                'wall_p99': percentiles[99],
+                'thread_cpu_mean': float( np.mean( stats.thread_cpu ) ),
+                'process_cpu_mean': float( np.mean( stats.process_cpu ) ),
+                'rss_delta_mean': float( np.mean( stats.rss_delta ) ),
+                'rss_max': stats.rss_max,
+            }
+        return summary
+
+class SimulatedNetwork():
+    r""" Fake axons registered and served on an in process chain, with a core validator querying them.
+
+        Args:
+            config (:obj:`bittensor.Config`, `required`):
+                simnet benchmark config, with the core validator and axon flags.
+    """
+    def __init__( self, config: 'bittensor.Config' ):
+        self.config = config
+        self.stages = Stages()
+        self.codes = {}
+        torch.manual_seed( config.simnet.seed )
+        self.subtensor = InProcessSubtensor( block_time = 0 )
+        self.axons = []
+        for i in range( config.simnet.n ):
+            wallet = virtual_wallet()
+            port = free_port()
+            axon = bittensor.axon(
+                config = config,
+                wallet = wallet,
+                forward_text = FakeNucleus( config, seed = config.simnet.seed + i + 1 ),
+                ip = '127.0.0.1',
+                port = port,
+            ).start()
+            self.axons.append( axon )
+            self.register( wallet, port )
+
+        wallet = virtual_wallet()
+        self.register( wallet, 0 )
+        self.config.nucleus.topk = min( self.config.nucleus.topk, self.config.simnet.n )
+        with self.quiet():
+            self.validator = core_validator(
+                config = self.config,
+                wallet = wallet,
+                subtensor = self.subtensor,
+                metagraph = bittensor.metagraph( config = self.config, subtensor = self.subtensor ),
+                dataset = TokenDataset( self.subtensor.validator_batch_size, self.subtensor.validator_sequence_length, config.simnet.seed ),
+            )
+        self.optimizer = torch.optim.SGD(
+            self.validator.nucleus.parameters(), lr = self.config.neuron.learning_rate, momentum = self.config.neuron.momentum
+        )
+        self.validator.moving_avg_scores = None
+        self._time_queries()
+
+    def register( self, wallet: 'bittensor.Wallet', port: int ):
+        self.subtensor.register( wallet )
+        self.subtensor.set_balance( wallet.coldkeypub.ss58_address, self.config.simnet.stake )
+        self.subtensor.add_stake( wallet )
+        if port != 0:
+            self.subtensor.serve( wallet, '127.0.0.1', port, bittensor.proto.Modality.TEXT )
+
+    def _time_queries( self ):
+        r""" Wraps the validator dendrite to time the network queries and count their return codes.
+        """
+        forward_text = self.validator.dendrite.forward_text
+        def timed_forward_text( *args, **kwargs ):
+            with self.stages.stage( 'query' ):
+                responses, codes, times = forward_text( *args, **kwargs )
+            for code in codes.tolist():
+                self.codes[ code ] = self.codes.get( code, 0 ) + 1
+            return responses, codes, times
+        self.validator.dendrite.forward_text = timed_forward_text
+
+    def quiet( self ):
+        return contextlib.nullcontext() if self.config.simnet.verbose else contextlib.redirect_stdout( io.StringIO() )
+
+    def step( self ):
+        r""" Runs one validator step: forward and backward, Shapley scoring, score update and parameter update.
+        """
+        validator = self.validator
+        with self.stages.stage( 'step' ), self.quiet():
+            with self.stages.stage( 'forward' ):
+                result = validator.forward()
+            with self.stages.stage( 'shapley' ):
+                loss, scores, uids = validator.nucleus.compute_shapely_scores( result )
+            validator.moving_avg_scores[ uids ] = validator.moving_avg_scores[ uids ] * 0.99 + scores * 0.01
+            with self.stages.stage( 'update' ):
+                clip_grad_norm_( validator.nucleus.parameters(), self.config.neuron.clip_gradients )
+                self.optimizer.step()
+                self.optimizer.zero_grad()
+
+    def run( self ) -> dict:
+        r""" Syncs the metagraph, runs the warmup steps then the measured steps and returns the stage summary.
+        """
+        with self.stages.stage( 'sync' ), self.quiet():
+            self.validator.metagraph_sync()
+        sync = self.stages.summary()[ 'sync' ]
+        for _ in range( self.config.simnet.warmup ):
+            self.step()
+        self.stages.clear()
+        self.codes = {}
+        start_time = time.time()
+        for _ in range( self.config.simnet.steps ):
+            self.step()
+        duration = time.time() - start_time
+        return {
+            'duration': duration,
+            'steps_per_second': self.config.simnet.steps / duration if duration > 0 else 0.0,
+            'stages': { 'sync': sync, **self.stages.summary() },
+            'codes': { bittensor.proto.ReturnCode.Name( code ): count for code, count in self.codes.items() },
+        }
+
+    def stop( self ):
+        for axon in self.axons:
+            axon.stop()
+        self.validator.dataset.close()
+        self.validator.forward_thread_queue.stop()
+
+def table( results: dict ) -> Table:
+    table = Table( title = 'Validator stages' )
+    for column in [ 'stage', 'count', 'wall ms', 'p50 ms', 'p99 ms', 'thread cpu ms', 'process cpu ms', 'rss delta MB', 'rss max MB' ]:
+        table.add_column( column )
+    for name, stage in results['stages'].items():
+        table.add_row( name, str( stage['count'] ), '{:.1f}'.format( stage['wall_mean'] * 1000 ), '{:.1f}'.format( stage['wall_p50'] * 1000 ),
+            '{:.1f}'.format( stage['wall_p99'] * 1000 ), '{:.1f}'.format( stage['thread_cpu_mean'] * 1000 ), '{:.1f}'.format( stage['process_cpu_mean'] * 1000 ),
+            '{:.1f}'.format( stage['rss_delta_mean'] / 2**20 ), '{:.1f}'.format( stage['rss_max'] / 2**20 ) )
+    return table
+
+def main():
+    config_ = config()
+    network = SimulatedNetwork( config_ )
+    try:
+        results = network.run()
+    finally:
+        network.stop()
+
+    bittensor.__console__.print( table( results ) )
+    bittensor.__console__.print( 'Return codes: {}'.format( results['codes'] ) )
+    report = {
+        'version': bittensor.__version__,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.time(),
+        'config': { 'simnet': config_.simnet, 'nucleus': config_.nucleus, 'dendrite': config_.dendrite },
+        **results,
+    }
+    with open( config_.simnet.output, 'w' ) as file:
+        json.dump( report, file, indent = 2 )
+    bittensor.__console__.print( 'Results written to {}'.format( config_.simnet.output ) )
+
+if __name__ == "__main__":
+    main()
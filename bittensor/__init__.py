@@ -106,6 +106,8 @@ from bittensor._dataset import dataset as dataset
 from bittensor._receptor import receptor_pool as receptor_pool
 from bittensor._wandb import wandb as wandb
 from bittensor._threadpool import prioritythreadpool as prioritythreadpool
+from bittensor._prometheus import prometheus as prometheus
+from bittensor._profiler import profiler as profiler
 
 # ---- Classes -----
 from bittensor._cli.cli_impl import CLI as CLI
@@ -117,11 +119,14 @@ from bittensor._receptor.receptor_impl import Receptor as Receptor
 from bittensor._endpoint.endpoint_impl import Endpoint as Endpoint
 from bittensor._dendrite.dendrite_impl import Dendrite as Dendrite
 from bittensor._metagraph.metagraph_impl import Metagraph as Metagraph
+from bittensor._metagraph.metagraph_refresher import MetagraphRefresher as MetagraphRefresher
 from bittensor._subtensor.subtensor_impl import Subtensor as Subtensor
 from bittensor._serializer.serializer_impl import Serializer as Serializer
 from bittensor._dataset.dataset_impl import Dataset as Dataset
 from bittensor._receptor.receptor_pool_impl import ReceptorPool as ReceptorPool
 from bittensor._threadpool.priority_thread_pool_impl import PriorityThreadPoolExecutor as PriorityThreadPoolExecutor
+from bittensor._prometheus.prometheus_impl import Prometheus as Prometheus
+from bittensor._profiler.profiler_impl import Profiler as Profiler
 from bittensor._ipfs.ipfs_impl import Ipfs
 
 # DEFAULTS
@@ -133,5 +138,7 @@ wallet.add_defaults( defaults )
 dataset.add_defaults( defaults )
 wandb.add_defaults( defaults )
 logging.add_defaults( defaults )
+prometheus.add_defaults( defaults )
+profiler.add_defaults( defaults )
 
 from substrateinterface import Keypair as Keypair
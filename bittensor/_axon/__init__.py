@@ -31,7 +31,10 @@ import grpc
 from substrateinterface import Keypair
 
 import bittensor
+import bittensor.utils.tracing as tracing
 from . import axon_impl
+from . import axon_asyncio_impl
+from .request_log import RequestRecorder
 
 class axon:
     """ The factor class for bittensor.Axon object
@@ -66,6 +69,10 @@ class axon:
             forward_timeout: int = None,
             backward_timeout: int = None,
             compression: str = None,
+            asyncio: bool = None,
+            forward_cache_bytes: int = None,
+            tracing: bool = None,
+            capture_dir: str = None,
         ) -> 'bittensor.Axon':
         r""" Creates a new bittensor.Axon object from passed arguments.
             Args:
@@ -105,6 +112,17 @@ class axon:
                     timeout on the forward requests. 
                 backward_timeout (:type:`int`, `optional`):
                     timeout on the backward requests.              
+                asyncio (:type:`bool`, `optional`):
+                    If true, requests are served by a grpc.aio server on an event loop thread and only the
+                    nucleus calls occupy threads of the thread pool. The passed server is ignored.
+                forward_cache_bytes (:type:`int`, `optional`):
+                    Memory budget of the cache of serialized forward responses. If 0, responses are not cached.
+                tracing (:type:`bool`, `optional`):
+                    If true, the stage timings of the requests carrying a trace id are recorded in axon.tracer
+                    and returned to the caller in the trailing metadata.
+                capture_dir (:type:`str`, `optional`):
+                    If set, the incoming requests are captured to a segmented log in this directory,
+                    see :obj:`bittensor._axon.request_log.Replayer` to replay them.
         """   
 
         if config == None: 
@@ -117,6 +135,10 @@ class axon:
         config.axon.forward_timeout = forward_timeout if forward_timeout != None else config.axon.forward_timeout
         config.axon.backward_timeout = backward_timeout if backward_timeout != None else config.axon.backward_timeout
         config.axon.compression = compression if compression != None else config.axon.compression
+        config.axon.asyncio = asyncio if asyncio != None else config.axon.asyncio
+        config.axon.forward_cache_bytes = forward_cache_bytes if forward_cache_bytes != None else config.axon.forward_cache_bytes
+        config.axon.tracing = tracing if tracing != None else config.axon.tracing
+        config.axon.capture_dir = capture_dir if capture_dir != None else config.axon.capture_dir
         axon.check_config( config )
 
         # Determine the grpc compression algorithm
@@ -131,22 +153,27 @@ class axon:
             wallet = bittensor.wallet( config = config )
         if thread_pool == None:
             thread_pool = futures.ThreadPoolExecutor( max_workers = config.axon.max_workers )
+        if priority != None:
+            priority_threadpool = bittensor.prioritythreadpool(config=config)
+        else: 
+            priority_threadpool = None
+        tracer = bittensor.utils.tracing.Tracer( int(config.axon.tracing_buffer) ) if config.axon.tracing else None
+        recorder = RequestRecorder( config.axon.capture_dir, int(config.axon.capture_segment_bytes), int(config.axon.capture_max_bytes) ) if config.axon.capture_dir else None
+
+        forwards = [forward_text, forward_image, forward_tensor]
+        backwards = [backward_text, backward_image, backward_tensor]
+
+        if config.axon.asyncio:
+            return axon.asyncio_axon( config, wallet, thread_pool, forwards, backwards, blacklist, priority, priority_threadpool, tracer, recorder )
+
         if server == None:
             server = grpc.server( thread_pool,
-                                  interceptors=(AuthInterceptor(blacklist=blacklist),),
+                                  interceptors=(AuthInterceptor(blacklist=blacklist, tracer=tracer),),
                                   maximum_concurrent_rpcs = config.axon.maximum_concurrent_rpcs,
                                   options = [('grpc.keepalive_time_ms', 100000),
                                              ('grpc.keepalive_timeout_ms', 500000)]
                                 )
 
-        forwards = [forward_text, forward_image, forward_tensor]
-        backwards = [backward_text, backward_image, backward_tensor]
-
-        if priority != None:
-            priority_threadpool = bittensor.prioritythreadpool(config=config)
-        else: 
-            priority_threadpool = None
-
         axon_instance = axon_impl.Axon( 
             wallet = wallet, 
             server = server,
@@ -158,12 +185,48 @@ class axon:
             priority_threadpool = priority_threadpool,
             forward_timeout = config.axon.forward_timeout,
             backward_timeout = config.axon.backward_timeout,
+            forward_cache_bytes = int(config.axon.forward_cache_bytes),
+            tracer = tracer,
+            recorder = recorder,
         )
         bittensor.grpc.add_BittensorServicer_to_server( axon_instance, server )
         full_address = str( config.axon.ip ) + ":" + str( config.axon.port )
         server.add_insecure_port( full_address )
         return axon_instance 
 
+    @classmethod
+    def asyncio_axon( cls, config, wallet, thread_pool, forwards, backwards, blacklist, priority, priority_threadpool, tracer = None, recorder = None ) -> 'bittensor.Axon':
+        r""" Creates an axon served by a grpc.aio server running on its own event loop thread.
+        """
+        event_loop = axon_asyncio_impl.EventLoopThread()
+        server = event_loop.run_coroutine( axon_asyncio_impl.create_server(
+            interceptors = (AsyncAuthInterceptor(blacklist=blacklist, tracer=tracer),),
+            maximum_concurrent_rpcs = config.axon.maximum_concurrent_rpcs,
+            options = [('grpc.keepalive_time_ms', 100000),
+                       ('grpc.keepalive_timeout_ms', 500000)]
+        ))
+        axon_instance = axon_asyncio_impl.AsyncioAxon(
+            wallet = wallet,
+            server = server,
+            event_loop = event_loop,
+            thread_pool = thread_pool,
+            ip = config.axon.ip,
+            port = config.axon.port,
+            forwards = forwards,
+            backwards = backwards,
+            priority = priority,
+            priority_threadpool = priority_threadpool,
+            forward_timeout = config.axon.forward_timeout,
+            backward_timeout = config.axon.backward_timeout,
+            forward_cache_bytes = int(config.axon.forward_cache_bytes),
+            tracer = tracer,
+            recorder = recorder,
+        )
+        bittensor.grpc.add_BittensorServicer_to_server( axon_instance, server )
+        full_address = str( config.axon.ip ) + ":" + str( config.axon.port )
+        server.add_insecure_port( full_address )
+        return axon_instance
+
     @classmethod   
     def config(cls) -> 'bittensor.Config':
         """ Get config from the argument parser
@@ -206,6 +269,20 @@ class axon:
                 help='''maximum size of tasks in priority queue''', default = bittensor.defaults.axon.priority.maxsize)
             parser.add_argument('--axon.compression', type=str, 
                 help='''Which compression algorithm to use for compression (gzip, deflate, NoCompression) ''', default = bittensor.defaults.axon.compression)
+            parser.add_argument('--axon.asyncio', action='store_true',
+                help='''If set, requests are served by a grpc.aio server and only the nucleus calls occupy worker threads.''', default = bittensor.defaults.axon.asyncio)
+            parser.add_argument('--axon.forward_cache_bytes', type=int,
+                help='''Memory budget in bytes of the cache of serialized forward responses keyed by the request tensor and model version. If 0, responses are not cached.''', default = bittensor.defaults.axon.forward_cache_bytes)
+            parser.add_argument('--axon.tracing', action='store_true',
+                help='''If set, the stage timings of requests carrying a trace id are recorded and returned to the caller.''', default = bittensor.defaults.axon.tracing)
+            parser.add_argument('--axon.tracing_buffer', type=int,
+                help='''Number of the last traced requests kept in the span buffer.''', default = bittensor.defaults.axon.tracing_buffer)
+            parser.add_argument('--axon.capture_dir', type=str,
+                help='''If set, the incoming requests are captured to a segmented log in this directory for offline replay.''', default = bittensor.defaults.axon.capture_dir)
+            parser.add_argument('--axon.capture_segment_bytes', type=int,
+                help='''Size in bytes of the segment files of the request capture.''', default = bittensor.defaults.axon.capture_segment_bytes)
+            parser.add_argument('--axon.capture_max_bytes', type=int,
+                help='''Size cap in bytes of the request capture, the oldest segments are deleted past it.''', default = bittensor.defaults.axon.capture_max_bytes)
         except argparse.ArgumentError:
             # re-parsing arguments.
             pass
@@ -227,12 +304,23 @@ class axon:
         defaults.axon.priority.maxsize = os.getenv('BT_AXON_PRIORITY_MAXSIZE') if os.getenv('BT_AXON_PRIORITY_MAXSIZE') != None else -1
 
         defaults.axon.compression = 'NoCompression'
+        defaults.axon.asyncio = os.getenv('BT_AXON_ASYNCIO') if os.getenv('BT_AXON_ASYNCIO') != None else False
+        defaults.axon.forward_cache_bytes = os.getenv('BT_AXON_FORWARD_CACHE_BYTES') if os.getenv('BT_AXON_FORWARD_CACHE_BYTES') != None else 0
+        defaults.axon.tracing = os.getenv('BT_AXON_TRACING') if os.getenv('BT_AXON_TRACING') != None else False
+        defaults.axon.tracing_buffer = os.getenv('BT_AXON_TRACING_BUFFER') if os.getenv('BT_AXON_TRACING_BUFFER') != None else 4096
+        defaults.axon.capture_dir = os.getenv('BT_AXON_CAPTURE_DIR') if os.getenv('BT_AXON_CAPTURE_DIR') != None else ''
+        defaults.axon.capture_segment_bytes = os.getenv('BT_AXON_CAPTURE_SEGMENT_BYTES') if os.getenv('BT_AXON_CAPTURE_SEGMENT_BYTES') != None else 64 * 1024 * 1024
+        defaults.axon.capture_max_bytes = os.getenv('BT_AXON_CAPTURE_MAX_BYTES') if os.getenv('BT_AXON_CAPTURE_MAX_BYTES') != None else 1024 * 1024 * 1024
 
     @classmethod   
     def check_config(cls, config: 'bittensor.Config' ):
         """ Check config for axon port and wallet
         """
         assert config.axon.port > 1024 and config.axon.port < 65535, 'port must be in range [1024, 65535]'
+        assert int(config.axon.forward_cache_bytes) >= 0, 'forward_cache_bytes must be larger or equal to 0'
+        assert int(config.axon.tracing_buffer) > 0, 'tracing_buffer must be larger than 0'
+        assert int(config.axon.capture_segment_bytes) > 0, 'capture_segment_bytes must be larger than 0'
+        assert int(config.axon.capture_max_bytes) >= int(config.axon.capture_segment_bytes), 'capture_max_bytes must be larger or equal to capture_segment_bytes'
         bittensor.wallet.check_config( config )
 
     @staticmethod
@@ -289,19 +377,22 @@ class axon:
 class AuthInterceptor(grpc.ServerInterceptor):
     """ Creates a new server interceptor that authenticates incoming messages from passed arguments.
     """
-    def __init__(self, key:str = 'Bittensor',blacklist:List = []):
+    def __init__(self, key:str = 'Bittensor',blacklist:List = [], tracer: 'tracing.Tracer' = None):
         r""" Creates a new server interceptor that authenticates incoming messages from passed arguments.
         Args:
             key (str, `optional`):
                  key for authentication header in the metadata (default= Bittensor)
             black_list (Fucntion, `optional`): 
                 black list function that prevents certain pubkeys from sending messages
+            tracer (:obj:`bittensor.utils.tracing.Tracer`, `optional`):
+                tracer of the axon, receives the authentication time of the traced requests.
         """
         super().__init__()
         self._valid_metadata = ('rpc-auth-header', key)
         self.nounce_dic = {}
         self.message = 'Invalid key'
         self.blacklist = blacklist
+        self.tracer = tracer
         def deny(_, context):
             context.abort(grpc.StatusCode.UNAUTHENTICATED, self.message)
 
@@ -311,6 +402,7 @@ class AuthInterceptor(grpc.ServerInterceptor):
         r""" Authentication between bittensor nodes. Intercepts messages and checks them
         """
         meta = handler_call_details.invocation_metadata
+        start_time = time.time()
 
         try: 
             #version checking
@@ -322,6 +414,7 @@ class AuthInterceptor(grpc.ServerInterceptor):
             #blacklist checking
             self.black_list_checking(meta)
 
+            self.trace_checking(meta, start_time)
             return continuation(handler_call_details)
 
         except Exception as e:
@@ -366,6 +459,15 @@ class AuthInterceptor(grpc.ServerInterceptor):
         else:
             raise Exception('Incorrect Signature')
 
+    def trace_checking(self, meta, start_time: float):
+        r""" Passes the authentication time of a traced request to the tracer, the axon adds it to the request span.
+        """
+        if self.tracer == None:
+            return
+        trace_id = tracing.trace_id_from_metadata(meta)
+        if trace_id != None:
+            self.tracer.add_pending( trace_id, 'auth', start_time, time.time() - start_time )
+
     def version_checking(self,meta):
         r""" Checks the header and version in the metadata
         """
@@ -386,3 +488,31 @@ class AuthInterceptor(grpc.ServerInterceptor):
             raise Exception('Black listed')
         else:
             pass
+
+
+class AsyncAuthInterceptor(AuthInterceptor, grpc.aio.ServerInterceptor):
+    """ Authenticates incoming messages of the grpc.aio server, see :obj:`AuthInterceptor`.
+    """
+    def __init__(self, key:str = 'Bittensor',blacklist:List = [], tracer: 'tracing.Tracer' = None):
+        super().__init__( key = key, blacklist = blacklist, tracer = tracer )
+        async def deny(_, context):
+            await context.abort(grpc.StatusCode.UNAUTHENTICATED, self.message)
+
+        self._deny = grpc.unary_unary_rpc_method_handler(deny)
+
+    async def intercept_service(self, continuation, handler_call_details):
+        r""" Authentication between bittensor nodes. Intercepts messages and checks them on the event loop.
+        """
+        meta = handler_call_details.invocation_metadata
+        start_time = time.time()
+
+        try: 
+            self.version_checking(meta)
+            self.signature_checking(meta)
+            self.black_list_checking(meta)
+            self.trace_checking(meta, start_time)
+            return await continuation(handler_call_details)
+
+        except Exception as e:
+            self.message = str(e)
+            return self._deny
@@ -0,0 +1,337 @@
+""" Implementation of the asyncio Axon, services Forward and Backward requests from other neurons on a grpc.aio server.
+"""
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import asyncio
+import functools
+import sys
+import threading
+import time as clock
+from concurrent import futures
+from typing import List, Tuple, Callable
+
+import torch
+import grpc
+from loguru import logger
+
+import bittensor
+import bittensor.utils.tracing as tracing
+from . import axon_impl
+
+logger = logger.opt(colors=True)
+
+class EventLoopThread( threading.Thread ):
+    r""" Daemon thread running the asyncio event loop of an asyncio Axon.
+    """
+    def __init__( self ):
+        super().__init__( daemon = True )
+        self.loop = asyncio.new_event_loop()
+        self.start()
+
+    def run( self ):
+        asyncio.set_event_loop( self.loop )
+        self.loop.run_forever()
+
+    def run_coroutine( self, coroutine, timeout: float = None ):
+        r""" Runs the coroutine on the event loop and blocks until it returns.
+        """
+        return asyncio.run_coroutine_threadsafe( coroutine, self.loop ).result( timeout = timeout )
+
+    def stop( self ):
+        if self.loop.is_running():
+            self.loop.call_soon_threadsafe( self.loop.stop )
+
+async def create_server( interceptors: List['grpc.aio.ServerInterceptor'], maximum_concurrent_rpcs: int, options: List[Tuple] ) -> 'grpc.aio.Server':
+    r""" Creates the grpc.aio server, must run on the event loop that serves it.
+    """
+    return grpc.aio.server(
+        interceptors = interceptors,
+        maximum_concurrent_rpcs = maximum_concurrent_rpcs,
+        options = options
+    )
+
+class AsyncioAxon( axon_impl.Axon ):
+    r""" Services Forward and Backward requests from other neurons on a grpc.aio server.
+
+        Authentication, deserialization and priority submission run as coroutines on a single event loop thread.
+        Only the nucleus callbacks occupy a thread, of the priority threadpool if set or of the passed thread pool,
+        so that in flight requests waiting on the model do not hold a server thread.
+    """
+    def __init__(
+        self,
+        wallet: 'bittensor.wallet',
+        ip: str,
+        port: int,
+        server: 'grpc.aio.Server',
+        event_loop: 'EventLoopThread',
+        thread_pool: 'futures.ThreadPoolExecutor',
+        forwards: List  = [],
+        backwards: List = [],
+        priority:  'Callable' = None,
+        priority_threadpool: 'bittensor.prioritythreadpool' = None,
+        forward_timeout: int = None,
+        backward_timeout: int = None,
+        forward_cache_bytes: int = 0,
+        tracer: 'tracing.Tracer' = None,
+        recorder: 'RequestRecorder' = None,
+    ):
+        r""" Initializes a new asyncio Axon tensor processing endpoint.
+
+            Args:
+                wallet (:obj:`bittensor.wallet`, `required`):
+                    bittensor wallet with hotkey and coldkeypub.
+                server (:obj:`grpc.aio.Server`, `required`):
+                    Grpc aio server endpoint created on the event_loop.
+                event_loop (:obj:`EventLoopThread`, `required`):
+                    Thread running the event loop of the server.
+                thread_pool (:obj:`ThreadPoolExecutor`, `required`):
+                    Threadpool running the nucleus callbacks when no priority is set.
+                forward (:obj:list of `callable`, `optional`):
+                    list of functions which is called on forward requests.
+                backward (:obj:list of `callable`, `optional`):
+                    list of functions which is called on backward requests.
+                priority (:obj:`callable`, `optional`):
+                    function to assign priority on requests.
+                priority_threadpool (:obj:`bittensor.prioritythreadpool`, `optional`):
+                    bittensor priority_threadpool.
+                forward_cache_bytes (:type:`int`, `optional`):
+                    Memory budget of the serialized forward responses cache. If 0, responses are not cached.
+                tracer (:obj:`bittensor.utils.tracing.Tracer`, `optional`):
+                    Buffer of the stage timings of the traced requests. If None, requests are not traced.
+                recorder (:obj:`bittensor._axon.request_log.RequestRecorder`, `optional`):
+                    Log the incoming requests are captured to for offline replay. If None, requests are not captured.
+        """
+        self.event_loop = event_loop
+        self.thread_pool = thread_pool
+        super().__init__(
+            wallet = wallet,
+            ip = ip,
+            port = port,
+            server = server,
+            forwards = forwards,
+            backwards = backwards,
+            priority = priority,
+            priority_threadpool = priority_threadpool,
+            forward_timeout = forward_timeout,
+            backward_timeout = backward_timeout,
+            forward_cache_bytes = forward_cache_bytes,
+            tracer = tracer,
+            recorder = recorder,
+        )
+
+    def __del__(self):
+        r""" Called when this axon is deleted, stops the server and its event loop.
+        """
+        # The event loop thread is frozen at interpreter shutdown.
+        if not sys.is_finalizing():
+            self.stop()
+        self.event_loop.stop()
+
+    def __str__(self) -> str:
+        return "AsyncioAxon({}, {}, {}, {})".format( self.ip, self.port, self.wallet.hotkey.ss58_address, "started" if self.started else "stopped")
+
+    async def Forward(self, request: bittensor.proto.TensorMessage, context: grpc.aio.ServicerContext) -> bittensor.proto.TensorMessage:
+        r""" The coroutine called by remote GRPC Forward requests from other neurons.
+            See :obj:`bittensor.Axon.Forward`.
+        """
+        self._capture( request, bittensor.proto.RequestType.FORWARD )
+        span = self._start_span( request, context, 'axon.forward' )
+        tensor, code, time, message = await self._async_forward( request )
+        response = bittensor.proto.TensorMessage(
+            version = bittensor.__version_as_int__,
+            hotkey = self.wallet.hotkey.ss58_address,
+            return_code = code,
+            message = message,
+            tensors = [tensor] if tensor is not None else [],
+            requires_grad = True,
+        )
+        # ---- Update stats for this request.
+        self.update_stats_for_request( request, response, time, code)
+        self._finish_span( span, context, code )
+        return response
+
+    async def Backward(self, request: bittensor.proto.TensorMessage, context: grpc.aio.ServicerContext) -> bittensor.proto.TensorMessage:
+        r""" The coroutine called by remote GRPC Backward requests from other neurons.
+            See :obj:`bittensor.Axon.Backward`.
+        """
+        self._capture( request, bittensor.proto.RequestType.BACKWARD )
+        span = self._start_span( request, context, 'axon.backward' )
+        tensor, code, time, message = await self._async_backward( request )
+        response = bittensor.proto.TensorMessage(
+            version = bittensor.__version_as_int__,
+            hotkey = self.wallet.hotkey.ss58_address,
+            return_code = code,
+            message = message,
+            tensors = [tensor] if tensor is not None else [],
+            requires_grad = True,
+        )
+        self.update_stats_for_request( request, response, time, code , request_type = bittensor.proto.RequestType.BACKWARD )
+        self._finish_span( span, context, code )
+        return response
+
+    def _submit( self, callback: Callable, priority: float = None, **kwargs ) -> asyncio.Future:
+        r""" Submits the nucleus callback to the priority threadpool if a priority is passed or to the thread pool otherwise.
+        """
+        if priority != None:
+            return asyncio.wrap_future( self.priority_threadpool.submit( tracing.wrap( callback ), priority = priority, **kwargs ) )
+        return asyncio.get_running_loop().run_in_executor( self.thread_pool, functools.partial( tracing.wrap( callback ), **kwargs ) )
+
+    async def _async_call_forward(
+            self,
+            public_key: str,
+            inputs_x: torch.Tensor,
+            modality: bittensor.proto.Modality
+        ) -> Tuple[ torch.FloatTensor, int, str ]:
+        r""" Awaits the forward callback served by the nucleus. See :obj:`bittensor.Axon._call_forward`.
+        """
+        # Check forward has been subscribed.
+        if self.forward_callback[modality] == None:
+            message = "Forward callback is not yet subscribed on this axon."
+            return None, bittensor.proto.ReturnCode.NotImplemented, message
+
+        # Make forward call.
+        try:
+            priority = self.priority( public_key, inputs_x = inputs_x, request_type = bittensor.proto.RequestType.FORWARD ) if self.priority != None else None
+            future = self._submit( self.forward_callback[modality], priority = priority, inputs_x = inputs_x )
+            response_tensor = await asyncio.wait_for( future, timeout = self.forward_timeout )
+            message = "Success"
+            code = bittensor.proto.ReturnCode.Success
+            return response_tensor, code, message
+
+        except Exception as e:
+            response_tensor = None
+            message = "Error calling forward callback: {}".format(e)
+            if isinstance(e, ( TimeoutError, asyncio.TimeoutError )):
+                code = bittensor.proto.ReturnCode.Timeout
+            else:
+                code = bittensor.proto.ReturnCode.UnknownException
+            return response_tensor, code, message
+
+    async def _async_call_backward(
+            self,
+            public_key: str,
+            inputs_x: torch.Tensor,
+            grads_dy: torch.FloatTensor,
+            modality: bittensor.proto.Modality
+        ) -> Tuple[ torch.FloatTensor, int, str ]:
+        r""" Awaits the backward callback. See :obj:`bittensor.Axon._call_backward`.
+        """
+        # Check backward has been subscribed.
+        if self.backward_callback[modality] == None:
+            message = "Backward callback is not yet subscribed on this axon."
+            return None, bittensor.proto.ReturnCode.NotImplemented, message
+
+        if modality == bittensor.proto.Modality.TEXT:
+            if self.priority != None:
+                # Prioritized text gradients are applied in the background, the request is not held.
+                try:
+                    priority = self.priority( public_key, inputs_x = inputs_x, request_type = bittensor.proto.RequestType.BACKWARD )
+                    self.priority_threadpool.submit( tracing.wrap( self.backward_callback[modality] ), inputs_x = inputs_x, grads_dy = grads_dy, priority = priority )
+                except Exception as e:
+                    logger.error('Error found: {}, with message {}'.format(repr(e), e))
+            else:
+                await self._submit( self.backward_callback[modality], inputs_x = inputs_x, grads_dy = grads_dy )
+
+            response_tensor = torch.ones(inputs_x.size())
+            message = "Success"
+            code = bittensor.proto.ReturnCode.Success
+            return response_tensor, code, message
+
+        # Make backward call.
+        try:
+            future = self._submit( self.backward_callback[modality], inputs_x = inputs_x, grads_dy = grads_dy )
+            response_tensor = await asyncio.wait_for( future, timeout = self.backward_timeout )
+            message = "Success"
+            code = bittensor.proto.ReturnCode.Success
+            return response_tensor, code, message
+
+        except Exception as e:
+            response_tensor = None
+            message = "Error calling backward callback: {}".format(e)
+            if isinstance(e, ( TimeoutError, asyncio.TimeoutError )):
+                code = bittensor.proto.ReturnCode.Timeout
+            else:
+                code = bittensor.proto.ReturnCode.UnknownException
+            return response_tensor, code, message
+
+    async def _async_forward(self, request):
+        r""" Coroutine version of :obj:`bittensor.Axon._forward`.
+        """
+        start_time = clock.time()
+        cache_key, cached = self._forward_cache_lookup( request, start_time )
+        if cached != None:
+            tracing.lap( 'cache' )
+            return cached
+        torch_inputs, modality, failure = self._forward_preprocess( request, start_time )
+        tracing.lap( 'deserialize' )
+        if failure != None:
+            return failure
+
+        # ---- Await nucleus forward call. ----
+        try:
+            outputs, code, message = await self._async_call_forward(
+                public_key = request.hotkey,
+                inputs_x = torch_inputs,
+                modality = modality
+            )
+        except Exception as e:
+            outputs, code, message = None, bittensor.proto.ReturnCode.UnknownException, 'exception in processing forward call: {}'.format(e)
+        result = self._forward_postprocess( request, torch_inputs, outputs, code, message, start_time )
+        tracing.lap( 'serialize' )
+        return self._forward_cache_store( cache_key, result )
+
+    async def _async_backward(self, request):
+        r""" Coroutine version of :obj:`bittensor.Axon._backward`.
+        """
+        start_time = clock.time()
+        inputs_x, grads_dy, modality_x, failure = self._backward_preprocess( request, start_time )
+        tracing.lap( 'deserialize' )
+        if failure != None:
+            return failure
+
+        # ---- Await nucleus backward call. ----
+        outputs, code, message = await self._async_call_backward(
+            public_key = request.hotkey,
+            inputs_x = inputs_x,
+            grads_dy = grads_dy,
+            modality = modality_x
+        )
+        result = self._backward_postprocess( request, grads_dy, outputs, code, message, start_time )
+        tracing.lap( 'serialize' )
+        return result
+
+    def start(self) -> 'AsyncioAxon':
+        r""" Starts the grpc.aio server on the event loop thread.
+        """
+        if self.started:
+            self.stop()
+        self.event_loop.run_coroutine( self.server.start() )
+        logger.success("Axon Started:".ljust(20) + "<blue>{}</blue>", self.ip + ':' + str(self.port))
+        self.started = True
+        return self
+
+    def stop(self) -> 'AsyncioAxon':
+        r""" Stops the grpc.aio server.
+        """
+        if self.server != None and self.event_loop.loop.is_running():
+            self.event_loop.run_coroutine( self.server.stop( grace = 1 ), timeout = 5 )
+            logger.success("Axon Stopped:".ljust(20) + "<blue>{}</blue>", self.ip + ':' + str(self.port))
+        if self.recorder != None:
+            self.recorder.close()
+        self.started = False
+        return self
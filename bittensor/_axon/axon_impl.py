@@ -32,6 +32,9 @@ import concurrent
 
 import bittensor
 import bittensor.utils.stats as stat_utils
+import bittensor.utils.tracing as tracing
+from bittensor._axon.forward_cache import ForwardCache
+from bittensor._axon.request_log import RequestRecorder
 
 logger = logger.opt(colors=True)
 
@@ -50,6 +53,9 @@ class Axon( bittensor.grpc.BittensorServicer ):
         priority_threadpool: 'bittensor.prioritythreadpool' = None,
         forward_timeout: int = None,
         backward_timeout: int = None,
+        forward_cache_bytes: int = 0,
+        tracer: 'tracing.Tracer' = None,
+        recorder: 'RequestRecorder' = None,
     ):
         r""" Initializes a new Axon tensor processing endpoint.
             
@@ -68,6 +74,12 @@ class Axon( bittensor.grpc.BittensorServicer ):
                     function to assign priority on requests.
                 priority_threadpool (:obj:`bittensor.prioritythreadpool`, `optional`):
                     bittensor priority_threadpool.                
+                forward_cache_bytes (:type:`int`, `optional`):
+                    Memory budget of the serialized forward responses cache. If 0, responses are not cached.
+                tracer (:obj:`bittensor.utils.tracing.Tracer`, `optional`):
+                    Buffer of the stage timings of the traced requests. If None, requests are not traced.
+                recorder (:obj:`bittensor._axon.request_log.RequestRecorder`, `optional`):
+                    Log the incoming requests are captured to for offline replay. If None, requests are not captured.
         """
         self.ip = ip
         self.port = port
@@ -85,6 +97,16 @@ class Axon( bittensor.grpc.BittensorServicer ):
         self.priority = priority 
         self.priority_threadpool= priority_threadpool
 
+        # -- Forward responses cache, keyed with the version of the served model.
+        self.model_version = 0
+        self.forward_cache = ForwardCache( forward_cache_bytes ) if forward_cache_bytes > 0 else None
+
+        # -- Spans of the requests carrying a trace id.
+        self.tracer = tracer
+
+        # -- Capture of the incoming requests.
+        self.recorder = recorder
+
     def __str__(self) -> str:
         return "Axon({}, {}, {}, {})".format( self.ip, self.port, self.wallet.hotkey.ss58_address, "started" if self.started else "stopped")
 
@@ -107,6 +129,8 @@ class Axon( bittensor.grpc.BittensorServicer ):
                 response (bittensor.proto.TensorMessage): 
                     proto response carring the nucleus forward output or None under failure.
         """
+        self._capture( request, bittensor.proto.RequestType.FORWARD )
+        span = self._start_span( request, context, 'axon.forward' )
         tensor, code, time, message = self._forward( request )
         response = bittensor.proto.TensorMessage(
             version = bittensor.__version_as_int__, 
@@ -118,6 +142,7 @@ class Axon( bittensor.grpc.BittensorServicer ):
         )
         # ---- Update stats for this request.
         self.update_stats_for_request( request, response, time, code)
+        self._finish_span( span, context, code )
         return response
 
     def Backward(self, request: bittensor.proto.TensorMessage, context: grpc.ServicerContext) -> bittensor.proto.TensorMessage:
@@ -136,6 +161,8 @@ class Axon( bittensor.grpc.BittensorServicer ):
                 response (:obj:`bittensor.proto.TensorMessage`): 
                     proto response carring the nucleus backward output or None under failure.
         """
+        self._capture( request, bittensor.proto.RequestType.BACKWARD )
+        span = self._start_span( request, context, 'axon.backward' )
         tensor, code, time, message = self._backward( request )
         response = bittensor.proto.TensorMessage(
             version = bittensor.__version_as_int__, 
@@ -145,7 +172,8 @@ class Axon( bittensor.grpc.BittensorServicer ):
             tensors = [tensor] if tensor is not None else [],
             requires_grad = True,
         )
-        self.update_stats_for_request( request, response, time, code )
+        self.update_stats_for_request( request, response, time, code , request_type = bittensor.proto.RequestType.BACKWARD )
+        self._finish_span( span, context, code )
         return response
 
     def _call_forward(
@@ -183,7 +211,7 @@ class Axon( bittensor.grpc.BittensorServicer ):
         try:
             if self.priority != None:
                 priority = self.priority(public_key,inputs_x=inputs_x, request_type = bittensor.proto.RequestType.FORWARD)
-                future = self.priority_threadpool.submit(self.forward_callback[modality],inputs_x=inputs_x,priority=priority)
+                future = self.priority_threadpool.submit(tracing.wrap(self.forward_callback[modality]),inputs_x=inputs_x,priority=priority)
                 
                 try:
                     response_tensor = future.result(timeout= self.forward_timeout)
@@ -193,7 +221,7 @@ class Axon( bittensor.grpc.BittensorServicer ):
                     logger.error('Error found: {}, with message {}'.format(repr(e), e))
 
             else:
-                response_tensor = self.forward_callback[modality]( inputs_x= inputs_x)
+                response_tensor = tracing.wrap(self.forward_callback[modality])( inputs_x= inputs_x)
 
             message = "Success"
             code = bittensor.proto.ReturnCode.Success
@@ -244,13 +272,13 @@ class Axon( bittensor.grpc.BittensorServicer ):
             if self.priority != None:
                 try:
                     priority = self.priority(public_key,inputs_x=inputs_x, request_type = bittensor.proto.RequestType.BACKWARD)
-                    future = self.priority_threadpool.submit(self.backward_callback[modality],inputs_x=inputs_x,grads_dy=grads_dy,priority=priority)
+                    future = self.priority_threadpool.submit(tracing.wrap(self.backward_callback[modality]),inputs_x=inputs_x,grads_dy=grads_dy,priority=priority)
                 except concurrent.futures.TimeoutError :
                     raise TimeoutError('TimeOutError')
                 except Exception as e:
                     logger.error('Error found: {}, with message {}'.format(repr(e), e))
             else:
-                self.backward_callback[modality](inputs_x, grads_dy)
+                tracing.wrap(self.backward_callback[modality])(inputs_x, grads_dy)
 
             response_tensor = torch.ones(inputs_x.size())
             message = "Success"
@@ -259,7 +287,7 @@ class Axon( bittensor.grpc.BittensorServicer ):
             
         # Make backward call.
         try:
-            response_tensor = self.backward_callback[modality]( inputs_x, grads_dy)
+            response_tensor = tracing.wrap(self.backward_callback[modality])( inputs_x, grads_dy)
             message = "Success"
             code = bittensor.proto.ReturnCode.Success
             return response_tensor, code, message
@@ -292,6 +320,106 @@ class Axon( bittensor.grpc.BittensorServicer ):
                     message associated with forward call, potentially error, or 'success'.
         """
         start_time = clock.time()
+        cache_key, cached = self._forward_cache_lookup( request, start_time )
+        if cached != None:
+            tracing.lap( 'cache' )
+            return cached
+        torch_inputs, modality, failure = self._forward_preprocess( request, start_time )
+        tracing.lap( 'deserialize' )
+        if failure != None:
+            return failure
+
+        # ---- Make nucleus forward call. ----
+        try:
+            outputs, code, message = self._call_forward( 
+                public_key = request.hotkey, 
+                inputs_x = torch_inputs, 
+                modality = modality
+            )
+        except Exception as e:
+            outputs, code, message = None, bittensor.proto.ReturnCode.UnknownException, 'exception in processing forward call: {}'.format(e)
+        result = self._forward_postprocess( request, torch_inputs, outputs, code, message, start_time )
+        tracing.lap( 'serialize' )
+        return self._forward_cache_store( cache_key, result )
+
+    def _forward_cache_lookup(self, request, start_time: float):
+        r""" Looks up the forward cache for the serialized request tensor.
+            Returns the cache key, or None if the cache is disabled, and the (response, code, time, message) tuple on a hit.
+        """
+        if self.forward_cache == None or len(request.tensors) == 0:
+            return None, None
+        cache_key = ForwardCache.key( request.tensors[0], self.model_version )
+        response = self.forward_cache.get( cache_key )
+        if response == None:
+            self.stats.forward_cache_misses.inc()
+            return cache_key, None
+        self.stats.forward_cache_hits.inc()
+        code = bittensor.proto.ReturnCode.Success
+        call_time = clock.time() - start_time
+        bittensor.logging.rpc_log( axon=True, forward=True, is_response=True, code=code, call_time = call_time, pubkey=request.hotkey, inputs=list(request.tensors[0].shape), outputs=list(response.shape), message='cached' )
+        return cache_key, (response, code, call_time, None)
+
+    def _forward_cache_store(self, cache_key, result):
+        r""" Caches the serialized response of a successful forward call and returns the call result.
+        """
+        response, code, _, _ = result
+        if cache_key != None and code == bittensor.proto.ReturnCode.Success:
+            self.forward_cache.put( cache_key, response )
+        return result
+
+    def _capture(self, request, request_type: int):
+        r""" Appends the request to the capture log, if any. Capture failures never fail the request.
+        """
+        if self.recorder == None:
+            return
+        try:
+            self.recorder.record( request, request_type )
+        except Exception as e:
+            logger.warning('Failed to capture request with error: {}', e)
+
+    def _start_span(self, request, context, name: str) -> 'tracing.Span':
+        r""" Starts the span of a request carrying a trace id, with the auth stage timed by the interceptor.
+            Returns None if the axon is not tracing or the request is not traced.
+        """
+        if self.tracer == None:
+            return None
+        trace_id = tracing.trace_id_from_metadata( context.invocation_metadata() )
+        if trace_id == None:
+            return None
+        span = self.tracer.start( name, trace_id = trace_id, pubkey = request.hotkey )
+        handler_start = span.start_time
+        for stage_name, start, duration in self.tracer.pop_pending( trace_id ):
+            span.add( stage_name, start, duration )
+            # Time between the authentication and the handler, waiting on a server thread.
+            span.add( 'dispatch', start + duration, max( handler_start - start - duration, 0 ) )
+        tracing.current_span.set( span )
+        return span
+
+    def _finish_span(self, span: 'tracing.Span', context, code: int):
+        r""" Records the span of a traced request and returns its stage timings in the trailing metadata.
+        """
+        if span == None:
+            return
+        tracing.current_span.set( None )
+        span.finish( code )
+        self.tracer.record( span )
+        try:
+            context.set_trailing_metadata( ( ( tracing.SERVER_TIMING_KEY, span.server_timing() ), ) )
+        except Exception as e:
+            logger.debug('Failed to set the server timing metadata: {}', e)
+
+    def update_model_version(self):
+        r""" Marks the served model as updated, cached forward responses of the previous weights are dropped.
+            Called after each optimizer step of the nucleus.
+        """
+        self.model_version += 1
+        if self.forward_cache != None:
+            self.forward_cache.clear()
+
+    def _forward_preprocess(self, request, start_time: float):
+        r""" Deserializes and checks the forward request.
+            Returns the torch inputs and modality, or the (response, code, time, message) failure tuple.
+        """
         try:
             # ---- Check Empty request ----
             if len(request.tensors) == 0:
@@ -299,7 +427,7 @@ class Axon( bittensor.grpc.BittensorServicer ):
                 message = "Forward request contains {} tensors, expected 1 tensor in the forward call".format(len(request.tensors))
                 call_time = clock.time() - start_time
                 bittensor.logging.rpc_log( axon=True, forward=True, is_response=False, code=code, call_time = call_time, pubkey=request.hotkey, inputs=None, outputs=None, message=message  )
-                return None, code, call_time, message
+                return None, None, (None, code, call_time, message)
 
             # ---- Check deserialization ----
             tensor_inputs = request.tensors[0]
@@ -312,7 +440,7 @@ class Axon( bittensor.grpc.BittensorServicer ):
                 message = "Request deserialization exception: {}".format(str(e))
                 call_time = clock.time() - start_time
                 bittensor.logging.rpc_log( axon=True, forward=True, is_response=False, code=code, call_time = call_time, pubkey=request.hotkey, inputs=None, outputs=None, message=message  )
-                return None, code, call_time, message
+                return None, None, (None, code, call_time, message)
 
             # ---- Check shape and modality ----
             if list(torch_inputs.shape)[0] < 1:
@@ -320,14 +448,14 @@ class Axon( bittensor.grpc.BittensorServicer ):
                 message = "Forward request batch dim exception with batch_size = {} ".format(list(torch_inputs.shape)[0])
                 call_time = clock.time() - start_time
                 bittensor.logging.rpc_log( axon=True, forward=True, is_response=False, code=code, call_time = call_time, pubkey=request.hotkey, inputs=list(torch_inputs.shape), outputs=None, message=message  )
-                return None, code, call_time, message
+                return None, None, (None, code, call_time, message)
 
             if list(torch_inputs.shape)[1] < 1:
                 code = bittensor.proto.ReturnCode.RequestShapeException
                 message = "Forward request sequence dim exception with sequence_dim = {} ".format(list(torch_inputs.shape)[1])
                 call_time = clock.time() - start_time
                 bittensor.logging.rpc_log( axon=True, forward=True, is_response=False, code=code, call_time = call_time, pubkey=request.hotkey, inputs=list(torch_inputs.shape), outputs=None, message=message  )
-                return None, code, call_time, message
+                return None, None, (None, code, call_time, message)
 
             if modality == bittensor.proto.Modality.TEXT:
                 if len(list(torch_inputs.shape)) != 2:
@@ -335,7 +463,7 @@ class Axon( bittensor.grpc.BittensorServicer ):
                     message = "Forward text input shape exception with len(request.shape) = {} must have rank 2.".format(len(list(torch_inputs.shape)))
                     call_time = clock.time() - start_time
                     bittensor.logging.rpc_log( axon=True, forward=True, is_response=False, code=code, call_time = call_time, pubkey=request.hotkey, inputs=list(torch_inputs.shape), outputs=None, message=message  )
-                    return None, code, call_time, message
+                    return None, None, (None, code, call_time, message)
           
             if modality == bittensor.proto.Modality.IMAGE:
                 if len(list(torch_inputs.shape)) != 5:
@@ -343,7 +471,7 @@ class Axon( bittensor.grpc.BittensorServicer ):
                     message =  "Forward image input shape exception for len(shape) = {}  must have rank 5".format(len(list(torch_inputs.shape)))
                     call_time = clock.time() - start_time
                     bittensor.logging.rpc_log( axon=True, forward=True, is_response=False, code=code, call_time = call_time, pubkey=request.hotkey, inputs=list(torch_inputs.shape), outputs=None, message=message  )
-                    return None, code, call_time, message
+                    return None, None, (None, code, call_time, message)
 
             if modality == bittensor.proto.Modality.TENSOR:
                 if len(list(torch_inputs.shape)) != 3:
@@ -351,28 +479,24 @@ class Axon( bittensor.grpc.BittensorServicer ):
                     message = "Forward message tensor input shape exception len(shape) = {} must have rank 3".format(len(list(torch_inputs.shape)))
                     call_time = clock.time() - start_time
                     bittensor.logging.rpc_log( axon=True, forward=True, is_response=False, code=code, call_time = call_time, pubkey=request.hotkey, inputs=list(torch_inputs.shape), outputs=None, message=message  )
-                    return None, code, call_time, message
+                    return None, None, (None, code, call_time, message)
 
         except Exception as e:
             code = bittensor.proto.ReturnCode.UnknownException
             message = 'exception in preprocessing forward call with error: {}'.format(e)
             call_time = clock.time() - start_time
             bittensor.logging.rpc_log( axon=True, forward=True, is_response=False, code=code, call_time = call_time, pubkey=request.hotkey, inputs=list(torch_inputs.shape), outputs=None, message=message  )
-            return None, code, call_time, message
+            return None, None, (None, code, call_time, message)
 
-        # Post process.
-        try:
+        call_time = clock.time() - start_time
+        bittensor.logging.rpc_log( axon=True, forward=True, is_response=False, code=bittensor.proto.ReturnCode.Success, call_time = call_time, pubkey=request.hotkey, inputs=list(torch_inputs.shape), outputs=None, message=None  )
+        return torch_inputs, modality, None
 
-            # ---- Make nucleus forward call. ----
-            code = bittensor.proto.ReturnCode.Success
-            message = None
-            call_time = clock.time() - start_time
-            bittensor.logging.rpc_log( axon=True, forward=True, is_response=False, code=code, call_time = call_time, pubkey=request.hotkey, inputs=list(torch_inputs.shape), outputs=None, message=message  )
-            outputs, code, message = self._call_forward( 
-                public_key = request.hotkey, 
-                inputs_x = torch_inputs, 
-                modality = modality
-            )
+    def _forward_postprocess(self, request, torch_inputs: torch.Tensor, outputs: torch.Tensor, code: int, message: str, start_time: float):
+        r""" Checks and serializes the nucleus forward outputs.
+            Returns the (response, code, time, message) tuple of the forward call.
+        """
+        try:
             if code != bittensor.proto.ReturnCode.Success:
                 call_time = clock.time() - start_time
                 bittensor.logging.rpc_log( axon=True, forward=True, is_response=True, code=code, call_time = call_time, pubkey=request.hotkey, inputs=list(torch_inputs.shape), outputs=None, message=message  )
@@ -426,6 +550,26 @@ class Axon( bittensor.grpc.BittensorServicer ):
                     message associated with backward call, potentially error, or 'success'.
         """
         start_time = clock.time()
+        inputs_x, grads_dy, modality_x, failure = self._backward_preprocess( request, start_time )
+        tracing.lap( 'deserialize' )
+        if failure != None:
+            return failure
+
+        # ---- Make nucleus backward call. ----
+        outputs, code, message = self._call_backward( 
+            public_key = request.hotkey, 
+            inputs_x = inputs_x, 
+            grads_dy = grads_dy, 
+            modality = modality_x
+        )
+        result = self._backward_postprocess( request, grads_dy, outputs, code, message, start_time )
+        tracing.lap( 'serialize' )
+        return result
+
+    def _backward_preprocess(self, request, start_time: float):
+        r""" Deserializes and checks the backward request.
+            Returns the torch inputs, gradients and modality, or the (response, code, time, message) failure tuple.
+        """
         # ---- Check request inputs ----.
         if len(request.tensors) == 2:
             inputs_x = request.tensors[0]
@@ -436,7 +580,7 @@ class Axon( bittensor.grpc.BittensorServicer ):
             message = "During backward: There are {} tensors in the request, expected 2.".format(len(request.tensors))
             call_time = clock.time() - start_time
             bittensor.logging.rpc_log( axon=True, forward=False, is_response=False, code=code, call_time = call_time, pubkey = request.hotkey, inputs=None, outputs=None, message = message  )
-            return None, code, call_time, message
+            return None, None, None, (None, code, call_time, message)
 
         # ---- Deserialize request ---
         try:
@@ -448,7 +592,7 @@ class Axon( bittensor.grpc.BittensorServicer ):
             message = "Request serialization exception with error: {}".format(str(e))
             call_time = clock.time() - start_time
             bittensor.logging.rpc_log( axon=True, forward=False, is_response=False, code=code, call_time = call_time, pubkey=request.hotkey, inputs=None, outputs=None, message=message  )
-            return None, code, call_time, message
+            return None, None, None, (None, code, call_time, message)
         
         # ---- Check shapes ----
         if modality_x == bittensor.proto.Modality.TEXT:
@@ -457,7 +601,7 @@ class Axon( bittensor.grpc.BittensorServicer ):
                 message = "Forward text input shape exception with len(request.shape) = {} must have rank 2.".format(len(inputs_x.shape))
                 call_time = clock.time() - start_time
                 bittensor.logging.rpc_log( axon=True, forward=False, is_response=False, code=code, call_time = call_time, pubkey=request.hotkey, inputs=list(grads_dy.shape), outputs=None, message=message  )
-                return None, code, call_time, message
+                return None, None, None, (None, code, call_time, message)
 
         if modality_x == bittensor.proto.Modality.IMAGE:
             if len(inputs_x.shape) != 5:
@@ -465,7 +609,7 @@ class Axon( bittensor.grpc.BittensorServicer ):
                 message =  "Forward image input shape exception for len(shape) = {}  must have rank 5".format(len(inputs_x.shape))
                 call_time = clock.time() - start_time
                 bittensor.logging.rpc_log( axon=True, forward=False, is_response=False, code=code, call_time = call_time, pubkey=request.hotkey, inputs=list(grads_dy.shape), outputs=None, message=message  )
-                return None, code, call_time, message
+                return None, None, None, (None, code, call_time, message)
 
         if modality_x == bittensor.proto.Modality.TENSOR:
             if len(inputs_x.shape) != 3:
@@ -473,31 +617,30 @@ class Axon( bittensor.grpc.BittensorServicer ):
                 message = "Forward message tensor input shape exception len(shape) = {} must have rank 3".format(len(inputs_x.shape))
                 call_time = clock.time() - start_time
                 bittensor.logging.rpc_log( axon=True, forward=False, is_response=False, code=code, call_time = call_time, pubkey=request.hotkey, inputs=list(grads_dy.shape), outputs=None, message=message  )
-                return None, code, call_time, message
+                return None, None, None, (None, code, call_time, message)
 
         if len(grads_dy.shape) != 3:
             code = bittensor.proto.ReturnCode.RequestShapeException
             message = "Passed gradients must have rank 3 but got {}".format(len(grads_dy.shape))
             call_time = clock.time() - start_time
             bittensor.logging.rpc_log( axon=True, forward=False, is_response=False, code=code, call_time = call_time, pubkey=request.hotkey, inputs=list(grads_dy.shape), outputs=None, message=message  )
-            return None, code, call_time, message
+            return None, None, None, (None, code, call_time, message)
 
         if grads_dy.shape[0] != inputs_x.shape[0] or grads_dy.shape[1] != inputs_x.shape[1]:
             code = bittensor.proto.ReturnCode.RequestShapeException
             message = "Passed gradients must same first and second dimension as passed inputs got shapes {} and {}".format(grads_dy.shape, inputs_x.shape)
             call_time = clock.time() - start_time
             bittensor.logging.rpc_log( axon=True, forward=False, is_response=False, code=code, call_time = call_time, pubkey=request.hotkey, inputs=list(grads_dy.shape), outputs=None, message=message  )
-            return None, code, call_time, message
+            return None, None, None, (None, code, call_time, message)
  
-        # ---- Make nucleus backward call. ----
         call_time = clock.time() - start_time
         bittensor.logging.rpc_log( axon=True, forward=False, is_response=False, code=bittensor.proto.ReturnCode.Success, call_time = call_time, pubkey=request.hotkey, inputs=list(grads_dy.shape), outputs=None, message=None  )
-        outputs, code, message = self._call_backward( 
-            public_key = request.hotkey, 
-            inputs_x = inputs_x, 
-            grads_dy = grads_dy, 
-            modality = modality_x
-        )
+        return inputs_x, grads_dy, modality_x, None
+
+    def _backward_postprocess(self, request, grads_dy: torch.Tensor, outputs: torch.Tensor, code: int, message: str, start_time: float):
+        r""" Checks and serializes the nucleus backward outputs.
+            Returns the (response, code, time, message) tuple of the backward call.
+        """
         if code != bittensor.proto.ReturnCode.Success:
             call_time = clock.time() - start_time
             bittensor.logging.rpc_log( axon=True, forward=False, is_response=True, code=code, call_time = call_time, pubkey=request.hotkey, inputs=list(grads_dy.shape), outputs=None, message=message  )
@@ -611,6 +754,8 @@ class Axon( bittensor.grpc.BittensorServicer ):
         if self.server != None:
             self.server.stop( grace = 1 )
             logger.success("Axon Stopped:".ljust(20) + "<blue>{}</blue>", self.ip + ':' + str(self.port))
+        if self.recorder != None:
+            self.recorder.close()
         self.started = False
         return self
 
@@ -646,35 +791,31 @@ class Axon( bittensor.grpc.BittensorServicer ):
 
     def _init_stats(self):
         return SimpleNamespace(
-            # Queries per second.
-            qps = stat_utils.EventsPerSecondRollingAverage( 0, 0.01 ),
-            # Total requests.
-            total_requests = 0,
-            # Total bytes recieved per second.
-            total_in_bytes = 0,
-            # Total bytes responded per second.
-            total_out_bytes = 0,
-            # Bytes recieved per second.
-            avg_in_bytes_per_second = stat_utils.AmountPerSecondRollingAverage( 0, 0.01 ),
-            # Bytes responded per second.
-            avg_out_bytes_per_second = stat_utils.AmountPerSecondRollingAverage( 0, 0.01 ),
-            # Requests per pubkey.
-            requests_per_pubkey = {},
-            # Success per pubkey.
-            successes_per_pubkey = {},
-            # Query time per pubkey.
-            query_times_per_pubkey = {},
-            # Queries per second per pubkey.
-            qps_per_pubkey = {},
-            # Codes recieved per pubkey.
-            codes_per_pubkey = {},
-            # Bytes recieved per pubkey.
-            avg_in_bytes_per_pubkey = {},
-            # Bytes sent per pubkey.
-            avg_out_bytes_per_pubkey = {}
+            # Queries per second, over the last minute.
+            qps = stat_utils.WindowedRate(),
+            # Total requests, counted per grpc thread.
+            total_requests = stat_utils.ShardedCounter(),
+            # Total bytes recieved.
+            total_in_bytes = stat_utils.ShardedCounter(),
+            # Total bytes responded.
+            total_out_bytes = stat_utils.ShardedCounter(),
+            # Bytes recieved per second, over the last minute.
+            avg_in_bytes_per_second = stat_utils.WindowedRate(),
+            # Bytes responded per second, over the last minute.
+            avg_out_bytes_per_second = stat_utils.WindowedRate(),
+            # Requests, successes, bytes, query time and return codes per pubkey.
+            peers = stat_utils.PeerStats( n_codes = len( bittensor.proto.ReturnCode.keys() ) ),
+            # Durations of the forward requests.
+            forward_latency = stat_utils.LatencyHistogram(),
+            # Durations of the backward requests.
+            backward_latency = stat_utils.LatencyHistogram(),
+            # Forward responses served from the forward cache.
+            forward_cache_hits = stat_utils.ShardedCounter(),
+            # Forward requests not found in the forward cache.
+            forward_cache_misses = stat_utils.ShardedCounter(),
         )
 
-    def update_stats_for_request(self, request, response, time, code):
+    def update_stats_for_request(self, request, response, time, code, request_type = bittensor.proto.RequestType.FORWARD):
         r""" Updates statistics for this request and response.
             Args:
                 requests ( bittensor.proto.TensorMessage, `required`):
@@ -685,35 +826,22 @@ class Axon( bittensor.grpc.BittensorServicer ):
                     Length of call in seconds.
                 code (:obj:`bittensor.proto.ReturnCode, `required`)
                     Return code associated with the call i.e. Success of Timeout.
+                request_type (:obj:`bittensor.proto.RequestType, `optional`)
+                    FORWARD or BACKWARD, selects the latency histogram the call time is recorded in.
         """
+        in_bytes = request.ByteSize()
+        out_bytes = response.ByteSize() if response != None else 0
         self.stats.qps.event()
-        self.stats.total_requests += 1
-        self.stats.total_in_bytes += sys.getsizeof(request) 
-        self.stats.total_out_bytes += sys.getsizeof(response) 
-        self.stats.avg_in_bytes_per_second.event( float(sys.getsizeof(request)) )
-        self.stats.avg_out_bytes_per_second.event( float(sys.getsizeof(response)) )
-        pubkey = request.hotkey
-        if pubkey not in self.stats.requests_per_pubkey:
-            self.stats.requests_per_pubkey[ pubkey ] = 0
-            self.stats.successes_per_pubkey[ pubkey ] = 0
-            self.stats.query_times_per_pubkey[ pubkey ] = stat_utils.AmountPerSecondRollingAverage(0, 0.05)
-            self.stats.qps_per_pubkey[ pubkey ] = stat_utils.EventsPerSecondRollingAverage(0, 0.05)
-            self.stats.codes_per_pubkey[ pubkey ] = dict([(k,0) for k in bittensor.proto.ReturnCode.keys()])
-            self.stats.avg_in_bytes_per_pubkey[ pubkey ] = stat_utils.AmountPerSecondRollingAverage(0, 0.01)
-            self.stats.avg_out_bytes_per_pubkey[ pubkey ] = stat_utils.AmountPerSecondRollingAverage(0, 0.01)
-
-        # Add values.
-        self.stats.requests_per_pubkey[ pubkey ] += 1
-        self.stats.successes_per_pubkey[ pubkey ] += 1 if code == 1 else 0
-        self.stats.query_times_per_pubkey[ pubkey ].event( float(time) )
-        self.stats.avg_in_bytes_per_pubkey[ pubkey ].event( float(sys.getsizeof(request)) )
-        self.stats.avg_out_bytes_per_pubkey[ pubkey ].event( float(sys.getsizeof(response)) )
-        self.stats.qps_per_pubkey[ pubkey ].event()    
-        try:
-            if bittensor.proto.ReturnCode.Name( code ) in self.stats.codes_per_pubkey[ pubkey ].keys():
-                self.stats.codes_per_pubkey[ pubkey ][bittensor.proto.ReturnCode.Name( code )] += 1
-        except:
-            pass  
+        self.stats.total_requests.inc()
+        self.stats.total_in_bytes.inc( in_bytes )
+        self.stats.total_out_bytes.inc( out_bytes )
+        self.stats.avg_in_bytes_per_second.event( float(in_bytes) )
+        self.stats.avg_out_bytes_per_second.event( float(out_bytes) )
+        self.stats.peers.update( [ request.hotkey ], [ code ], [ time ], [ in_bytes ], [ out_bytes ] )
+        if request_type == bittensor.proto.RequestType.BACKWARD:
+            self.stats.backward_latency.record( time )
+        else:
+            self.stats.forward_latency.record( time )
 
     def to_dataframe ( self, metagraph ):
         r""" Return a stats info as a pandas dataframe indexed by the metagraph or pubkey if not existend.
@@ -725,20 +853,7 @@ class Axon( bittensor.grpc.BittensorServicer ):
         """
         # Reindex the pubkey to uid if metagraph is present.
         try:
-            index = [ metagraph.hotkeys.index(pubkey) for pubkey in self.stats.requests_per_pubkey.keys() if pubkey in metagraph.hotkeys ]
-            columns = [ 'axon_n_requested', 'axon_n_success', 'axon_query_time','axon_avg_inbytes','axon_avg_outbytes', 'axon_qps' ]
-            dataframe = pandas.DataFrame(columns = columns, index = index)
-            for pubkey in self.stats.requests_per_pubkey.keys():
-                if pubkey in metagraph.hotkeys:
-                    uid = metagraph.hotkeys.index(pubkey)
-                    dataframe.loc[ uid ] = pandas.Series( {
-                        'axon_n_requested': int(self.stats.requests_per_pubkey[pubkey]),
-                        'axon_n_success': int(self.stats.requests_per_pubkey[pubkey]),
-                        'axon_query_time': float(self.stats.query_times_per_pubkey[pubkey].get()),             
-                        'axon_avg_inbytes': float(self.stats.avg_in_bytes_per_pubkey[pubkey].get()),
-                        'axon_avg_outbytes': float(self.stats.avg_out_bytes_per_pubkey[pubkey].get()),
-                        'axon_qps': float(self.stats.qps_per_pubkey[pubkey].get())
-                    } )
+            dataframe = self.stats.peers.to_dataframe( metagraph, prefix = 'axon' )
             dataframe['uid'] = dataframe.index
             return dataframe
 
@@ -755,19 +870,25 @@ class Axon( bittensor.grpc.BittensorServicer ):
                 wandb_info (:obj:`Dict`)
         """
         try:
-            avg_query_time = 0.0
-            for pubkey in self.stats.query_times_per_pubkey:
-                avg_query_time += self.stats.query_times_per_pubkey[pubkey].get() / len( self.stats.query_times_per_pubkey )
+            peers = self.stats.peers
+            avg_query_time = float( peers.query_time[ :len(peers) ].mean() ) if len(peers) > 0 else 0.0
             # ---- Axon summary for wandb
             wandb_data = {
-                'axon/qps': self.stats.qps.get(),
+                'axon/qps': self.stats.qps.rate(),
                 'axon/avg_query_time': avg_query_time,
-                'axon/total_requests': self.stats.total_requests,
-                'axon/total_in_bytes' : self.stats.total_in_bytes,
-                'axon/total_out_bytes' : self.stats.total_out_bytes,
-                'axon/avg_in_bytes_per_second' : self.stats.avg_in_bytes_per_second.get(),
-                'axon/avg_out_bytes_per_second' : self.stats.avg_out_bytes_per_second.get(),
+                'axon/total_requests': self.stats.total_requests.value(),
+                'axon/total_in_bytes' : self.stats.total_in_bytes.value(),
+                'axon/total_out_bytes' : self.stats.total_out_bytes.value(),
+                'axon/avg_in_bytes_per_second' : self.stats.avg_in_bytes_per_second.rate(),
+                'axon/avg_out_bytes_per_second' : self.stats.avg_out_bytes_per_second.rate(),
+                'axon/forward_cache_hits' : self.stats.forward_cache_hits.value(),
+                'axon/forward_cache_misses' : self.stats.forward_cache_misses.value(),
+                **self.stats.forward_latency.summary( 'axon/forward_latency' ),
+                **self.stats.backward_latency.summary( 'axon/backward_latency' ),
             }
+            if self.priority_threadpool != None:
+                wandb_data.update( self.priority_threadpool.stats.queue_latency.summary( 'axon/priority_queue_latency' ) )
+                wandb_data.update( self.priority_threadpool.stats.run_latency.summary( 'axon/priority_run_latency' ) )
             return wandb_data
         except Exception as e:
             bittensor.logging.error(prefix='failed during axon.to_wandb()', sufix=str(e))
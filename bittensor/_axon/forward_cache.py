@@ -0,0 +1,82 @@
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import hashlib
+from collections import OrderedDict
+from threading import Lock
+from typing import Tuple, Union
+
+import bittensor
+
+class ForwardCache:
+    r""" LRU cache of serialized forward responses keyed by the serialized request tensor and the model version.
+
+        Args:
+            max_bytes (:type:`int`, `required`):
+                Memory budget of the cached response protos in bytes.
+    """
+    def __init__( self, max_bytes: int ):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.entries = OrderedDict()
+        self.lock = Lock()
+
+    def __str__(self):
+        return "ForwardCache({}, {}/{} bytes)".format( len(self.entries), self.total_bytes, self.max_bytes )
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def key( tensor_inputs: bittensor.proto.Tensor, model_version: int ) -> Tuple[bytes, int]:
+        r""" Hash of the serialized request tensor, its encoding and shape, paired with the model version.
+        """
+        hasher = hashlib.blake2b( digest_size = 16 )
+        hasher.update( str( ( tensor_inputs.serializer, tensor_inputs.modality, tensor_inputs.dtype, tuple( tensor_inputs.shape ) ) ).encode() )
+        hasher.update( tensor_inputs.buffer )
+        return hasher.digest(), model_version
+
+    def get( self, key: Tuple[bytes, int] ) -> Union[ bittensor.proto.Tensor, None ]:
+        r""" Returns the cached response proto or None on a miss.
+        """
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end( key )
+            return self.entries[ key ][0]
+
+    def put( self, key: Tuple[bytes, int], response: bittensor.proto.Tensor ):
+        r""" Caches the response proto, evicting the least recently used entries over the memory budget.
+        """
+        nbytes = response.ByteSize()
+        if nbytes > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self.total_bytes -= self.entries.pop( key )[1]
+            while self.entries and self.total_bytes + nbytes > self.max_bytes:
+                self.total_bytes -= self.entries.popitem( last = False )[1][1]
+            self.entries[ key ] = ( response, nbytes )
+            self.total_bytes += nbytes
+
+    def clear( self ):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
@@ -0,0 +1,345 @@
+""" Capture of the requests served by an axon into a segmented binary log, and their offline replay.
+"""
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import asyncio
+import glob
+import inspect
+import mmap
+import os
+import struct
+import time
+from collections import OrderedDict
+from concurrent import futures
+from threading import Lock, Semaphore
+from types import SimpleNamespace
+from typing import Callable, Iterable, Iterator, List
+
+import bittensor
+import bittensor.utils.stats as stat_utils
+
+# Segment header: magic and format version.
+MAGIC = b'BTREQLOG'
+VERSION = 1
+SEGMENT_HEADER = struct.Struct( '<8sI' )
+# Record header: arrival time, request type, hotkey length and message length, followed by the
+# utf8 hotkey and the serialized TensorMessage.
+RECORD_HEADER = struct.Struct( '<dBHI' )
+SEGMENT_PATTERN = 'requests-{:08d}.log'
+
+def segment_paths( directory: str ) -> List[str]:
+    r""" Returns the segment files of the log directory, oldest first.
+    """
+    return sorted( glob.glob( os.path.join( os.path.expanduser( directory ), 'requests-*.log' ) ) )
+
+class RequestRecord():
+    r""" A captured request: arrival time in seconds since the epoch, request type, caller hotkey and the serialized TensorMessage.
+    """
+    __slots__ = [ 'timestamp', 'request_type', 'hotkey', 'message' ]
+
+    def __init__( self, timestamp: float, request_type: int, hotkey: str, message: bytes ):
+        self.timestamp = timestamp
+        self.request_type = request_type
+        self.hotkey = hotkey
+        self.message = message
+
+    def __str__(self):
+        return "RequestRecord({}, {}, {}, {} bytes)".format( self.timestamp, bittensor.proto.RequestType.Name( self.request_type ), self.hotkey, len( self.message ) )
+
+    def __repr__(self):
+        return self.__str__()
+
+    def request( self ) -> bittensor.proto.TensorMessage:
+        r""" Parses the captured TensorMessage.
+        """
+        return bittensor.proto.TensorMessage.FromString( self.message )
+
+class RequestRecorder():
+    r""" Appends the requests served by an axon to size capped segment files, one record per request.
+        Segments are rotated once they reach segment_bytes and the oldest segments are deleted
+        when the log grows over max_bytes. Safe to call from the axon worker threads.
+
+        Args:
+            directory (:type:`str`, `required`):
+                Directory of the segment files, created if needed. Capture resumes after the existing segments.
+            segment_bytes (:type:`int`, `optional`):
+                Size in bytes after which a new segment is started.
+            max_bytes (:type:`int`, `optional`):
+                Size cap of the log in bytes, the segment being written is never deleted.
+    """
+    def __init__( self, directory: str, segment_bytes: int = 64 * 1024 * 1024, max_bytes: int = 1024 * 1024 * 1024 ):
+        self.file = None
+        self.path = None
+        self.records = 0
+        self.lock = Lock()
+        self.directory = os.path.expanduser( directory )
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        os.makedirs( self.directory, exist_ok = True )
+        self.segments = OrderedDict( ( path, os.path.getsize( path ) ) for path in segment_paths( self.directory ) )
+        self.total_bytes = sum( self.segments.values() )
+        self.index = int( os.path.basename( next( reversed( self.segments ) ) )[ len('requests-'):-len('.log') ] ) + 1 if len( self.segments ) > 0 else 0
+
+    def __str__(self):
+        return "RequestRecorder({}, {} segments, {}/{} bytes)".format( self.directory, len( self.segments ), self.total_bytes, self.max_bytes )
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __del__(self):
+        self.close()
+
+    def record( self, request: bittensor.proto.TensorMessage, request_type: int, timestamp: float = None ):
+        r""" Appends the request to the current segment.
+            Args:
+                request (:obj:`bittensor.proto.TensorMessage`, `required`):
+                    The request received by the axon.
+                request_type (:obj:`bittensor.proto.RequestType`, `required`):
+                    FORWARD or BACKWARD.
+                timestamp (:type:`float`, `optional`):
+                    Arrival time of the request, defaults to now.
+        """
+        timestamp = timestamp if timestamp != None else time.time()
+        hotkey = request.hotkey.encode()
+        message = request.SerializeToString()
+        size = RECORD_HEADER.size + len( hotkey ) + len( message )
+        with self.lock:
+            if self.file == None or ( self.segments[ self.path ] + size > self.segment_bytes and self.segments[ self.path ] > SEGMENT_HEADER.size ):
+                self._rotate()
+            self.file.write( RECORD_HEADER.pack( timestamp, request_type, len( hotkey ), len( message ) ) )
+            self.file.write( hotkey )
+            self.file.write( message )
+            self.segments[ self.path ] += size
+            self.total_bytes += size
+            self.records += 1
+            self._enforce_cap()
+
+    def flush( self ):
+        r""" Flushes the buffered records so that readers see them.
+        """
+        with self.lock:
+            if self.file != None:
+                self.file.flush()
+
+    def close( self ):
+        r""" Closes the current segment, the next record starts a new one.
+        """
+        with self.lock:
+            if self.file != None:
+                self.file.close()
+                self.file = None
+
+    def _rotate( self ):
+        if self.file != None:
+            self.file.close()
+        self.path = os.path.join( self.directory, SEGMENT_PATTERN.format( self.index ) )
+        self.index += 1
+        self.file = open( self.path, 'wb' )
+        self.file.write( SEGMENT_HEADER.pack( MAGIC, VERSION ) )
+        self.segments[ self.path ] = SEGMENT_HEADER.size
+        self.total_bytes += SEGMENT_HEADER.size
+
+    def _enforce_cap( self ):
+        while self.total_bytes > self.max_bytes and len( self.segments ) > 1:
+            path, size = self.segments.popitem( last = False )
+            self.total_bytes -= size
+            try:
+                os.remove( path )
+            except FileNotFoundError:
+                pass
+
+class RequestLog():
+    r""" Reads the records of a capture directory in arrival order. Segments are memory mapped and
+        read one at a time, a record truncated at the end of the segment being written is skipped.
+
+        Args:
+            directory (:type:`str`, `required`):
+                Directory of the segment files written by a :obj:`RequestRecorder`.
+    """
+    def __init__( self, directory: str ):
+        self.directory = os.path.expanduser( directory )
+        if not os.path.isdir( self.directory ):
+            raise FileNotFoundError( 'No request log at {}'.format( self.directory ) )
+
+    def __str__(self):
+        return "RequestLog({}, {} segments)".format( self.directory, len( self.segments() ) )
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __iter__( self ) -> Iterator[RequestRecord]:
+        for path in self.segments():
+            yield from self.read_segment( path )
+
+    def segments( self ) -> List[str]:
+        return segment_paths( self.directory )
+
+    @staticmethod
+    def read_segment( path: str ) -> Iterator[RequestRecord]:
+        r""" Yields the records of a segment file.
+        """
+        with open( path, 'rb' ) as file:
+            size = os.fstat( file.fileno() ).st_size
+            if size < SEGMENT_HEADER.size:
+                return
+            with mmap.mmap( file.fileno(), 0, access = mmap.ACCESS_READ ) as buffer:
+                magic, version = SEGMENT_HEADER.unpack_from( buffer, 0 )
+                if magic != MAGIC or version != VERSION:
+                    raise ValueError( '{} is not a version {} request log segment'.format( path, VERSION ) )
+                offset = SEGMENT_HEADER.size
+                while offset + RECORD_HEADER.size <= size:
+                    timestamp, request_type, hotkey_length, message_length = RECORD_HEADER.unpack_from( buffer, offset )
+                    hotkey_start = offset + RECORD_HEADER.size
+                    message_start = hotkey_start + hotkey_length
+                    offset = message_start + message_length
+                    if offset > size:
+                        return
+                    yield RequestRecord( timestamp, request_type, buffer[ hotkey_start:message_start ].decode(), buffer[ message_start:offset ] )
+
+class ReplayContext():
+    r""" Stands in for the grpc servicer context when requests are replayed into an axon in process.
+    """
+    def invocation_metadata( self ):
+        return ()
+
+    def set_trailing_metadata( self, metadata ):
+        pass
+
+class Replayer():
+    r""" Replays captured requests into an axon, in process, or directly into nucleus callbacks.
+        Requests are dispatched open loop on the captured arrival times scaled by speed, to a pool of
+        max_workers threads. At most max_pending requests are in flight, dispatch waits beyond that
+        and the wait shows in the lag histogram.
+
+        Args:
+            axon (:obj:`bittensor.Axon`, `optional`):
+                Axon whose Forward and Backward handlers serve the requests, it does not need to be started.
+            forward (:obj:`callable`, `optional`):
+                Nucleus forward callback, called with the deserialized inputs when no axon is passed.
+            backward (:obj:`callable`, `optional`):
+                Nucleus backward callback, called with the deserialized inputs and gradients when no axon is passed.
+            speed (:type:`float`, `optional`):
+                Replay speed relative to the capture, i.e. 2 halves the gaps between requests. If 0, requests are sent as fast as possible.
+            max_workers (:type:`int`, `optional`):
+                Number of threads serving the requests.
+            max_pending (:type:`int`, `optional`):
+                Maximum number of requests dispatched and not yet served.
+    """
+    def __init__(
+            self,
+            axon: 'bittensor.Axon' = None,
+            forward: Callable = None,
+            backward: Callable = None,
+            speed: float = 1.0,
+            max_workers: int = 10,
+            max_pending: int = 1000,
+        ):
+        if axon == None and forward == None and backward == None:
+            raise ValueError( 'Replay needs an axon or nucleus callbacks' )
+        self.axon = axon
+        self.forward = forward
+        self.backward = backward
+        self.speed = speed
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+
+    def run( self, records: Iterable[RequestRecord], limit: int = None ) -> SimpleNamespace:
+        r""" Replays the records and returns the replay stats.
+            Args:
+                records (:obj:`Iterable[RequestRecord]`, `required`):
+                    Records to replay in arrival order, i.e. a :obj:`RequestLog`.
+                limit (:type:`int`, `optional`):
+                    Maximum number of records replayed.
+            Returns:
+                stats (:obj:`SimpleNamespace`, `required`):
+                    requests, forward and backward counts, return codes by name, latency and lag histograms,
+                    duration in seconds and served queries per second.
+        """
+        stats = SimpleNamespace(
+            requests = 0,
+            forward = 0,
+            backward = 0,
+            codes = {},
+            latency = stat_utils.LatencyHistogram(),
+            lag = stat_utils.LatencyHistogram(),
+            duration = 0.0,
+            qps = 0.0,
+        )
+        lock = Lock()
+        pending = Semaphore( self.max_pending )
+        first_timestamp = None
+        start_time = time.time()
+        with futures.ThreadPoolExecutor( max_workers = self.max_workers ) as executor:
+            for record in records:
+                if limit != None and stats.requests >= limit:
+                    break
+                if first_timestamp == None:
+                    first_timestamp = record.timestamp
+                due = start_time + ( record.timestamp - first_timestamp ) / self.speed if self.speed > 0 else time.time()
+                wait = due - time.time()
+                if wait > 0:
+                    time.sleep( wait )
+                pending.acquire()
+                stats.requests += 1
+                if record.request_type == bittensor.proto.RequestType.BACKWARD:
+                    stats.backward += 1
+                else:
+                    stats.forward += 1
+                future = executor.submit( self._serve, record, due, stats, lock )
+                future.add_done_callback( lambda _: pending.release() )
+        stats.duration = time.time() - start_time
+        stats.qps = stats.requests / stats.duration if stats.duration > 0 else 0.0
+        return stats
+
+    def _serve( self, record: RequestRecord, due: float, stats: SimpleNamespace, lock: Lock ):
+        stats.lag.record( max( 0.0, time.time() - due ) )
+        start_time = time.time()
+        try:
+            if self.axon != None:
+                code = self._call_axon( record )
+            else:
+                code = self._call_nucleus( record )
+        except Exception:
+            code = bittensor.proto.ReturnCode.UnknownException
+        stats.latency.record( time.time() - start_time )
+        name = bittensor.proto.ReturnCode.Name( code )
+        with lock:
+            stats.codes[ name ] = stats.codes.get( name, 0 ) + 1
+
+    def _call_axon( self, record: RequestRecord ) -> int:
+        handler = self.axon.Backward if record.request_type == bittensor.proto.RequestType.BACKWARD else self.axon.Forward
+        if inspect.iscoroutinefunction( handler ):
+            # Asyncio axons serve the request on their event loop.
+            response = asyncio.run_coroutine_threadsafe( handler( record.request(), ReplayContext() ), self.axon.event_loop.loop ).result()
+        else:
+            response = handler( record.request(), ReplayContext() )
+        return response.return_code
+
+    def _call_nucleus( self, record: RequestRecord ) -> int:
+        request = record.request()
+        serializer = bittensor.serializer( request.tensors[0].serializer )
+        tensors = [ serializer.deserialize( tensor, to_type = bittensor.proto.TensorType.TORCH ) for tensor in request.tensors ]
+        if record.request_type == bittensor.proto.RequestType.BACKWARD:
+            if self.backward == None:
+                return bittensor.proto.ReturnCode.NotImplemented
+            self.backward( tensors[0], tensors[1] )
+        else:
+            if self.forward == None:
+                return bittensor.proto.ReturnCode.NotImplemented
+            self.forward( tensors[0] )
+        return bittensor.proto.ReturnCode.Success
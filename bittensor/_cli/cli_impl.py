@@ -116,7 +116,7 @@ class CLI:
         for uid in self.config.uids:
             neuron = subtensor.neuron_for_uid( uid )
             endpoint = bittensor.endpoint.from_neuron( neuron )
-            _, c, t = dendrite.forward_text( endpoints = endpoint, inputs = 'hello world')
+            _, c, t = dendrite.forward_text( endpoints = endpoint, inputs = 'hello world', requires_grad = False )
             latency = "{}".format(t.tolist()[0]) if c.tolist()[0] == 1 else 'N/A'
             bittensor.__console__.print("\tUid: [bold white]{}[/bold white]\n\tLatency: [bold white]{}[/bold white]\n\tCode: [bold {}]{}[/bold {}]\n\n".format(uid, latency, bittensor.utils.codes.code_to_loguru_color( c.item() ), bittensor.utils.codes.code_to_string( c.item() ), bittensor.utils.codes.code_to_loguru_color( c.item() )), highlight=True)
             stats[uid] = latency
@@ -151,7 +151,7 @@ class CLI:
                     registered = '[bold white]Yes[/bold white]'
                     stake = bittensor.Balance.from_tao( neuron.stake )
                     emission = bittensor.Balance.from_rao( neuron.emission * 1000000000 )
-                    _, c, t = dendrite.forward_text( endpoints = endpoint, inputs = 'hello world')
+                    _, c, t = dendrite.forward_text( endpoints = endpoint, inputs = 'hello world', requires_grad = False )
                     latency = "{}".format(t.tolist()[0]) if c.tolist()[0] == 1 else 'N/A'
 
                 cold_balance = wallet.get_balance( subtensor = subtensor )
@@ -22,6 +22,7 @@ import copy
 import bittensor
 from . import dendrite_impl
 from . import dendrite_mock
+from . import shared_memory_pool
 from .manager_server import ManagerServer
 from multiprocessing.managers import BaseManager
 from loguru import logger
@@ -47,6 +48,10 @@ class dendrite:
             receptor_pool: 'bittensor.ReceptorPool' = None,
             multiprocess: bool = None,
             compression: str = None,
+            shared_memory_bytes: int = None,
+            cache_bytes: int = None,
+            cache_ttl: float = None,
+            tracing: bool = None,
             _mock:bool=None
         ) -> 'bittensor.Dendrite':
         r""" Creates a new Dendrite object from passed arguments.
@@ -69,6 +74,20 @@ class dendrite:
                 receptor_pool (:obj:`bittensor.ReceptorPool`, `optional`):
                     A bittensor receptor pool object which maintains a set of connections to other peers in the network and operates as
                     a normal torch.nn.Module. By default this object is created with the dendrite config.
+                multiprocess (:type:`bool`, `optional`, default: bittensor.dendrite.config().dendrite.multiprocessing):
+                    If true, the dendrite shares a single receptor pool served by a local manager process.
+                compression (:type:`str`, `optional`, default: bittensor.dendrite.config().dendrite.compression):
+                    Compression algorithm used on the wire.
+                shared_memory_bytes (:type:`int`, `optional`, default: bittensor.dendrite.config().dendrite.shared_memory_bytes):
+                    Size of the shared memory ring used to pass tensors to the receptor pool manager when multiprocess is set.
+                    The ring is reserved in /dev/shm and skipped when it does not fit the free space there. If 0, tensors are pickled over the manager connection.
+                cache_bytes (:type:`int`, `optional`, default: bittensor.dendrite.config().dendrite.cache_bytes):
+                    Memory budget of the forward response cache. If 0, responses are not cached.
+                cache_ttl (:type:`float`, `optional`, default: bittensor.dendrite.config().dendrite.cache_ttl):
+                    Seconds a cached response is served before the endpoint is queried again.
+                tracing (:type:`bool`, `optional`, default: bittensor.dendrite.config().dendrite.tracing):
+                    If true, the stage timings of the requests are recorded in receptor_pool.tracer. Does not override the
+                    optionally passed receptor pool.
                 _mock (:obj:`bool`, `optional`):
                     For testing, if true the dendrite returns mocked outputs.
         """
@@ -81,6 +100,10 @@ class dendrite:
         config.dendrite.max_active_receptors = max_active_receptors if max_active_receptors != None else config.dendrite.max_active_receptors
         config.dendrite.multiprocessing = multiprocess if multiprocess != None else config.dendrite.multiprocessing
         config.dendrite.compression = compression if compression != None else config.dendrite.compression
+        config.dendrite.shared_memory_bytes = shared_memory_bytes if shared_memory_bytes != None else config.dendrite.shared_memory_bytes
+        config.dendrite.cache_bytes = cache_bytes if cache_bytes != None else config.dendrite.cache_bytes
+        config.dendrite.cache_ttl = cache_ttl if cache_ttl != None else config.dendrite.cache_ttl
+        config.dendrite.tracing = tracing if tracing != None else config.dendrite.tracing
         config.dendrite._mock = _mock if _mock != None else config.dendrite._mock
         dendrite.check_config( config )
 
@@ -93,6 +116,7 @@ class dendrite:
                 max_worker_threads = config.dendrite.max_worker_threads,
                 max_active_receptors = config.dendrite.max_active_receptors,
                 compression = config.dendrite.compression,
+                tracer = bittensor.utils.tracing.Tracer( int(config.dendrite.tracing_buffer) ) if config.dendrite.tracing else None,
             )
         if config.dendrite._mock:
             return dendrite_mock.DendriteMock ( 
@@ -114,7 +138,7 @@ class dendrite:
             return dendrite_impl.Dendrite ( 
                 config = config,
                 wallet = wallet, 
-                receptor_pool = manager_client.get_receptorpool(),
+                receptor_pool = dendrite.shared_memory_receptor_pool( config, manager_client ),
                 manager = manager_client,
             )
         else:
@@ -153,6 +177,11 @@ class dendrite:
             parser.add_argument('--dendrite.no_requires_grad', dest='dendrite.requires_grad', action='store_false', help='''If set, the dendrite will not passes gradients on the wire.''')
             parser.add_argument('--dendrite.multiprocessing', dest='dendrite.multiprocessing', action='store_true', help='''If set, the dendrite will initialize multiprocessing''', default=bittensor.defaults.dendrite.multiprocessing)
             parser.add_argument('--dendrite.compression', type=str, help='''Which compression algorithm to use for compression (gzip, deflate, NoCompression) ''', default = bittensor.defaults.dendrite.compression)
+            parser.add_argument('--dendrite.shared_memory_bytes', type=int, help='''Size in bytes of the shared memory ring used to pass tensors to the multiprocess receptor pool. The ring is reserved in /dev/shm and skipped when it does not fit the free space there. If 0, tensors are pickled over the manager connection.''', default = bittensor.defaults.dendrite.shared_memory_bytes)
+            parser.add_argument('--dendrite.cache_bytes', type=int, help='''Memory budget in bytes of the forward response cache keyed by endpoint and inputs. If 0, responses are not cached.''', default = bittensor.defaults.dendrite.cache_bytes)
+            parser.add_argument('--dendrite.cache_ttl', type=float, help='''Seconds a cached forward response is served before the endpoint is queried again.''', default = bittensor.defaults.dendrite.cache_ttl)
+            parser.add_argument('--dendrite.tracing', action='store_true', help='''If set, the stage timings of the requests are recorded and sent with a trace id to the axons.''', default = bittensor.defaults.dendrite.tracing)
+            parser.add_argument('--dendrite.tracing_buffer', type=int, help='''Number of the last traced requests kept in the span buffer.''', default = bittensor.defaults.dendrite.tracing_buffer)
             parser.add_argument('--dendrite._mock', action='store_true', help='To turn on dendrite mocking for testing purposes.', default=False)
         except argparse.ArgumentError:
             # re-parsing arguments.
@@ -170,6 +199,11 @@ class dendrite:
         defaults.dendrite.requires_grad = os.getenv('BT_DENDRITE_REQUIRES_GRAD') if os.getenv('BT_DENDRITE_REQUIRES_GRAD') != None else True
         defaults.dendrite.multiprocessing = os.getenv('BT_DENDRITE_multiprocessing') if os.getenv('BT_DENDRITE_multiprocessing') != None else False
         defaults.dendrite.compression = 'NoCompression'
+        defaults.dendrite.shared_memory_bytes = os.getenv('BT_DENDRITE_SHARED_MEMORY_BYTES') if os.getenv('BT_DENDRITE_SHARED_MEMORY_BYTES') != None else 32 * 1024 * 1024
+        defaults.dendrite.cache_bytes = os.getenv('BT_DENDRITE_CACHE_BYTES') if os.getenv('BT_DENDRITE_CACHE_BYTES') != None else 0
+        defaults.dendrite.cache_ttl = os.getenv('BT_DENDRITE_CACHE_TTL') if os.getenv('BT_DENDRITE_CACHE_TTL') != None else 12
+        defaults.dendrite.tracing = os.getenv('BT_DENDRITE_TRACING') if os.getenv('BT_DENDRITE_TRACING') != None else False
+        defaults.dendrite.tracing_buffer = os.getenv('BT_DENDRITE_TRACING_BUFFER') if os.getenv('BT_DENDRITE_TRACING_BUFFER') != None else 4096
 
 
     @classmethod   
@@ -181,6 +215,10 @@ class dendrite:
         assert 'requires_grad' in config.dendrite
         assert config.dendrite.max_worker_threads > 0, 'max_worker_threads must be larger than 0'
         assert config.dendrite.max_active_receptors > 0, 'max_active_receptors must be larger than 0'
+        assert int(config.dendrite.shared_memory_bytes) >= 0, 'shared_memory_bytes must be larger or equal to 0'
+        assert int(config.dendrite.cache_bytes) >= 0, 'cache_bytes must be larger or equal to 0'
+        assert float(config.dendrite.cache_ttl) >= 0, 'cache_ttl must be larger or equal to 0'
+        assert int(config.dendrite.tracing_buffer) > 0, 'tracing_buffer must be larger than 0'
         bittensor.wallet.check_config( config )
 
     @classmethod
@@ -191,6 +229,7 @@ class dendrite:
         BaseManager.register('add_connection_count')
         BaseManager.register('deduct_connection_count')
         BaseManager.register('get_total_requests')
+        BaseManager.register('get_shared_memory_receptorpool')
         manager = BaseManager(address=('', 4098), authkey=authkey)
         manager.connect()
         manager.add_connection_count()
@@ -207,6 +246,26 @@ class dendrite:
                 max_active_receptors = config.dendrite.max_active_receptors
             )
         ManagerServer.register('get_receptorpool', callable=lambda:receptor_pool,exposed=['forward','backward','get_receptors_state', 'get_total_requests'])
+        shared_memory_server = shared_memory_pool.SharedMemoryReceptorPoolServer( receptor_pool )
+        ManagerServer.register('get_shared_memory_receptorpool', callable=lambda:shared_memory_server, exposed=['forward','backward','release'])
         manager = ManagerServer(address=('', 4098), authkey=authkey)
 
-        return manager
\ No newline at end of file
+        return manager
+
+    @classmethod
+    def shared_memory_receptor_pool(cls, config, manager):
+        r"""Returns the receptor pool proxy for a connected manager. When shared memory is available tensors are passed 
+        through a ring buffer owned by this process and only slot descriptors are pickled over the manager connection.
+        """
+        receptor_pool = manager.get_receptorpool()
+        if int(config.dendrite.shared_memory_bytes) == 0 or not shared_memory_pool.is_available():
+            return receptor_pool
+        try:
+            return shared_memory_pool.SharedMemoryReceptorPool( 
+                proxy = manager.get_shared_memory_receptorpool(),
+                receptor_pool = receptor_pool,
+                size = int(config.dendrite.shared_memory_bytes),
+            )
+        except Exception as e:
+            logger.warning('Shared memory receptor pool unavailable, falling back to the manager connection: {}'.format(e))
+            return receptor_pool
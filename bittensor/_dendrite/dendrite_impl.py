@@ -26,11 +26,13 @@ import pandas
 import random
 
 from torch.autograd.function import once_differentiable
+from multiprocessing.managers import BaseProxy
 from loguru import logger
 from transformers.utils.logging import enable_explicit_format
 
 import bittensor
 from bittensor._endpoint.endpoint_impl import Endpoint
+from bittensor._dendrite.response_cache import ResponseCache
 import bittensor.utils.stats as stat_utils
 import bittensor.utils.codes as codes
 
@@ -84,6 +86,9 @@ class Dendrite(torch.autograd.Function):
         self.wallet = wallet
         self.receptor_pool = receptor_pool
         self.manager = manager
+        # ---- Optional cache of successful forward responses.
+        cache_bytes = int(config.dendrite.get('cache_bytes', 0))
+        self.response_cache = ResponseCache( cache_bytes, float(config.dendrite.get('cache_ttl', 0)) ) if cache_bytes > 0 else None
         # ---- Dendrite stats
         # num of time we have sent request to a peer, received successful respond, and the respond time
         self.stats = self._init_stats()
@@ -111,6 +116,7 @@ class Dendrite(torch.autograd.Function):
             modality: bittensor.proto.Modality,
             timeout: int,
             requires_grad: bool,
+            outputs_buffer: torch.FloatTensor,
             *inputs: torch.Tensor
     ) -> Tuple[torch.Tensor, ...]:
         """ Internal autograd-friendly Forward RPC call to a list of neuron endpoints.
@@ -141,6 +147,9 @@ class Dendrite(torch.autograd.Function):
                 requires_grad (int, default = dendrite.requires_grad, `optional`):
                     If true, the backward pass triggers passing gradients on the wire.
 
+                outputs_buffer (:obj:`torch.FloatTensor` of shape :obj:`(n_endpoints, batch_size, sequence_len, bittensor.__network_dim__)`, `optional`):
+                    If not None, responses are deserialized into this zero initialized tensor which is returned as the single output.
+
             Returns:
                 codes (:obj:`torch.LongTensor` of shape :obj:`(n_endpoints)` `required`):
                     Return code associated with forward call.
@@ -150,18 +159,23 @@ class Dendrite(torch.autograd.Function):
                 
                 outputs (:obj:`List[torch.FloatTensor]` of shape :obj:`n_endpoints * (batch_size, sequence_len, bittensor.__network_dim__)`, `required`):
                         Output encodings of inputs produced by the remote endpoints. Non-responses are zeroes of common shape.
+                        A single tensor of shape :obj:`(n_endpoints, batch_size, sequence_len, bittensor.__network_dim__)` if outputs_buffer is passed.
         """
         ctx.receptor_pool = dendrite.receptor_pool
         ctx.endpoints, ctx.inputs, ctx.modality, ctx.timeout, ctx.does_requires_grad = endpoints, inputs, modality, timeout, requires_grad
+        ctx.stacked = outputs_buffer != None
         inputs = [x.cpu().clone().detach() for x in inputs]
-        forward_outputs, forward_codes, forward_times = ctx.receptor_pool.forward(
+        forward_outputs, forward_codes, forward_times = dendrite._receptor_pool_forward(
             endpoints=endpoints,
             inputs=inputs,
             modality=modality,
-            timeout=timeout
+            timeout=timeout,
+            outputs_buffer=outputs_buffer
         )
         ctx.forward_codes = forward_codes
         forward_times = [-1 if t is None else t for t in forward_times]
+        if ctx.stacked:
+            forward_outputs = [outputs_buffer]
         return (torch.tensor(forward_codes, dtype=torch.int64), 
                 torch.tensor(forward_times, dtype=torch.float32),
                 *forward_outputs)
@@ -196,6 +210,8 @@ class Dendrite(torch.autograd.Function):
 
         """
         if ctx.does_requires_grad:
+            if ctx.stacked:
+                output_grads = output_grads[0].unbind(0)
             grads_cpu = [x.cpu().clone().detach() for x in output_grads]
             input_grads, _, _ = ctx.receptor_pool.backward(
                 endpoints=ctx.endpoints,
@@ -204,10 +220,81 @@ class Dendrite(torch.autograd.Function):
                 modality=ctx.modality,
                 timeout=ctx.timeout,
             )
-            return (None, None, None, None, None, None, *input_grads)
+            return (None, None, None, None, None, None, None, *input_grads)
         else:
             input_grads = [nill_response_for(inp) for inp in ctx.inputs]
-            return (None, None, None, None, None, None, *input_grads)
+            return (None, None, None, None, None, None, None, *input_grads)
+
+    def _receptor_pool_forward(
+            self,
+            endpoints: List['bittensor.Endpoint'],
+            inputs: List[torch.Tensor],
+            modality: bittensor.proto.Modality,
+            timeout: int,
+            outputs_buffer: torch.FloatTensor = None
+    ) -> Tuple[List[torch.Tensor], List[int], List[float]]:
+        r""" Calls forward on the receptor pool, optionally filling outputs_buffer with the responses.
+            Responses held by the response cache are returned without a network call.
+        """
+        if self.response_cache == None:
+            return self._receptor_pool_forward_uncached(endpoints, inputs, modality, timeout, outputs_buffer)
+
+        input_hashes = [ResponseCache.input_hash(x) for x in inputs]
+        cached = [self.response_cache.get(endpoint, modality, input_hash) for endpoint, input_hash in zip(endpoints, input_hashes)]
+        misses = [index for index, response in enumerate(cached) if response == None]
+        self.stats.cache_hits += len(endpoints) - len(misses)
+        self.stats.cache_misses += len(misses)
+
+        forward_outputs, forward_codes, forward_times = list(cached), [bittensor.proto.ReturnCode.Success] * len(endpoints), [0.0] * len(endpoints)
+        if len(misses) > 0:
+            # The buffer is only handed down if every endpoint is queried, otherwise misses are copied in below.
+            miss_outputs, miss_codes, miss_times = self._receptor_pool_forward_uncached(
+                endpoints=[endpoints[index] for index in misses],
+                inputs=[inputs[index] for index in misses],
+                modality=modality,
+                timeout=timeout,
+                outputs_buffer=outputs_buffer if len(misses) == len(endpoints) else None
+            )
+            for index, output, code, query_time in zip(misses, miss_outputs, miss_codes, miss_times):
+                forward_outputs[index], forward_codes[index], forward_times[index] = output, code, query_time
+                if code == bittensor.proto.ReturnCode.Success:
+                    self.response_cache.put(endpoints[index], modality, input_hashes[index], output)
+
+        if outputs_buffer != None and len(misses) < len(endpoints):
+            for output, buffer in zip(forward_outputs, outputs_buffer):
+                buffer.copy_(output)
+            forward_outputs = list(outputs_buffer.unbind(0))
+        return forward_outputs, forward_codes, forward_times
+
+    def _receptor_pool_forward_uncached(
+            self,
+            endpoints: List['bittensor.Endpoint'],
+            inputs: List[torch.Tensor],
+            modality: bittensor.proto.Modality,
+            timeout: int,
+            outputs_buffer: torch.FloatTensor = None
+    ) -> Tuple[List[torch.Tensor], List[int], List[float]]:
+        # Buffers are not shared with the receptor pool across a manager connection.
+        if outputs_buffer == None or isinstance(self.receptor_pool, BaseProxy):
+            forward_outputs, forward_codes, forward_times = self.receptor_pool.forward(
+                endpoints=endpoints,
+                inputs=inputs,
+                modality=modality,
+                timeout=timeout
+            )
+            if outputs_buffer != None:
+                for output, buffer in zip(forward_outputs, outputs_buffer):
+                    buffer.copy_(output)
+                forward_outputs = list(outputs_buffer.unbind(0))
+            return forward_outputs, forward_codes, forward_times
+
+        return self.receptor_pool.forward(
+            endpoints=endpoints,
+            inputs=inputs,
+            modality=modality,
+            timeout=timeout,
+            outputs_buffer=outputs_buffer
+        )
 
     def _forward(
             self,
@@ -215,8 +302,9 @@ class Dendrite(torch.autograd.Function):
             inputs: List[torch.Tensor],
             modality: bittensor.proto.Modality,
             timeout: int = None,
-            requires_grad: bool = None
-    ) -> Tuple[List[torch.Tensor], torch.LongTensor, torch.FloatTensor]:
+            requires_grad: bool = None,
+            outputs_buffer: torch.FloatTensor = None
+    ) -> Tuple[Union[List[torch.Tensor], torch.FloatTensor], torch.LongTensor, torch.FloatTensor]:
         r""" Internal Forward tensor inputs to a list of neuron endpoints.
 
             Args:
@@ -234,11 +322,16 @@ class Dendrite(torch.autograd.Function):
                     request timeout.
 
                 requires_grad (int, default = dendrite.requires_grad, `optional`):
-                    If true, the backward pass triggers passing gradients on the wire.
+                    If true, the backward pass triggers passing gradients on the wire. If false and no input requires grad,
+                    or if grad is disabled, the call bypasses autograd and the responses are not part of the computation graph.
+
+                outputs_buffer (:obj:`torch.FloatTensor` of shape :obj:`(num_endpoints, batch_size, sequence_len, bittensor.__network_dim__)`, `optional`):
+                    Zero initialized tensor the responses are deserialized into.
 
             Returns:
                 responses (:obj:`List[torch.FloatTensor]` of shape :obj:`(batch_size, sequence_len, bittensor.__network_dim__)`, `required`):
                     Output encodings of inputs produced by the remote endpoints. Non-responses are zeroes of common shape.
+                    A single tensor of shape :obj:`(num_endpoints, batch_size, sequence_len, bittensor.__network_dim__)` if outputs_buffer is passed.
 
                 codes (:obj:`List[torch.LongTensor]` of shape :obj:`[num_endpoints]`, `required`):
                     dendrite call return codes.
@@ -249,6 +342,22 @@ class Dendrite(torch.autograd.Function):
         """
         timeout = timeout if timeout is not None else self.config.dendrite.timeout
         requires_grad = requires_grad if requires_grad is not None else self.config.dendrite.requires_grad
+
+        # ---- Inference only: skip the autograd function so that no inputs are kept alive after return.
+        # Inputs which require grad still go through autograd to receive their (zero) gradients.
+        if not torch.is_grad_enabled() or ( not requires_grad and not any(x.requires_grad for x in inputs) ):
+            forward_outputs, forward_codes, forward_times = self._receptor_pool_forward(
+                endpoints=endpoints,
+                inputs=[x.cpu().detach() for x in inputs],
+                modality=modality,
+                timeout=timeout,
+                outputs_buffer=outputs_buffer
+            )
+            codes = torch.tensor(forward_codes, dtype=torch.int64)
+            times = torch.tensor([-1 if t is None else t for t in forward_times], dtype=torch.float32)
+            responses = outputs_buffer if outputs_buffer != None else tuple(forward_outputs)
+            return responses, codes, times
+
         forward_response = Dendrite.apply(
             self,
             DUMMY,
@@ -256,11 +365,12 @@ class Dendrite(torch.autograd.Function):
             modality,
             timeout,
             requires_grad,
+            outputs_buffer,
             *inputs
         )
         codes = forward_response[0]
         times = forward_response[1]
-        responses = forward_response[2:]
+        responses = forward_response[2] if outputs_buffer != None else forward_response[2:]
         return responses, codes, times
 
     def forward_image(
@@ -464,7 +574,9 @@ class Dendrite(torch.autograd.Function):
                 torch.LongTensor, List[torch.LongTensor], List['bittensor.Endpoint'], 'bittensor.Endpoint'],
             inputs: Union[str, List[str], List[torch.LongTensor], torch.LongTensor],
             timeout: int = None,
-            requires_grad: bool = None
+            requires_grad: bool = None,
+            stack_responses: bool = False,
+            pin_memory: bool = False
     ) -> Tuple[Union[List[torch.FloatTensor], torch.FloatTensor], torch.LongTensor, torch.FloatTensor]:
         r""" Forward text inputs to a list of neuron endpoints and block until responses or timeout.
 
@@ -490,6 +602,15 @@ class Dendrite(torch.autograd.Function):
 
                     requires_grad (:type:`int`, default = dendrite.requires_grad, `optional`):
                         If true, the backward pass triggers passing gradients on the wire.
+                        If false, the call skips autograd entirely, use it for inference only queries.
+
+                    stack_responses (:type:`bool`, default = False, `optional`):
+                        If true, responses are deserialized into a single preallocated tensor of shape
+                        [n, batch_size, sequence_len, bittensor.__network_dim__] which is returned instead of a list.
+                        All inputs must share the same shape.
+
+                    pin_memory (:type:`bool`, default = False, `optional`):
+                        If true and cuda is available, the stacked responses are allocated in pinned memory.
 
                 Returns:
                     responses (:obj:`torch.FloatTensor` of shape :obj:`(n, batch_size, sequence_len, bittensor.__network_dim__)`, `required`):
@@ -616,6 +737,19 @@ class Dendrite(torch.autograd.Function):
                 len(inputs), len(endpoints))
             raise ValueError(error_msg)
 
+        # ---- Preallocate stacked responses.
+        outputs_buffer = None
+        if stack_responses:
+            shape = formatted_inputs[0].shape
+            if any(input.shape != shape for input in formatted_inputs):
+                error_msg = 'Stacked responses require text inputs with the same shape, got {}'.format([list(input.shape) for input in formatted_inputs])
+                raise ValueError(error_msg)
+            outputs_buffer = torch.zeros( 
+                (len(formatted_endpoints), shape[0], shape[1], bittensor.__network_dim__), 
+                dtype=torch.float32, 
+                pin_memory=pin_memory and torch.cuda.is_available()
+            )
+
         # Make calls.
         responses, codes, times = self._forward(
             endpoints=formatted_endpoints,
@@ -623,6 +757,7 @@ class Dendrite(torch.autograd.Function):
             modality=bittensor.proto.Modality.TEXT,
             timeout=timeout,
             requires_grad=requires_grad,
+            outputs_buffer=outputs_buffer,
         )
 
         # Return.
@@ -638,20 +773,12 @@ class Dendrite(torch.autograd.Function):
             avg_in_bytes_per_second = stat_utils.AmountPerSecondRollingAverage( 0, 0.01 ),
             # total sent by this dendrite per second.
             avg_out_bytes_per_second = stat_utils.AmountPerSecondRollingAverage( 0, 0.01 ),
-            # Codes recieved per pubkey.
-            codes_per_pubkey = {},
-            # Number of requests per pubkey.
-            requests_per_pubkey = {},
-            # Success rate per pubkey.
-            successes_per_pubkey = {},
-            # Query time per pubkey.
-            query_times_per_pubkey = {},
-            # Bytes recieved per pubkey.
-            avg_in_bytes_per_pubkey = {},
-            # Bytes sent per pubkey.
-            avg_out_bytes_per_pubkey = {},
-            # QPS per pubkey.
-            qps_per_pubkey = {},
+            # Requests, successes, bytes, query time and return codes per pubkey.
+            peers = stat_utils.PeerStats( n_codes = len( bittensor.proto.ReturnCode.keys() ) ),
+            # Responses served from the response cache.
+            cache_hits = 0,
+            # Responses not found in the response cache.
+            cache_misses = 0,
         )
 
     def update_stats(self, endpoints, requests, responses, return_ops, query_times):
@@ -672,38 +799,14 @@ class Dendrite(torch.autograd.Function):
                 query_times (:obj:`torch.FloatTensor` of shape :obj:`[ num_endpoints ]`, `required`):
                     Times per call.
         """
+        return_ops = return_ops.tolist()
+        out_bytes = [ req_i.element_size() * req_i.nelement() for req_i in requests ]
+        in_bytes = [ resp_i.element_size() * resp_i.nelement() if code_i == bittensor.proto.ReturnCode.Success else 0 for resp_i, code_i in zip( responses, return_ops ) ]
         self.stats.qps.event()
         self.stats.total_requests += 1
-        total_in_bytes_per_second = 0
-        self.stats.avg_out_bytes_per_second.event( float(sys.getsizeof(requests)) )
-        for (e_i, req_i, resp_i, code_i, time_i) in list(zip(endpoints, requests, responses, return_ops.tolist(), query_times.tolist())):
-            pubkey = e_i.hotkey
-
-            # First time for this pubkey we create a new entry.
-            if pubkey not in self.stats.requests_per_pubkey:
-                self.stats.requests_per_pubkey[pubkey] = 0
-                self.stats.successes_per_pubkey[pubkey] = 0
-                self.stats.codes_per_pubkey[pubkey] = dict([(k,0) for k in bittensor.proto.ReturnCode.keys()])
-                self.stats.query_times_per_pubkey[pubkey] = stat_utils.AmountPerSecondRollingAverage( 0, 0.01 )
-                self.stats.avg_in_bytes_per_pubkey[pubkey] = stat_utils.AmountPerSecondRollingAverage( 0, 0.01 )
-                self.stats.avg_out_bytes_per_pubkey[pubkey] = stat_utils.AmountPerSecondRollingAverage( 0, 0.01 )
-                self.stats.qps_per_pubkey[pubkey] = stat_utils.EventsPerSecondRollingAverage( 0, 0.01 )
-
-            self.stats.requests_per_pubkey[pubkey] += 1
-            self.stats.successes_per_pubkey[pubkey] += 1 if code_i == 1 else 0
-            self.stats.query_times_per_pubkey[pubkey].event( float(time_i) )
-            self.stats.avg_in_bytes_per_pubkey[pubkey].event( float(sys.getsizeof(resp_i)) )
-            self.stats.avg_out_bytes_per_pubkey[pubkey].event( float(sys.getsizeof(req_i)) )
-            self.stats.qps_per_pubkey[pubkey].event()
-            total_in_bytes_per_second += sys.getsizeof(resp_i) if code_i == 1 else 0 
-            try:
-                if bittensor.proto.ReturnCode.Name(code_i) in self.stats.codes_per_pubkey[pubkey].keys():
-                    self.stats.codes_per_pubkey[pubkey][bittensor.proto.ReturnCode.Name(code_i)] += 1
-            except:
-                # Code may be faulty.
-                pass
-
-        self.stats.avg_in_bytes_per_second.event( float( total_in_bytes_per_second ) )
+        self.stats.avg_out_bytes_per_second.event( float( sum( out_bytes ) ) )
+        self.stats.avg_in_bytes_per_second.event( float( sum( in_bytes ) ) )
+        self.stats.peers.update( [ e_i.hotkey for e_i in endpoints ], return_ops, query_times.tolist(), in_bytes, out_bytes )
 
     def to_dataframe ( self, metagraph ):
         r""" Return a stats info as a pandas dataframe indexed by the metagraph or pubkey if not existend.
@@ -714,20 +817,7 @@ class Dendrite(torch.autograd.Function):
                 dataframe (:obj:`pandas.Dataframe`)
         """
         try:
-            index = [ metagraph.hotkeys.index(pubkey) for pubkey in self.stats.requests_per_pubkey.keys() if pubkey in metagraph.hotkeys]
-            columns = [ 'dendrite_n_requested', 'dendrite_n_success', 'dendrite_query_time', 'dendrite_avg_inbytes', 'dendrite_avg_outbytes', 'dendrite_qps' ]
-            dataframe = pandas.DataFrame(columns = columns, index = index)
-            for pubkey in self.stats.requests_per_pubkey.keys():
-                if pubkey in metagraph.hotkeys:
-                    uid = metagraph.hotkeys.index(pubkey)
-                    dataframe.loc[ uid ] = pandas.Series( {
-                        'dendrite_n_requested': int(self.stats.requests_per_pubkey[pubkey]),
-                        'dendrite_n_success': int(self.stats.successes_per_pubkey[pubkey]),
-                        'dendrite_query_time': float(self.stats.query_times_per_pubkey[pubkey].get()),               
-                        'dendrite_avg_inbytes': float(self.stats.avg_in_bytes_per_pubkey[pubkey].get()),
-                        'dendrite_avg_outbytes': float(self.stats.avg_out_bytes_per_pubkey[pubkey].get()),
-                        'dendrite_qps': float(self.stats.qps_per_pubkey[pubkey].get())
-                    } )
+            dataframe = self.stats.peers.to_dataframe( metagraph, prefix = 'dendrite' )
             return dataframe
 
         except Exception as e:
@@ -749,7 +839,11 @@ class Dendrite(torch.autograd.Function):
                 'dendrite/total_requests' : self.receptor_pool.get_total_requests(),
                 'dendrite/avg_in_bytes_per_second' : self.stats.avg_in_bytes_per_second.get(),
                 'dendrite/avg_out_bytes_per_second' : self.stats.avg_out_bytes_per_second.get(),
-                'dendrite/Total unique queries': len(self.stats.requests_per_pubkey.keys()),
+                'dendrite/Total unique queries': len(self.stats.peers),
+                'dendrite/cache_hits': self.stats.cache_hits,
+                'dendrite/cache_misses': self.stats.cache_misses,
+                **self.receptor_pool.get_latency().summary( 'dendrite/forward_latency' ),
+                **self.receptor_pool.get_latency( backward = True ).summary( 'dendrite/backward_latency' ),
             }
             return wandb_info
         except Exception as e:
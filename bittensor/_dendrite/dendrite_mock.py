@@ -613,20 +613,8 @@ class DendriteMock(torch.autograd.Function):
             avg_in_bytes_per_second = stat_utils.AmountPerSecondRollingAverage( 0, 0.01 ),
             # total sent by this dendrite per second.
             avg_out_bytes_per_second = stat_utils.AmountPerSecondRollingAverage( 0, 0.01 ),
-            # Codes recieved per pubkey.
-            codes_per_pubkey = {},
-            # Number of requests per pubkey.
-            requests_per_pubkey = {},
-            # Success rate per pubkey.
-            successes_per_pubkey = {},
-            # Query time per pubkey.
-            query_times_per_pubkey = {},
-            # Bytes recieved per pubkey.
-            avg_in_bytes_per_pubkey = {},
-            # Bytes sent per pubkey.
-            avg_out_bytes_per_pubkey = {},
-            # QPS per pubkey.
-            qps_per_pubkey = {},
+            # Requests, successes, bytes, query time and return codes per pubkey.
+            peers = stat_utils.PeerStats( n_codes = len( bittensor.proto.ReturnCode.keys() ) ),
         )
 
     def update_stats(self, endpoints, requests, responses, return_ops, query_times):
@@ -647,38 +635,14 @@ class DendriteMock(torch.autograd.Function):
                 query_times (:obj:`torch.FloatTensor` of shape :obj:`[ num_endpoints ]`, `required`):
                     Times per call.
         """
+        return_ops = return_ops.tolist()
+        out_bytes = [ req_i.element_size() * req_i.nelement() for req_i in requests ]
+        in_bytes = [ resp_i.element_size() * resp_i.nelement() if code_i == bittensor.proto.ReturnCode.Success else 0 for resp_i, code_i in zip( responses, return_ops ) ]
         self.stats.qps.event()
         self.stats.total_requests += 1
-        total_in_bytes_per_second = 0
-        self.stats.avg_out_bytes_per_second.event( float(sys.getsizeof(requests)) )
-        for (e_i, req_i, resp_i, code_i, time_i) in list(zip(endpoints, requests, responses, return_ops.tolist(), query_times.tolist())):
-            pubkey = e_i.hotkey
-
-            # First time for this pubkey we create a new entry.
-            if pubkey not in self.stats.requests_per_pubkey:
-                self.stats.requests_per_pubkey[pubkey] = 0
-                self.stats.successes_per_pubkey[pubkey] = 0
-                self.stats.codes_per_pubkey[pubkey] = dict([(k,0) for k in bittensor.proto.ReturnCode.keys()])
-                self.stats.query_times_per_pubkey[pubkey] = stat_utils.AmountPerSecondRollingAverage( 0, 0.01 )
-                self.stats.avg_in_bytes_per_pubkey[pubkey] = stat_utils.AmountPerSecondRollingAverage( 0, 0.01 )
-                self.stats.avg_out_bytes_per_pubkey[pubkey] = stat_utils.AmountPerSecondRollingAverage( 0, 0.01 )
-                self.stats.qps_per_pubkey[pubkey] = stat_utils.EventsPerSecondRollingAverage( 0, 0.01 )
-
-            self.stats.requests_per_pubkey[pubkey] += 1
-            self.stats.successes_per_pubkey[pubkey] += 1 if code_i == 1 else 0
-            self.stats.query_times_per_pubkey[pubkey].event( float(time_i) )
-            self.stats.avg_in_bytes_per_pubkey[pubkey].event( float(sys.getsizeof(resp_i)) )
-            self.stats.avg_out_bytes_per_pubkey[pubkey].event( float(sys.getsizeof(req_i)) )
-            self.stats.qps_per_pubkey[pubkey].event()
-            total_in_bytes_per_second += sys.getsizeof(resp_i) if code_i == 1 else 0 
-            try:
-                if bittensor.proto.ReturnCode.Name(code_i) in self.stats.codes_per_pubkey[pubkey].keys():
-                    self.stats.codes_per_pubkey[pubkey][bittensor.proto.ReturnCode.Name(code_i)] += 1
-            except:
-                # Code may be faulty.
-                pass
-
-        self.stats.avg_in_bytes_per_second.event( float( total_in_bytes_per_second ) )
+        self.stats.avg_out_bytes_per_second.event( float( sum( out_bytes ) ) )
+        self.stats.avg_in_bytes_per_second.event( float( sum( in_bytes ) ) )
+        self.stats.peers.update( [ e_i.hotkey for e_i in endpoints ], return_ops, query_times.tolist(), in_bytes, out_bytes )
 
     def to_dataframe ( self, metagraph ):
         r""" Return a stats info as a pandas dataframe indexed by the metagraph or pubkey if not existend.
@@ -689,20 +653,7 @@ class DendriteMock(torch.autograd.Function):
                 dataframe (:obj:`pandas.Dataframe`)
         """
         try:
-            index = [ metagraph.hotkeys.index(pubkey) for pubkey in self.stats.requests_per_pubkey.keys() if pubkey in metagraph.hotkeys]
-            columns = [ 'dendrite_n_requested', 'dendrite_n_success', 'dendrite_query_time', 'dendrite_avg_inbytes', 'dendrite_avg_outbytes', 'dendrite_qps' ]
-            dataframe = pandas.DataFrame(columns = columns, index = index)
-            for pubkey in self.stats.requests_per_pubkey.keys():
-                if pubkey in metagraph.hotkeys:
-                    uid = metagraph.hotkeys.index(pubkey)
-                    dataframe.loc[ uid ] = pandas.Series( {
-                        'dendrite_n_requested': int(self.stats.requests_per_pubkey[pubkey]),
-                        'dendrite_n_success': int(self.stats.successes_per_pubkey[pubkey]),
-                        'dendrite_query_time': float(self.stats.query_times_per_pubkey[pubkey].get()),               
-                        'dendrite_avg_inbytes': float(self.stats.avg_in_bytes_per_pubkey[pubkey].get()),
-                        'dendrite_avg_outbytes': float(self.stats.avg_out_bytes_per_pubkey[pubkey].get()),
-                        'dendrite_qps': float(self.stats.qps_per_pubkey[pubkey].get())
-                    } )
+            dataframe = self.stats.peers.to_dataframe( metagraph, prefix = 'dendrite' )
             return dataframe
 
         except Exception as e:
@@ -723,7 +674,7 @@ class DendriteMock(torch.autograd.Function):
                 'dendrite/total_requests' : self.stats.total_requests,
                 'dendrite/avg_in_bytes_per_second' : self.stats.avg_in_bytes_per_second.get(),
                 'dendrite/avg_out_bytes_per_second' : self.stats.avg_out_bytes_per_second.get(),
-                'dendrite/Total unique queries': len(self.stats.requests_per_pubkey.keys()),
+                'dendrite/Total unique queries': len(self.stats.peers),
             }
             return wandb_info
         except Exception as e:
@@ -0,0 +1,119 @@
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import hashlib
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Tuple, Union
+
+import torch
+
+import bittensor
+
+class ResponseCache:
+    r""" LRU and TTL cache of successful dendrite responses keyed by (hotkey, modality, input content hash).
+
+        Entries of a hotkey are dropped as soon as the hotkey is seen with a different ip, port or version,
+        which happens when the endpoints are rebuilt from a synced metagraph.
+
+        Args:
+            max_bytes (:type:`int`, `required`):
+                Memory budget of the cached responses in bytes.
+            ttl (:type:`float`, `required`):
+                Seconds a response stays valid.
+    """
+    def __init__( self, max_bytes: int, ttl: float ):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.total_bytes = 0
+        self.entries = OrderedDict()
+        self.endpoint_signatures = {}
+        self.lock = Lock()
+
+    def __str__(self):
+        return "ResponseCache({}, {}/{} bytes)".format( len(self.entries), self.total_bytes, self.max_bytes )
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def input_hash( inputs: torch.Tensor ) -> bytes:
+        r""" Hash of the tensor content, dtype and shape.
+        """
+        hasher = hashlib.blake2b( digest_size = 16 )
+        hasher.update( str( inputs.dtype ).encode() )
+        hasher.update( str( tuple( inputs.shape ) ).encode() )
+        hasher.update( inputs.detach().cpu().contiguous().numpy().tobytes() )
+        return hasher.digest()
+
+    @staticmethod
+    def endpoint_signature( endpoint: 'bittensor.Endpoint' ) -> Tuple[str, int, int]:
+        return ( endpoint.ip, endpoint.port, endpoint.version )
+
+    def _check_endpoint( self, endpoint: 'bittensor.Endpoint' ):
+        # Drops every entry of the hotkey if its endpoint has changed. Must hold the lock.
+        signature = self.endpoint_signature( endpoint )
+        if self.endpoint_signatures.get( endpoint.hotkey, signature ) != signature:
+            for key in [ key for key in self.entries if key[0] == endpoint.hotkey ]:
+                self._remove( key )
+        self.endpoint_signatures[ endpoint.hotkey ] = signature
+
+    def _remove( self, key ):
+        _, _, nbytes = self.entries.pop( key )
+        self.total_bytes -= nbytes
+
+    def get( self, endpoint: 'bittensor.Endpoint', modality: bittensor.proto.Modality, input_hash: bytes ) -> Union[ torch.Tensor, None ]:
+        r""" Returns a copy of the cached response or None on a miss.
+        """
+        key = ( endpoint.hotkey, modality, input_hash )
+        with self.lock:
+            self._check_endpoint( endpoint )
+            if key not in self.entries:
+                return None
+            response, expiry, _ = self.entries[ key ]
+            if expiry < time.time():
+                self._remove( key )
+                return None
+            self.entries.move_to_end( key )
+        return response.clone()
+
+    def put( self, endpoint: 'bittensor.Endpoint', modality: bittensor.proto.Modality, input_hash: bytes, response: torch.Tensor ):
+        r""" Caches the response, evicting the least recently used entries over the memory budget.
+        """
+        nbytes = response.element_size() * response.nelement()
+        if nbytes > self.max_bytes:
+            return
+        key = ( endpoint.hotkey, modality, input_hash )
+        response = response.detach().clone()
+        with self.lock:
+            self._check_endpoint( endpoint )
+            if key in self.entries:
+                self._remove( key )
+            while self.entries and self.total_bytes + nbytes > self.max_bytes:
+                self._remove( next( iter( self.entries ) ) )
+            self.entries[ key ] = ( response, time.time() + self.ttl, nbytes )
+            self.total_bytes += nbytes
+
+    def clear( self ):
+        with self.lock:
+            self.entries.clear()
+            self.endpoint_signatures.clear()
+            self.total_bytes = 0
@@ -0,0 +1,362 @@
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+""" Shared memory data plane for the multiprocess dendrite.
+
+Every dendrite process that connects to the receptor pool manager owns a TensorRingBuffer. Inputs are written into the
+ring before the call and output slots are reserved up front, so only small TensorSlot descriptors are pickled over the
+manager proxy. The manager process attaches to the ring by name, reads the inputs and writes the responses straight into
+the reserved slots. Whenever a tensor does not fit the ring it is sent over the proxy as before.
+"""
+
+import os
+from threading import Lock
+from typing import List, NamedTuple, Tuple, Union
+
+import numpy
+import torch
+from loguru import logger
+
+import bittensor
+
+try:
+    from multiprocessing import shared_memory
+    from multiprocessing import resource_tracker
+except ImportError:
+    # Python < 3.8.
+    shared_memory = None
+    resource_tracker = None
+
+logger = logger.opt(colors=True)
+
+# Slots are aligned to cache lines.
+SLOT_ALIGNMENT = 64
+
+# Directory backing the shared memory segments on linux.
+SHM_DIRECTORY = '/dev/shm'
+
+# Names of the segments created by this process.
+_created_segments = set()
+
+
+def is_available() -> bool:
+    r""" Returns true if multiprocessing.shared_memory is available on this interpreter.
+    """
+    return shared_memory != None
+
+
+def free_bytes() -> Union[ int, None ]:
+    r""" Returns the free space of the shared memory filesystem, or None if it can not be read, e.g. outside linux.
+    """
+    try:
+        stats = os.statvfs( SHM_DIRECTORY )
+    except (AttributeError, OSError):
+        return None
+    return stats.f_bavail * stats.f_frsize
+
+
+class TensorSlot(NamedTuple):
+    r""" Descriptor of a tensor living inside a TensorRingBuffer. This is what travels over the manager proxy.
+    """
+    offset: int
+    dtype: str
+    shape: Tuple[int, ...]
+
+
+class TensorRingBuffer:
+    r""" A fixed size ring of bytes inside a multiprocessing.shared_memory segment.
+
+        The owning process creates the segment and reserves slots with allocate(). Other processes attach to the
+        segment by name and only read or write the slots they are handed. A slot is reserved until it is freed,
+        allocations which would overlap a reserved slot fail and return None so that callers can fall back to
+        sending the tensor over the proxy.
+
+        Args:
+            size (:type:`int`, `optional`):
+                Size in bytes of the segment to create. Required when name is None.
+            name (:type:`str`, `optional`):
+                Name of an existing segment to attach to.
+    """
+    def __init__( self, size: int = None, name: str = None ):
+        if not is_available():
+            raise RuntimeError('multiprocessing.shared_memory requires python >= 3.8')
+        if name == None:
+            # Pages of a segment are only allocated when touched, a segment larger than the free space of the
+            # filesystem (64MB by default in docker) crashes the process with a SIGBUS once the space runs out.
+            available = free_bytes()
+            if available != None and size > available:
+                raise RuntimeError('{} bytes of shared memory requested, {} has {} bytes free'.format( size, SHM_DIRECTORY, available ))
+            self.shm = shared_memory.SharedMemory( create = True, size = size )
+            self.owner = True
+            _created_segments.add( self.shm.name )
+            # Reserve the pages up front, so the space taken by other processes raises here rather than on write.
+            if hasattr( os, 'posix_fallocate' ) and getattr( self.shm, '_fd', -1 ) >= 0:
+                try:
+                    os.posix_fallocate( self.shm._fd, 0, self.shm.size )
+                except OSError as e:
+                    self.close()
+                    raise RuntimeError('Failed to reserve {} bytes of shared memory: {}'.format( size, e ))
+        else:
+            self.shm = shared_memory.SharedMemory( name = name )
+            self.owner = False
+            # Segments attached from another process must not be unlinked by this process' resource tracker at exit.
+            if name not in _created_segments:
+                try:
+                    resource_tracker.unregister( self.shm._name, 'shared_memory' )
+                except Exception:
+                    pass
+        self.size = self.shm.size
+        self.head = 0
+        self.reserved = {}
+        self.lock = Lock()
+
+    def __str__(self):
+        return "TensorRingBuffer({}, {})".format( self.name, self.size )
+
+    def __repr__(self):
+        return self.__str__()
+
+    @property
+    def name( self ) -> str:
+        return self.shm.name
+
+    def allocate( self, shape: Tuple[int, ...], dtype: torch.dtype ) -> Union[ TensorSlot, None ]:
+        r""" Reserves a slot for a tensor of the passed shape and dtype.
+            Returns:
+                slot (:obj:`TensorSlot`):
+                    Reserved slot or None if the ring has no free space at its head.
+        """
+        dtype = numpy.dtype( torch.empty( 0, dtype = dtype ).numpy().dtype )
+        nbytes = int( numpy.prod( shape, dtype = numpy.int64 ) ) * dtype.itemsize
+        nbytes = max( SLOT_ALIGNMENT, -(-nbytes // SLOT_ALIGNMENT) * SLOT_ALIGNMENT )
+        if nbytes > self.size:
+            return None
+        with self.lock:
+            start = self.head if self.head + nbytes <= self.size else 0
+            end = start + nbytes
+            for reserved_start, reserved_end in self.reserved.values():
+                if reserved_start < end and start < reserved_end:
+                    return None
+            self.reserved[ start ] = ( start, end )
+            self.head = end if end < self.size else 0
+        return TensorSlot( start, dtype.str, tuple( shape ) )
+
+    def free( self, slot: TensorSlot ):
+        r""" Releases a reserved slot.
+        """
+        with self.lock:
+            self.reserved.pop( slot.offset, None )
+
+    def view( self, slot: TensorSlot ) -> torch.Tensor:
+        r""" Returns a tensor which aliases the slot memory.
+        """
+        array = numpy.ndarray( slot.shape, dtype = numpy.dtype( slot.dtype ), buffer = self.shm.buf, offset = slot.offset )
+        return torch.from_numpy( array )
+
+    def read( self, slot: TensorSlot ) -> torch.Tensor:
+        r""" Copies the slot out of the ring.
+        """
+        return self.view( slot ).clone()
+
+    def write( self, slot: TensorSlot, tensor: torch.Tensor ):
+        r""" Copies the tensor into the slot.
+        """
+        self.view( slot ).copy_( tensor.detach() )
+
+    def close( self ):
+        r""" Closes this process' handle on the segment. The owner also unlinks it.
+        """
+        try:
+            self.shm.close()
+            if self.owner:
+                self.shm.unlink()
+                _created_segments.discard( self.shm.name )
+        except (BufferError, FileNotFoundError):
+            pass
+
+
+class SharedMemoryReceptorPool:
+    r""" Client side of the shared memory data plane. Exposes the bittensor.ReceptorPool interface used by the dendrite
+        and moves tensors through a ring owned by this process.
+
+        Args:
+            proxy (:obj:`multiprocessing.managers.BaseProxy`, `required`):
+                Proxy to the SharedMemoryReceptorPoolServer registered on the manager.
+            receptor_pool (:obj:`multiprocessing.managers.BaseProxy`, `required`):
+                Proxy to the shared bittensor.ReceptorPool, used for non tensor calls.
+            size (:type:`int`, `required`):
+                Size in bytes of the ring buffer.
+    """
+    def __init__( self, proxy, receptor_pool, size: int ):
+        self.proxy = proxy
+        self.receptor_pool = receptor_pool
+        self.ring = TensorRingBuffer( size = size )
+
+    def __str__(self):
+        return "SharedMemoryReceptorPool({})".format( self.ring )
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __del__( self ):
+        self.close()
+
+    def close( self ):
+        r""" Detaches the manager from the ring and destroys it.
+        """
+        ring = getattr( self, 'ring', None )
+        if ring == None:
+            return
+        try:
+            self.proxy.release( ring.name )
+        except Exception:
+            pass
+        ring.close()
+        self.ring = None
+
+    def get_total_requests( self ) -> int:
+        return self.receptor_pool.get_total_requests()
+
+    def get_receptors_state( self ):
+        return self.receptor_pool.get_receptors_state()
+
+    def _put( self, tensor: torch.Tensor ) -> Union[ TensorSlot, torch.Tensor ]:
+        # Writes the tensor into the ring or returns it unchanged when it does not fit.
+        slot = self.ring.allocate( tuple( tensor.shape ), tensor.dtype )
+        if slot == None:
+            return tensor
+        self.ring.write( slot, tensor )
+        return slot
+
+    def _reserve_outputs( self, inputs: List[torch.Tensor] ) -> List[ Union[ TensorSlot, None ] ]:
+        # Outputs have shape [batch_size, sequence_len, bittensor.__network_dim__] for every modality.
+        return [
+            self.ring.allocate( ( x.size(0), x.size(1), bittensor.__network_dim__ ), torch.float32 ) if torch.numel( x ) > 0 else None
+            for x in inputs
+        ]
+
+    def _collect( self, outputs: List[ Union[ torch.Tensor, None ] ], slots: List[ Union[ TensorSlot, None ] ], outputs_buffer: torch.Tensor = None ) -> List[torch.Tensor]:
+        # None outputs were written by the server into their slot.
+        if outputs_buffer == None:
+            return [ self.ring.read( slot ) if output is None else output for output, slot in zip( outputs, slots ) ]
+        for output, slot, buffer in zip( outputs, slots, outputs_buffer ):
+            buffer.copy_( self.ring.view( slot ) if output is None else output )
+        return list( outputs_buffer.unbind(0) )
+
+    def _free( self, slots: List[ Union[ TensorSlot, torch.Tensor, None ] ] ):
+        for slot in slots:
+            if isinstance( slot, TensorSlot ):
+                self.ring.free( slot )
+
+    def forward(
+            self,
+            endpoints: List['bittensor.Endpoint'],
+            inputs: List[torch.Tensor],
+            modality: bittensor.proto.Modality,
+            timeout: int,
+            outputs_buffer: torch.FloatTensor = None
+        ) -> Tuple[List[torch.Tensor], List[int], List[float]]:
+        r""" Forward tensor inputs to endpoints through the shared receptor pool. See bittensor.ReceptorPool.forward.
+        """
+        input_slots = [ self._put( x ) for x in inputs ]
+        output_slots = self._reserve_outputs( inputs )
+        try:
+            outputs, codes, times = self.proxy.forward( self.ring.name, endpoints, input_slots, output_slots, modality, timeout )
+            outputs = self._collect( outputs, output_slots, outputs_buffer )
+        finally:
+            self._free( input_slots )
+            self._free( output_slots )
+        return outputs, codes, times
+
+    def backward(
+            self,
+            endpoints: List['bittensor.Endpoint'],
+            inputs_x: List[torch.Tensor],
+            grads_dy: List[torch.Tensor],
+            modality: bittensor.proto.Modality,
+            timeout: int
+        ) -> Tuple[List[torch.Tensor], List[int], List[float]]:
+        r""" Backward gradients to endpoints through the shared receptor pool. See bittensor.ReceptorPool.backward.
+        """
+        input_slots = [ self._put( x ) for x in inputs_x ]
+        grad_slots = [ self._put( dy ) for dy in grads_dy ]
+        output_slots = self._reserve_outputs( inputs_x )
+        try:
+            outputs, codes, times = self.proxy.backward( self.ring.name, endpoints, input_slots, grad_slots, output_slots, modality, timeout )
+            outputs = self._collect( outputs, output_slots )
+        finally:
+            self._free( input_slots )
+            self._free( grad_slots )
+            self._free( output_slots )
+        return outputs, codes, times
+
+
+class SharedMemoryReceptorPoolServer:
+    r""" Manager side of the shared memory data plane. Wraps the shared bittensor.ReceptorPool and attaches to the
+        rings of connected dendrite processes by name.
+
+        Args:
+            receptor_pool (:obj:`bittensor.ReceptorPool`, `required`):
+                The receptor pool served by the manager.
+    """
+    def __init__( self, receptor_pool: 'bittensor.ReceptorPool' ):
+        self.receptor_pool = receptor_pool
+        self.rings = {}
+        self.lock = Lock()
+
+    def _ring( self, name: str ) -> TensorRingBuffer:
+        with self.lock:
+            if name not in self.rings:
+                self.rings[ name ] = TensorRingBuffer( name = name )
+            return self.rings[ name ]
+
+    def release( self, name: str ):
+        r""" Detaches from the ring of a disconnecting dendrite.
+        """
+        with self.lock:
+            ring = self.rings.pop( name, None )
+        if ring != None:
+            ring.close()
+
+    @staticmethod
+    def _get( ring: TensorRingBuffer, slot: Union[ TensorSlot, torch.Tensor ] ) -> torch.Tensor:
+        return ring.read( slot ) if isinstance( slot, TensorSlot ) else slot
+
+    @staticmethod
+    def _put( ring: TensorRingBuffer, outputs: List[torch.Tensor], slots: List[ Union[ TensorSlot, None ] ] ) -> List[ Union[ torch.Tensor, None ] ]:
+        # Outputs written into their slot are returned as None, the rest travel over the proxy.
+        results = []
+        for output, slot in zip( outputs, slots ):
+            if slot != None and tuple( output.shape ) == slot.shape and output.dtype == torch.float32:
+                ring.write( slot, output )
+                results.append( None )
+            else:
+                results.append( output )
+        return results
+
+    def forward( self, name, endpoints, input_slots, output_slots, modality, timeout ):
+        ring = self._ring( name )
+        inputs = [ self._get( ring, slot ) for slot in input_slots ]
+        outputs, codes, times = self.receptor_pool.forward( endpoints = endpoints, inputs = inputs, modality = modality, timeout = timeout )
+        return self._put( ring, outputs, output_slots ), codes, times
+
+    def backward( self, name, endpoints, input_slots, grad_slots, output_slots, modality, timeout ):
+        ring = self._ring( name )
+        inputs_x = [ self._get( ring, slot ) for slot in input_slots ]
+        grads_dy = [ self._get( ring, slot ) for slot in grad_slots ]
+        outputs, codes, times = self.receptor_pool.backward( endpoints = endpoints, inputs_x = inputs_x, grads_dy = grads_dy, modality = modality, timeout = timeout )
+        return self._put( ring, outputs, output_slots ), codes, times
@@ -1,4 +1,6 @@
 
+import json
+import os
 from socket import timeout
 from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.util.retry import Retry
@@ -66,4 +68,60 @@ class Ipfs():
             response = Ipfs.requests_retry_session(session=session).get(address, timeout=timeout)
         elif action == 'post':
             response = Ipfs.requests_retry_session(session=session).post(address, timeout=timeout)
-        return response
\ No newline at end of file
+        return response
+
+    def resolve_ipns(self, ipns_hash: str, timeout: int = 180) -> str:
+        r"""Resolves an IPNS name to the IPFS hash it currently points to.
+
+        Args:
+            ipns_hash (str): IPNS name to resolve.
+
+        Returns:
+            str: The resolved IPFS hash.
+        """
+        response = self.retrieve_directory(self.ipns_resolve, (('arg', ipns_hash),), timeout = timeout)
+        response.raise_for_status()
+        return json.loads(response.text)['Path'].split('ipfs/')[1]
+
+    def list_directory(self, ipfs_hash: str, timeout: int = 180) -> list:
+        r"""Lists the links of an IPFS directory object.
+
+        Returns:
+            list: The links of the directory, as dicts with Name, Hash and Size.
+        """
+        response = self.retrieve_directory(self.node_get, (('arg', ipfs_hash),), timeout = timeout)
+        response.raise_for_status()
+        return json.loads(response.content)['Links']
+
+    def download(self, ipfs_hash: str, path: str, chunk_size: int = 1 << 20, timeout: int = 180, prefix: bytes = None) -> str:
+        r"""Streams the content of an IPFS hash into a file. If the file exists the download resumes at its size,
+        so an interrupted download continues where it stopped on the next call.
+
+        Args:
+            ipfs_hash (str): IPFS hash of the content.
+            path (str): File to append the content to.
+            chunk_size (int, optional): Bytes written per chunk. Defaults to 1MB.
+            prefix (bytes, optional): Expected first bytes of the content, checked before anything else is written.
+
+        Returns:
+            str: The path of the file.
+
+        Raises:
+            ValueError: If the content does not start with prefix, the rest of the content is not downloaded.
+        """
+        offset = os.path.getsize(path) if os.path.exists(path) else 0
+        head = b''
+        if prefix != None and offset > 0:
+            with open(path, 'rb') as file:
+                head = file.read(len(prefix))
+        session = Ipfs.requests_retry_session()
+        with session.post(self.cat, params = {'arg': ipfs_hash, 'offset': offset}, stream = True, timeout = timeout) as response:
+            response.raise_for_status()
+            with open(path, 'ab') as file:
+                for chunk in response.iter_content(chunk_size = chunk_size):
+                    if prefix != None and len(head) < len(prefix):
+                        head += chunk[:len(prefix) - len(head)]
+                        if head != prefix[:len(head)]:
+                            raise ValueError('Content of {} does not start with {}'.format(ipfs_hash, prefix))
+                    file.write(chunk)
+        return path
@@ -0,0 +1,208 @@
+""" Columnar endpoint table of the metagraph.
+"""
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import sys
+from typing import Dict, Iterable, List
+
+import numpy as np
+import torch
+
+import bittensor
+import bittensor.utils.networking as net
+from bittensor._endpoint import endpoint_impl
+
+U64 = 2 ** 64
+I64MAX = 2 ** 63
+
+# Integer columns, ips are 128 bit and are split in two signed 64 bit halves.
+COLUMNS = [ 'versions', 'uids', 'ip_high', 'ip_low', 'ip_types', 'ports', 'modalities', 'registered' ]
+
+# Column values of uids without a neuron, as in bittensor.endpoint.dummy().
+DUMMY_KEY = 'X' * 48
+DUMMY_IP_TYPE = 4
+
+def _signed( value: int ) -> int:
+    return value - U64 if value >= I64MAX else value
+
+def split_ip( ip: int ) -> tuple:
+    r""" Returns the high and low 64 bits of the ip as signed integers.
+    """
+    return _signed( ( ip >> 64 ) % U64 ), _signed( ip % U64 )
+
+def join_ip( high: int, low: int ) -> int:
+    r""" Returns the ip integer of the high and low signed 64 bits.
+    """
+    return ( ( high % U64 ) << 64 ) | ( low % U64 )
+
+class EndpointTable:
+    r""" Endpoint information of the metagraph stored by column, one row per uid.
+
+        Integer columns are torch.LongTensors of shape :obj:`(n)`, hotkeys and coldkeys are lists of interned strings.
+        Uids without a neuron hold the values of bittensor.endpoint.dummy() and are not registered. Endpoint objects are
+        built on demand for the uids that are used, the [n, 250] json tensor is only produced by to_tensor.
+    """
+    def __init__( self, columns: Dict[str, torch.LongTensor], hotkeys: List[str], coldkeys: List[str] ):
+        for name in COLUMNS:
+            setattr( self, name, columns[ name ] )
+        self.hotkeys = hotkeys
+        self.coldkeys = coldkeys
+
+    def __len__( self ) -> int:
+        return len( self.hotkeys )
+
+    @staticmethod
+    def from_neurons( neurons: Iterable, n: int ) -> 'EndpointTable':
+        r""" Builds the table from the chain neurons.
+            Args:
+                neurons (:obj:`Iterable`, `required`):
+                    Neurons with uid, version, hotkey, coldkey, ip, ip_type, port and modality.
+                n (:type:`int`, `required`):
+                    Number of rows, uids without a neuron are filled with dummy values.
+        """
+        versions, uids, ports, modalities, registered = [ 0 ] * n, [ 0 ] * n, [ 0 ] * n, [ 0 ] * n, [ 0 ] * n
+        ip_high, ip_low, ip_types = [ 0 ] * n, [ 0 ] * n, [ DUMMY_IP_TYPE ] * n
+        hotkeys, coldkeys = [ DUMMY_KEY ] * n, [ DUMMY_KEY ] * n
+        for neuron in neurons:
+            uid = int( neuron.uid )
+            versions[ uid ] = int( neuron.version )
+            uids[ uid ] = uid
+            ip_high[ uid ], ip_low[ uid ] = split_ip( int( neuron.ip ) )
+            ip_types[ uid ] = int( neuron.ip_type )
+            ports[ uid ] = int( neuron.port )
+            modalities[ uid ] = int( neuron.modality )
+            registered[ uid ] = 1
+            hotkeys[ uid ] = sys.intern( str( neuron.hotkey ) )
+            coldkeys[ uid ] = sys.intern( str( neuron.coldkey ) )
+        columns = {
+            'versions': versions, 'uids': uids, 'ip_high': ip_high, 'ip_low': ip_low, 'ip_types': ip_types,
+            'ports': ports, 'modalities': modalities, 'registered': registered,
+        }
+        return EndpointTable( { name: torch.tensor( values, dtype = torch.int64 ) for name, values in columns.items() }, hotkeys, coldkeys )
+
+    @staticmethod
+    def from_tensor( endpoints: torch.LongTensor ) -> 'EndpointTable':
+        r""" Builds the table from the legacy [n, 250] json tensor of state dicts and old snapshots.
+        """
+        dummy = bittensor.endpoint.dummy()
+        neurons = []
+        for uid, tensor in enumerate( endpoints ):
+            endpoint = bittensor.endpoint.from_tensor( tensor )
+            if endpoint != dummy:
+                endpoint.ip = net.ip_to_int( endpoint.ip )
+                endpoint.uid = uid
+                neurons.append( endpoint )
+        return EndpointTable.from_neurons( neurons, len( endpoints ) )
+
+    def update( self, neurons: Iterable, n: int ):
+        r""" Grows the table to n rows and overwrites the rows of the passed neurons in place.
+            Args:
+                neurons (:obj:`Iterable`, `required`):
+                    Neurons with uid, version, hotkey, coldkey, ip, ip_type, port and modality.
+                n (:type:`int`, `required`):
+                    Number of rows, appended uids without a neuron are filled with dummy values.
+        """
+        if n > len( self ):
+            appended = EndpointTable.from_neurons( [], n - len( self ) )
+            for name in COLUMNS:
+                setattr( self, name, torch.cat( [ getattr( self, name ), getattr( appended, name ) ] ) )
+            self.hotkeys.extend( appended.hotkeys )
+            self.coldkeys.extend( appended.coldkeys )
+        for neuron in neurons:
+            uid = int( neuron.uid )
+            self.versions[ uid ] = int( neuron.version )
+            self.uids[ uid ] = uid
+            self.ip_high[ uid ], self.ip_low[ uid ] = split_ip( int( neuron.ip ) )
+            self.ip_types[ uid ] = int( neuron.ip_type )
+            self.ports[ uid ] = int( neuron.port )
+            self.modalities[ uid ] = int( neuron.modality )
+            self.registered[ uid ] = 1
+            self.hotkeys[ uid ] = sys.intern( str( neuron.hotkey ) )
+            self.coldkeys[ uid ] = sys.intern( str( neuron.coldkey ) )
+
+    def row( self, uid: int ) -> tuple:
+        r""" Returns the values of the uid in every column, or None if the uid is out of range.
+        """
+        if uid >= len( self ):
+            return None
+        return tuple( getattr( self, name )[ uid ].item() for name in COLUMNS ) + ( self.hotkeys[ uid ], self.coldkeys[ uid ] )
+
+    def to_tensor( self ) -> torch.LongTensor:
+        r""" Exports the table as the legacy [n, 250] tensor of json bytes padded with -1.
+        """
+        if len( self ) == 0:
+            return torch.tensor( [], dtype = torch.int64 )
+        return torch.stack( [ self.endpoint( uid ).to_tensor() for uid in range( len( self ) ) ] )
+
+    def to_arrays( self ) -> Dict[str, np.ndarray]:
+        r""" Returns the columns as numpy arrays, keys as fixed width bytes.
+        """
+        arrays = { name: getattr( self, name ).numpy() for name in COLUMNS }
+        arrays[ 'hotkeys' ] = np.array( [ key.encode() for key in self.hotkeys ], dtype = 'S48' )
+        arrays[ 'coldkeys' ] = np.array( [ key.encode() for key in self.coldkeys ], dtype = 'S48' )
+        return arrays
+
+    @staticmethod
+    def from_arrays( arrays: Dict[str, np.ndarray] ) -> 'EndpointTable':
+        r""" Builds the table from the arrays of to_arrays.
+        """
+        columns = { name: torch.from_numpy( np.asarray( arrays[ name ], dtype = np.int64 ) ) for name in COLUMNS }
+        hotkeys = [ sys.intern( key.decode() ) for key in arrays[ 'hotkeys' ].tolist() ]
+        coldkeys = [ sys.intern( key.decode() ) for key in arrays[ 'coldkeys' ].tolist() ]
+        return EndpointTable( columns, hotkeys, coldkeys )
+
+    @property
+    def is_serving( self ) -> torch.BoolTensor:
+        r""" True for the uids with a non zero ip, as Endpoint.is_serving.
+        """
+        return ( self.ip_high != 0 ) | ( self.ip_low != 0 )
+
+    def ip( self, uid: int ) -> int:
+        r""" Returns the ip integer of the uid.
+        """
+        return join_ip( self.ip_high[ uid ].item(), self.ip_low[ uid ].item() )
+
+    def endpoint( self, uid: int ) -> 'bittensor.Endpoint':
+        r""" Returns the endpoint object of the uid.
+        """
+        uid = int( uid )
+        return endpoint_impl.Endpoint(
+            version = self.versions[ uid ].item(),
+            uid = self.uids[ uid ].item(),
+            hotkey = self.hotkeys[ uid ],
+            ip = self.ip( uid ),
+            ip_type = self.ip_types[ uid ].item(),
+            port = self.ports[ uid ].item(),
+            modality = self.modalities[ uid ].item(),
+            coldkey = self.coldkeys[ uid ],
+        )
+
+    def endpoints( self, uids: Iterable[int] ) -> List['bittensor.Endpoint']:
+        r""" Returns the endpoint objects of the uids.
+        """
+        if isinstance( uids, torch.Tensor ):
+            uids = uids.tolist()
+        return [ self.endpoint( uid ) for uid in uids ]
+
+    def addresses( self ) -> List[str]:
+        r""" Returns the address string of each uid, empty for unregistered uids.
+        """
+        addresses = []
+        for uid, ( registered, ip_type, port ) in enumerate( zip( self.registered.tolist(), self.ip_types.tolist(), self.ports.tolist() ) ):
+            addresses.append( net.ip__str__( ip_type, net.int_to_ip( self.ip( uid ) ), port ) if registered else '' )
+        return addresses
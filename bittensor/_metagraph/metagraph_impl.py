@@ -19,23 +19,85 @@
 
 import os
 
+from threading import Lock
+from types import SimpleNamespace
 from typing import List
 from loguru import logger
 
-import ast
 import pandas
+import numpy as np
 import torch.nn.functional as f
 import torch
-import pickle
-import json
 
 import bittensor
 import bittensor.utils.networking as net
 import bittensor.utils.weight_utils as weight_utils
+from . import metagraph_snapshot
+from .endpoint_table import EndpointTable
+from .neuron_cache import NeuronCache
 
 RAOPERTAO = 1000000000
 U64MAX = 18446744073709551615
 
+# The bond indices come from nonzero() and are in range, invariant checks are skipped on torch versions which have them.
+SPARSE_ARGS = { 'check_invariants': False } if hasattr( torch.sparse, 'check_sparse_tensor_invariants' ) else {}
+
+def _neurons_by_uid( neurons: List, n: int ) -> List:
+    by_uid = [ None ] * n
+    for neuron in neurons:
+        by_uid[ neuron.uid ] = neuron
+    return by_uid
+
+def _endpoint_key( neuron ) -> tuple:
+    return ( neuron.version, int( neuron.ip ), neuron.ip_type, neuron.port, neuron.modality, neuron.hotkey, neuron.coldkey )
+
+def _weight_row( neuron, n: int ) -> torch.FloatTensor:
+    if len( neuron.weights ) > 0:
+        w_uids, w_weights = zip( *neuron.weights )
+        return weight_utils.convert_weight_uids_and_vals_to_tensor( n, w_uids, w_weights )
+    return torch.zeros( [ n ], dtype = torch.float32 )
+
+def _bond_row( neuron, n: int ) -> torch.LongTensor:
+    if len( neuron.bonds ) > 0:
+        b_uids, b_bonds = zip( *neuron.bonds )
+        return weight_utils.convert_bond_uids_and_vals_to_tensor( n, b_uids, b_bonds )
+    return torch.zeros( [ n ], dtype = torch.int64 )
+
+def _normalize_bonds( bonds: torch.LongTensor, n: int ) -> torch.FloatTensor:
+    # Normalize bond ownership.
+    return torch.nn.functional.normalize( bonds.float(), p=1, dim=0, eps=1e-12 ) * 0.5 + torch.eye( n ) * 0.5
+
+def _diff_neurons( previous: List, current: List, n: int ) -> SimpleNamespace:
+    # Compares the first n uids of two neuron lists ordered by uid, uids without a neuron count as replaced.
+    diff = SimpleNamespace( replaced_uids = [], endpoint_uids = [], weight_uids = [], bond_uids = [], updated_uids = [] )
+    for uid in range( n ):
+        old, new = previous[ uid ], current[ uid ]
+        replaced = old == None or new == None or old.hotkey != new.hotkey
+        endpoint_changed = replaced or _endpoint_key( old ) != _endpoint_key( new )
+        weights_changed = replaced or old.last_update != new.last_update
+        if replaced:
+            diff.replaced_uids.append( uid )
+        if endpoint_changed:
+            diff.endpoint_uids.append( uid )
+        if weights_changed:
+            diff.weight_uids.append( uid )
+        if replaced or old.bonds != new.bonds:
+            diff.bond_uids.append( uid )
+        if endpoint_changed or weights_changed or old.stake != new.stake:
+            diff.updated_uids.append( uid )
+    return diff
+
+def _change_set( block: int, full: bool, new_uids: List[int], replaced_uids: List[int], endpoint_uids: List[int], updated_uids: List[int] ) -> SimpleNamespace:
+    as_tensor = lambda uids: torch.tensor( sorted( uids ), dtype = torch.int64 )
+    return SimpleNamespace(
+        block = int( block ),
+        full = full,
+        new_uids = as_tensor( new_uids ),
+        replaced_uids = as_tensor( replaced_uids ),
+        endpoint_uids = as_tensor( endpoint_uids ),
+        updated_uids = as_tensor( updated_uids ),
+    )
+
 class Metagraph( torch.nn.Module ):
     r""" Maintains chain state as a torch.nn.Module.
 
@@ -58,8 +120,8 @@ class Metagraph( torch.nn.Module ):
             weights (:obj:`torch.FloatTensor` of shape :obj:`(metagraph.n, metagraph.n)`):
                 Full weight matrix on chain ordered by uid.
 
-            neurons (:obj:`torch.LongTensor` of shape :obj:`(metagraph.n, -1)`) 
-                Tokenized endpoint information.
+            endpoint_table (:obj:`EndpointTable` of length :obj:`(metagraph.n)`):
+                Endpoint information by column, the tokenized endpoints tensor is exported from it.
 
     """
     def __init__( self, subtensor ):
@@ -67,6 +129,8 @@ class Metagraph( torch.nn.Module ):
         """
         super(Metagraph, self).__init__()
         self.subtensor = subtensor
+        self._sparse_lock = Lock()
+        self._forward_cache = None
         self.clear()
 
     def clear( self ) -> 'Metagraph':
@@ -87,89 +151,158 @@ class Metagraph( torch.nn.Module ):
         self.last_update = torch.nn.Parameter(  torch.tensor( [], dtype=torch.int64), requires_grad=False )
         self.weights = torch.nn.Parameter(  torch.tensor( [], dtype=torch.float32), requires_grad=False )
         self.bonds = torch.nn.Parameter(  torch.tensor( [], dtype=torch.int64), requires_grad=False )
-        self.endpoints = torch.nn.Parameter( torch.tensor( [], dtype=torch.int64), requires_grad=False )
         self.uids = torch.nn.Parameter( torch.tensor([], dtype = torch.int64),requires_grad=False )
-        self._endpoint_objs = None
+        self._set_endpoint_table( EndpointTable.from_neurons( [], 0 ) )
+        self._sparse_state = {}
+        self._neurons = None
+        self._raw_bonds = None
+        self._clear_index()
         return self
 
+    def __getattr__( self, name: str ):
+        r""" Densifies the weights and bonds of a loaded snapshot on first access.
+        """
+        try:
+            return super().__getattr__( name )
+        except AttributeError:
+            if not self.__dict__.get( '_sparse_state' ):
+                raise
+            with self._sparse_lock:
+                csr = self._sparse_state.pop( name, None )
+                if csr != None:
+                    self._parameters[ name ] = torch.nn.Parameter( metagraph_snapshot.to_dense( csr ), requires_grad = False )
+            return super().__getattr__( name )
+
+    def state_dict( self, *args, **kwargs ):
+        for name in list( self.__dict__.get( '_sparse_state', {} ) ):
+            getattr( self, name )
+        return super().state_dict( *args, **kwargs )
+
+    def _save_to_state_dict( self, destination, prefix, keep_vars ):
+        # The endpoints tensor is not a parameter, it is exported from the table for compatible state dicts.
+        super()._save_to_state_dict( destination, prefix, keep_vars )
+        destination[ prefix + 'endpoints' ] = self.endpoints
+
     def forward (
         self, 
         uid: int, 
         row_weight: torch.FloatTensor 
     ) -> torch.FloatTensor:
         """
-        Returns a dividend vector for a change in weights by computing the full incenvite function.
+        Returns dividend vectors for changes in weights by computing the full incentive function, for one candidate
+        row or a batch of candidate rows. Ranks and trust are updated by rank one corrections of the replaced row
+        and bonds are applied as a sparse matrix, W is neither cloned nor densified.
             Args:
                 uid (int):
                     uid to set weights.
-                row_weights: (torch.FloatTensor, shape =(n)):
-                    normalized row to replace at uid.
+                row_weight: (torch.FloatTensor, shape =(n) or (K, n)):
+                    candidate rows to replace at uid, rows which do not sum to 1 are normalized. A single row of
+                    any shape with n elements, (1, n) included, is not batched.
             Returns:
-                dividends (torch.FloatTensor):
-                    Dividends for the entire network.
+                dividends (torch.FloatTensor, shape =(n) or (K, n)):
+                    Dividends for the entire network, of shape (n) for a single row and (K, n) for K > 1 rows.
         """
+        n = self.n.item()
 
         # Return if there are no neurons.
-        if self.n.item() == 0:
+        if n == 0:
             return torch.tensor([], dtype=torch.float32)
 
         # Raise if the passed weights are badly shaped.
-        if torch.numel( row_weight ) != self.n.item():
-            raise ValueError('Passed weight update must have the dimension of a row in W. Got {}, expected {}', row_weight.size(), self.n.item())
+        if torch.numel( row_weight ) == n:
+            batched = False
+            rows = row_weight.float().view( 1, n )
+        elif row_weight.dim() == 2 and row_weight.shape[1] == n:
+            batched = True
+            rows = row_weight.float()
+        else:
+            raise ValueError('Passed weight update must have the dimension of a row in W. Got {}, expected {}'.format( row_weight.size(), n ))
 
-        # Reshape to fit weights.
-        row_weight = row_weight.view( self.n )
+        # Raise if the passed uid is not in the graph.
+        if uid >= n:
+            raise ValueError('Passed uid does not exist in the graph. Got {} >= {}'.format( uid, n ))
 
-        # Normalize row.
-        if torch.abs( torch.sum( row_weight ) - 1 ) > 0.0001:
-            row_weight = f.normalize(row_weight, p=1, dim=0)
-        
-        # Raise if the passed weights are badly shaped.
-        if uid >= self.n.item():
-            raise ValueError('Passed uid does not exist in the graph. Got {} > {}', uid, self.n.item())
+        # Normalize rows.
+        unnormalized = torch.abs( torch.sum( rows, dim = 1 ) - 1 ) > 0.0001
+        rows = torch.where( unnormalized.view( -1, 1 ), f.normalize( rows, p=1, dim=1 ), rows )
 
-        weight = self.W.detach().clone()
-        weight[uid,:] = row_weight
-        
-        # Compute ranks.
-        S = self.S.view(self.n, 1)
-        Wt = torch.transpose(weight, 0, 1)
-        R = torch.matmul(Wt, S).view(self.n)
+        # Replaced row of W.
+        base = self._forward_base()
+        S = base.S
+        begin, end = base.indptr[ uid ].item(), base.indptr[ uid + 1 ].item()
+        old_row = torch.zeros( n, dtype=torch.float32 )
+        old_row[ base.columns[ begin:end ] ] = base.values[ begin:end ]
 
-        # Compute trust.
-        T  = torch.matmul((Wt != 0).float(), S).view(self.n)
+        # Compute ranks and trust, with rank one updates of the base ranks and trust.
+        R = base.R + S[ uid ] * ( rows - old_row )
+        T = base.T + S[ uid ] * ( ( rows != 0 ).float() - ( old_row != 0 ).float() )
 
         # Compute consensus.
         rho = 10
         kappa = 0.5
         # Return if there is no stake.
-        if torch.sum( self.S )  == 0:
-            C = torch.sigmoid( rho * (T - kappa) ).view(self.n)
+        if torch.sum( S ) == 0:
+            C = torch.sigmoid( rho * (T - kappa) )
         else:
-            C = torch.sigmoid( rho * (T / torch.sum(S) - kappa) ).view(self.n)
+            C = torch.sigmoid( rho * (T / torch.sum(S) - kappa) )
 
         # Compute incentive.
-        Incentive = (R * C).view(self.n)
-        print (Incentive)
+        Incentive = R * C
 
         # Compute emission.
-        if torch.sum(Incentive) == 0:
-            Inflation = torch.zeros( (self.n.item()), dtype=torch.float32 ).view(self.n)
-        else:
-            Inflation = (self.tau * Incentive).view(self.n)
-        print (Inflation)
-
-        # Compute bonds.
-        B = self.B.detach().clone().float()
-        B_norm = f.normalize(B, p=1, dim=1)
-        print (B_norm)
+        no_incentive = ( torch.sum( Incentive, dim = 1 ) == 0 ).view( -1, 1 )
+        Inflation = torch.where( no_incentive, torch.zeros_like( Incentive ), self.tau * Incentive )
 
-        # Dividends
-        D = torch.matmul( B_norm.view(self.n, self.n), Inflation.view(self.n, 1) ).view(self.n) + 0.5 * Inflation.view(self.n)
-        print (D)
+        # Dividends, through the row normalized bonds.
+        D = torch.sparse.mm( base.B, Inflation.t() ).t() + 0.5 * Inflation
 
         # Return dividends.
-        return D.view(self.n)
+        return D if batched else D.view( n )
+
+    def _matrix_entries( self, name: str ):
+        r""" Returns the rows, columns and values of the non zero entries of a matrix, ordered by row. Reads the
+            compressed sparse rows of a loaded snapshot without densifying them.
+        """
+        with self._sparse_lock:
+            csr = self._sparse_state.get( name )
+        if csr != None:
+            rows = torch.from_numpy( np.repeat( np.arange( csr.shape[0] ), np.diff( csr.indptr ) ) )
+            return rows, torch.from_numpy( np.array( csr.indices ) ), torch.from_numpy( np.array( csr.values ) ), csr
+        matrix = getattr( self, name )
+        rows, columns = matrix.nonzero( as_tuple = True )
+        return rows, columns, matrix[ rows, columns ], matrix
+
+    def _forward_base( self ) -> SimpleNamespace:
+        r""" Returns the ranks and trust of the current weights, the weights by row and the row normalized bonds as a
+            sparse matrix. Cached until the weights, bonds or stake change.
+        """
+        def source( name ):
+            with self._sparse_lock:
+                if name in self._sparse_state:
+                    return self._sparse_state[ name ], 0
+            tensor = getattr( self, name )
+            return tensor, tensor._version
+        sources = [ source( 'weights' ), source( 'bonds' ), source( 'stake' ) ]
+        cached = self._forward_cache
+        if cached != None and all( old is new and old_version == new_version for ( old, old_version ), ( new, new_version ) in zip( cached.sources, sources ) ):
+            return cached
+
+        n = self.n.item()
+        S = self.S.float()
+        rows, columns, values, _ = self._matrix_entries( 'weights' )
+        values = values.float()
+        R = torch.zeros( n ).index_add_( 0, columns, values * S[ rows ] )
+        T = torch.zeros( n ).index_add_( 0, columns, S[ rows ] )
+        indptr = torch.zeros( n + 1, dtype = torch.int64 )
+        indptr[ 1: ] = torch.cumsum( torch.bincount( rows, minlength = n ), dim = 0 )
+
+        b_rows, b_columns, b_values, _ = self._matrix_entries( 'bonds' )
+        b_values = b_values.float()
+        row_sums = torch.zeros( n ).index_add_( 0, b_rows, torch.abs( b_values ) )
+        B = torch.sparse_coo_tensor( torch.stack( [ b_rows, b_columns ] ), b_values / torch.clamp( row_sums[ b_rows ], min = 1e-12 ), ( n, n ), **SPARSE_ARGS ).coalesce()
+
+        self._forward_cache = SimpleNamespace( sources = sources, S = S, R = R, T = T, indptr = indptr, columns = columns, values = values, B = B )
+        return self._forward_cache
 
     @property
     def S(self) -> torch.FloatTensor:
@@ -227,47 +360,81 @@ class Metagraph( torch.nn.Module ):
 
     @property
     def hotkeys( self ) -> List[str]:
-        r""" Returns hotkeys for each neuron.
+        r""" Returns hotkeys for each neuron, cached until the next sync.
             Returns:
                 hotkeys (:obj:`List[str] of shape :obj:`(metagraph.n)`):
                     Neuron hotkeys.
         """
         if self.n.item() == 0:
             return []
-        return [ neuron.hotkey if neuron != bittensor.endpoint.dummy() else '' for neuron in self.endpoint_objs ]
+        self._build_index()
+        return self._hotkeys
 
     @property
     def coldkeys( self ) -> List[str]:
-        r""" Returns coldkeys for each neuron.
+        r""" Returns coldkeys for each neuron, cached until the next sync.
             Returns:
                 coldkeys (:obj:`List[str] of shape :obj:`(metagraph.n)`):
                     Neuron coldkeys.
         """
         if self.n.item() == 0:
             return []
-        return [ neuron.coldkey if neuron != bittensor.endpoint.dummy() else '' for neuron in self.endpoint_objs ]
+        self._build_index()
+        return self._coldkeys
 
     @property
     def modalities( self ) -> List[str]:
-        r""" Returns the modality for each neuron.
+        r""" Returns the modality for each neuron, cached until the next sync.
             Returns:
                 coldkeys (:obj:`List[str] of shape :obj:`(metagraph.n)`):
                     Neuron coldkeys.
         """
         if self.n.item() == 0:
             return []
-        return [ neuron.modality if neuron != bittensor.endpoint.dummy() else '' for neuron in self.endpoint_objs ]
+        self._build_index()
+        return self._modalities
 
     @property
     def addresses( self ) -> List[str]:
-        r""" Returns ip addresses for each neuron.
+        r""" Returns ip addresses for each neuron, cached until the next sync.
             Returns:
                 coldkeys (:obj:`List[str] of shape :obj:`(metagraph.n)`):
                     Neuron address.
         """
         if self.n.item() == 0:
             return []
-        return [ net.ip__str__( neuron.ip_type, neuron.ip, neuron.port ) if neuron != bittensor.endpoint.dummy() else '' for neuron in self.endpoint_objs ]
+        if self._addresses is None:
+            self._addresses = self._endpoint_table.addresses()
+        return self._addresses
+
+    @property
+    def endpoint_table( self ) -> EndpointTable:
+        r""" Returns the endpoint information by column.
+            Returns:
+                endpoint_table (:obj:`EndpointTable` of length :obj:`(metagraph.n)`):
+                    Endpoint columns ordered by uid.
+        """
+        return self._endpoint_table
+
+    @property
+    def endpoints( self ) -> torch.LongTensor:
+        r""" Returns the endpoints as tokenized json, exported from the endpoint table on first access.
+            Returns:
+                endpoints (:obj:`torch.LongTensor` of shape :obj:`(metagraph.n, 250)`):
+                    Tokenized endpoint information.
+        """
+        if self._endpoints_tensor is None:
+            self._endpoints_tensor = self._endpoint_table.to_tensor()
+        return self._endpoints_tensor
+
+    @property
+    def is_serving( self ) -> torch.BoolTensor:
+        r""" Returns True for each neuron with an ip set.
+            Returns:
+                is_serving (:obj:`torch.BoolTensor` of shape :obj:`(metagraph.n)`):
+                    Serving mask ordered by uid.
+        """
+        return self._endpoint_table.is_serving
 
     @property
     def endpoint_objs( self ) -> List['bittensor.Endpoint']:
@@ -281,12 +448,63 @@ class Metagraph( torch.nn.Module ):
         elif self._endpoint_objs != None:
             return self._endpoint_objs
         else:
-            self._endpoint_objs = []
-            for tensor in self.endpoints:
-                obj = bittensor.endpoint.from_tensor( tensor )
-                self._endpoint_objs.append( obj )
+            self._endpoint_objs = self._endpoint_table.endpoints( range( len( self._endpoint_table ) ) )
             return self._endpoint_objs
 
+    def endpoints_for_uids( self, uids: torch.LongTensor ) -> List['bittensor.Endpoint']:
+        r""" Returns the endpoint objects of the passed uids, without building the endpoints of the other uids.
+            Args:
+                uids: (:obj:`torch.LongTensor` of shape :obj:`(-1)`, required):
+                    Uids to fetch the endpoints for.
+
+            Return:
+                endpoints: (:obj:`List[bittensor.Endpoint]` of length :obj:`(len(uids))`):
+                    The endpoint of each uid.
+        """
+        if self._endpoint_objs != None:
+            if isinstance( uids, torch.Tensor ):
+                uids = uids.tolist()
+            return [ self._endpoint_objs[ uid ] for uid in uids ]
+        return self._endpoint_table.endpoints( uids )
+
+    def _set_endpoint_table( self, table: EndpointTable ):
+        r""" Replaces the endpoint table and drops everything derived from it.
+        """
+        self._endpoint_table = table
+        self._endpoints_tensor = None
+        self._endpoint_objs = None
+        self._clear_index()
+
+    def _clear_index( self ):
+        r""" Drops the cached per neuron lists and hotkey index, they are rebuilt on the next access.
+        """
+        self._hotkeys = None
+        self._coldkeys = None
+        self._modalities = None
+        self._addresses = None
+        self._hotkey_uids = None
+
+    def _build_index( self ):
+        r""" Builds the per neuron lists and the hotkey to uid dict from the endpoint table, once per sync.
+            Entries without an endpoint are empty strings and are not indexed.
+        """
+        if self._hotkey_uids != None:
+            return
+        table = self._endpoint_table
+        registered = table.registered.tolist()
+        hotkeys = [ hotkey if is_registered else '' for hotkey, is_registered in zip( table.hotkeys, registered ) ]
+        coldkeys = [ coldkey if is_registered else '' for coldkey, is_registered in zip( table.coldkeys, registered ) ]
+        modalities = [ modality if is_registered else '' for modality, is_registered in zip( table.modalities.tolist(), registered ) ]
+        hotkey_uids = {}
+        for uid, hotkey in enumerate( hotkeys ):
+            if registered[ uid ]:
+                # The lowest uid wins, as with list.index.
+                hotkey_uids.setdefault( hotkey, uid )
+        self._hotkeys = hotkeys
+        self._coldkeys = coldkeys
+        self._modalities = modalities
+        self._hotkey_uids = hotkey_uids
+
     def hotkey_to_uid( self, hotkey:str ) -> int:
         r""" Fetch uid according to hotkey. 
             Args: 
@@ -297,10 +515,26 @@ class Metagraph( torch.nn.Module ):
                 uid: (`int`):
                     The uid for specified hotkey, -1 if hotkey does not exist.
         """ 
-        if hotkey in self.hotkeys:
-            return self.hotkeys.index(hotkey) 
-        else:
+        if self.n.item() == 0:
             return -1
+        self._build_index()
+        return self._hotkey_uids.get( hotkey, -1 )
+
+    def uids_for_hotkeys( self, hotkeys: List[str] ) -> torch.LongTensor:
+        r""" Fetch uids according to hotkeys.
+            Args:
+                hotkeys: (`List[str]`, required):
+                    Hotkeys to fetch the uids for.
+
+            Return:
+                uids: (:obj:`torch.LongTensor` of shape :obj:`(len(hotkeys))`):
+                    The uid of each hotkey, -1 where the hotkey does not exist.
+        """
+        if self.n.item() == 0:
+            return torch.full( ( len( hotkeys ), ), -1, dtype = torch.int64 )
+        self._build_index()
+        get = self._hotkey_uids.get
+        return torch.tensor( [ get( hotkey, -1 ) for hotkey in hotkeys ], dtype = torch.int64 )
 
     def load( self, network:str = None  ) -> 'Metagraph':
         r""" Loads this metagraph object's state_dict from bittensor root dir.
@@ -311,9 +545,12 @@ class Metagraph( torch.nn.Module ):
         try:
             if network == None:
                 network = self.subtensor.network
+            snapshot_path = os.path.expanduser( '~/.bittensor/' + str(network) + '.snapshot' )
             metagraph_path = '~/.bittensor/' + str(network) + '.pt'
             metagraph_path = os.path.expanduser(metagraph_path)
-            if os.path.isfile(metagraph_path):
+            if metagraph_snapshot.is_snapshot( snapshot_path ):
+                self.load_snapshot( path = snapshot_path )
+            elif os.path.isfile(metagraph_path):
                 self.load_from_path( path = metagraph_path )
             else:
                 logger.warning('Did not load metagraph from path: {}, file does not exist. Run metagraph.save() first.', metagraph_path)
@@ -322,21 +559,23 @@ class Metagraph( torch.nn.Module ):
         return self
 
     def save( self, network:str = None ) -> 'Metagraph':
-        r""" Saves this metagraph object's state_dict under bittensor root dir.
+        r""" Saves this metagraph object as a snapshot under bittensor root dir.
             Args: 
                 network: (:obj:`str`, required):
-                    Name of state_dict, defaults to kusanagi
+                    Name of the snapshot, defaults to kusanagi
         """
         if network == None:
             network = self.subtensor.network
-        return self.save_to_path( path = '~/.bittensor/', filename = str(network) + '.pt')
+        return self.save_snapshot( path = '~/.bittensor/' + str(network) + '.snapshot' )
 
     def load_from_path(self, path:str ) -> 'Metagraph':
-        r""" Loads this metagraph object with state_dict under the specified path.
+        r""" Loads this metagraph object with state_dict, or the snapshot, under the specified path.
             Args: 
                 path: (:obj:`str`, required):
                     Path to load state_dict.
         """
+        if metagraph_snapshot.is_snapshot( path ):
+            return self.load_snapshot( path )
         full_path = os.path.expanduser(path)
         metastate = torch.load( full_path )
         return self.load_from_state_dict( metastate )
@@ -353,6 +592,45 @@ class Metagraph( torch.nn.Module ):
         torch.save(metastate, full_path + '/' + filename)
         return self
 
+    def save_snapshot( self, path: str ) -> 'Metagraph':
+        r""" Saves this metagraph object as a snapshot directory of raw arrays and a json header.
+            Weights and bonds are stored as compressed sparse rows.
+            Args:
+                path: (:obj:`str`, required):
+                    Snapshot directory, replaced if it exists.
+        """
+        sparse_state = dict( self.__dict__.get( '_sparse_state', {} ) )
+        dense = { name: tensor for name, tensor in self._parameters.items() if tensor is not None }
+        columns = { 'endpoints.' + name: array for name, array in self._endpoint_table.to_arrays().items() }
+        metagraph_snapshot.write_snapshot( path, dense = dense, sparse = sparse_state, columns = columns, metadata = { 'network': str( getattr( self.subtensor, 'network', None ) ) } )
+        return self
+
+    def load_snapshot( self, path: str ) -> 'Metagraph':
+        r""" Loads this metagraph object from a snapshot directory. The arrays are memory mapped copy on write, so
+            processes loading the same snapshot share its pages until they write to them. Weights and bonds
+            are densified on first access.
+            Args:
+                path: (:obj:`str`, required):
+                    Snapshot directory written by save_snapshot.
+        """
+        dense, sparse, columns, _ = metagraph_snapshot.read_snapshot( path )
+        # Version 1 snapshots hold the tokenized endpoints instead of the columns.
+        legacy_endpoints = dense.pop( 'endpoints', None )
+        for name, tensor in dense.items():
+            self.register_parameter( name, torch.nn.Parameter( tensor, requires_grad = False ) )
+        with self._sparse_lock:
+            for name in sparse:
+                if name in self._parameters:
+                    del self._parameters[ name ]
+            self._sparse_state = sparse
+        if legacy_endpoints is not None:
+            self._set_endpoint_table( EndpointTable.from_tensor( legacy_endpoints ) )
+        else:
+            prefix = 'endpoints.'
+            self._set_endpoint_table( EndpointTable.from_arrays( { name[ len( prefix ): ]: array for name, array in columns.items() if name.startswith( prefix ) } ) )
+        self._neurons = None
+        return self
+
     def load_from_state_dict(self, state_dict:dict ) -> 'Metagraph':
         r""" Loads this metagraph object from passed state_dict.
             Args: 
@@ -375,57 +653,126 @@ class Metagraph( torch.nn.Module ):
         self.last_update = torch.nn.Parameter( state_dict['last_update'], requires_grad=False )
         self.weights = torch.nn.Parameter( state_dict['weights'], requires_grad=False )
         self.bonds = torch.nn.Parameter( state_dict['bonds'], requires_grad=False )
-        self.endpoints = torch.nn.Parameter( state_dict['endpoints'], requires_grad=False )
-        self._endpoint_objs = None
+        self._set_endpoint_table( EndpointTable.from_tensor( state_dict['endpoints'] ) )
+        self._sparse_state = {}
+        self._neurons = None
         return self
 
     def retrieve_cached_neurons( self, block: int = None ):
         """
-            Retrieves cached metagraph syncs from IPFS. 
+            Retrieves cached metagraph syncs from IPFS, through the local neuron cache.
         """
-        ipfs = bittensor.Ipfs()
-        ipns_hash = ipfs.latest_neurons_ipns
-        ipfs_hash = ipfs.cat
-        
+        cache = NeuronCache()
         if block != None:
-            ipns_hash = ipfs.historical_neurons_ipns
-            ipfs_hash = ipfs.node_get
-        
-        try:
-            # Ping IPNS for latest IPFS hash
-            ipns_resolve =  ipfs.retrieve_directory(ipfs.ipns_resolve, (('arg', ipns_hash),))
-
-            # Extract IPFS hash from IPNS response
-            ipfs_path = ast.literal_eval(ipns_resolve.text)
-        except Exception as e:
-            logger.error("Error detected in metagraph sync: {} with sample text {}".format(e,ipns_resolve.text))
-
-            # Try Again
-            # Ping IPNS for latest IPFS hash
-            ipns_resolve =  ipfs.retrieve_directory(ipfs.ipns_resolve, (('arg', ipns_hash),))
-
-            # Extract IPFS hash from IPNS response
-            ipfs_path = ast.literal_eval(ipns_resolve.text)
-
-        ipfs_resolved_hash = ipfs_path['Path'].split("ipfs/")[1]
-        ipfs_response = ipfs.retrieve_directory(ipfs_hash, (('arg', ipfs_resolved_hash),))
-
-        # Extract all neuron sync hashes
-        if block != None:
-            historical_neurons = json.loads(ipfs_response.content)['Links']
-            # Find the one that corresponds to our block
-            sync_data = next(item for item in historical_neurons if item["Name"] == "nakamoto-{}.pkl".format(block))
-            # Retrieve Neuron contents
-            ipfs_response = ipfs.retrieve_directory(ipfs.cat, (('arg', sync_data['Hash']),))
-
-        # Unpickle the response
-        neurons = pickle.loads(ipfs_response.content)
-
+            return cache.at_block( block )
+        _, neurons = cache.latest()
         return neurons
 
     def sync ( self, block: int = None, cached: bool = True ) -> 'Metagraph':
         r""" Synchronizes this metagraph with the chain state.
         """
+        block, neurons = self._fetch_neurons( block = block, cached = cached )
+        return self._set_neurons( block, neurons )
+
+    def sync_delta( self, block: int = None, cached: bool = True ) -> SimpleNamespace:
+        r""" Synchronizes this metagraph with the chain state, patching the state of the previous sync in place.
+            Weight rows are rebuilt for the neurons with a new last_update, bond rows for the neurons with new bonds
+            and endpoint rows for the neurons with a new endpoint. Uids beyond the previous n are appended. Falls back
+            to a full sync when there is no previous sync, e.g. after load or clear.
+            Args:
+                block: (:obj:`int`, optional):
+                    Block to sync at, defaults to the current block.
+                cached: (:obj:`bool`, optional):
+                    If the neurons are fetched from the IPFS cache when available.
+
+            Returns:
+                changes: (:obj:`SimpleNamespace`):
+                    block (:obj:`int`): synced block.
+                    full (:obj:`bool`): True if the graph was rebuilt rather than patched.
+                    new_uids (:obj:`torch.LongTensor`): uids beyond the previous n.
+                    replaced_uids (:obj:`torch.LongTensor`): uids below the previous n with a new hotkey.
+                    endpoint_uids (:obj:`torch.LongTensor`): uids with a new endpoint, new and replaced uids included.
+                    updated_uids (:obj:`torch.LongTensor`): uids with new weights, stake or endpoint, new and replaced uids included.
+        """
+        previous = self._neurons
+        old_n = self.n.item() if previous != None else 0
+        old_hotkeys = list( self.hotkeys )
+        old_table = self._endpoint_table
+        block, neurons = self._fetch_neurons( block = block, cached = cached )
+        n_total = len( neurons )
+        current = _neurons_by_uid( neurons, n_total )
+
+        if previous == None or n_total < len( previous ) or any( neuron == None for neuron in current ):
+            self._set_neurons( block, neurons )
+            # Compare against the previous endpoints, which may come from a loaded state.
+            old_n = min( len( old_hotkeys ), n_total )
+            table = self._endpoint_table
+            replaced_uids = [ uid for uid in range( old_n ) if old_hotkeys[ uid ] != self.hotkeys[ uid ] ]
+            endpoint_uids = [ uid for uid in range( old_n ) if old_table.row( uid ) != table.row( uid ) ]
+            return _change_set( block, True, list( range( old_n, n_total ) ), replaced_uids, endpoint_uids, list( range( n_total ) ) )
+
+        diff = _diff_neurons( previous, current, old_n )
+        replaced_uids, endpoint_uids, weight_uids, bond_uids, updated_uids = diff.replaced_uids, diff.endpoint_uids, diff.weight_uids, diff.bond_uids, diff.updated_uids
+        new_uids = list( range( old_n, n_total ) )
+
+        # Matrix rows, the matrices are grown with zero columns for the new uids.
+        weights = self.weights.data
+        raw_bonds = self._raw_bonds
+        if n_total > old_n:
+            weights = torch.nn.functional.pad( weights.view( old_n, old_n ), ( 0, n_total - old_n, 0, n_total - old_n ) )
+            raw_bonds = torch.nn.functional.pad( raw_bonds.view( old_n, old_n ), ( 0, n_total - old_n, 0, n_total - old_n ) )
+        for uid in weight_uids + new_uids:
+            weights[ uid ] = _weight_row( current[ uid ], n_total )
+        for uid in bond_uids + new_uids:
+            raw_bonds[ uid ] = _bond_row( current[ uid ], n_total )
+
+        self._set_vectors( block, current )
+        self.weights = torch.nn.Parameter( weights, requires_grad=False )
+        if bond_uids or new_uids:
+            self._raw_bonds = raw_bonds
+            self.bonds = torch.nn.Parameter( _normalize_bonds( raw_bonds, n_total ), requires_grad=False )
+
+        # Endpoint rows, objects already built are kept for the unchanged uids.
+        endpoint_objs = self._endpoint_objs
+        self._endpoint_table.update( [ current[ uid ] for uid in endpoint_uids + new_uids ], n_total )
+        self._set_endpoint_table( self._endpoint_table )
+        if endpoint_objs != None:
+            endpoint_objs.extend( [ None ] * len( new_uids ) )
+            for uid in endpoint_uids + new_uids:
+                endpoint_objs[ uid ] = self._endpoint_table.endpoint( uid )
+            self._endpoint_objs = endpoint_objs
+        self._neurons = current
+        return _change_set( block, False, new_uids, replaced_uids, endpoint_uids + new_uids, updated_uids + new_uids )
+
+    def changes_since( self, previous: 'Metagraph' ) -> SimpleNamespace:
+        r""" Returns the change set of sync_delta from a previous metagraph to this one, for a metagraph synced from
+            scratch which replaces the previous one.
+            Args:
+                previous: (:obj:`bittensor.Metagraph`, required):
+                    Metagraph replaced by this one.
+
+            Returns:
+                changes: (:obj:`SimpleNamespace`):
+                    Change set as returned by sync_delta, with full set to True.
+        """
+        n_total = self.n.item()
+        old_neurons = previous._neurons
+        if old_neurons != None and self._neurons != None and len( old_neurons ) <= n_total:
+            old_n = len( old_neurons )
+            diff = _diff_neurons( old_neurons, self._neurons, old_n )
+            new_uids = list( range( old_n, n_total ) )
+            return _change_set( self.block.item(), True, new_uids, diff.replaced_uids, diff.endpoint_uids + new_uids, diff.updated_uids + new_uids )
+
+        # Without the previous neurons, e.g. for a loaded state, compare the hotkeys and endpoints.
+        old_hotkeys, old_table, table = previous.hotkeys, previous.endpoint_table, self._endpoint_table
+        old_n = min( len( old_hotkeys ), n_total )
+        replaced_uids = [ uid for uid in range( old_n ) if old_hotkeys[ uid ] != self.hotkeys[ uid ] ]
+        endpoint_uids = [ uid for uid in range( old_n ) if old_table.row( uid ) != table.row( uid ) ]
+        return _change_set( self.block.item(), True, list( range( old_n, n_total ) ), replaced_uids, endpoint_uids, list( range( n_total ) ) )
+
+    def _fetch_neurons( self, block: int = None, cached: bool = True ):
+        r""" Returns the sync block and the neurons at that block, from the IPFS cache when available.
+        """
         logger.success(self.subtensor)
         if block == None:
             block = self.subtensor.get_current_block()
@@ -472,8 +819,12 @@ class Metagraph( torch.nn.Module ):
             else:
                 neurons = self.subtensor.neurons( block = block )
                 n_total = len(neurons)
+        return block, neurons
 
-        # Fill arrays.
+    def _set_vectors( self, block: int, neurons: List ):
+        r""" Sets the block, n and the per neuron vectors from the neurons ordered by uid.
+        """
+        n_total = len( neurons )
         uids = [ i for i in range(n_total) ]
         active = [ 0 for _ in range(n_total) ]
         stake = [ 0 for _ in range(n_total) ]
@@ -484,11 +835,9 @@ class Metagraph( torch.nn.Module ):
         emission = [ 0 for _ in range(n_total) ]
         dividends = [ 0 for _ in range(n_total) ]
         last_updates = [ -1 for _ in range(n_total) ]
-        endpoints = [ [-1 for _ in range(250) ]  for _ in range(n_total) ]
-        weights = [ [ 0 for _ in range(n_total) ] for _ in range(n_total) ]
-        bonds = [ [0 for _ in range(n_total) ] for _ in range(n_total) ]
-        self._endpoint_objs = [ bittensor.endpoint.dummy() for _ in range(n_total) ]
         for n in neurons:
+            if n == None:
+                continue
             uids[n.uid] = n.uid 
             active[n.uid] = n.active
             stake[n.uid] = n.stake 
@@ -499,65 +848,44 @@ class Metagraph( torch.nn.Module ):
             dividends[n.uid] = n.dividends
             emission[n.uid] = n.emission
             last_updates[n.uid] = n.last_update
-            endpoint =  bittensor.endpoint(
-                version = int(n.version),
-                uid = int(n.uid), 
-                hotkey = str(n.hotkey), 
-                ip_type = int(n.ip_type), 
-                ip = str(n.ip), 
-                port = int(n.port), 
-                modality = int(n.modality), 
-                coldkey = str(n.coldkey) 
-            )
-            self._endpoint_objs[n.uid] = endpoint 
-            endpoints[n.uid] = endpoint.to_tensor().tolist()
-            if len(n.weights) > 0:
-                w_uids, w_weights = zip(*n.weights)
-                weights[n.uid] = weight_utils.convert_weight_uids_and_vals_to_tensor( n_total, w_uids, w_weights ).tolist()
-            else:
-                weights[n.uid] = [0] * n_total
-            if len(n.bonds) > 0:
-                b_uids, b_bonds = zip(*n.bonds)
-                bonds[n.uid] = weight_utils.convert_bond_uids_and_vals_to_tensor( n_total, b_uids, b_bonds ).tolist()
-            else:
-                bonds[n.uid] = [0] * n_total
-
-        # Set tensors.
-        tn = torch.tensor( n_total, dtype=torch.int64 )
-        tblock = torch.tensor( block, dtype=torch.int64 )
-        tuids = torch.tensor( uids, dtype=torch.int64 )
-        tactive = torch.tensor( active, dtype=torch.int64 )
-        tstake = torch.tensor( stake, dtype=torch.float32 )
-        tranks = torch.tensor( ranks, dtype=torch.float32 )
-        ttrust = torch.tensor( trust, dtype=torch.float32 )
-        tconsensus = torch.tensor( consensus, dtype=torch.float32 )
-        tincentive = torch.tensor( incentive, dtype=torch.float32 )
-        temission = torch.tensor( emission, dtype=torch.float32 )
-        tdividends = torch.tensor( dividends, dtype=torch.float32 )
-        tlast_update = torch.tensor( last_updates, dtype=torch.int64 )
+
+        # Set params.
+        self.n = torch.nn.Parameter( torch.tensor( n_total, dtype=torch.int64 ), requires_grad=False )
+        self.block = torch.nn.Parameter( torch.tensor( block, dtype=torch.int64 ), requires_grad=False )
+        self.uids = torch.nn.Parameter( torch.tensor( uids, dtype=torch.int64 ), requires_grad=False )
+        self.stake = torch.nn.Parameter( torch.tensor( stake, dtype=torch.float32 ), requires_grad=False )
+        self.ranks = torch.nn.Parameter( torch.tensor( ranks, dtype=torch.float32 ), requires_grad=False )
+        self.trust = torch.nn.Parameter( torch.tensor( trust, dtype=torch.float32 ), requires_grad=False )
+        self.consensus = torch.nn.Parameter( torch.tensor( consensus, dtype=torch.float32 ), requires_grad=False )
+        self.incentive = torch.nn.Parameter( torch.tensor( incentive, dtype=torch.float32 ), requires_grad=False )
+        self.emission = torch.nn.Parameter( torch.tensor( emission, dtype=torch.float32 ), requires_grad=False )
+        self.dividends = torch.nn.Parameter( torch.tensor( dividends, dtype=torch.float32 ), requires_grad=False )
+        self.active = torch.nn.Parameter( torch.tensor( active, dtype=torch.int64 ), requires_grad=False )
+        self.last_update = torch.nn.Parameter( torch.tensor( last_updates, dtype=torch.int64 ), requires_grad=False )
+
+    def _set_neurons( self, block: int, neurons: List ) -> 'Metagraph':
+        r""" Rebuilds the whole state from the neurons.
+        """
+        n_total = len(neurons)
+        neurons_by_uid = _neurons_by_uid( neurons, n_total )
+        weights = [ [ 0 for _ in range(n_total) ] for _ in range(n_total) ]
+        bonds = [ [0 for _ in range(n_total) ] for _ in range(n_total) ]
+        for n in neurons:
+            weights[n.uid] = _weight_row( n, n_total ).tolist()
+            bonds[n.uid] = _bond_row( n, n_total ).tolist()
         tbonds = torch.tensor( bonds, dtype=torch.int64 )
         tweights = torch.tensor( weights, dtype=torch.float32 )
-        tendpoints = torch.tensor( endpoints, dtype=torch.int64 )
-
-        # Normalize bond ownership.
-        tbonds = torch.nn.functional.normalize( tbonds.float(), p=1, dim=0, eps=1e-12 ) * 0.5 + torch.eye( tn ) * 0.5
 
         # Set params.
-        self.n = torch.nn.Parameter( tn, requires_grad=False )
-        self.block = torch.nn.Parameter( tblock, requires_grad=False )
-        self.uids = torch.nn.Parameter( tuids, requires_grad=False )
-        self.stake = torch.nn.Parameter( tstake, requires_grad=False )
-        self.ranks = torch.nn.Parameter( tranks, requires_grad=False )
-        self.trust = torch.nn.Parameter( ttrust, requires_grad=False )
-        self.consensus = torch.nn.Parameter( tconsensus, requires_grad=False )
-        self.incentive = torch.nn.Parameter( tincentive, requires_grad=False )
-        self.emission = torch.nn.Parameter( temission, requires_grad=False )
-        self.dividends = torch.nn.Parameter( tdividends, requires_grad=False )
-        self.active = torch.nn.Parameter( tactive, requires_grad=False )
-        self.last_update = torch.nn.Parameter( tlast_update, requires_grad=False )
+        self._set_vectors( block, neurons_by_uid )
         self.weights = torch.nn.Parameter( tweights, requires_grad=False )
-        self.bonds = torch.nn.Parameter( tbonds, requires_grad=False )
-        self.endpoints = torch.nn.Parameter( tendpoints, requires_grad=False )
+        self.bonds = torch.nn.Parameter( _normalize_bonds( tbonds, n_total ), requires_grad=False )
+        self._set_endpoint_table( EndpointTable.from_neurons( neurons, n_total ) )
+        self._sparse_state = {}
+
+        # Kept for sync_delta.
+        self._raw_bonds = tbonds
+        self._neurons = neurons_by_uid
             
         # For contructor.
         return self
@@ -20,12 +20,14 @@
 
 import os
 
+from types import SimpleNamespace
 from typing import List
 from loguru import logger
 
 import pandas
 import torch
 from . import metagraph_impl
+from .endpoint_table import EndpointTable
 import bittensor
 import bittensor.utils.networking as net
 
@@ -54,8 +56,6 @@ class MockMetagraph( metagraph_impl.Metagraph ):
         tlast_update = torch.tensor( [0 for _ in range (2000) ], dtype=torch.int64 )
         tbonds = torch.tensor( [ [1 for _ in range (2000) ] for _ in range (2000) ], dtype=torch.int64 )
         tweights = torch.tensor( [ [1.0/2000 for _ in range (2000) ] for _ in range (2000) ], dtype=torch.float32 )
-        self._endpoint_objs = [ bittensor.endpoint.dummy() for _ in range (2000) ]
-        tendpoints = torch.tensor( [ end.to_tensor().tolist() for end in self._endpoint_objs ], dtype=torch.int64 )
         self.n = torch.nn.Parameter( tn, requires_grad=False )
         self.block = torch.nn.Parameter( tblock, requires_grad=False )
         self.uids = torch.nn.Parameter( tuids, requires_grad=False )
@@ -70,7 +70,7 @@ class MockMetagraph( metagraph_impl.Metagraph ):
         self.last_update = torch.nn.Parameter( tlast_update, requires_grad=False )
         self.weights = torch.nn.Parameter( tweights, requires_grad=False )
         self.bonds = torch.nn.Parameter( tbonds, requires_grad=False )
-        self.endpoints = torch.nn.Parameter( tendpoints, requires_grad=False )
+        self._set_endpoint_table( EndpointTable.from_neurons( [], 2000 ) )
 
         print("---- MOCKED METAGRAPH INITIALIZED ----")
 
@@ -92,9 +92,10 @@ class MockMetagraph( metagraph_impl.Metagraph ):
         self.last_update = torch.nn.Parameter(  torch.tensor( [], dtype=torch.int64), requires_grad=False )
         self.weights = torch.nn.Parameter(  torch.tensor( [], dtype=torch.float32), requires_grad=False )
         self.bonds = torch.nn.Parameter(  torch.tensor( [], dtype=torch.int64), requires_grad=False )
-        self.endpoints = torch.nn.Parameter( torch.tensor( [], dtype=torch.int64), requires_grad=False )
         self.uids = torch.nn.Parameter( torch.tensor([], dtype = torch.int64),requires_grad=False )
-        self._endpoint_objs = None
+        self._set_endpoint_table( EndpointTable.from_neurons( [], 0 ) )
+        self._neurons = None
+        self._raw_bonds = None
         return self
 
     def load( self, network:str = None  ) -> 'Metagraph':
@@ -127,4 +128,7 @@ class MockMetagraph( metagraph_impl.Metagraph ):
         return self.save_to_path( path = '~/.bittensor/', filename = 'mock.pt')
 
     def sync ( self, block: int = None, cached: bool = True ) -> 'Metagraph':
-        return self
\ No newline at end of file
+        return self
+
+    def sync_delta ( self, block: int = None, cached: bool = True ) -> SimpleNamespace:
+        return metagraph_impl._change_set( self.block.item(), False, [], [], [], [] )
\ No newline at end of file
@@ -0,0 +1,162 @@
+""" Background metagraph refresher.
+"""
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import threading
+import time
+from types import SimpleNamespace
+from typing import Callable
+
+from loguru import logger
+
+import bittensor
+from bittensor._subtensor import subtensor_inprocess
+from . import metagraph_impl
+
+def _own_connection( subtensor: 'bittensor.Subtensor' ) -> 'bittensor.Subtensor':
+    # The in process chain locks its own state and is shared, other chains are reconnected to.
+    if isinstance( subtensor, subtensor_inprocess.InProcessSubtensor ):
+        return subtensor
+    return bittensor.subtensor( network = subtensor.network, chain_endpoint = subtensor.chain_endpoint )
+
+class MetagraphRefresher:
+    r""" Syncs the metagraph on a background thread and publishes each sync as a new metagraph.
+
+        Every sync builds a new metagraph, which is then published by swapping a single reference. Published
+        metagraphs are never written to again, so readers that hold one, like the axon blacklist and priority
+        callbacks, see a consistent graph without locking and never wait on the chain. Readers should fetch
+        refresher.metagraph once per use rather than once per attribute.
+
+        The substrate websocket connection is not thread safe, the refresher syncs over its own subtensor connection
+        rather than the one of the main loop.
+
+        Examples::
+            >>> refresher = bittensor.MetagraphRefresher( metagraph, blocks = 100 ).start()
+            >>> uid = refresher.metagraph.hotkey_to_uid( pubkey )
+            >>> refresher.stop()
+    """
+    def __init__(
+            self,
+            metagraph: 'bittensor.Metagraph',
+            blocks: int = 100,
+            poll_interval: float = None,
+            on_refresh: Callable = None,
+            subtensor: 'bittensor.Subtensor' = None,
+        ):
+        r""" Initializes the refresher.
+            Args:
+                metagraph (:obj:`bittensor.Metagraph`, `required`):
+                    First published metagraph.
+                blocks (:type:`int`, `optional`):
+                    Number of blocks between syncs.
+                poll_interval (:type:`float`, `optional`):
+                    Seconds between reads of the current block, defaults to the block time.
+                on_refresh (:obj:`Callable`, `optional`):
+                    Called from the refresher thread with the new metagraph and the change set of sync_delta
+                    after each publication.
+                subtensor (:obj:`bittensor.Subtensor`, `optional`):
+                    Connection used for the syncs, not to be shared with other threads. Defaults to a new connection
+                    to the chain endpoint of the metagraph subtensor.
+        """
+        self._metagraph = metagraph
+        self.subtensor = subtensor if subtensor != None else _own_connection( metagraph.subtensor )
+        self.blocks = blocks
+        self.poll_interval = bittensor.__blocktime__ if poll_interval == None else poll_interval
+        self.on_refresh = on_refresh
+        self.stats = SimpleNamespace(
+            refreshes = 0,
+            failures = 0,
+            last_block = metagraph.block.item(),
+            last_duration = 0.0,
+        )
+        self._refresh_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def __str__( self ) -> str:
+        return "MetagraphRefresher({}, {})".format( self.blocks, self.stats.last_block )
+
+    def __repr__( self ) -> str:
+        return self.__str__()
+
+    def __enter__( self ) -> 'MetagraphRefresher':
+        return self.start()
+
+    def __exit__( self, exc_type, exc_value, exc_traceback ):
+        self.stop()
+
+    @property
+    def metagraph( self ) -> 'bittensor.Metagraph':
+        r""" Returns the last published metagraph.
+        """
+        return self._metagraph
+
+    @property
+    def is_running( self ) -> bool:
+        return self._thread != None and self._thread.is_alive()
+
+    def start( self ) -> 'MetagraphRefresher':
+        r""" Starts the refresher thread, does nothing if it is running.
+        """
+        if not self.is_running:
+            self._stop_event.clear()
+            self._thread = threading.Thread( target = self._run, name = 'metagraph_refresher', daemon = True )
+            self._thread.start()
+        return self
+
+    def stop( self, timeout: float = None ):
+        r""" Stops the refresher thread, waiting for a sync in progress up to timeout seconds.
+        """
+        self._stop_event.set()
+        if self._thread != None:
+            self._thread.join( timeout )
+            self._thread = None
+
+    def refresh( self, block: int = None ) -> SimpleNamespace:
+        r""" Syncs a new metagraph and publishes it, on the calling thread.
+            Args:
+                block (:type:`int`, `optional`):
+                    Block to sync at, defaults to the current block.
+
+            Returns:
+                changes (:obj:`SimpleNamespace`):
+                    Change set of Metagraph.sync_delta against the previously published metagraph.
+        """
+        with self._refresh_lock:
+            start_time = time.time()
+            metagraph = metagraph_impl.Metagraph( subtensor = self.subtensor ).sync( block = block )
+            changes = metagraph.changes_since( self._metagraph )
+            # The swap is a single reference assignment, readers see the old or the new graph.
+            self._metagraph = metagraph
+            self.stats.refreshes += 1
+            self.stats.last_block = changes.block
+            self.stats.last_duration = time.time() - start_time
+        if self.on_refresh != None:
+            self.on_refresh( metagraph, changes )
+        return changes
+
+    def _run( self ):
+        while not self._stop_event.wait( self.poll_interval ):
+            try:
+                current_block = self.subtensor.get_current_block()
+                if current_block - self.stats.last_block >= self.blocks:
+                    self.refresh()
+            except Exception as e:
+                # Keep serving the last published graph and retry on the next poll.
+                self.stats.failures += 1
+                logger.exception( 'Metagraph refresh failed: {}', e )
@@ -0,0 +1,245 @@
+""" Memory mapped metagraph snapshots.
+"""
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import json
+import os
+import shutil
+import time
+from types import SimpleNamespace
+from typing import Dict, Tuple
+
+import numpy as np
+import torch
+
+SNAPSHOT_FORMAT = 'bittensor.metagraph.snapshot'
+SNAPSHOT_VERSION = 2
+# Version 1 snapshots have no columns section.
+SUPPORTED_VERSIONS = [ 1, 2 ]
+HEADER = 'header.json'
+
+# Snapshots are published as versioned directories next to the path, which is a symlink to the current one.
+VERSION_MARK = '.v'
+# Seconds a replaced version is kept for the processes still reading or publishing it.
+CLEANUP_GRACE = 60
+
+# Matrices stored as compressed sparse rows, the other state is stored as raw dense arrays.
+SPARSE = [ 'weights', 'bonds' ]
+
+def is_snapshot( path: str ) -> bool:
+    r""" Returns True if the path is a snapshot directory.
+    """
+    return os.path.isfile( os.path.join( os.path.expanduser( path ), HEADER ) )
+
+def _write_array( directory: str, name: str, array: np.ndarray ) -> dict:
+    filename = name + '.bin'
+    np.ascontiguousarray( array ).tofile( os.path.join( directory, filename ) )
+    return { 'file': filename, 'dtype': array.dtype.str, 'shape': list( array.shape ) }
+
+def _read_array( directory: str, entry: dict ) -> np.ndarray:
+    dtype = np.dtype( entry['dtype'] )
+    shape = tuple( entry['shape'] )
+    if int( np.prod( shape ) ) == 0:
+        return np.zeros( shape, dtype = dtype )
+    # Copy on write private mapping: pages are shared with the page cache until written to.
+    array = np.memmap( os.path.join( directory, entry['file'] ), dtype = dtype, mode = 'c', shape = shape if len( shape ) > 0 else ( 1, ) )
+    return array.reshape( shape )
+
+def write_snapshot( path: str, dense: Dict[str, torch.Tensor], sparse: Dict[str, SimpleNamespace] = {}, columns: Dict[str, np.ndarray] = {}, metadata: dict = {} ):
+    r""" Writes the tensors as a snapshot directory: one raw array file per tensor and a json header.
+        The 2d tensors named in SPARSE are stored as compressed sparse rows. The snapshot is written to the
+        versioned directory <path>.v<time>-<pid>, then published by atomically replacing the symlink at path.
+        Concurrent saves to the same path never fail: the newest version wins and an older save which loses
+        the race is dropped. Processes with an old version mapped keep reading it.
+
+        Args:
+            path (:type:`str`, `required`):
+                Snapshot directory.
+            dense (:obj:`Dict[str, torch.Tensor]`, `required`):
+                Tensors by name.
+            sparse (:obj:`Dict[str, SimpleNamespace]`, `optional`):
+                Matrices already in compressed sparse rows, with indptr, indices, values and shape.
+            columns (:obj:`Dict[str, np.ndarray]`, `optional`):
+                Numpy arrays by name, for the columns torch has no dtype for, such as fixed width bytes.
+            metadata (:obj:`dict`, `optional`):
+                Json serializable values added to the header.
+    """
+    path = os.path.expanduser( path ).rstrip( os.sep )
+    parent = os.path.dirname( path ) or '.'
+    os.makedirs( parent, exist_ok = True )
+    version = '{}{}{}-{}'.format( path, VERSION_MARK, time.time_ns(), os.getpid() )
+    link = '{}.link-{}'.format( path, os.getpid() )
+    try:
+        _write_version( version, dense, sparse, columns, metadata )
+        if _version_time( _current_version( path ) ) > _version_time( version ):
+            # A newer save was published while this one was written.
+            shutil.rmtree( version, ignore_errors = True )
+        else:
+            _publish( path, version, link )
+    except BaseException:
+        shutil.rmtree( version, ignore_errors = True )
+        raise
+    finally:
+        if os.path.lexists( link ):
+            os.remove( link )
+    _cleanup( path )
+
+def _write_version( staging: str, dense: Dict[str, torch.Tensor], sparse: Dict[str, SimpleNamespace], columns: Dict[str, np.ndarray], metadata: dict ):
+    os.makedirs( staging )
+
+    arrays = {}
+    matrices = {}
+    for name, tensor in dense.items():
+        tensor = tensor.detach().cpu()
+        if name in SPARSE and tensor.dim() == 2:
+            sparse = { **sparse, name: to_csr( tensor ) }
+        else:
+            arrays[ name ] = _write_array( staging, name, tensor.numpy() )
+    for name, csr in sparse.items():
+        matrices[ name ] = {
+            'shape': list( csr.shape ),
+            'indptr': _write_array( staging, name + '.indptr', csr.indptr ),
+            'indices': _write_array( staging, name + '.indices', csr.indices ),
+            'values': _write_array( staging, name + '.values', csr.values ),
+        }
+    header = {
+        'format': SNAPSHOT_FORMAT,
+        'version': SNAPSHOT_VERSION,
+        'timestamp': time.time(),
+        'metadata': metadata,
+        'arrays': arrays,
+        'sparse': matrices,
+        'columns': { name: _write_array( staging, name, array ) for name, array in columns.items() },
+    }
+    with open( os.path.join( staging, HEADER ), 'w' ) as file:
+        json.dump( header, file, indent = 2 )
+
+def _version_time( version: str ) -> int:
+    # Returns the time in the name of a versioned directory, -1 for anything else.
+    if version == None:
+        return -1
+    name = os.path.basename( version )
+    mark = name.rfind( VERSION_MARK )
+    try:
+        return int( name[ mark + len( VERSION_MARK ): ].split( '-' )[0] ) if mark >= 0 else -1
+    except ValueError:
+        return -1
+
+def _current_version( path: str ) -> str:
+    # Returns the versioned directory the path links to, or None.
+    if not os.path.islink( path ):
+        return None
+    return os.path.join( os.path.dirname( path ), os.readlink( path ) )
+
+def _publish( path: str, version: str, link: str ):
+    if os.path.lexists( link ):
+        os.remove( link )
+    os.symlink( os.path.basename( version ), link )
+    if os.path.isdir( path ) and not os.path.islink( path ):
+        # Snapshot written before versioning, moved aside once, by whichever process gets there first.
+        try:
+            os.rename( path, '{}.old-{}'.format( path, os.getpid() ) )
+        except FileNotFoundError:
+            pass
+    # Atomic, readers see the previous version or this one.
+    os.replace( link, path )
+
+def _cleanup( path: str ):
+    r""" Removes the versions older than the published one and the directories left by failed or pre versioning
+        saves, once they are older than CLEANUP_GRACE.
+    """
+    parent, base = os.path.split( path )
+    current = _current_version( path )
+    current_time = _version_time( current )
+    deadline = time.time() - CLEANUP_GRACE
+    for name in os.listdir( parent or '.' ):
+        if not name.startswith( base + '.' ):
+            continue
+        entry = os.path.join( parent, name )
+        if current != None and os.path.basename( current ) == name:
+            continue
+        if name.startswith( base + VERSION_MARK ):
+            if _version_time( entry ) >= current_time:
+                continue
+        elif not any( name.startswith( base + suffix ) for suffix in ( '.tmp-', '.old-', '.link-' ) ):
+            continue
+        try:
+            if os.lstat( entry ).st_mtime > deadline:
+                continue
+            if os.path.islink( entry ) or not os.path.isdir( entry ):
+                os.remove( entry )
+            else:
+                shutil.rmtree( entry, ignore_errors = True )
+        except FileNotFoundError:
+            pass
+
+def read_snapshot( path: str ) -> Tuple[ Dict[str, torch.Tensor], Dict[str, SimpleNamespace], Dict[str, np.ndarray], dict ]:
+    r""" Maps the snapshot directory, nothing is read until the tensors are used.
+
+        Args:
+            path (:type:`str`, `required`):
+                Snapshot directory.
+
+        Returns:
+            dense (:obj:`Dict[str, torch.Tensor]`):
+                Tensors by name, backed by copy on write mappings of the array files.
+            sparse (:obj:`Dict[str, SimpleNamespace]`):
+                Compressed sparse rows matrices by name, with indptr, indices, values and shape.
+            columns (:obj:`Dict[str, np.ndarray]`):
+                Numpy arrays by name, empty for version 1 snapshots.
+            metadata (:obj:`dict`):
+                Metadata of the header.
+
+        Raises:
+            ValueError:
+                If the directory is not a snapshot of a supported version.
+    """
+    # Resolved once, the header and the arrays are read from the same version.
+    path = os.path.realpath( os.path.expanduser( path ) )
+    with open( os.path.join( path, HEADER ) ) as file:
+        header = json.load( file )
+    if header.get( 'format' ) != SNAPSHOT_FORMAT or header.get( 'version' ) not in SUPPORTED_VERSIONS:
+        raise ValueError( 'Unsupported metagraph snapshot {} version {} at {}'.format( header.get( 'format' ), header.get( 'version' ), path ) )
+    dense = { name: torch.from_numpy( _read_array( path, entry ) ) for name, entry in header['arrays'].items() }
+    sparse = {
+        name: SimpleNamespace(
+            indptr = _read_array( path, entry['indptr'] ),
+            indices = _read_array( path, entry['indices'] ),
+            values = _read_array( path, entry['values'] ),
+            shape = tuple( entry['shape'] ),
+        ) for name, entry in header['sparse'].items()
+    }
+    columns = { name: _read_array( path, entry ) for name, entry in header.get( 'columns', {} ).items() }
+    return dense, sparse, columns, header['metadata']
+
+def to_csr( tensor: torch.Tensor ) -> SimpleNamespace:
+    r""" Returns the compressed sparse rows of the 2d tensor, with indptr, indices, values and shape.
+    """
+    array = tensor.numpy()
+    rows, columns = np.nonzero( array )
+    indptr = np.zeros( array.shape[0] + 1, dtype = np.int64 )
+    np.cumsum( np.bincount( rows, minlength = array.shape[0] ), out = indptr[1:] )
+    return SimpleNamespace( indptr = indptr, indices = columns.astype( np.int64 ), values = array[ rows, columns ], shape = array.shape )
+
+def to_dense( csr: SimpleNamespace ) -> torch.Tensor:
+    r""" Returns the compressed sparse rows matrix as a dense tensor.
+    """
+    dense = np.zeros( csr.shape, dtype = csr.values.dtype )
+    rows = np.repeat( np.arange( csr.shape[0] ), np.diff( csr.indptr ) )
+    dense[ rows, csr.indices ] = csr.values
+    return torch.from_numpy( dense )
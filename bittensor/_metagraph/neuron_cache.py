@@ -0,0 +1,369 @@
+""" Columnar neuron cache, published on IPFS and kept on local disk.
+"""
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import fcntl
+import hashlib
+import json
+import os
+import re
+import struct
+import zlib
+from types import SimpleNamespace
+from typing import Dict, List, Tuple
+
+import numpy as np
+from loguru import logger
+
+import bittensor
+from .endpoint_table import split_ip, join_ip
+
+# File layout: MAGIC, the header length as a little endian u32, the json header, then the zlib compressed columns.
+MAGIC = b'BTNEURON'
+FORMAT = 'bittensor.neurons'
+VERSION = 1
+EXTENSION = '.neurons'
+
+# Largest decompressed size accepted, above the columns of a fully connected 4096 uid graph.
+MAX_SIZE = 1 << 30
+
+# Only plain numeric and fixed width bytes columns are accepted, nothing that numpy would build objects for.
+SAFE_KINDS = 'biufS'
+
+class UnsupportedNeuronCache( ValueError ):
+    r""" The content is not a neuron cache file of a supported format and version, it never will be.
+    """
+
+INT_FIELDS = [ 'uid', 'active', 'version', 'modality', 'port', 'priority', 'ip_type', 'last_update' ]
+FLOAT_FIELDS = [ 'stake', 'rank', 'trust', 'consensus', 'incentive', 'dividends', 'emission' ]
+KEY_FIELDS = [ 'hotkey', 'coldkey' ]
+EDGE_FIELDS = [ 'weights', 'bonds' ]
+
+def encode_neurons( neurons: List[SimpleNamespace], block: int ) -> bytes:
+    r""" Encodes the neurons as a compressed columnar buffer with a checksummed header.
+        Args:
+            neurons (:obj:`List[SimpleNamespace]`, `required`):
+                Neurons as returned by subtensor.neurons().
+            block (:type:`int`, `required`):
+                Block of the neurons.
+
+        Returns:
+            buffer (:obj:`bytes`):
+                The encoded neurons.
+    """
+    columns = {}
+    for field in INT_FIELDS:
+        columns[ field ] = np.array( [ int( getattr( neuron, field ) ) for neuron in neurons ], dtype = np.int64 )
+    for field in FLOAT_FIELDS:
+        columns[ field ] = np.array( [ float( getattr( neuron, field ) ) for neuron in neurons ], dtype = np.float64 )
+    for field in KEY_FIELDS:
+        columns[ field ] = np.array( [ str( getattr( neuron, field ) ).encode() for neuron in neurons ], dtype = 'S48' )
+    columns[ 'is_null' ] = np.array( [ bool( getattr( neuron, 'is_null', False ) ) for neuron in neurons ], dtype = np.bool_ )
+    ips = [ split_ip( int( neuron.ip ) ) for neuron in neurons ]
+    columns[ 'ip_high' ] = np.array( [ high for high, _ in ips ], dtype = np.int64 )
+    columns[ 'ip_low' ] = np.array( [ low for _, low in ips ], dtype = np.int64 )
+    for field in EDGE_FIELDS:
+        # Ragged rows of ( uid, value ) pairs, as compressed sparse rows.
+        edges = [ getattr( neuron, field ) for neuron in neurons ]
+        columns[ field + '.indptr' ] = np.cumsum( [ 0 ] + [ len( row ) for row in edges ], dtype = np.int64 )
+        columns[ field + '.uids' ] = np.array( [ int( uid ) for row in edges for uid, _ in row ], dtype = np.int64 )
+        columns[ field + '.values' ] = np.array( [ int( value ) for row in edges for _, value in row ], dtype = np.int64 )
+
+    entries = {}
+    chunks = []
+    offset = 0
+    for name, array in columns.items():
+        data = np.ascontiguousarray( array ).tobytes()
+        entries[ name ] = { 'dtype': array.dtype.str, 'shape': list( array.shape ), 'offset': offset, 'nbytes': len( data ) }
+        chunks.append( data )
+        offset += len( data )
+    payload = zlib.compress( b''.join( chunks ) )
+    header = json.dumps( {
+        'format': FORMAT,
+        'version': VERSION,
+        'block': int( block ),
+        'n': len( neurons ),
+        'compression': 'zlib',
+        'size': offset,
+        'payload_size': len( payload ),
+        'sha256': hashlib.sha256( payload ).hexdigest(),
+        'columns': entries,
+    } ).encode()
+    return MAGIC + struct.pack( '<I', len( header ) ) + header + payload
+
+def _read_header( buffer: bytes ) -> Tuple[ dict, int ]:
+    if buffer[ :len( MAGIC ) ] != MAGIC[ :len( buffer ) ]:
+        raise UnsupportedNeuronCache( 'Not a neuron cache file' )
+    start = len( MAGIC ) + 4
+    if len( buffer ) < start:
+        raise ValueError( 'Truncated neuron cache header' )
+    length, = struct.unpack( '<I', buffer[ len( MAGIC ):start ] )
+    if len( buffer ) < start + length:
+        raise ValueError( 'Truncated neuron cache header' )
+    try:
+        header = json.loads( buffer[ start:start + length ].decode() )
+    except ValueError as e:
+        raise UnsupportedNeuronCache( 'Neuron cache header is not json: {}'.format( e ) )
+    if not isinstance( header, dict ):
+        raise UnsupportedNeuronCache( 'Neuron cache header is not an object' )
+    if header.get( 'format' ) != FORMAT or header.get( 'version' ) != VERSION:
+        raise UnsupportedNeuronCache( 'Unsupported neuron cache {} version {}'.format( header.get( 'format' ), header.get( 'version' ) ) )
+    return header, start + length
+
+def decode_neurons( buffer: bytes ) -> Tuple[ int, List[SimpleNamespace] ]:
+    r""" Decodes neurons encoded by encode_neurons, after checking the checksum and the column bounds.
+        Args:
+            buffer (:obj:`bytes`, `required`):
+                The encoded neurons.
+
+        Returns:
+            block (:type:`int`):
+                Block of the neurons.
+            neurons (:obj:`List[SimpleNamespace]`):
+                Neurons with the fields of subtensor.neurons().
+
+        Raises:
+            ValueError:
+                If the buffer is not a supported neuron cache, is truncated or fails its checksum.
+    """
+    header, start = _read_header( buffer )
+    payload = buffer[ start: ]
+    if len( payload ) != header[ 'payload_size' ] or hashlib.sha256( payload ).hexdigest() != header[ 'sha256' ]:
+        raise ValueError( 'Neuron cache checksum mismatch' )
+    if not 0 <= header[ 'size' ] <= MAX_SIZE:
+        raise ValueError( 'Neuron cache size {} out of bounds'.format( header[ 'size' ] ) )
+    # Bounded by the size of the header, a payload which inflates further is rejected.
+    decompressor = zlib.decompressobj()
+    try:
+        data = decompressor.decompress( payload, header[ 'size' ] )
+    except zlib.error as e:
+        raise ValueError( 'Neuron cache payload is not zlib: {}'.format( e ) )
+    if len( data ) != header[ 'size' ] or decompressor.unconsumed_tail or not decompressor.eof:
+        raise ValueError( 'Neuron cache size mismatch' )
+
+    columns = {}
+    for name, entry in header[ 'columns' ].items():
+        dtype = np.dtype( entry[ 'dtype' ] )
+        if dtype.kind not in SAFE_KINDS:
+            raise ValueError( 'Unsupported neuron cache column {} of dtype {}'.format( name, dtype ) )
+        count = int( np.prod( entry[ 'shape' ] ) )
+        if entry[ 'offset' ] < 0 or entry[ 'offset' ] + count * dtype.itemsize > len( data ) or count * dtype.itemsize != entry[ 'nbytes' ]:
+            raise ValueError( 'Neuron cache column {} out of bounds'.format( name ) )
+        columns[ name ] = np.frombuffer( data, dtype = dtype, count = count, offset = entry[ 'offset' ] ).reshape( entry[ 'shape' ] )
+
+    n = header[ 'n' ]
+    lists = { name: column.tolist() for name, column in columns.items() }
+    neurons = []
+    for i in range( n ):
+        neuron = SimpleNamespace()
+        for field in INT_FIELDS + FLOAT_FIELDS:
+            setattr( neuron, field, lists[ field ][ i ] )
+        for field in KEY_FIELDS:
+            setattr( neuron, field, lists[ field ][ i ].decode() )
+        neuron.is_null = lists[ 'is_null' ][ i ]
+        neuron.ip = join_ip( lists[ 'ip_high' ][ i ], lists[ 'ip_low' ][ i ] )
+        for field in EDGE_FIELDS:
+            begin, end = lists[ field + '.indptr' ][ i ], lists[ field + '.indptr' ][ i + 1 ]
+            setattr( neuron, field, [ [ uid, value ] for uid, value in zip( lists[ field + '.uids' ][ begin:end ], lists[ field + '.values' ][ begin:end ] ) ] )
+        neurons.append( neuron )
+    return header[ 'block' ], neurons
+
+def _atomic_write( path: str, data: bytes ):
+    staging = '{}.tmp-{}'.format( path, os.getpid() )
+    with open( staging, 'wb' ) as file:
+        file.write( data )
+    os.replace( staging, path )
+
+def write_neurons( path: str, neurons: List[SimpleNamespace], block: int ) -> str:
+    r""" Encodes the neurons into a file, as published to IPFS under the name neurons_file_name( block ).
+    """
+    path = os.path.expanduser( path )
+    _atomic_write( path, encode_neurons( neurons, block ) )
+    return path
+
+def _is_running( pid: str ) -> bool:
+    try:
+        os.kill( int( pid ), 0 )
+    except ( ValueError, ProcessLookupError ):
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def neurons_file_name( block: int, network: str = 'nakamoto' ) -> str:
+    return '{}-{}{}'.format( network, block, EXTENSION )
+
+class NeuronCache:
+    r""" Fetches the neurons published on IPFS and keeps them on disk, one verified file per block.
+
+        Files are written atomically, so processes sharing the cache directory reuse each other's downloads.
+        An index maps blocks to IPFS hashes for historical lookups, and resolved IPFS hashes to blocks so that
+        an unchanged latest sync is not downloaded again. IPFS hashes which are not neuron cache files, e.g. legacy
+        pickles, are recorded as rejected and never fetched again. Downloads are streamed, stopped after the first
+        bytes of a file of another format, and resumed after an interruption.
+    """
+    def __init__( self, ipfs: 'bittensor.Ipfs' = None, root: str = '~/.bittensor/neuron_cache', network: str = 'nakamoto' ):
+        r""" Initializes the cache.
+            Args:
+                ipfs (:obj:`bittensor.Ipfs`, `optional`):
+                    IPFS connection, defaults to the opentensor gateway.
+                root (:type:`str`, `optional`):
+                    Cache directory.
+                network (:type:`str`, `optional`):
+                    Network of the published neurons.
+        """
+        self.ipfs = ipfs if ipfs != None else bittensor.Ipfs()
+        self.network = network
+        self.root = os.path.join( os.path.expanduser( root ), network )
+        os.makedirs( os.path.join( self.root, 'blocks' ), exist_ok = True )
+        os.makedirs( os.path.join( self.root, 'downloads' ), exist_ok = True )
+
+    def block_path( self, block: int ) -> str:
+        return os.path.join( self.root, 'blocks', '{}{}'.format( block, EXTENSION ) )
+
+    def load_index( self ) -> dict:
+        r""" Returns the index, with the historical directory hash, block to hash and hash to block maps.
+        """
+        try:
+            with open( os.path.join( self.root, 'index.json' ) ) as file:
+                return json.load( file )
+        except ( OSError, ValueError ):
+            return { 'directory': None, 'blocks': {}, 'hashes': {}, 'rejected': {} }
+
+    def _update_index( self, directory: str = None, blocks: Dict[str, str] = {}, hashes: Dict[str, int] = {}, rejected: Dict[str, str] = {} ):
+        # Merge into the index on disk under a file lock, other processes may be adding entries.
+        with open( os.path.join( self.root, 'index.lock' ), 'w' ) as lock:
+            fcntl.flock( lock, fcntl.LOCK_EX )
+            index = self.load_index()
+            if directory != None:
+                index[ 'directory' ] = directory
+            index[ 'blocks' ].update( blocks )
+            index[ 'hashes' ].update( hashes )
+            index.setdefault( 'rejected', {} ).update( rejected )
+            _atomic_write( os.path.join( self.root, 'index.json' ), json.dumps( index ).encode() )
+        return index
+
+    def read_block( self, block: int ) -> List[SimpleNamespace]:
+        r""" Returns the neurons of the block from disk, or None if the block is not cached or fails its checksum.
+        """
+        path = self.block_path( block )
+        if not os.path.exists( path ):
+            return None
+        try:
+            with open( path, 'rb' ) as file:
+                return decode_neurons( file.read() )[ 1 ]
+        except ValueError as e:
+            logger.warning( 'Dropping corrupt neuron cache {}: {}', path, e )
+            os.remove( path )
+            return None
+
+    def _part_path( self, ipfs_hash: str ) -> str:
+        r""" Returns the download file of this process for the IPFS hash, taking over the partial download of a
+            process which stopped. Partial downloads of running processes are left alone.
+        """
+        downloads = os.path.join( self.root, 'downloads' )
+        prefix = ipfs_hash + '.part-'
+        part = os.path.join( downloads, prefix + str( os.getpid() ) )
+        if not os.path.exists( part ):
+            for name in os.listdir( downloads ):
+                if name.startswith( prefix ) and not _is_running( name[ len( prefix ): ] ):
+                    try:
+                        os.replace( os.path.join( downloads, name ), part )
+                        break
+                    except OSError:
+                        # Taken over by another process.
+                        continue
+        return part
+
+    def _fetch( self, ipfs_hash: str ) -> Tuple[ int, List[SimpleNamespace] ]:
+        r""" Downloads, verifies and stores the neurons of the IPFS hash.
+            Raises:
+                ValueError:
+                    If the IPFS hash is not a neuron cache file, is truncated or fails its checksum. A truncated
+                    download is kept and resumed by the next call.
+        """
+        rejected = self.load_index().get( 'rejected', {} )
+        if ipfs_hash in rejected:
+            raise ValueError( 'Rejected neuron cache {}: {}'.format( ipfs_hash, rejected[ ipfs_hash ] ) )
+        part = self._part_path( ipfs_hash )
+        try:
+            try:
+                self.ipfs.download( ipfs_hash, part, prefix = MAGIC )
+            except ValueError as e:
+                # The content does not start with MAGIC.
+                raise UnsupportedNeuronCache( str( e ) )
+            with open( part, 'rb' ) as file:
+                buffer = file.read()
+            header, start = _read_header( buffer )
+        except UnsupportedNeuronCache as e:
+            # Content is addressed by hash, a file of another format stays one.
+            if os.path.exists( part ):
+                os.remove( part )
+            self._update_index( rejected = { ipfs_hash: str( e ) } )
+            raise
+        if len( buffer ) - start < header.get( 'payload_size', 0 ):
+            raise ValueError( 'Truncated neuron cache {}, {} of {} bytes'.format( ipfs_hash, len( buffer ), start + header[ 'payload_size' ] ) )
+        try:
+            block, neurons = decode_neurons( buffer )
+        except ValueError:
+            # Nothing to resume from a bad download.
+            os.remove( part )
+            raise
+        os.replace( part, self.block_path( block ) )
+        self._update_index( blocks = { str( block ): ipfs_hash }, hashes = { ipfs_hash: block } )
+        return block, neurons
+
+    def latest( self ) -> Tuple[ int, List[SimpleNamespace] ]:
+        r""" Returns the block and the neurons of the latest published sync.
+        """
+        ipfs_hash = self.ipfs.resolve_ipns( self.ipfs.latest_neurons_ipns )
+        block = self.load_index()[ 'hashes' ].get( ipfs_hash )
+        if block != None:
+            neurons = self.read_block( block )
+            if neurons != None:
+                return block, neurons
+        return self._fetch( ipfs_hash )
+
+    def at_block( self, block: int ) -> List[SimpleNamespace]:
+        r""" Returns the neurons of a historical block.
+            Raises:
+                KeyError:
+                    If no sync is published for the block.
+        """
+        neurons = self.read_block( block )
+        if neurons != None:
+            return neurons
+        index = self.load_index()
+        if str( block ) not in index[ 'blocks' ]:
+            index = self._refresh_historical_index()
+        if str( block ) not in index[ 'blocks' ]:
+            raise KeyError( 'No cached neurons published for block {}'.format( block ) )
+        return self._fetch( index[ 'blocks' ][ str( block ) ] )[ 1 ]
+
+    def _refresh_historical_index( self ) -> dict:
+        directory = self.ipfs.resolve_ipns( self.ipfs.historical_neurons_ipns )
+        index = self.load_index()
+        if directory == index[ 'directory' ]:
+            return index
+        pattern = re.compile( r'^{}-(\d+){}$'.format( re.escape( self.network ), re.escape( EXTENSION ) ) )
+        blocks = {}
+        for link in self.ipfs.list_directory( directory ):
+            match = pattern.match( link[ 'Name' ] )
+            if match:
+                blocks[ match.group( 1 ) ] = link[ 'Hash' ]
+        return self._update_index( directory = directory, blocks = blocks )
@@ -7,6 +7,7 @@ from transformers import AutoModel,AutoTokenizer,AutoConfig
 from torch.nn.utils.rnn import pad_sequence
 from loguru import logger; logger = logger.opt(colors=True)
 from typing import Tuple, Optional
+from ..neuron_utilities import ActivationCache
 
 class server(torch.nn.Module):
     def __init__(self, 
@@ -79,7 +80,8 @@ class server(torch.nn.Module):
         self.decoder = torch.nn.Linear( self.final_dim, bittensor.__vocab_size__ , bias=False)
         self.loss_fct = torch.nn.CrossEntropyLoss()
         
-        self.outputs_cache = None
+        # -- forward outputs kept for the backward requests on the same inputs
+        self.outputs_cache = ActivationCache( config.neuron.activation_cache.size, config.neuron.activation_cache.ttl, config.neuron.activation_cache.max_bytes )
         self.gradients_cache = None
 
         #checking if the parameters of the server makes sense
@@ -292,12 +294,19 @@ class server(torch.nn.Module):
         parser.add_argument('--neuron.finetune.all', action='store_true', help='Finetune your whole model instead of only on the last (few) layers', default=False)
         parser.add_argument('--neuron.finetune.num_layers', type=int, help='The number of layers to finetune on your model.', default=1)
         parser.add_argument('--neuron.finetune.layer_name', type=str, help='Specify since which layer to finetune. eg. encoder.layer.11', default=None)
+        parser.add_argument('--neuron.activation_cache.size', type=int, help='Maximum number of forward outputs kept with their graph for matching backward requests, 0 recomputes the forward on backward.', default=256)
+        parser.add_argument('--neuron.activation_cache.max_bytes', type=int, help='Memory budget of the cached graphs. A graph holds the activations of the finetuned layers only (--neuron.finetune.num_layers), the whole model with --neuron.finetune.all.', default=512 * 1024 * 1024)
+        parser.add_argument('--neuron.activation_cache.ttl', type=float, help='Seconds a forward output is kept for a matching backward request.', default=bittensor.__blocktime__ * 2)
+        parser.add_argument('--neuron.backward_queue.size', type=int, help='Maximum number of queued backward requests, requests over it are dropped.', default=256)
+        parser.add_argument('--neuron.backward_queue.batch_size', type=int, help='Maximum number of backward requests merged into one backward pass.', default=32)
 
         bittensor.wallet.add_args( parser )
         bittensor.axon.add_args( parser )
         bittensor.subtensor.add_args( parser )
         bittensor.logging.add_args( parser )
         bittensor.wandb.add_args(parser)
+        bittensor.prometheus.add_args( parser )
+        bittensor.profiler.add_args( parser )
         bittensor.prioritythreadpool.add_args( parser )
         bittensor.dataset.add_args( parser )
         bittensor.metagraph.add_args( parser )
@@ -35,6 +35,7 @@ from loguru import logger; logger = logger.opt(colors=True)
 from torch.nn.utils import clip_grad_norm_
 from datetime import datetime,timedelta
 from threading import Lock
+from ..neuron_utilities import ActivationCache, GradientAccumulator
 os.environ['TOKENIZERS_PARALLELISM'] = 'false'
 
 def serve( 
@@ -64,6 +65,9 @@ def serve(
     else: 
         metagraph.load().sync().save()
 
+    # Sync the metagraph in the background, the axon callbacks read the last published graph.
+    refresher = bittensor.MetagraphRefresher( metagraph, blocks = config.neuron.metagraph_sync ).start()
+
     # Instantiate the model we are going to serve on the network.
     # Creating a threading lock for updates to the model
     mutex = Lock()
@@ -78,8 +82,22 @@ def serve(
     bittensor.tokenizer() 
     timecheck = {}
 
+    # Times the request callbacks and the training step, captures are triggered with --profiler.enabled.
+    profiler = bittensor.profiler( config = config, root_dir = config.neuron.full_path )
+
+    # Backward requests are queued and merged into batched backward passes off the request path.
+    gradient_accumulator = GradientAccumulator(
+        model = gp_server,
+        mutex = mutex,
+        queue_size = config.neuron.backward_queue.size,
+        batch_size = config.neuron.backward_queue.batch_size,
+        outputs_cache = gp_server.outputs_cache
+    )
+    gradient_accumulator.start()
+
     n_topk_peer_weights = subtensor.min_allowed_weights
     # Define our forward function.
+    @profiler.timed( 'axon.forward_text' )
     def forward_text ( inputs_x ):
         r""" Forward function that is called when the axon recieves a forward request from other peers
             Args:
@@ -90,12 +108,17 @@ def serve(
                 outputs (:obj:`torch.FloatTensor`):
                     The nucleus's outputs as a torch tensor of shape [batch_size, sequence_len, __network_dim__]
         """ 
-        return gp_server.encode_forward( inputs_x.to(gp_server.device) )
+        generation = gp_server.outputs_cache.generation
+        with ActivationCache.graph_bytes() as graph:
+            outputs = gp_server.encode_forward( inputs_x.to(gp_server.device) )
+        gp_server.outputs_cache.put( ActivationCache.key( inputs_x ), outputs, generation, graph.nbytes )
+        return outputs
 
     # Define our backward function.
+    @profiler.timed( 'axon.backward_text' )
     def backward_text (inputs_x, grads_dy ):
         r"""Backwards function that is called when the axon recieves a backwards request from other peers.
-            Updates the server parameters with gradients through the chain.
+            Queues the gradients through the chain, they are applied to the server parameters at the next step.
 
             Args:
                 inputs_x ( :obj:`torch.Tensor`, `required`):
@@ -107,17 +130,8 @@ def serve(
         # -- normalized grads -- 
         grads_dy = grads_dy/(grads_dy.sum() + 0.00001)
         
-        with mutex:
-            outputs_y = gp_server.encode_forward( inputs_x.to(gp_server.device) )
-            with torch.autograd.set_detect_anomaly(True):
-                torch.autograd.backward (
-                    tensors = [ outputs_y ],
-                    grad_tensors = [ grads_dy.to(gp_server.device) ],
-                    retain_graph=True
-                )
-            logger.info('Backwards axon gradient applied')
-
-        gp_server.backward_gradients += inputs_x.size(0)
+        if gradient_accumulator.submit( inputs_x, grads_dy ):
+            gp_server.backward_gradients += inputs_x.size(0)
        
     def priority(pubkey:str, request_type:bittensor.proto.RequestType, inputs_x) -> float:
         r"""Calculates the priority on requests based on stake and size of input
@@ -131,8 +145,9 @@ def serve(
                     the request type ('FORWARD' or 'BACKWARD').
         """
         try:        
-            uid = metagraph.hotkeys.index(pubkey)
-            priority = metagraph.S[uid].item()/ sys.getsizeof(inputs_x)
+            metagraph = refresher.metagraph
+            uid = metagraph.hotkey_to_uid(pubkey)
+            priority = metagraph.S[uid].item()/ sys.getsizeof(inputs_x) if uid != -1 else 0
         
         except:
             # zero priority for those who are not registered.
@@ -148,10 +163,12 @@ def serve(
                 request_type ( bittensor.proto.RequestType, `required`):
                     the request type ('FORWARD' or 'BACKWARD').
         """
+        # One graph for all the checks of this request.
+        metagraph = refresher.metagraph
 
         def registration_check():
             # If we allow non-registered requests return False = not blacklisted.
-            is_registered = pubkey in metagraph.hotkeys
+            is_registered = metagraph.hotkey_to_uid(pubkey) != -1
             if not is_registered:
                 if config.neuron.blacklist_allow_non_registered:
                     return False
@@ -161,7 +178,9 @@ def serve(
         def stake_check() -> bool:
                 
             # Check stake.
-            uid = metagraph.hotkeys.index(pubkey)
+            uid = metagraph.hotkey_to_uid(pubkey)
+            if uid == -1:
+                raise Exception('Registration blacklist')
             if request_type == bittensor.proto.RequestType.FORWARD:
                 if metagraph.S[uid].item() < config.neuron.blacklist.stake.forward:
                     raise Exception('Stake blacklist')
@@ -176,8 +195,8 @@ def serve(
         
         def validator_check():
 
-            uid = metagraph.hotkeys.index(pubkey)
-            if (metagraph.W[uid] >0).sum() >= n_topk_peer_weights:
+            uid = metagraph.hotkey_to_uid(pubkey)
+            if uid != -1 and (metagraph.W[uid] >0).sum() >= n_topk_peer_weights:
                 return False
             raise Exception('Validator blacklist')
 
@@ -240,6 +259,14 @@ def serve(
             root_dir = config.neuron.full_path
         )
 
+    # --- Optionally serve the axon, subtensor and dataset stats to prometheus.
+    if config.prometheus.enabled:
+        prometheus = bittensor.prometheus( config = config ).register( axon = axon, subtensor = subtensor, dataset = dataset ).start()
+
+    # --- Optionally profile in place on signal or on the admin endpoint.
+    if config.profiler.enabled:
+        profiler.start()
+
     nn = subtensor.neuron_for_pubkey(wallet.hotkey.ss58_address)
 
     # --- last sync block 
@@ -278,7 +305,8 @@ def serve(
             # --- Training step.
             while end_block >= current_block:
                 if current_block != subtensor.get_current_block():
-                    loss, _ = gp_server( next( dataset ).to(gp_server.device) )
+                    with profiler.section( 'server.training_step' ):
+                        loss, _ = gp_server( next( dataset ).to(gp_server.device) )
                     if interation > 0 : 
                         losses += loss
                     else:
@@ -295,14 +323,17 @@ def serve(
             
             # --- Update parameters
             if interation != 0 or gp_server.backward_gradients != 0:
-                with mutex:
+                with mutex, profiler.section( 'server.update' ):
                     logger.info('Backpropagation Started')
                     if interation != 0:
                         losses.backward()
+                    gradient_accumulator.apply()
                     clip_grad_norm_(gp_server.parameters(), 1.0)
                     
                     optimizer.step()
                     optimizer.zero_grad()
+                    gp_server.outputs_cache.clear()
+                    axon.update_model_version()
                     logger.info('Backpropagation Successful: Model updated')
 
             nn = subtensor.neuron_for_pubkey(wallet.hotkey.ss58_address)
@@ -334,7 +365,7 @@ def serve(
                     df['uid'] = df.index
                     stats_data_table = wandb.Table( dataframe = df ) 
                     wandb_info_axon = axon.to_wandb()                
-                    wandb.log( { **wandb_data, **wandb_info_axon }, step = current_block )
+                    wandb.log( { **wandb_data, **wandb_info_axon, **profiler.to_wandb() }, step = current_block )
                     wandb.log( { 'stats': stats_data_table }, step = current_block )
                     wandb.log( { 'axon_query_times': wandb.plot.scatter( stats_data_table, "uid", "axon_query_time", title="Axon Query time by UID") } )
                     wandb.log( { 'in_weights': wandb.plot.scatter( stats_data_table, "uid", 'w_i_{}'.format(nn.uid), title="Inward weights by UID") } )
@@ -364,17 +395,21 @@ def serve(
                     logger.error('Failure setting weights on chain with error: {}', e)
 
 
-            if current_block - last_sync_block > config.neuron.metagraph_sync:
-                metagraph.sync()
-                last_sync_block = current_block
+            # Pick up the last graph published by the refresher.
+            metagraph = refresher.metagraph
 
 
     except KeyboardInterrupt:
         # --- User ended session ----
         axon.stop()
+        gradient_accumulator.stop()
         dataset.close()
         
     except Exception as e:
         # --- Unknown error ----
         logger.exception('Unknown exception: {} with traceback {}', e, traceback.format_exc())
 
+    finally:
+        # --- The refresher thread outlives the loop otherwise ----
+        refresher.stop()
+
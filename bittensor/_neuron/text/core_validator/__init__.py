@@ -110,6 +110,7 @@ class neuron:
         self.device = torch.device ( device = self.config.neuron.device )    
         self.nucleus = nucleus ( config = self.config, device = self.device, subtensor = self.subtensor ).to( self.device )
         self.dataset = bittensor.dataset ( config = self.config, batch_size = self.subtensor.validator_batch_size, block_size = self.subtensor.validator_sequence_length ) if dataset == None else dataset
+        self.profiler = bittensor.profiler ( config = self.config, root_dir = self.config.neuron.full_path )
         
         # === Create thread queue ===
         self.forward_thread_queue = ThreadQueue(num_jobs = self.config.neuron.forward_num, target = self.forward)
@@ -129,6 +130,8 @@ class neuron:
         bittensor.dataset.check_config( config )
         bittensor.dendrite.check_config( config )
         bittensor.wandb.check_config( config )
+        bittensor.prometheus.check_config( config )
+        bittensor.profiler.check_config( config )
         full_path = os.path.expanduser('{}/{}/{}/{}'.format( config.logging.logging_dir, config.wallet.name, config.wallet.hotkey, config.neuron.name ))
         config.neuron.full_path = os.path.expanduser(full_path)
         config.using_wandb = config.wandb.api_key != 'default'
@@ -161,6 +164,8 @@ class neuron:
         bittensor.logging.add_args( parser )
         bittensor.dataset.add_args( parser )
         bittensor.wandb.add_args(parser)
+        bittensor.prometheus.add_args( parser )
+        bittensor.profiler.add_args( parser )
         return bittensor.config( parser )
     
     def __del__(self):
@@ -198,15 +203,28 @@ class neuron:
                 root_dir = self.config.neuron.full_path
             )
 
+        # Optionally serve the dendrite, subtensor and dataset stats to prometheus.
+        if self.config.prometheus.enabled:
+            self.prometheus = bittensor.prometheus( config = self.config ).register(
+                dendrite = self.dendrite,
+                subtensor = self.subtensor,
+                dataset = self.dataset
+            ).start()
+
+        # Optionally profile in place on signal or on the admin endpoint.
+        if self.config.profiler.enabled:
+            self.profiler.start()
+
     def forward(self):
         r""" Run the nucleus forward request
         This function is supposed to be ran multi-threaded.
         """
-        result = self.nucleus( next(self.dataset) , self.metagraph, self.dendrite )
+        with self.profiler.section( 'validator.forward' ):
+            result = self.nucleus( next(self.dataset) , self.metagraph, self.dendrite )
                 
-        # === Backward ===
-        # Backwards gradients through model to train gating and remote endpoints.
-        (result.loss / self.config.neuron.forward_num).backward()
+            # === Backward ===
+            # Backwards gradients through model to train gating and remote endpoints.
+            (result.loss / self.config.neuron.forward_num).backward()
         return result
 
     def run ( self ):
@@ -302,7 +320,8 @@ class neuron:
             # and endpoint scores using shapely approximation of salience.
             forward_results = self.forward_thread_queue.get()
             print(f'Run\t| Got forward result in {round(time.time() - start_time, 3)}')
-            loss, scores, uids = self.nucleus.compute_shapely_scores(forward_results)
+            with self.profiler.section( 'validator.step' ):
+                loss, scores, uids = self.nucleus.compute_shapely_scores(forward_results)
             # === Scoring ===
             # Updates moving averages and history.
             self.moving_avg_scores[uids] = self.moving_avg_scores[uids]*(0.99) + scores*(0.01)
@@ -318,7 +337,7 @@ class neuron:
             print( '\nStep:', '\n\t epoch:', self.epoch, '\n\t epoch_steps:', epoch_steps, '\n\t global_steps:', self.global_step, '\n\t step_time:', step_time, '\n\t loss:', loss.item(),
                    '\n\t current_block', current_block, '\n\t blocks remaining:', current_block - start_block, '/', blocks_per_epoch, '\n')
             if self.config.using_wandb:
-                wandb.log( { 'epoch/epoch': self.epoch, 'epoch/epoch_steps': epoch_steps, 'epoch/global_steps': self.global_step, 'epoch/loss': loss.item(), 'epoch/time': step_time }, step = current_block )
+                wandb.log( { 'epoch/epoch': self.epoch, 'epoch/epoch_steps': epoch_steps, 'epoch/global_steps': self.global_step, 'epoch/loss': loss.item(), 'epoch/time': step_time, **self.profiler.to_wandb() }, step = current_block )
                 step_topk_scores, step_topk_uids = bittensor.unbiased_topk( self.moving_avg_scores, k = n_topk_peer_weights )
                 step_topk_normalized = bittensor.utils.weight_utils.normalize_max_multiple( x = step_topk_scores, multiple = max_allowed_ratio )
                 for i, w in list(zip(step_topk_uids.tolist(), step_topk_normalized.tolist()) ):
@@ -330,9 +349,10 @@ class neuron:
 
                 # === Apply gradients ===
                 # Applies local gradients to parameters.
-                clip_grad_norm_(self.nucleus.parameters(), self.config.neuron.clip_gradients)
-                self.optimizer.step()
-                self.optimizer.zero_grad()    
+                with self.profiler.section( 'validator.update' ):
+                    clip_grad_norm_(self.nucleus.parameters(), self.config.neuron.clip_gradients)
+                    self.optimizer.step()
+                    self.optimizer.zero_grad()    
                 
                 # === Get another round of forward requests ===
                 self.forward_thread_queue.resume()
@@ -370,8 +390,7 @@ class neuron:
     def metagraph_sync(self):
         r""" Syncing metagraph together with other metagraph-size related objects
         """
-        old_hotkeys = self.metagraph.hotkeys 
-        self.metagraph.sync()
+        changes = self.metagraph.sync_delta()
         
         # === Create if None
         if self.moving_avg_scores == None:
@@ -383,9 +402,7 @@ class neuron:
             self.moving_avg_scores = torch.concat([self.moving_avg_scores, torch.ones(size_incerease) * -1]) 
 
         # === Reset moving average score if uid got replaced
-        for uid, old_hotkey in enumerate(old_hotkeys):
-            if old_hotkey != self.metagraph.hotkeys[uid]:
-                self.moving_avg_scores[uid] = -1
+        self.moving_avg_scores[ changes.replaced_uids ] = -1
 class PositionalEncoding(nn.Module):
     r""" Positional Encoder which adds information based on the relative position of each token
     
@@ -580,10 +597,10 @@ class nucleus( torch.nn.Module ):
         top_k_routing_weights, routing_uids = torch.topk( noisy_routing_weights, self.config.nucleus.topk, dim=0)
 
         # === Get endpoint information for the highest scoring uids ===
-        # We index into the metagraph's endpoints and return a list of the filtered set of endpoints we wish to query.
-        # routing_endpoints: List[bittensor.endpoints]: endpoint information for filtered uids.
+        # We build the endpoint objects of the filtered set of uids we wish to query from the metagraph's endpoint table.
+        # routing_endpoints: List[bittensor.Endpoint]: endpoint information for filtered uids.
         # len(neurons) == self.config.nucleus.topk
-        routing_endpoints = [ metagraph.endpoints[ uid ] for uid in routing_uids ]
+        routing_endpoints = metagraph.endpoints_for_uids( routing_uids )
 
         # === Query the endpoints ===
         # Makes the dendrite call into the network returning the representations 
@@ -270,7 +270,9 @@ class Server:
                 request_type ( bittensor.proto.RequestType, `required`):
                     the request type ('FORWARD' or 'BACKWARD').
         """        
-        uid = self.metagraph.hotkeys.index(pubkey)
+        uid = self.metagraph.hotkey_to_uid(pubkey)
+        if uid == -1:
+            raise ValueError('{} is not registered'.format(pubkey))
         priority = self.metagraph.S[uid].item()/ sys.getsizeof(inputs_x)
 
         return priority
@@ -287,7 +289,8 @@ class Server:
         # Check for stake
         def stake_check() -> bool:
             # If we allow non-registered requests return False = not blacklisted.
-            is_registered = pubkey in self.metagraph.hotkeys
+            uid = self.metagraph.hotkey_to_uid(pubkey)
+            is_registered = uid != -1
             if not is_registered:
                 if self.config.neuron.blacklist_allow_non_registered:
                     return False
@@ -295,7 +298,6 @@ class Server:
                     return True
 
             # Check stake.
-            uid = self.metagraph.hotkeys.index(pubkey)
             if request_type == bittensor.proto.RequestType.FORWARD:
                 if self.metagraph.S[uid].item() < self.config.neuron.blacklist.stake.forward:
                     return True
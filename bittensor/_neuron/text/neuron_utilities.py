@@ -1,5 +1,6 @@
 from numpy import zeros_like
 import bittensor
+import hashlib
 import threading
 import time
 import torch
@@ -9,11 +10,15 @@ from concurrent.futures import Future
 import queue
 from threading import Thread
 from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from contextlib import contextmanager
+from types import SimpleNamespace
+from loguru import logger; logger = logger.opt(colors=True)
 
 def update_metagraph_peerweight(metagraph, nucleus, device):
     r"""
-    Check for the change in hotkey before and after metagraph sync, 
-    update the peer_weight of nucleus accordingingly.
+    Sync the metagraph incrementally and reset the peer_weight of the uids
+    whose hotkey was replaced, as reported in the change set of the sync.
         Args:
             metagraph (:obj:`bittensor.metagraph`, `required`):
                 The metagraph to sync.
@@ -22,17 +27,13 @@ def update_metagraph_peerweight(metagraph, nucleus, device):
             device (:type:`torch.device`)
                 The device where peer_weight should be stored. 
     """ 
-    old_hotkeys = metagraph.hotkeys
-    metagraph.sync()
-    new_hotkeys = metagraph.hotkeys
+    changes = metagraph.sync_delta()
     peer_weight_mean = torch.mean(nucleus.peer_weights)
     chain_growth = max(metagraph.n.item() - nucleus.peer_weights.shape[0], 0)
     nucleus.peer_weights = nn.Parameter(torch.cat([nucleus.peer_weights, torch.ones([chain_growth],dtype=torch.float32,requires_grad=True).to(device)]))
     
-    for i, (old_hotkey, new_hotkey) in enumerate(zip(old_hotkeys, new_hotkeys)):
-        if old_hotkey != new_hotkey:
-            with torch.no_grad():
-                nucleus.peer_weights[i] = peer_weight_mean
+    with torch.no_grad():
+        nucleus.peer_weights[ changes.replaced_uids.to( device ) ] = peer_weight_mean
     
 def jacobian(y, x, create_graph=False,hessian =False): 
 
@@ -213,4 +214,220 @@ class ThreadQueue(threading.Thread):
         return self.queue.empty()
         
     def get(self):
-        return self.queue.get()
\ No newline at end of file
+        return self.queue.get()
+
+class ActivationCache:
+    r""" Bounded cache of forward outputs, with their autograd graph, keyed by the content hash of the inputs.
+        A backward request on the same inputs applies its gradients through the cached graph instead of recomputing the forward.
+        The graph only holds the activations saved from the first layer with trainable parameters onwards, measured with
+        graph_bytes() and bounded by max_bytes, so the frozen layers of a partially finetuned model cost nothing.
+        The cache must be cleared whenever the parameters are updated in place, outputs computed before are then rejected.
+    """
+    def __init__(self, max_entries: int, ttl: float, max_bytes: int = None):
+        r"""Initialization.
+        Args:
+            max_entries (:type:`int`, `required`)
+                Maximum number of cached outputs, 0 disables the cache.
+
+            ttl (:type:`float`, `required`)
+                Seconds an output is kept for a matching backward request.
+
+            max_bytes (:type:`int`, `optional`)
+                Maximum bytes of activations held by the cached graphs, unbounded if None.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.generation = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def key(inputs_x: torch.Tensor) -> bytes:
+        r""" Hash of the inputs content, dtype and shape.
+        """
+        hasher = hashlib.blake2b( digest_size = 16 )
+        hasher.update( str( ( inputs_x.dtype, tuple( inputs_x.shape ) ) ).encode() )
+        hasher.update( inputs_x.detach().cpu().contiguous().numpy().tobytes() )
+        return hasher.digest()
+
+    @staticmethod
+    @contextmanager
+    def graph_bytes():
+        r""" Counts the bytes of the activations saved for backward by the graph built inside the context,
+            the trainable parameters themselves are not counted.
+        """
+        counter = SimpleNamespace( nbytes = 0 )
+        def pack( tensor ):
+            if not ( tensor.is_leaf and tensor.requires_grad ):
+                counter.nbytes += tensor.numel() * tensor.element_size()
+            return tensor
+        with torch.autograd.graph.saved_tensors_hooks( pack, lambda tensor: tensor ):
+            yield counter
+
+    def put(self, key: bytes, outputs: torch.Tensor, generation: int, nbytes: int = 0):
+        r""" Caches the outputs if no clear() happened since generation was read, before computing them.
+            nbytes is the size of the activations held by their graph, as counted by graph_bytes().
+        """
+        if self.max_entries <= 0 or not outputs.requires_grad:
+            return
+        if self.max_bytes != None and nbytes > self.max_bytes:
+            return
+        with self.lock:
+            if generation != self.generation:
+                return
+            now = time.time()
+            self._remove( key )
+            while self.entries and (
+                len(self.entries) >= self.max_entries
+                or next(iter(self.entries.values()))[1] < now
+                or ( self.max_bytes != None and self.nbytes + nbytes > self.max_bytes )
+            ):
+                self._remove( next(iter(self.entries)) )
+            self.entries[key] = ( outputs, now + self.ttl, nbytes )
+            self.nbytes += nbytes
+
+    def _remove(self, key: bytes):
+        outputs, expiry, nbytes = self.entries.pop( key, ( None, 0, 0 ) )
+        self.nbytes -= nbytes
+        return outputs, expiry
+
+    def pop(self, key: bytes):
+        r""" Removes and returns the cached outputs, or None if missing or expired.
+        """
+        with self.lock:
+            outputs, expiry = self._remove( key )
+        return outputs if expiry >= time.time() else None
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.nbytes = 0
+            self.generation += 1
+
+class GradientAccumulator(threading.Thread):
+    r""" Background thread merging queued backward requests into one backward pass per batch.
+        The gradients are accumulated in a buffer rather than the parameters' .grad and are added to them by apply() at step time,
+        so a backward request is acknowledged as soon as it is queued.
+    """
+    def __init__(self, model, mutex, queue_size: int, batch_size: int, outputs_cache: 'ActivationCache' = None):
+        r"""Initialization.
+        Args:
+            model (:obj:`torch.nn.Module`, `required`)
+                The served model, its encode_forward computes the outputs the gradients are applied to.
+
+            mutex (:obj:`threading.Lock`, `required`)
+                Lock held around the optimizer step, the parameters are not updated during a backward pass.
+
+            queue_size (:type:`int`, `required`)
+                Maximum number of queued backward requests, requests over it are dropped.
+
+            batch_size (:type:`int`, `required`)
+                Maximum number of backward requests merged into one backward pass.
+
+            outputs_cache (:obj:`ActivationCache`, `optional`)
+                Cached forward outputs, the forward is only recomputed for the requests missing from it.
+        """
+        super(GradientAccumulator, self).__init__(daemon=True)
+        self.model = model
+        self.mutex = mutex
+        self.batch_size = batch_size
+        self.outputs_cache = outputs_cache
+        self.queue = queue.Queue(queue_size)
+        self.gradients = {}
+        self.accumulated = 0
+        self.dropped = 0
+        self._stop_event = threading.Event()
+
+    def submit(self, inputs_x: torch.Tensor, grads_dy: torch.Tensor) -> bool:
+        r""" Queues a backward request, returns False if the queue is full and the request is dropped.
+        """
+        try:
+            self.queue.put_nowait( ( inputs_x, grads_dy ) )
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def run(self):
+        r""" Pulls up to batch_size queued requests at a time and runs their backward pass.
+        """
+        while not self.stopped():
+            try:
+                requests = [ self.queue.get( timeout = 1 ) ]
+            except queue.Empty:
+                continue
+            while len(requests) < self.batch_size:
+                try:
+                    requests.append( self.queue.get_nowait() )
+                except queue.Empty:
+                    break
+            try:
+                self.backward( requests )
+            except Exception as e:
+                logger.error('Failed to apply {} backward requests with error: {}', len(requests), e)
+
+    def backward(self, requests):
+        r""" Computes the gradients of the requests in one backward pass and adds them to the buffer. The forward
+            of each request is computed on its own, only the backward pass is merged.
+        Args:
+            requests (:obj:`List[Tuple[torch.Tensor, torch.Tensor]]`, `required`)
+                (inputs_x, grads_dy) pairs of the backward requests.
+        """
+        parameters = [ parameter for parameter in self.model.parameters() if parameter.requires_grad ]
+        if len(parameters) == 0:
+            return
+
+        with self.mutex, torch.enable_grad():
+            outputs = [ None ] * len(requests)
+            if self.outputs_cache != None:
+                outputs = [ self.outputs_cache.pop( ActivationCache.key( inputs_x ) ) for inputs_x, _ in requests ]
+
+            # -- recompute the missing outputs one request at a time, the servers pad the remapped tokens to the
+            # -- longest row of their batch, so merged requests would not get the outputs their gradients were computed on.
+            for index, ( inputs_x, _ ) in enumerate( requests ):
+                if outputs[index] == None:
+                    outputs[index] = self.model.encode_forward( inputs_x )
+
+            gradients = torch.autograd.grad(
+                outputs = outputs,
+                inputs = parameters,
+                grad_outputs = [ grads_dy.to( outputs_y.device ) for ( _, grads_dy ), outputs_y in zip( requests, outputs ) ],
+                allow_unused = True
+            )
+            for parameter, gradient in zip( parameters, gradients ):
+                if gradient == None:
+                    continue
+                if parameter in self.gradients:
+                    self.gradients[parameter] += gradient
+                else:
+                    self.gradients[parameter] = gradient
+            self.accumulated += sum( inputs_x.size(0) for inputs_x, _ in requests )
+
+    def apply(self) -> int:
+        r""" Adds the accumulated gradients to the parameters' .grad and empties the buffer.
+            Must be called holding the mutex, before the optimizer step.
+
+            Returns:
+                accumulated (:type:`int`):
+                    Number of samples whose gradients were applied.
+        """
+        for parameter, gradient in self.gradients.items():
+            if parameter.grad == None:
+                parameter.grad = gradient
+            else:
+                parameter.grad += gradient
+        accumulated = self.accumulated
+        self.gradients = {}
+        self.accumulated = 0
+        return accumulated
+
+    def stop(self):
+        self._stop_event.set()
+
+    def stopped(self):
+        return self._stop_event.is_set()
@@ -173,7 +173,10 @@ class neuron:
         """        
         try:
             # Priority = stake / request_size 
-            priority = self.metagraph.S[ self.metagraph.hotkeys.index(pubkey) ] / sys.getsizeof(inputs_x)
+            uid = self.metagraph.hotkey_to_uid(pubkey)
+            if uid == -1:
+                return 0
+            priority = self.metagraph.S[ uid ] / sys.getsizeof(inputs_x)
         except:
             return 0
 
@@ -192,12 +195,12 @@ class neuron:
         # Check for stake
         def stake_check() -> bool:
             # If we allow non-registered requests return False = not blacklisted.
-            is_registered = pubkey in self.metagraph.hotkeys
+            uid = self.metagraph.hotkey_to_uid(pubkey)
+            is_registered = uid != -1
             if not is_registered:
                 return not self.config.neuron.blacklist_allow_non_registered
 
             # Check stake.
-            uid = self.metagraph.hotkeys.index(pubkey)
             if request_type == bittensor.proto.RequestType.FORWARD:
                 return self.metagraph.S[uid].item() < self.config.neuron.blacklist.stake.forward
 
@@ -352,6 +355,7 @@ class neuron:
             clip_grad_norm_(self.nucleus.parameters(), self.config.neuron.clip_gradients)
             self.optimizer.step()
             self.optimizer.zero_grad()    
+            self.axon.update_model_version()
 
             # === Scoring ===
             # Updates moving averages and history.
@@ -625,10 +629,10 @@ class nucleus( torch.nn.Module ):
         top_k_routing_weights, routing_uids = torch.topk( noisy_routing_weights, self.config.nucleus.topk, dim=0)
 
         # === Get endpoint information for the highest scoring uids ===
-        # We index into the metagraph's endpoints and return a list of the filtered set of endpoints we wish to query.
-        # routing_endpoints: List[bittensor.endpoints]: endpoint information for filtered uids.
+        # We build the endpoint objects of the filtered set of uids we wish to query from the metagraph's endpoint table.
+        # routing_endpoints: List[bittensor.Endpoint]: endpoint information for filtered uids.
         # len(neurons) == self.config.nucleus.topk
-        routing_endpoints = [ metagraph.endpoints[ uid ] for uid in routing_uids ]
+        routing_endpoints = metagraph.endpoints_for_uids( routing_uids )
 
         # === Query the endpoints ===
         # Makes the dendrite call into the network returning the representations 
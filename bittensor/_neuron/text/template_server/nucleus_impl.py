@@ -234,6 +234,8 @@ class server(torch.nn.Module):
         parser.add_argument('--neuron.blocks_per_epoch', type=int, help='Blocks per epoch', default=10)
         parser.add_argument('--neuron.blacklist.time', type=int, help='how often a peer can query you (seconds) ', default=1)
         parser.add_argument('--neuron.training',  action='store_true', help='if the model should be training (increases memory load)', default=False)
+        parser.add_argument('--neuron.backward_queue.size', type=int, help='Maximum number of queued backward requests, requests over it are dropped.', default=256)
+        parser.add_argument('--neuron.backward_queue.batch_size', type=int, help='Maximum number of backward requests merged into one backward pass.', default=32)
         parser.add_argument('--neuron.autocast',  action='store_true', help='(experimental) autocasts the model to float16. Must require cuda', default=False)
         parser.add_argument('--neuron.blocks_per_set_weights', type=float, help='how often to set weights', default=100)
         parser.add_argument('--neuron.metagraph_sync', type=float, help='how often to sync the metagraph', default=100000)
@@ -245,6 +247,8 @@ class server(torch.nn.Module):
         bittensor.subtensor.add_args( parser )
         bittensor.logging.add_args( parser )
         bittensor.wandb.add_args(parser)
+        bittensor.prometheus.add_args( parser )
+        bittensor.profiler.add_args( parser )
         bittensor.prioritythreadpool.add_args( parser )
         bittensor.dataset.add_args( parser )
         bittensor.metagraph.add_args( parser )
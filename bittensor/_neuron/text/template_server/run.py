@@ -31,6 +31,7 @@ import datetime
 from threading import Lock
 from loguru import logger; logger = logger.opt(colors=True)
 from datetime import datetime,timedelta
+from ..neuron_utilities import GradientAccumulator
 
 def serve( 
         config, 
@@ -61,6 +62,9 @@ def serve(
     
     metagraph.load().sync().save()
 
+    # Sync the metagraph in the background, at the cadence weights are set, the axon callbacks read the last published graph.
+    refresher = bittensor.MetagraphRefresher( metagraph, blocks = config.neuron.blocks_per_set_weights ).start()
+
     # Create our optimizer.
     optimizer = torch.optim.SGD(
         [ {"params": model.parameters()} ],
@@ -69,29 +73,35 @@ def serve(
     )
     mutex = Lock()
 
+    # Times the request callbacks and the parameter updates, captures are triggered with --profiler.enabled.
+    profiler = bittensor.profiler( config = config, root_dir = config.neuron.full_path )
+
     timecheck = {}
     n_topk_peer_weights = subtensor.min_allowed_weights
+    @profiler.timed( 'axon.forward_text' )
     def forward_text ( inputs_x ):
         r""" Single threaded version of the Forward function that is called when the axon recieves a forward request from other peers
         """ 
         return model.encode_forward( inputs_x.to(model.device))
 
 
+    # Backward requests are queued and merged into batched backward passes off the request path.
+    gradient_accumulator = GradientAccumulator(
+        model = model,
+        mutex = mutex,
+        queue_size = config.neuron.backward_queue.size,
+        batch_size = config.neuron.backward_queue.batch_size
+    )
+    if config.neuron.training:
+        gradient_accumulator.start()
+
+    @profiler.timed( 'axon.backward_text' )
     def backward_text ( inputs_x, grads_dy ):
-        r"""Single threaded backwards function that is called when the axon recieves a backwards request from other peers.
-            Updates the server parameters with gradients through the chain.             
+        r"""Backwards function that is called when the axon recieves a backwards request from other peers.
+            Queues the gradients through the chain, they are applied to the server parameters once per block.
         """
         if config.neuron.training:
-            with mutex:
-                with torch.enable_grad():
-                    with torch.autograd.set_detect_anomaly(True):
-                        outputs_y = model.encode_forward( inputs_x )
-                        torch.autograd.backward (
-                            tensors = [ outputs_y ],
-                            grad_tensors = [ grads_dy ]
-                            )
-                        optimizer.step()
-                        optimizer.zero_grad()
+            gradient_accumulator.submit( inputs_x, grads_dy )
     
 
     def blacklist(pubkey:str, request_type:bittensor.proto.RequestType) -> bool:
@@ -102,11 +112,14 @@ def serve(
                 request_type ( bittensor.proto.RequestType, `required`):
                     the request type ('FORWARD' or 'BACKWARD').
         """
+        # One graph for all the checks of this request.
+        metagraph = refresher.metagraph
+
         # Check for registrations
 
         def registration_check():
             # If we allow non-registered requests return False = not blacklisted.
-            is_registered = pubkey in metagraph.hotkeys
+            is_registered = metagraph.hotkey_to_uid(pubkey) != -1
             if not is_registered:
                 if config.neuron.blacklist_allow_non_registered:
                     
@@ -117,15 +130,15 @@ def serve(
         def stake_check() -> bool:
                 
             # Check stake.
-            uid = metagraph.hotkeys.index(pubkey)
-            if metagraph.S[uid].item() < config.neuron.blacklist.stake:
+            uid = metagraph.hotkey_to_uid(pubkey)
+            if uid == -1 or metagraph.S[uid].item() < config.neuron.blacklist.stake:
                 raise Exception('Stake blacklist')
             return False
 
         def validator_check():
 
-            uid = metagraph.hotkeys.index(pubkey)
-            if (metagraph.W[uid] >0).sum() >= n_topk_peer_weights:
+            uid = metagraph.hotkey_to_uid(pubkey)
+            if uid != -1 and (metagraph.W[uid] >0).sum() >= n_topk_peer_weights:
                 return False
 
             raise Exception('Validator blacklist')
@@ -179,6 +192,14 @@ def serve(
             root_dir = config.neuron.full_path
         )
 
+    # --- Optionally serve the axon and subtensor stats to prometheus.
+    if config.prometheus.enabled:
+        prometheus = bittensor.prometheus( config = config ).register( axon = axon, subtensor = subtensor ).start()
+
+    # --- Optionally profile in place on signal or on the admin endpoint.
+    if config.profiler.enabled:
+        profiler.start()
+
     last_set_block = subtensor.get_current_block()
 
 
@@ -191,6 +212,16 @@ def serve(
             time.sleep( bittensor.__blocktime__ )
             current_block = subtensor.get_current_block()
 
+            # --- Apply the gradients accumulated from the backward requests.
+            if config.neuron.training:
+                with mutex, profiler.section( 'server.update' ):
+                    if gradient_accumulator.apply() > 0:
+                        optimizer.step()
+                        optimizer.zero_grad()
+                        axon.update_model_version()
+
+        # Pick up the last graph published by the refresher.
+        metagraph = refresher.metagraph
         nn = subtensor.neuron_for_pubkey(wallet.hotkey.ss58_address)
         uid = metagraph.hotkeys.index( wallet.hotkey.ss58_address )
         wandb_data = {
@@ -210,7 +241,7 @@ def serve(
             ], axis = 1)
             df['uid'] = df.index
             wandb_info_axon = axon.to_wandb()                
-            wandb.log( { **wandb_data, **wandb_info_axon }, step = current_block )
+            wandb.log( { **wandb_data, **wandb_info_axon, **profiler.to_wandb() }, step = current_block )
             wandb.log( { 'stats': wandb.Table( dataframe = df ) }, step = current_block )
 
         if current_block - last_set_block > config.neuron.blocks_per_set_weights:
@@ -227,7 +258,6 @@ def serve(
                     wallet = wallet,
                 )
                 
-                metagraph.sync()
                 if did_set:
                     logger.success('Successfully set weights on the chain')
                 else:
@@ -0,0 +1,131 @@
+""" Factory method for creating the on-demand profiler of a running neuron
+"""
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated 
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation 
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, 
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of 
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL 
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION 
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER 
+# DEALINGS IN THE SOFTWARE.
+
+import os
+import argparse
+import copy
+import bittensor
+from . import profiler_impl
+
+class profiler:
+    """ Factory method for creating the profiler of a running neuron, captures are triggered by a signal or on a local admin endpoint.
+    """
+    def __new__(
+            cls,
+            config: 'bittensor.config' = None,
+            root_dir: str = None,
+            mode: str = None,
+            seconds: float = None,
+            interval: float = None,
+            port: int = None,
+            ip: str = None,
+        ) -> 'bittensor.Profiler':
+        r""" Creates a new profiler, the signal handler and the admin endpoint are set up with .start().
+            Args:
+                config (:obj:`bittensor.Config`, `optional`):
+                    bittensor.profiler.config()
+                root_dir (:type:`str`, `optional`):
+                    Directory the captures are written to, under root_dir/profiles. i.e. config.neuron.full_path
+                mode (:type:`str`, `optional`):
+                    Default capture mode, one of sample, cprofile or torch.
+                seconds (:type:`float`, `optional`):
+                    Default length of a capture in seconds.
+                interval (:type:`float`, `optional`):
+                    Seconds between two stack samples in the sample mode.
+                port (:type:`int`, `optional`):
+                    Port of the admin endpoint.
+                ip (:type:`str`, `optional`):
+                    Interface of the admin endpoint.
+        """
+        if config == None:
+            config = profiler.config()
+        config = copy.deepcopy( config )
+        config.profiler.mode = mode if mode != None else config.profiler.mode
+        config.profiler.seconds = seconds if seconds != None else config.profiler.seconds
+        config.profiler.interval = interval if interval != None else config.profiler.interval
+        config.profiler.port = port if port != None else config.profiler.port
+        config.profiler.ip = ip if ip != None else config.profiler.ip
+        profiler.check_config( config )
+        return profiler_impl.Profiler(
+            root_dir = root_dir if root_dir != None else config.profiler.root_dir,
+            mode = config.profiler.mode,
+            seconds = float( config.profiler.seconds ),
+            interval = float( config.profiler.interval ),
+            ip = config.profiler.ip,
+            port = config.profiler.port,
+            signal_name = config.profiler.signal,
+        )
+
+    @classmethod
+    def config(cls) -> 'bittensor.Config':
+        """ Get config from the argument parser
+            Return: bittensor.config object
+        """
+        parser = argparse.ArgumentParser()
+        profiler.add_args( parser )
+        return bittensor.config( parser )
+
+    @classmethod
+    def help(cls):
+        """ Print help to stdout
+        """
+        parser = argparse.ArgumentParser()
+        cls.add_args( parser )
+        print (cls.__new__.__doc__)
+        parser.print_help()
+
+    @classmethod
+    def add_args(cls, parser: argparse.ArgumentParser ):
+        """ Accept specific arguments from parser
+        """
+        try:
+            parser.add_argument('--profiler.enabled', action='store_true', help='''If set, captures are triggered by the profiler signal or on http://ip:port/profile?seconds=N&mode=M''', default = bittensor.defaults.profiler.enabled)
+            parser.add_argument('--profiler.mode', type=str, choices=profiler_impl.MODES, help='''Default capture mode: stack sampling of all threads, cProfile of the timed sections or the torch CPU profiler''', default = bittensor.defaults.profiler.mode)
+            parser.add_argument('--profiler.seconds', type=float, help='''Default length of a capture in seconds''', default = bittensor.defaults.profiler.seconds)
+            parser.add_argument('--profiler.interval', type=float, help='''Seconds between two stack samples in the sample mode''', default = bittensor.defaults.profiler.interval)
+            parser.add_argument('--profiler.signal', type=str, help='''Name of the signal triggering a capture, i.e. SIGUSR1. Empty to disable''', default = bittensor.defaults.profiler.signal)
+            parser.add_argument('--profiler.port', type=int, help='''Port of the profiler admin endpoint''', default = bittensor.defaults.profiler.port)
+            parser.add_argument('--profiler.ip', type=str, help='''Interface of the profiler admin endpoint''', default = bittensor.defaults.profiler.ip)
+            parser.add_argument('--profiler.root_dir', type=str, help='''Directory the captures are written to when the neuron does not pass its own''', default = bittensor.defaults.profiler.root_dir)
+        except argparse.ArgumentError:
+            # re-parsing arguments.
+            pass
+
+    @classmethod
+    def add_defaults(cls, defaults):
+        """ Adds parser defaults to object from enviroment variables.
+        """
+        defaults.profiler = bittensor.Config()
+        defaults.profiler.enabled = os.getenv('BT_PROFILER_ENABLED') if os.getenv('BT_PROFILER_ENABLED') != None else False
+        defaults.profiler.mode = os.getenv('BT_PROFILER_MODE') if os.getenv('BT_PROFILER_MODE') != None else 'sample'
+        defaults.profiler.seconds = os.getenv('BT_PROFILER_SECONDS') if os.getenv('BT_PROFILER_SECONDS') != None else 30
+        defaults.profiler.interval = os.getenv('BT_PROFILER_INTERVAL') if os.getenv('BT_PROFILER_INTERVAL') != None else 0.005
+        defaults.profiler.signal = os.getenv('BT_PROFILER_SIGNAL') if os.getenv('BT_PROFILER_SIGNAL') != None else 'SIGUSR1'
+        defaults.profiler.port = os.getenv('BT_PROFILER_PORT') if os.getenv('BT_PROFILER_PORT') != None else 7092
+        defaults.profiler.ip = os.getenv('BT_PROFILER_IP') if os.getenv('BT_PROFILER_IP') != None else '127.0.0.1'
+        defaults.profiler.root_dir = os.getenv('BT_PROFILER_ROOT_DIR') if os.getenv('BT_PROFILER_ROOT_DIR') != None else '~/.bittensor'
+
+    @classmethod
+    def check_config(cls, config: 'bittensor.Config' ):
+        """ Check config for the profiler mode and admin endpoint
+        """
+        assert config.profiler.mode in profiler_impl.MODES, 'profiler.mode must be one of {}'.format( profiler_impl.MODES )
+        assert float(config.profiler.seconds) > 0, 'profiler.seconds must be larger than 0'
+        assert float(config.profiler.interval) > 0, 'profiler.interval must be larger than 0'
+        assert int(config.profiler.port) >= 0 and int(config.profiler.port) < 65536, 'profiler.port must be in range [0, 65535]'
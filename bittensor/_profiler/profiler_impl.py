@@ -0,0 +1,357 @@
+""" Implementation of the profiler, sampling, cProfile and torch captures and an admin endpoint
+"""
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated 
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation 
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, 
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of 
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL 
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION 
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER 
+# DEALINGS IN THE SOFTWARE.
+
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+from urllib.parse import parse_qs, urlparse
+
+import torch
+from loguru import logger
+logger = logger.opt(colors=True)
+
+import bittensor
+import bittensor.utils.stats as stat_utils
+
+MODES = [ 'sample', 'cprofile', 'torch' ]
+
+def frame_name( frame ) -> str:
+    code = frame.f_code
+    return '{} ({}:{})'.format( getattr( code, 'co_qualname', code.co_name ), os.path.basename( code.co_filename ), code.co_firstlineno )
+
+class Profiler:
+    r""" Profiles a running neuron in place. Captures of N seconds are written under root_dir/profiles in one of the modes:
+            sample: the stacks of all threads are sampled every interval, written as folded stacks (flamegraph.pl, speedscope)
+                and a summary of the functions with the most samples.
+            cprofile: the timed sections run during the capture are profiled with cProfile, written as a .prof file
+                (pstats, snakeviz) and a summary sorted by cumulative time.
+            torch: the torch CPU profiler runs during the capture, the timed sections appear as labelled ranges,
+                written as a chrome trace and a summary of the operators.
+        Timed sections also record their wall time in latency histograms, whether a capture runs or not.
+
+        Args:
+            root_dir (:type:`str`, `required`):
+                Directory of the neuron, captures are written to root_dir/profiles.
+            mode (:type:`str`, `required`):
+                Default capture mode.
+            seconds (:type:`float`, `required`):
+                Default length of a capture in seconds.
+            interval (:type:`float`, `required`):
+                Seconds between two stack samples in the sample mode.
+            ip (:type:`str`, `required`):
+                Interface of the admin endpoint.
+            port (:type:`int`, `required`):
+                Port of the admin endpoint, 0 picks a free port.
+            signal_name (:type:`str`, `required`):
+                Name of the signal triggering a capture, the handler is not installed if empty.
+    """
+    def __init__( self, root_dir: str, mode: str, seconds: float, interval: float, ip: str, port: int, signal_name: str ):
+        self.root_dir = os.path.expanduser( root_dir )
+        self.mode = mode
+        self.seconds = seconds
+        self.interval = interval
+        self.ip = ip
+        self.port = port
+        self.signal_name = signal_name
+        self.sections = {}
+        self.lock = threading.Lock()
+        self.server = None
+        self.previous_handler = None
+        # Mode of the running capture, None when idle.
+        self._active_mode = None
+        self._capturing = threading.Lock()
+        self._profiles = []
+        self._local = threading.local()
+        self.last_capture = None
+
+    def __str__(self):
+        return "Profiler({}, {}, {} sections)".format( self.root_dir, self.mode, len( self.sections ) )
+
+    def __repr__(self):
+        return self.__str__()
+
+    def histogram( self, name: str ) -> stat_utils.LatencyHistogram:
+        histogram = self.sections.get( name )
+        if histogram == None:
+            with self.lock:
+                histogram = self.sections.setdefault( name, stat_utils.LatencyHistogram() )
+        return histogram
+
+    @contextmanager
+    def section( self, name: str ):
+        r""" Times the block as the named section, and profiles it if a cprofile or torch capture is running.
+        """
+        start_time = time.time()
+        profile = None
+        record = None
+        mode = self._active_mode
+        if mode == 'cprofile' and getattr( self._local, 'profile', None ) == None:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+                self._local.profile = profile
+            except ValueError:
+                # Another profiler is active on this thread.
+                profile = None
+        elif mode == 'torch':
+            record = torch.profiler.record_function( name )
+            record.__enter__()
+        try:
+            yield
+        finally:
+            if profile != None:
+                profile.disable()
+                self._local.profile = None
+                with self.lock:
+                    self._profiles.append( profile )
+            if record != None:
+                record.__exit__( None, None, None )
+            self.histogram( name ).record( time.time() - start_time )
+
+    def timed( self, name: str ) -> Callable:
+        r""" Decorator running the function as a timed section, the signature of the function is kept.
+        """
+        def decorator( function ):
+            @functools.wraps( function )
+            def wrapper( *args, **kwargs ):
+                with self.section( name ):
+                    return function( *args, **kwargs )
+            return wrapper
+        return decorator
+
+    def capture( self, seconds: float = None, mode: str = None, block: bool = False ) -> str:
+        r""" Starts a capture in a background thread.
+            Args:
+                seconds (:type:`float`, `optional`):
+                    Length of the capture, defaults to the profiler seconds.
+                mode (:type:`str`, `optional`):
+                    Capture mode, defaults to the profiler mode.
+                block (:type:`bool`, `optional`):
+                    If true, waits for the capture to be written.
+            Returns:
+                path (:type:`str`):
+                    Path of the capture files without extension, or None if a capture is already running.
+        """
+        seconds = float( seconds ) if seconds != None else self.seconds
+        mode = mode if mode != None else self.mode
+        if mode not in MODES:
+            raise ValueError( 'Profiler mode must be one of {}, got {}'.format( MODES, mode ) )
+        # Not blocking, the capture can be triggered from a signal handler interrupting the main thread.
+        if not self._capturing.acquire( blocking = False ):
+            logger.warning( 'Profiler capture already running, ignoring the request' )
+            return None
+        directory = os.path.join( self.root_dir, 'profiles' )
+        os.makedirs( directory, exist_ok = True )
+        path = os.path.join( directory, '{}-{}'.format( mode, time.strftime( '%Y%m%d-%H%M%S' ) ) )
+        thread = threading.Thread( target = self._run_capture, args = ( path, seconds, mode ), daemon = True )
+        thread.start()
+        if block:
+            thread.join()
+        return path
+
+    def _run_capture( self, path: str, seconds: float, mode: str ):
+        try:
+            logger.info( 'Profiler capturing <blue>{}</blue>s in mode <blue>{}</blue> to: <blue>{}</blue>', seconds, mode, path )
+            if mode == 'sample':
+                self._capture_samples( path, seconds )
+            elif mode == 'cprofile':
+                self._capture_cprofile( path, seconds )
+            else:
+                self._capture_torch( path, seconds )
+            self.last_capture = path
+            logger.success( 'Profiler capture written to: <blue>{}</blue>', path )
+        except Exception as e:
+            logger.error( 'Profiler capture failed with error: {}', e )
+        finally:
+            self._active_mode = None
+            self._capturing.release()
+
+    def _capture_samples( self, path: str, seconds: float ):
+        stacks = Counter()
+        own_thread = threading.get_ident()
+        deadline = time.time() + seconds
+        n_samples = 0
+        while time.time() < deadline:
+            names = { thread.ident: thread.name for thread in threading.enumerate() }
+            for ident, frame in sys._current_frames().items():
+                if ident == own_thread:
+                    continue
+                stack = []
+                while frame != None:
+                    stack.append( frame_name( frame ) )
+                    frame = frame.f_back
+                stack.append( names.get( ident, str( ident ) ) )
+                stacks[ ';'.join( reversed( stack ) ) ] += 1
+            n_samples += 1
+            time.sleep( self.interval )
+
+        with open( path + '.folded', 'w' ) as file:
+            for stack, count in stacks.most_common():
+                file.write( '{} {}\n'.format( stack, count ) )
+
+        # Self samples count the leaf function, total samples every function on the stack once.
+        self_samples = Counter()
+        total_samples = Counter()
+        for stack, count in stacks.items():
+            functions = stack.split( ';' )[1:]
+            if len( functions ) == 0:
+                continue
+            self_samples[ functions[-1] ] += count
+            for function in set( functions ):
+                total_samples[ function ] += count
+        n_stacks = max( sum( stacks.values() ), 1 )
+        with open( path + '.txt', 'w' ) as file:
+            file.write( '{} samples of {} threads over {}s\n\n'.format( n_samples, len( { stack.split( ';' )[0] for stack in stacks } ), seconds ) )
+            for title, counter in [ ( 'self', self_samples ), ( 'total', total_samples ) ]:
+                file.write( 'Top functions by {} samples:\n'.format( title ) )
+                for function, count in counter.most_common( 30 ):
+                    file.write( '{:8d} {:6.2f}%  {}\n'.format( count, 100 * count / n_stacks, function ) )
+                file.write( '\n' )
+
+    def _capture_cprofile( self, path: str, seconds: float ):
+        with self.lock:
+            self._profiles = []
+        self._active_mode = 'cprofile'
+        time.sleep( seconds )
+        self._active_mode = None
+        with self.lock:
+            profiles, self._profiles = self._profiles, []
+        if len( profiles ) == 0:
+            with open( path + '.txt', 'w' ) as file:
+                file.write( 'No timed section ran during the capture.\n' )
+            return
+        stats = pstats.Stats( profiles[0] )
+        for profile in profiles[1:]:
+            stats.add( profile )
+        stats.dump_stats( path + '.prof' )
+        summary = io.StringIO()
+        pstats.Stats( path + '.prof', stream = summary ).sort_stats( 'cumulative' ).print_stats( 50 )
+        with open( path + '.txt', 'w' ) as file:
+            file.write( '{} timed sections profiled over {}s\n'.format( len( profiles ), seconds ) )
+            file.write( summary.getvalue() )
+
+    def _capture_torch( self, path: str, seconds: float ):
+        # The torch profiler only records the thread it is started on, unless it can profile all threads.
+        try:
+            from torch._C._profiler import _ExperimentalConfig
+            experimental_config = _ExperimentalConfig( profile_all_threads = True )
+        except ( ImportError, TypeError ):
+            experimental_config = None
+        with torch.profiler.profile( activities = [ torch.profiler.ProfilerActivity.CPU ], experimental_config = experimental_config ) as profile:
+            self._active_mode = 'torch'
+            time.sleep( seconds )
+            self._active_mode = None
+        profile.export_chrome_trace( path + '.json' )
+        with open( path + '.txt', 'w' ) as file:
+            file.write( profile.key_averages().table( sort_by = 'cpu_time_total', row_limit = 50 ) )
+
+    def summary( self ) -> dict:
+        r""" Returns the count, mean and percentiles of the wall time of each timed section.
+        """
+        with self.lock:
+            sections = dict( self.sections )
+        return { name: histogram.summary( name ) for name, histogram in sections.items() }
+
+    def to_wandb( self ) -> dict:
+        wandb_data = {}
+        with self.lock:
+            sections = dict( self.sections )
+        for name, histogram in sections.items():
+            wandb_data.update( histogram.summary( 'profiler/' + name ) )
+        return wandb_data
+
+    def start( self ) -> 'Profiler':
+        r""" Installs the capture signal handler, from the main thread only, and serves the admin endpoint:
+                GET /profile?seconds=N&mode=M starts a capture and returns the path it is written to.
+                GET /sections returns the wall time summary of the timed sections.
+        """
+        if self.signal_name and self.previous_handler == None:
+            try:
+                signum = getattr( signal, self.signal_name )
+                self.previous_handler = signal.signal( signum, lambda signum, frame: self.capture() )
+                logger.success( 'Profiler captures on signal: <blue>{}</blue> to pid <blue>{}</blue>', self.signal_name, os.getpid() )
+            except ( AttributeError, ValueError ) as e:
+                logger.warning( 'Profiler signal {} not installed: {}', self.signal_name, e )
+
+        if self.server == None:
+            profiler = self
+            class Handler( BaseHTTPRequestHandler ):
+                def do_GET( self ):
+                    url = urlparse( self.path )
+                    query = { key: values[-1] for key, values in parse_qs( url.query ).items() }
+                    try:
+                        if url.path == '/profile':
+                            path = profiler.capture( seconds = query.get( 'seconds' ), mode = query.get( 'mode' ) )
+                            status, body = ( 202, { 'path': path } ) if path != None else ( 409, { 'error': 'capture already running' } )
+                        elif url.path == '/sections':
+                            status, body = 200, profiler.summary()
+                        else:
+                            status, body = 404, { 'error': 'not found' }
+                    except ValueError as e:
+                        status, body = 400, { 'error': str( e ) }
+                    body = json.dumps( body ).encode()
+                    self.send_response( status )
+                    self.send_header( 'Content-Type', 'application/json' )
+                    self.send_header( 'Content-Length', str( len( body ) ) )
+                    self.end_headers()
+                    self.wfile.write( body )
+
+                def log_message( self, format, *args ):
+                    pass
+
+            try:
+                self.server = ThreadingHTTPServer( ( self.ip, self.port ), Handler )
+            except OSError as e:
+                # E.g. another neuron on the host serves its profiler on the port, signal captures still work.
+                logger.warning( 'Profiler admin endpoint not served on port {}: {}', self.port, e )
+                return self
+            self.server.daemon_threads = True
+            self.port = self.server.server_address[1]
+            threading.Thread( target = self.server.serve_forever, daemon = True ).start()
+            logger.success( 'Profiler admin endpoint served on: <blue>http://{}:{}/profile</blue>', self.ip, self.port )
+        return self
+
+    def stop( self ) -> 'Profiler':
+        if self.server != None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        if self.previous_handler != None:
+            try:
+                signal.signal( getattr( signal, self.signal_name ), self.previous_handler )
+            except ValueError:
+                pass
+            self.previous_handler = None
+        return self
+
+    def __del__( self ):
+        # The serving thread is frozen at interpreter exit, shutdown would wait on it forever.
+        if not sys.is_finalizing():
+            self.stop()
@@ -0,0 +1,97 @@
+""" Factory method for creating the prometheus metrics endpoint
+"""
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated 
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation 
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, 
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of 
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL 
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION 
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER 
+# DEALINGS IN THE SOFTWARE.
+
+import os
+import argparse
+import copy
+import bittensor
+from . import prometheus_impl
+
+class prometheus:
+    """ Factory method for creating the prometheus metrics endpoint, an HTTP server exposing the neuron stats in the prometheus text format.
+    """
+    def __new__(
+            cls,
+            config: 'bittensor.config' = None,
+            port: int = None,
+            ip: str = None,
+        ) -> 'bittensor.Prometheus':
+        r""" Creates a new prometheus metrics endpoint, started with .start().
+            Args:
+                config (:obj:`bittensor.Config`, `optional`):
+                    bittensor.prometheus.config()
+                port (:type:`int`, `optional`):
+                    Port the metrics are served on, at /metrics.
+                ip (:type:`str`, `optional`):
+                    Interface the metrics are served on.
+        """
+        if config == None:
+            config = prometheus.config()
+        config = copy.deepcopy( config )
+        config.prometheus.port = port if port != None else config.prometheus.port
+        config.prometheus.ip = ip if ip != None else config.prometheus.ip
+        prometheus.check_config( config )
+        return prometheus_impl.Prometheus( ip = config.prometheus.ip, port = config.prometheus.port )
+
+    @classmethod
+    def config(cls) -> 'bittensor.Config':
+        """ Get config from the argument parser
+            Return: bittensor.config object
+        """
+        parser = argparse.ArgumentParser()
+        prometheus.add_args( parser )
+        return bittensor.config( parser )
+
+    @classmethod
+    def help(cls):
+        """ Print help to stdout
+        """
+        parser = argparse.ArgumentParser()
+        cls.add_args( parser )
+        print (cls.__new__.__doc__)
+        parser.print_help()
+
+    @classmethod
+    def add_args(cls, parser: argparse.ArgumentParser ):
+        """ Accept specific arguments from parser
+        """
+        try:
+            parser.add_argument('--prometheus.enabled', action='store_true', help='''If set, the neuron serves its stats in the prometheus text format at http://ip:port/metrics''', default = bittensor.defaults.prometheus.enabled)
+            parser.add_argument('--prometheus.port', type=int, help='''Port the prometheus metrics are served on''', default = bittensor.defaults.prometheus.port)
+            parser.add_argument('--prometheus.ip', type=str, help='''Interface the prometheus metrics are served on''', default = bittensor.defaults.prometheus.ip)
+        except argparse.ArgumentError:
+            # re-parsing arguments.
+            pass
+
+    @classmethod
+    def add_defaults(cls, defaults):
+        """ Adds parser defaults to object from enviroment variables.
+        """
+        defaults.prometheus = bittensor.Config()
+        defaults.prometheus.enabled = os.getenv('BT_PROMETHEUS_ENABLED') if os.getenv('BT_PROMETHEUS_ENABLED') != None else False
+        defaults.prometheus.port = os.getenv('BT_PROMETHEUS_PORT') if os.getenv('BT_PROMETHEUS_PORT') != None else 7091
+        defaults.prometheus.ip = os.getenv('BT_PROMETHEUS_IP') if os.getenv('BT_PROMETHEUS_IP') != None else '0.0.0.0'
+
+    @classmethod
+    def check_config(cls, config: 'bittensor.Config' ):
+        """ Check config for the prometheus port and ip
+        """
+        assert isinstance(config.prometheus.port, int), 'prometheus.port must be an int'
+        assert config.prometheus.port >= 0 and config.prometheus.port < 65536, 'prometheus.port must be in range [0, 65535]'
+        assert isinstance(config.prometheus.ip, str), 'prometheus.ip must be a str'
@@ -0,0 +1,259 @@
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated 
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation 
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, 
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of 
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL 
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION 
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER 
+# DEALINGS IN THE SOFTWARE.
+
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List
+
+import numpy as np
+from loguru import logger
+logger = logger.opt(colors=True)
+
+import bittensor
+import bittensor.utils.stats as stat_utils
+
+# Upper bounds, in seconds, of the latency buckets exported for each histogram.
+LATENCY_BOUNDS = [ 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60 ]
+
+class Metric:
+    r""" A metric family, rendered in the prometheus text format as its HELP and TYPE lines followed by its samples.
+
+        Args:
+            name (:type:`str`, `required`):
+                Metric name.
+            kind (:type:`str`, `required`):
+                One of counter, gauge or histogram.
+            documentation (:type:`str`, `required`):
+                Help line of the metric.
+    """
+    def __init__( self, name: str, kind: str, documentation: str ):
+        self.name = name
+        self.kind = kind
+        self.documentation = documentation
+        self.samples = []
+
+    def add( self, value: float, suffix: str = '', **labels ) -> 'Metric':
+        self.samples.append( ( suffix, labels, value ) )
+        return self
+
+    def add_histogram( self, histogram: 'stat_utils.LatencyHistogram', **labels ) -> 'Metric':
+        r""" Adds the cumulative buckets, sum and count samples of a latency histogram.
+        """
+        for bound, count in zip( LATENCY_BOUNDS, histogram.cumulative_counts( LATENCY_BOUNDS ) ):
+            self.add( count, '_bucket', le = format_value( bound ), **labels )
+        count = histogram.count()
+        self.add( count, '_bucket', le = '+Inf', **labels )
+        self.add( histogram.total(), '_sum', **labels )
+        self.add( count, '_count', **labels )
+        return self
+
+    def render( self ) -> str:
+        lines = [ '# HELP {} {}'.format( self.name, self.documentation ), '# TYPE {} {}'.format( self.name, self.kind ) ]
+        for suffix, labels, value in self.samples:
+            lines.append( '{}{}{} {}'.format( self.name, suffix, format_labels( labels ), format_value( value ) ) )
+        return '\n'.join( lines ) + '\n'
+
+def format_labels( labels: dict ) -> str:
+    if len( labels ) == 0:
+        return ''
+    escaped = [ '{}="{}"'.format( key, str( value ).replace( '\\', '\\\\' ).replace( '"', '\\"' ).replace( '\n', '\\n' ) ) for key, value in labels.items() ]
+    return '{' + ','.join( escaped ) + '}'
+
+def format_value( value: float ) -> str:
+    if isinstance( value, ( int, np.integer ) ):
+        return str( int( value ) )
+    value = float( value )
+    if value == float( 'inf' ):
+        return '+Inf'
+    if value == float( '-inf' ):
+        return '-Inf'
+    return repr( value )
+
+def code_counts( metric: Metric, peers: 'stat_utils.PeerStats' ) -> Metric:
+    r""" Adds one sample per return code, summed over the peers.
+    """
+    counts = peers.codes[ :len( peers ) ].sum( axis = 0 )
+    for code, count in enumerate( counts ):
+        metric.add( count, code = bittensor.proto.ReturnCode.Name( code ) )
+    return metric
+
+def axon_metrics( axon: 'bittensor.Axon' ) -> List[Metric]:
+    stats = axon.stats
+    metrics = [
+        Metric( 'bittensor_axon_requests_total', 'counter', 'Requests served by the axon.' ).add( stats.total_requests.value() ),
+        Metric( 'bittensor_axon_in_bytes_total', 'counter', 'Serialized bytes of the requests recieved by the axon.' ).add( stats.total_in_bytes.value() ),
+        Metric( 'bittensor_axon_out_bytes_total', 'counter', 'Serialized bytes of the responses sent by the axon.' ).add( stats.total_out_bytes.value() ),
+        code_counts( Metric( 'bittensor_axon_responses_total', 'counter', 'Responses sent by the axon per return code.' ), stats.peers ),
+        Metric( 'bittensor_axon_peers', 'gauge', 'Peers that sent requests to the axon.' ).add( len( stats.peers ) ),
+        Metric( 'bittensor_axon_request_duration_seconds', 'histogram', 'Duration of the requests served by the axon.' )
+            .add_histogram( stats.forward_latency, type = 'forward' )
+            .add_histogram( stats.backward_latency, type = 'backward' ),
+        Metric( 'bittensor_axon_forward_cache_hits_total', 'counter', 'Forward responses served from the forward cache.' ).add( stats.forward_cache_hits.value() ),
+        Metric( 'bittensor_axon_forward_cache_misses_total', 'counter', 'Forward requests not found in the forward cache.' ).add( stats.forward_cache_misses.value() ),
+    ]
+    if axon.priority_threadpool != None:
+        metrics += threadpool_metrics( axon.priority_threadpool )
+    return metrics
+
+def threadpool_metrics( threadpool: 'bittensor.PriorityThreadPoolExecutor' ) -> List[Metric]:
+    stats = threadpool.stats
+    return [
+        Metric( 'bittensor_threadpool_queue_depth', 'gauge', 'Work items waiting in the priority threadpool queue.' ).add( threadpool._work_queue.qsize() ),
+        Metric( 'bittensor_threadpool_workers', 'gauge', 'Worker threads of the priority threadpool.' ).add( len( threadpool._threads ) ),
+        Metric( 'bittensor_threadpool_shed_total', 'counter', 'Work items rejected because the priority threadpool queue was full.' ).add( stats.shed ),
+        Metric( 'bittensor_threadpool_queue_seconds', 'histogram', 'Time work items waited in the priority threadpool queue.' ).add_histogram( stats.queue_latency ),
+        Metric( 'bittensor_threadpool_run_seconds', 'histogram', 'Run time of the priority threadpool work items.' ).add_histogram( stats.run_latency ),
+    ]
+
+def dendrite_metrics( dendrite: 'bittensor.Dendrite' ) -> List[Metric]:
+    stats = dendrite.stats
+    peers = stats.peers
+    return [
+        Metric( 'bittensor_dendrite_calls_total', 'counter', 'Calls to the dendrite, each querying a list of endpoints.' ).add( stats.total_requests ),
+        Metric( 'bittensor_dendrite_requests_total', 'counter', 'Requests sent to endpoints by the dendrite.' ).add( peers.requests[ :len( peers ) ].sum() ),
+        Metric( 'bittensor_dendrite_in_bytes_total', 'counter', 'Bytes of the successful responses recieved by the dendrite.' ).add( peers.in_bytes[ :len( peers ) ].sum() ),
+        Metric( 'bittensor_dendrite_out_bytes_total', 'counter', 'Bytes of the requests sent by the dendrite.' ).add( peers.out_bytes[ :len( peers ) ].sum() ),
+        code_counts( Metric( 'bittensor_dendrite_responses_total', 'counter', 'Responses recieved by the dendrite per return code.' ), peers ),
+        Metric( 'bittensor_dendrite_receptors', 'gauge', 'Active receptor connections.' ).add( len( dendrite.receptor_pool.receptors ) ),
+        Metric( 'bittensor_dendrite_request_duration_seconds', 'histogram', 'Duration of the requests that reached the network.' )
+            .add_histogram( dendrite.receptor_pool.get_latency(), type = 'forward' )
+            .add_histogram( dendrite.receptor_pool.get_latency( backward = True ), type = 'backward' ),
+        Metric( 'bittensor_dendrite_cache_hits_total', 'counter', 'Responses served from the response cache.' ).add( stats.cache_hits ),
+        Metric( 'bittensor_dendrite_cache_misses_total', 'counter', 'Responses not found in the response cache.' ).add( stats.cache_misses ),
+    ]
+
+def subtensor_metrics( subtensor: 'bittensor.Subtensor' ) -> List[Metric]:
+    stats = subtensor.stats
+    requests = Metric( 'bittensor_subtensor_rpc_requests_total', 'counter', 'Chain RPC requests per method.' )
+    for method, count in list( stats.rpc_requests.items() ):
+        requests.add( count, method = method )
+    return [
+        requests,
+        Metric( 'bittensor_subtensor_rpc_errors_total', 'counter', 'Chain RPC requests that raised.' ).add( stats.rpc_errors ),
+        Metric( 'bittensor_subtensor_rpc_duration_seconds', 'histogram', 'Duration of the chain RPC requests.' ).add_histogram( stats.rpc_latency ),
+    ]
+
+def dataset_metrics( dataset: 'bittensor.Dataset' ) -> List[Metric]:
+    data_queue = dataset.data_queue.queue
+    return [
+        Metric( 'bittensor_dataset_queue_depth', 'gauge', 'Dataset batches ready in the queue.' ).add( data_queue.qsize() ),
+        Metric( 'bittensor_dataset_queue_capacity', 'gauge', 'Size of the dataset queue.' ).add( data_queue.maxsize ),
+    ]
+
+class Prometheus:
+    r""" HTTP server exposing the stats of the registered components in the prometheus text format at /metrics.
+
+        Args:
+            ip (:type:`str`, `required`):
+                Interface the metrics are served on.
+            port (:type:`int`, `required`):
+                Port the metrics are served on, 0 picks a free port.
+    """
+    def __init__( self, ip: str, port: int ):
+        self.ip = ip
+        self.port = port
+        self.collectors = []
+        self.server = None
+        self.thread = None
+
+    def __str__(self):
+        return "Prometheus({}:{}, {} collectors)".format( self.ip, self.port, len( self.collectors ) )
+
+    def __repr__(self):
+        return self.__str__()
+
+    def register(
+            self,
+            axon: 'bittensor.Axon' = None,
+            dendrite: 'bittensor.Dendrite' = None,
+            subtensor: 'bittensor.Subtensor' = None,
+            dataset: 'bittensor.Dataset' = None,
+            collector: Callable[ [], List[Metric] ] = None,
+        ) -> 'Prometheus':
+        r""" Adds the stats of the passed components to the exported metrics.
+            Args:
+                axon, dendrite, subtensor, dataset (`optional`):
+                    Components whose stats are exported, the axon's priority threadpool included.
+                collector (:obj:`Callable[ [], List[Metric] ]`, `optional`):
+                    Function returning additional metrics on each scrape.
+        """
+        if axon != None:
+            self.collectors.append( lambda: axon_metrics( axon ) )
+        if dendrite != None:
+            self.collectors.append( lambda: dendrite_metrics( dendrite ) )
+        if subtensor != None:
+            self.collectors.append( lambda: subtensor_metrics( subtensor ) )
+        if dataset != None:
+            self.collectors.append( lambda: dataset_metrics( dataset ) )
+        if collector != None:
+            self.collectors.append( collector )
+        return self
+
+    def render( self ) -> str:
+        r""" Returns the metrics of all the collectors, a failing collector is logged and skipped.
+        """
+        output = []
+        for collector in self.collectors:
+            try:
+                output += [ metric.render() for metric in collector() ]
+            except Exception as e:
+                logger.warning( 'Prometheus collector failed with error: {}', e )
+        return ''.join( output )
+
+    def start( self ) -> 'Prometheus':
+        r""" Starts serving the metrics in a background thread.
+        """
+        if self.server != None:
+            return self
+        prometheus = self
+        class Handler( BaseHTTPRequestHandler ):
+            def do_GET( self ):
+                if self.path.split( '?' )[0] != '/metrics':
+                    self.send_error( 404 )
+                    return
+                body = prometheus.render().encode()
+                self.send_response( 200 )
+                self.send_header( 'Content-Type', 'text/plain; version=0.0.4; charset=utf-8' )
+                self.send_header( 'Content-Length', str( len( body ) ) )
+                self.end_headers()
+                self.wfile.write( body )
+
+            def log_message( self, format, *args ):
+                # Scrapes are not logged.
+                pass
+
+        self.server = ThreadingHTTPServer( ( self.ip, self.port ), Handler )
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread( target = self.server.serve_forever, daemon = True )
+        self.thread.start()
+        logger.success( 'Prometheus metrics served on: <blue>http://{}:{}/metrics</blue>', self.ip, self.port )
+        return self
+
+    def stop( self ) -> 'Prometheus':
+        if self.server != None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+            self.thread = None
+        return self
+
+    def __del__( self ):
+        # The serving thread is frozen at interpreter exit, shutdown would wait on it forever.
+        if not sys.is_finalizing():
+            self.stop()
@@ -34,11 +34,14 @@ class receptor:
              wallet: 'bittensor.Wallet' = None,
              external_ip: 'str' = None,
              compression: str = None,
+             tracer: 'bittensor.utils.tracing.Tracer' = None,
         ) -> 'bittensor.Receptor':
         r""" Initializes a receptor grpc connection.
             Args:
                 endpoint (:obj:`bittensor.Endpoint`, `required`):
                     neuron endpoint descriptor.
+                tracer (:obj:`bittensor.utils.tracing.Tracer`, `optional`):
+                    Buffer of the stage timings of the requests. If None, requests are not traced.
         """        
 
         if wallet == None:
@@ -70,7 +73,8 @@ class receptor:
             channel = channel, 
             wallet = wallet,
             stub = stub,
-            max_processes=max_processes
+            max_processes=max_processes,
+            tracer = tracer
         )
 
 class receptor_pool:
@@ -83,6 +87,7 @@ class receptor_pool:
             max_worker_threads: int = 150,
             max_active_receptors: int = 500,
             compression: str = None,
+            tracer: 'bittensor.utils.tracing.Tracer' = None,
         ) -> 'bittensor.ReceptorPool':
         r""" Initializes a receptor grpc connection.
             Args:
@@ -95,6 +100,8 @@ class receptor_pool:
                     Threadpool.
                 max_active_receptors (:type:`int`, `optional`):
                     Maximum allowed active allocated TCP connections.
+                tracer (:obj:`bittensor.utils.tracing.Tracer`, `optional`):
+                    Buffer of the stage timings of the requests of all receptors. If None, requests are not traced.
         """        
         if thread_pool == None:
             thread_pool = ThreadPoolExecutor( max_workers = max_worker_threads )
@@ -103,5 +110,6 @@ class receptor_pool:
             thread_pool = thread_pool,
             max_worker_threads = max_worker_threads,
             max_active_receptors = max_active_receptors,
-            compression = compression
+            compression = compression,
+            tracer = tracer
         )
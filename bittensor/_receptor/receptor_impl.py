@@ -33,6 +33,7 @@ from grpc import _common
 
 import bittensor
 import bittensor.utils.stats as stat_utils
+import bittensor.utils.tracing as tracing
 
 logger = logger.opt(colors=True)
 
@@ -55,7 +56,8 @@ class Request():
         inputs, 
         modality,
         grads_dy = None,
-        backward = False
+        backward = False,
+        outputs_buffer = None
         ):
         r""" Initialize a forward/backward request.
 
@@ -72,11 +74,15 @@ class Request():
 
                 backward (:type:`Bool`);
                     True if it is a backward request. False when it is a forward request instead.
+
+                outputs_buffer (:obj:`torch.FloatTensor` of shape :obj:`(batch_size, sequence_len, bittensor.__network_dim__)`, `optional`):
+                    Zero initialized tensor the forward response is deserialized into. Failed requests return it untouched.
         """
         # ---- Inputs ----
         self.inputs = inputs
         self.grads_dy = grads_dy
-        self.zeros = nill_response_for(inputs)
+        self.outputs_buffer = outputs_buffer
+        self._zeros = None
         
         # ---- Setups ----
         self.modality = modality
@@ -94,6 +100,25 @@ class Request():
         self.message = None
         self.outputs = None
 
+        # ---- Stage timings, set if the receptor is tracing ----
+        self.span = None
+
+    def lap(self, stage: str):
+        r""" Closes the stage of the request span, if the request is traced.
+        """
+        if self.span != None:
+            self.span.lap( stage )
+
+    @property
+    def zeros(self):
+        r""" Response returned on failure, only allocated when a request fails.
+        """
+        if self.outputs_buffer != None:
+            return self.outputs_buffer
+        if self._zeros == None:
+            self._zeros = nill_response_for(self.inputs)
+        return self._zeros
+
 class Receptor(nn.Module):
     """ Encapsulates a grpc connection to an axon endpoint as a standard auto-grad torch.nn.Module.
     """
@@ -105,6 +130,7 @@ class Receptor(nn.Module):
             channel: 'grpc._Channel',
             stub: 'bittensor.grpc.BittensorStub',
             max_processes: int,
+            tracer: 'tracing.Tracer' = None,
         ):
         r""" Initializes a receptor grpc connection.
 
@@ -117,6 +143,8 @@ class Receptor(nn.Module):
                     grpc TCP channel.
                 endpoint (:obj:`bittensor.grpc.BittensorStub`, `required`):
                     bittensor protocol stub created from channel.
+                tracer (:obj:`bittensor.utils.tracing.Tracer`, `optional`):
+                    Buffer of the stage timings of the requests. If None, requests are not traced.
         """
         super().__init__()
         self.wallet = wallet # Keypair information
@@ -128,6 +156,7 @@ class Receptor(nn.Module):
         self.receptor_uid = str(uuid.uuid1())
         self.semaphore = threading.Semaphore(max_processes)
         self.state_dict = _common.CYGRPC_CONNECTIVITY_STATE_TO_CHANNEL_CONNECTIVITY
+        self.tracer = tracer
         self.stats = SimpleNamespace(
             forward_qps = stat_utils.timed_rolling_avg(0.0, 0.01),
             backward_qps = stat_utils.timed_rolling_avg(0.0, 0.01),
@@ -136,6 +165,8 @@ class Receptor(nn.Module):
             forward_bytes_in = stat_utils.timed_rolling_avg(0.0, 0.01),
             backward_bytes_out = stat_utils.timed_rolling_avg(0.0, 0.01),
             backward_bytes_in = stat_utils.timed_rolling_avg(0.0, 0.01),
+            forward_latency = stat_utils.LatencyHistogram(),
+            backward_latency = stat_utils.LatencyHistogram(),
             codes = {
                 bittensor.proto.ReturnCode.NoReturn: 0,
                 bittensor.proto.ReturnCode.Success: 0,
@@ -356,7 +387,7 @@ class Receptor(nn.Module):
         """
         try:
             request.response = request.future.result()
-            self.stats.forward_bytes_in.update(sys.getsizeof(request.response))
+            self.stats.forward_bytes_in.update(request.response.ByteSize())
             self.stats.forward_elapsed_time.update((clock.time()-request.start_time))
             
         # ---- Catch GRPC Errors ----
@@ -435,6 +466,10 @@ class Receptor(nn.Module):
                     The request object holds all specifications and processing of the request.
         """
 
+        # ---- Deserialize straight into the preallocated response ----
+        if request.outputs_buffer != None:
+            return self.deserialize_forward_response_into_buffer(request)
+
         # ---- Deserialize response ----
         try:
             outputs = request.response.tensors[0]
@@ -468,6 +503,51 @@ class Receptor(nn.Module):
         
         return True, request 
 
+    def deserialize_forward_response_into_buffer(self, request):
+        r"""Deserialization for the forward request into request.outputs_buffer.
+            NaNs are replaced in place and the buffer is left zeroed on failure.
+
+            Args:
+                request: (:obj:`Request`, required):
+                    The request object holds all specifications and processing of the request.
+
+            Returns:
+                success: (:type:`bool`, `required`):
+                    True if the deserialization is successful.
+                request: (:obj:`Request`, required):
+                    The request object holds all specifications and processing of the request.
+        """
+        outputs = request.response.tensors[0]
+
+        # ---- Check response shape ----
+        if tuple(outputs.shape) != tuple(request.outputs_buffer.shape):
+            request.code = bittensor.proto.ReturnCode.ResponseShapeException
+            request.message = "output.shape:{} does not match inputs:{}".format(list(outputs.shape), request.inputs.shape)
+            self.request_log(request = request, is_response = True, inputs = list(request.inputs.shape), outputs = list(outputs.shape))
+            return False, request
+
+        # ---- Deserialize response ----
+        try:
+            deserializer = bittensor.serializer(  outputs.serializer )
+            deserializer.deserialize_into( outputs, request.outputs_buffer )
+
+        except Exception as e:
+            request.outputs_buffer.zero_()
+            request.code = bittensor.proto.ReturnCode.ResponseDeserializationException
+            request.message = 'Deserialziation exception with error:{}'.format(str(e))
+            self.request_log(request = request, is_response = True, inputs = list(request.inputs.shape))
+            return False, request
+
+        # ---- Safe catch NaNs and replace with 0.0 ----
+        request.outputs = torch.nan_to_num_( request.outputs_buffer, nan = 0.0, posinf = float('inf'), neginf = float('-inf') )
+
+        # ---- Return ----
+        request.code = request.response.return_code
+        self.request_log(request = request, is_response = True, inputs = list(request.inputs.shape), outputs = list(outputs.shape))
+        self.stats.codes[request.code] += 1
+        
+        return True, request 
+
     def deserialize_backward_response(self, request):
         r"""Deserialization for the backward request.
             The result would update request.output.
@@ -550,7 +630,8 @@ class Receptor(nn.Module):
         inputs: torch.Tensor, 
         modality: bittensor.proto.Modality,
         grads_dy: torch.FloatTensor = None,
-        backward: str = False 
+        backward: str = False,
+        outputs_buffer: torch.FloatTensor = None,
     ):  
         r""" Does all the checking and preprocessing to build the grpc request.
             
@@ -567,12 +648,17 @@ class Receptor(nn.Module):
                 backward (:type:`Bool`, `required`);
                     If the request is a backward request.
 
+                outputs_buffer (:obj:`torch.FloatTensor` of shape :obj:`(batch_size, sequence_len, bittensor.__network_dim__)`, `optional`):
+                    Zero initialized tensor the forward response is deserialized into.
+
             Returns:
                 request: (:obj:`Request`, required):
                     The request object holds all specifications and processing of the request.
         """
         # ---- Setup forward request namespace, which will hold all the objects regarding the forward request ----
-        request = Request(inputs = inputs, modality = modality, grads_dy = grads_dy, backward = backward)
+        request = Request(inputs = inputs, modality = modality, grads_dy = grads_dy, backward = backward, outputs_buffer = outputs_buffer)
+        if self.tracer != None:
+            request.span = self.tracer.start( 'receptor.backward' if backward else 'receptor.forward', pubkey = self.endpoint.hotkey, start_time = request.start_time )
 
         preprocessing_funs = [self.prerequisite_check, self.serialization, self.build_grpc_request]
 
@@ -580,6 +666,7 @@ class Receptor(nn.Module):
             check, request = fun(request)
             if not check:
                 return request 
+        request.lap( 'serialize' )
 
         request.code = bittensor.proto.ReturnCode.Success
         return request
@@ -602,30 +689,38 @@ class Receptor(nn.Module):
         
         # ---- Make RPC call ----
         try:
+            # Time since the preprocessing, i.e. waiting on the other requests of the receptor pool.
+            request.lap( 'pending' )
+            signature = self.sign()
+            request.lap( 'sign' )
+            # The trace id goes last, the axon reads the authentication metadata by position.
+            trace_metadata = ( (tracing.TRACE_ID_KEY, request.span.trace_id), ) if request.span != None else ()
             if not request.backward:
-                self.sign()
                 self.stats.forward_qps.update(1)
-                self.stats.forward_bytes_out.update(sys.getsizeof(request.grpc_request))
+                self.stats.forward_bytes_out.update(request.grpc_request.ByteSize())
                 request.future = self.stub.Forward.future(request = request.grpc_request, 
                                 timeout = timeout,
                                 metadata = (
                                         ('rpc-auth-header','Bittensor'),
-                                        ('bittensor-signature',self.sign()),
+                                        ('bittensor-signature',signature),
                                         ('bittensor-version',str(bittensor.__version_as_int__)),
                                         ('request_type', str(bittensor.proto.RequestType.FORWARD)),
-                                        ))
+                                        ) + trace_metadata)
                 request.future.add_done_callback(lambda z : self.handle_request_response(request))
             else:
                 self.stats.backward_qps.update(1)
-                self.stats.backward_bytes_out.update(sys.getsizeof(request.grpc_request))
+                self.stats.backward_bytes_out.update(request.grpc_request.ByteSize())
                 request.future = self.stub.Backward.future(request = request.grpc_request, 
                                 timeout = timeout,
                                 metadata = (
                                         ('rpc-auth-header','Bittensor'),
-                                        ('bittensor-signature',self.sign()),
+                                        ('bittensor-signature',signature),
                                         ('bittensor-version',str(bittensor.__version_as_int__)),
                                         ('request_type', str(bittensor.proto.RequestType.BACKWARD)),
-                                        ))
+                                        ) + trace_metadata)
+                # Backward responses are not awaited by the receptor pool, the span ends once the request is sent.
+                request.lap( 'send' )
+                self.finish_span(request)
             
             request.code = bittensor.proto.ReturnCode.Success
             self.request_log(request = request, is_response = False, inputs = list(request.serialized_inputs.shape))
@@ -671,21 +766,59 @@ class Receptor(nn.Module):
 
         if (request.code != bittensor.proto.ReturnCode.Success) or (request.future == None):
             request.end_time = clock.time() - request.start_time
+            self.finish_span(request)
             return request.zeros, request.code, request.end_time
 
         deserializer = self.deserialize_forward_response if not request.backward else self.deserialize_backward_response
         response_handling_funs = [self.collect_future, self.check_response, deserializer]
 
-        for fun in response_handling_funs:
+        for stage, fun in zip( ['network', 'check', 'deserialize'], response_handling_funs ):
             check, request = fun(request)
+            request.lap( stage )
             if not check:
                 request.end_time = clock.time()-request.start_time
+                self.record_latency(request)
+                self.finish_span(request)
                 return request.zeros, request.code, request.end_time
         
         request.end_time = clock.time()-request.start_time
+        self.record_latency(request)
+        self.finish_span(request)
         return request.outputs if check else request.zeros, request.code, request.end_time
+
+    def record_latency(self, request):
+        r""" Records the duration of a request that reached the network in the forward or backward latency histogram.
+        """
+        if request.backward:
+            self.stats.backward_latency.record(request.end_time)
+        else:
+            self.stats.forward_latency.record(request.end_time)
  
 
+    def finish_span(self, request):
+        r""" Records the span of a traced request, with the server stage timings returned by a tracing axon
+            placed at the middle of the network stage.
+        """
+        span = request.span
+        if span == None or span.finished:
+            return
+        try:
+            if request.future != None and request.future.done() and not request.future.cancelled():
+                metadata = dict( request.future.trailing_metadata() or () )
+                if tracing.SERVER_TIMING_KEY in metadata:
+                    network = [ stage for stage in span.stages if stage[0] == 'network' ]
+                    timings = tracing.parse_server_timing( metadata[ tracing.SERVER_TIMING_KEY ] )
+                    if len( network ) > 0:
+                        _, network_start, network_duration = network[0]
+                        start = network_start + max( network_duration - sum( duration for _, duration in timings ), 0 ) / 2
+                        for name, duration in timings:
+                            span.add( 'server.' + name, start, duration )
+                            start += duration
+        except Exception as e:
+            logger.debug('Failed to read the server timings of {}: {}', self.endpoint.hotkey, e)
+        span.finish( request.code )
+        self.tracer.record( span )
+
     def rpc_exception_handler(self, request, rpc_error_call):
         r""" Handle the rpc exception call according to grpc status code.
         """
@@ -26,6 +26,7 @@ from loguru import logger
 import concurrent
 import bittensor
 import bittensor.utils.networking as net
+import bittensor.utils.stats as stat_utils
 from concurrent.futures import ThreadPoolExecutor
 
 logger = logger.opt(colors=True)
@@ -40,6 +41,7 @@ class ReceptorPool ( torch.nn.Module ):
         max_worker_threads: int,
         max_active_receptors: int,
         compression: str,
+        tracer: 'bittensor.utils.tracing.Tracer' = None,
     ):
         super().__init__()
         self.wallet = wallet
@@ -50,7 +52,11 @@ class ReceptorPool ( torch.nn.Module ):
         self.cull_mutex = Lock()
         self.max_processes = 10
         self.compression = compression
+        self.tracer = tracer
         self.total_requests = 0
+        # Latencies of the receptors that were destroyed or replaced.
+        self.forward_latency = stat_utils.LatencyHistogram()
+        self.backward_latency = stat_utils.LatencyHistogram()
 
 
         
@@ -71,6 +77,19 @@ class ReceptorPool ( torch.nn.Module ):
 
     def get_total_requests(self):
         return self.total_requests
+    def get_latency(self, backward: bool = False) -> 'stat_utils.LatencyHistogram':
+        r""" Return the forward or backward latencies of all the receptors, past and active, merged in one histogram.
+        """
+        latency = stat_utils.LatencyHistogram().merge( self.backward_latency if backward else self.forward_latency )
+        for receptor in list( self.receptors.values() ):
+            latency.merge( receptor.stats.backward_latency if backward else receptor.stats.forward_latency )
+        return latency
+
+    def _retire_receptor_stats( self, receptor: 'bittensor.Receptor' ):
+        # Keeps the latencies of a receptor that is about to be dropped.
+        self.forward_latency.merge( receptor.stats.forward_latency )
+        self.backward_latency.merge( receptor.stats.backward_latency )
+
     def get_receptors_state(self):
         r""" Return the state of each receptor.
             Returns:
@@ -84,7 +103,8 @@ class ReceptorPool ( torch.nn.Module ):
             endpoints: List['bittensor.Endpoint'],
             inputs: List[torch.Tensor],
             modality: bittensor.proto.Modality,
-            timeout: int
+            timeout: int,
+            outputs_buffer: torch.FloatTensor = None
         ) -> Tuple[List[torch.Tensor], List[int], List[float]]:
         r""" Forward tensor inputs to endpoints.
 
@@ -102,6 +122,9 @@ class ReceptorPool ( torch.nn.Module ):
                 timeout (int):
                     request timeout.
 
+                outputs_buffer (:obj:`torch.FloatTensor` of shape :obj:`(num_endpoints, batch_size, sequence_len, bittensor.network_size)`, `optional`):
+                    Zero initialized tensor the responses are deserialized into. If set, forward_outputs are its slices.
+
             Returns:
                 forward_outputs (:obj:`List[torch.FloatTensor]` of shape :obj:`num_endpoints * (batch_size, sequence_len, bittensor.network_size)]`, `required`):
                     Output encodings of tensors produced by remote endpoints. Non-responses are zeroes of common shape.
@@ -125,10 +148,11 @@ class ReceptorPool ( torch.nn.Module ):
 
         # ---- Preprocessing for the forward function, get the request. ---- 
         requests = []
-        for arg in call_args:
+        for index, arg in enumerate(call_args):
             self.total_requests += 1
             receptor, inputs, modality = arg
-            requests.append(receptor.preprocess_request ( inputs = inputs, modality = modality ))
+            buffer = outputs_buffer[ index ] if outputs_buffer != None else None
+            requests.append(receptor.preprocess_request ( inputs = inputs, modality = modality, outputs_buffer = buffer ))
 
         # ---- Send the forward request to peers. ---- 
         request_futures = []
@@ -147,12 +171,12 @@ class ReceptorPool ( torch.nn.Module ):
             forward_outputs, forward_codes, forward_times = zip(*results)
 
         except concurrent.futures._base.TimeoutError:
-            forward_outputs= [torch.zeros( (inputs[0].size(0), inputs[0].size(1), bittensor.__network_dim__), dtype=torch.float32)] * len(endpoints) 
+            forward_outputs= self._nill_forward_outputs( inputs, len(endpoints), outputs_buffer )
             forward_codes= [bittensor.proto.ReturnCode.Timeout] * len(endpoints) 
             forward_times= [15] * len(endpoints)
         
         except Exception as e:
-            forward_outputs= [torch.zeros( (inputs[0].size(0), inputs[0].size(1), bittensor.__network_dim__), dtype=torch.float32)] * len(endpoints) 
+            forward_outputs= self._nill_forward_outputs( inputs, len(endpoints), outputs_buffer )
             forward_codes= [bittensor.proto.ReturnCode.UnknownException] * len(endpoints) 
             forward_times= [15] * len(endpoints)
             logger.exception('Exception encountered: {}'.format(e))
@@ -163,6 +187,14 @@ class ReceptorPool ( torch.nn.Module ):
         # ---- Return ----
         return list(forward_outputs), list(forward_codes), list(forward_times)
 
+    @staticmethod
+    def _nill_forward_outputs( inputs, n_endpoints, outputs_buffer = None ) -> List[torch.Tensor]:
+        r""" Zero responses for a failed forward call.
+        """
+        if outputs_buffer != None:
+            return list( outputs_buffer.zero_().unbind(0) )
+        return [torch.zeros( (inputs[0].size(0), inputs[0].size(1), bittensor.__network_dim__), dtype=torch.float32)] * n_endpoints
+
     def backward(
                 self, 
                 endpoints: List['bittensor.Endpoint'],
@@ -257,6 +289,7 @@ class ReceptorPool ( torch.nn.Module ):
                 if receptor_to_remove != None:
                     try:
                         bittensor.logging.destroy_receptor_log(receptor_to_remove.endpoint)
+                        self._retire_receptor_stats( receptor_to_remove )
                         self.receptors[ receptor_to_remove.endpoint.hotkey ].close()
                         del self.receptors[ receptor_to_remove.endpoint.hotkey ]
                     except KeyError:
@@ -278,11 +311,13 @@ class ReceptorPool ( torch.nn.Module ):
             if receptor.endpoint.ip != endpoint.ip or receptor.endpoint.port != endpoint.port:
                 #receptor.close()
                 bittensor.logging.update_receptor_log( endpoint )
+                self._retire_receptor_stats( receptor )
                 receptor = bittensor.receptor (
                     endpoint = endpoint, 
                     wallet = self.wallet,
                     external_ip = self.external_ip,
-                    max_processes = self.max_processes
+                    max_processes = self.max_processes,
+                    tracer = self.tracer
                 )            
                 self.receptors[ receptor.endpoint.hotkey ] = receptor
 
@@ -294,7 +329,8 @@ class ReceptorPool ( torch.nn.Module ):
                     wallet = self.wallet,
                     external_ip = self.external_ip,
                     max_processes = self.max_processes,
-                    compression = self.compression
+                    compression = self.compression,
+                    tracer = self.tracer
             )
             self.receptors[ receptor.endpoint.hotkey ] = receptor
             
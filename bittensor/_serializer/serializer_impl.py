@@ -98,6 +98,24 @@ class Serializer(object):
         else:
             raise bittensor.serializer.SerializationTypeNotImplementedException("Deserialization to type {} not implemented.".format(to_type))
 
+    def deserialize_into (self, tensor_pb2: bittensor.proto.Tensor, out: torch.Tensor) -> torch.Tensor:
+        """Deserializes a bittensor.proto.Tensor into a preallocated torch tensor of the same shape.
+
+        Args:
+            tensor_pb2 (`obj`: bittensor.proto.Tensor, `required`): 
+                Serialized tensor as bittensor.proto.proto. 
+
+            out (:obj:`torch.Tensor`, `required`): 
+                Destination cpu tensor, the serialized values are cast to its dtype.
+
+        Returns:
+            out (:obj:`torch.Tensor`, `required`): 
+                The filled destination tensor.
+        """
+        if tuple(tensor_pb2.shape) != tuple(out.shape):
+            raise bittensor.serializer.DeserializationException('Serialized shape {} does not match destination shape {}'.format(list(tensor_pb2.shape), list(out.shape)))
+        return out.copy_( self.deserialize_to_torch( tensor_pb2 ) )
+
     def serialize_from_tensorflow(self, tensorflow_tensor: torch.Tensor, modality: bittensor.proto.Modality) -> bittensor.proto.Tensor:
         """ tensorflow -> bittensor.proto.Tensor """
         raise bittensor.serializer.SerializationTypeNotImplementedException
@@ -172,6 +190,26 @@ class MSGPackSerializer( Serializer ):
         torch_object = torch.as_tensor(numpy_object).view(shape).requires_grad_(torch_proto.requires_grad)
         return torch_object.type(dtype)
 
+    def deserialize_into(self, torch_proto: bittensor.proto.Tensor, out: torch.Tensor) -> torch.Tensor:
+        """Deserializes an bittensor.proto.Tensor directly into a preallocated cpu tensor without intermediate copies.
+
+        Args:
+            torch_proto (bittensor.proto.Tensor): 
+                Proto containing torch tensor to derserialize.
+
+            out (torch.Tensor): 
+                Destination tensor with the same shape as the proto.
+
+        Returns:
+            torch.Tensor: 
+                The filled destination tensor.
+        """
+        if tuple(torch_proto.shape) != tuple(out.shape):
+            raise bittensor.serializer.DeserializationException('Serialized shape {} does not match destination shape {}'.format(list(torch_proto.shape), list(out.shape)))
+        numpy_object = msgpack.unpackb(torch_proto.buffer, object_hook=msgpack_numpy.decode)
+        out.numpy()[...] = numpy_object.reshape( out.shape )
+        return out
+
 
 class CMPPackSerializer( Serializer ):
     """ Make conversion between torch and bittensor.proto.torch in float16
@@ -222,3 +260,23 @@ class CMPPackSerializer( Serializer ):
         numpy_object = msgpack.unpackb(torch_proto.buffer, object_hook=msgpack_numpy.decode).copy()
         torch_object = torch.as_tensor(numpy_object).view(shape).requires_grad_(torch_proto.requires_grad)
         return torch_object.type(dtype)
+
+    def deserialize_into(self, torch_proto: bittensor.proto.Tensor, out: torch.Tensor) -> torch.Tensor:
+        """Deserializes an bittensor.proto.Tensor directly into a preallocated cpu tensor without intermediate copies.
+
+        Args:
+            torch_proto (bittensor.proto.Tensor): 
+                Proto containing torch tensor to derserialize.
+
+            out (torch.Tensor): 
+                Destination tensor with the same shape as the proto.
+
+        Returns:
+            torch.Tensor: 
+                The filled destination tensor.
+        """
+        if tuple(torch_proto.shape) != tuple(out.shape):
+            raise bittensor.serializer.DeserializationException('Serialized shape {} does not match destination shape {}'.format(list(torch_proto.shape), list(out.shape)))
+        numpy_object = msgpack.unpackb(torch_proto.buffer, object_hook=msgpack_numpy.decode)
+        out.numpy()[...] = numpy_object.reshape( out.shape )
+        return out
@@ -16,6 +16,7 @@
 # DEALINGS IN THE SOFTWARE.
 import argparse
 import os
+from typing import Union
 
 import random
 import time
@@ -29,6 +30,7 @@ from substrateinterface import SubstrateInterface
 
 from . import subtensor_impl
 from . import subtensor_mock
+from . import subtensor_inprocess
 
 from loguru import logger
 logger = logger.opt(colors=True)
@@ -80,7 +82,7 @@ class subtensor:
             config: 'bittensor.config' = None,
             network: str = None,
             chain_endpoint: str = None,
-            _mock: bool = None,
+            _mock: Union[bool, str] = None,
         ) -> 'bittensor.Subtensor':
         r""" Initializes a subtensor chain interface.
             Args:
@@ -92,16 +94,22 @@ class subtensor:
                             -- nakamoto (main network)
                             -- nobunaga (staging network)
                             -- mock (mock network for testing.)
+                            -- inprocess (in memory chain for testing.)
                     If this option is set it overloads subtensor.chain_endpoint with 
                     an entry point node from that network.
                 chain_endpoint (default=None, type=str)
                     The subtensor endpoint flag. If set, overrides the network argument.
-                _mock (bool, `optional`):
+                _mock (Union[bool, str], `optional`):
                     Returned object is mocks the underlying chain connection.
+                    If 'inprocess', returns a pure python chain held in memory, without a background process.
         """
         if config == None: config = subtensor.config()
         config = copy.deepcopy( config )
 
+        # Returns a chain held in memory.
+        if _mock == 'inprocess' or network == 'inprocess' or config.subtensor.network == 'inprocess':
+            return subtensor_inprocess.InProcessSubtensor()
+
         # Returns a mocked connection with a background chain connection.
         config.subtensor._mock = _mock if _mock != None else config.subtensor._mock
         if config.subtensor._mock == True or network == 'mock' or config.subtensor.network == 'mock':
@@ -176,6 +184,7 @@ class subtensor:
                                         -- nakamoto (master network)
                                         -- local (local running network)
                                         -- mock (creates a mock connection (for testing))
+                                        -- inprocess (creates a chain held in memory (for testing))
                                     If this option is set it overloads subtensor.chain_endpoint with 
                                     an entry point node from that network.
                                     ''')
@@ -23,6 +23,7 @@ import bittensor
 from tqdm import tqdm
 import bittensor.utils.networking as net
 import bittensor.utils.weight_utils as weight_utils
+import bittensor.utils.stats as stat_utils
 from retry import retry
 from substrateinterface import SubstrateInterface
 from bittensor.utils.balance import Balance
@@ -67,6 +68,32 @@ class Subtensor:
         self.network = network
         self.chain_endpoint = chain_endpoint
         self.substrate = substrate
+        self.stats = SimpleNamespace(
+            # Chain RPC requests per method.
+            rpc_requests = {},
+            # Chain RPC requests that raised.
+            rpc_errors = 0,
+            # Duration of the chain RPC requests.
+            rpc_latency = stat_utils.LatencyHistogram(),
+        )
+        if substrate != None:
+            self._count_rpc_requests( substrate )
+
+    def _count_rpc_requests( self, substrate: 'SubstrateInterface' ):
+        r""" Wraps the substrate rpc_request, which every query and extrinsic goes through, to count the chain RPCs.
+        """
+        rpc_request = substrate.rpc_request
+        def counted_rpc_request( method, params, *args, **kwargs ):
+            start_time = time.time()
+            self.stats.rpc_requests[ method ] = self.stats.rpc_requests.get( method, 0 ) + 1
+            try:
+                return rpc_request( method, params, *args, **kwargs )
+            except Exception:
+                self.stats.rpc_errors += 1
+                raise
+            finally:
+                self.stats.rpc_latency.record( time.time() - start_time )
+        substrate.rpc_request = counted_rpc_request
 
     def __str__(self) -> str:
         if self.network == self.chain_endpoint:
@@ -0,0 +1,530 @@
+""" In memory chain with the Subtensor interface, for tests and benchmarks.
+"""
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import hashlib
+import time
+from threading import RLock
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Union
+
+import numpy as np
+import torch
+from substrateinterface.utils.ss58 import ss58_encode
+
+import bittensor
+import bittensor.utils.networking as net
+import bittensor.utils.weight_utils as weight_utils
+from bittensor.utils.balance import Balance
+from . import subtensor_impl
+
+RAOPERTAO = 1000000000
+U32MAX = 4294967295
+U16MAX = 65535
+
+# Chain hyperparameters, overridden with the InProcessSubtensor keyword arguments.
+DEFAULT_HYPERPARAMETERS = {
+    'rho': 10,
+    'kappa': 32767,
+    'difficulty': 1,
+    'immunity_period': 200,
+    'validator_batch_size': 10,
+    'validator_sequence_length': 20,
+    'validator_epochs_per_reset': 60,
+    'validator_epoch_length': 250,
+    'min_allowed_weights': 1,
+    'max_allowed_min_max_ratio': 64,
+    'max_n': 4096,
+    'blocks_per_epoch': 100,
+    # Tao emitted per block.
+    'block_emission': 1.0,
+}
+
+# Addresses are resolved to the local host when an axon binds a wildcard.
+WILDCARD_IPS = [ '', '[::]', '::', '0.0.0.0' ]
+
+class InProcessSubtensor( subtensor_impl.Subtensor ):
+    r""" Pure python chain held in memory, with the Subtensor interface used by the wallets, the metagraph and the neurons.
+        Blocks advance with a virtual clock, once every block_time seconds, and with :obj:`advance`. Every blocks_per_epoch
+        blocks, ranks, trust, consensus, incentive and dividends are recomputed from the weights and the stake with a
+        simplified Yuma consensus, and the epoch emission is added to the stake. Registration solves the proof of work
+        at the chain difficulty, trivial by default. State is not versioned: queries at a past block return the current state.
+
+        Args:
+            block_time (:type:`float`, `optional`):
+                Seconds per block of the virtual clock. If 0, blocks only advance with :obj:`advance`.
+            start_block (:type:`int`, `optional`):
+                Block of the chain at creation.
+            clock (:obj:`Callable[[], float]`, `optional`):
+                Time source of the virtual clock.
+            hyperparameters:
+                Overrides of :obj:`DEFAULT_HYPERPARAMETERS`, i.e. max_n = 10000 or blocks_per_epoch = 10.
+    """
+    def __init__(
+            self,
+            block_time: float = bittensor.__blocktime__,
+            start_block: int = 0,
+            clock: Callable[[], float] = time.time,
+            **hyperparameters
+        ):
+        super().__init__( substrate = None, network = 'inprocess', chain_endpoint = 'inprocess' )
+        unknown = set( hyperparameters ) - set( DEFAULT_HYPERPARAMETERS )
+        if len( unknown ) > 0:
+            raise ValueError( 'Unknown chain hyperparameters: {}'.format( sorted( unknown ) ) )
+        self.hyperparameters = SimpleNamespace( **{ **DEFAULT_HYPERPARAMETERS, **hyperparameters } )
+        self.block_time = block_time
+        self.clock = clock
+        self.lock = RLock()
+        self._start_time = clock()
+        self._start_block = start_block
+        self._advanced_blocks = 0
+        self._epoch_block = start_block
+        # Neurons as the namespaces returned by the chain, with the registration blocks for pruning.
+        self._neurons = []
+        self._registration_blocks = []
+        self._uids = {}
+        # Free balances in rao by coldkey.
+        self._balances = {}
+        self._issuance = 0
+
+    def __str__(self) -> str:
+        return "InProcessSubtensor({}, {})".format( len( self._neurons ), self.get_current_block() )
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+    # ---- Blocks ----
+
+    def get_current_block( self ) -> int:
+        r""" Returns the current block of the virtual clock, running the epochs it went through.
+        """
+        with self.lock:
+            elapsed = int( ( self.clock() - self._start_time ) / self.block_time ) if self.block_time > 0 else 0
+            block = self._start_block + elapsed + self._advanced_blocks
+            self._run_epochs( block )
+            return block
+
+    def advance( self, blocks: int = 1 ) -> int:
+        r""" Moves the chain forward by blocks and returns the new current block.
+        """
+        with self.lock:
+            self._advanced_blocks += blocks
+            return self.get_current_block()
+
+    def get_block_hash( self, block: int ) -> str:
+        return '0x' + hashlib.sha256( 'inprocess{}'.format( block ).encode() ).hexdigest()
+
+    def connect( self, timeout: int = 10, failure = True ) -> bool:
+        return True
+
+    def endpoint_for_network( self, blacklist: List[str] = [] ) -> str:
+        return self.chain_endpoint
+
+    # ---- Hyperparameters ----
+
+    @property
+    def rho( self ) -> int:
+        return self.hyperparameters.rho
+
+    @property
+    def kappa( self ) -> int:
+        return self.hyperparameters.kappa
+
+    @property
+    def difficulty( self ) -> int:
+        return self.hyperparameters.difficulty
+
+    @property
+    def immunity_period( self ) -> int:
+        return self.hyperparameters.immunity_period
+
+    @property
+    def validator_batch_size( self ) -> int:
+        return self.hyperparameters.validator_batch_size
+
+    @property
+    def validator_sequence_length( self ) -> int:
+        return self.hyperparameters.validator_sequence_length
+
+    @property
+    def validator_epochs_per_reset( self ) -> int:
+        return self.hyperparameters.validator_epochs_per_reset
+
+    @property
+    def validator_epoch_length( self ) -> int:
+        return self.hyperparameters.validator_epoch_length
+
+    @property
+    def min_allowed_weights( self ) -> int:
+        return self.hyperparameters.min_allowed_weights
+
+    @property
+    def max_allowed_min_max_ratio( self ) -> int:
+        return self.hyperparameters.max_allowed_min_max_ratio
+
+    @property
+    def max_n( self ) -> int:
+        return self.hyperparameters.max_n
+
+    @property
+    def blocks_per_epoch( self ) -> int:
+        return self.hyperparameters.blocks_per_epoch
+
+    @property
+    def blocks_since_epoch( self ) -> int:
+        return self.get_current_block() - self._epoch_block
+
+    @property
+    def n( self ) -> int:
+        return len( self._neurons )
+
+    @property
+    def total_issuance( self ) -> 'bittensor.Balance':
+        return Balance.from_rao( self._issuance )
+
+    @property
+    def total_stake( self ) -> 'bittensor.Balance':
+        with self.lock:
+            return Balance.from_tao( sum( neuron.stake for neuron in self._neurons ) )
+
+    # ---- Queries ----
+
+    def get_n( self, block: int = None ) -> int:
+        return len( self._neurons )
+
+    def neurons( self, block: int = None ) -> List[SimpleNamespace]:
+        r""" Returns copies of all the neurons on the chain, ordered by uid.
+        """
+        with self.lock:
+            self.get_current_block()
+            return [ SimpleNamespace( **vars( neuron ) ) for neuron in self._neurons ]
+
+    def neuron_for_uid( self, uid: int, block: int = None ) -> SimpleNamespace:
+        with self.lock:
+            if uid < 0 or uid >= len( self._neurons ):
+                return subtensor_impl.Subtensor._null_neuron()
+            return SimpleNamespace( **vars( self._neurons[ uid ] ) )
+
+    def get_uid_for_hotkey( self, ss58_hotkey: str, block: int = None ) -> int:
+        return self._uids.get( ss58_hotkey, -1 )
+
+    def is_hotkey_registered( self, ss58_hotkey: str, block: int = None ) -> bool:
+        return ss58_hotkey in self._uids
+
+    def neuron_for_pubkey( self, ss58_hotkey: str, block: int = None ) -> SimpleNamespace:
+        return self.neuron_for_uid( self.get_uid_for_hotkey( ss58_hotkey ) )
+
+    def get_balance( self, address: str, block: int = None ) -> Balance:
+        return Balance.from_rao( self._balances.get( address, 0 ) )
+
+    def get_balances( self, block: int = None ) -> Dict[str, Balance]:
+        with self.lock:
+            return { address: Balance.from_rao( rao ) for address, rao in self._balances.items() }
+
+    # ---- Extrinsics ----
+
+    def register(
+            self,
+            wallet: 'bittensor.Wallet',
+            wait_for_inclusion: bool = False,
+            wait_for_finalization: bool = True,
+            prompt: bool = False,
+            max_allowed_attempts: int = 3
+        ) -> bool:
+        r""" Solves the proof of work at the chain difficulty and registers the wallet hotkey.
+            When the chain is full, the neuron with the lowest emission out of its immunity period is replaced.
+        """
+        with self.lock:
+            if wallet.hotkey.ss58_address in self._uids:
+                return True
+            block = self.get_current_block()
+            block_hash = self.get_block_hash( block )
+            nonce = 0
+            while not bittensor.utils.seal_meets_difficulty( bittensor.utils.create_seal_hash( block_hash, nonce ), self.difficulty ):
+                nonce += 1
+            return self._register( wallet.hotkey.ss58_address, wallet.coldkeypub.ss58_address, block ) != None
+
+    def serve(
+            self,
+            wallet: 'bittensor.wallet',
+            ip: str,
+            port: int,
+            modality: int,
+            wait_for_inclusion: bool = False,
+            wait_for_finalization = True,
+            prompt: bool = False,
+        ) -> bool:
+        with self.lock:
+            uid = self._uids.get( wallet.hotkey.ss58_address )
+            if uid == None:
+                return False
+            neuron = self._neurons[ uid ]
+            neuron.ip = net.ip_to_int( ip )
+            neuron.ip_type = net.ip_version( ip )
+            neuron.port = port
+            neuron.modality = modality
+            neuron.version = bittensor.__version_as_int__
+            return True
+
+    def serve_axon(
+            self,
+            axon: 'bittensor.Axon',
+            use_upnpc: bool = False,
+            wait_for_inclusion: bool = False,
+            wait_for_finalization: bool = True,
+            prompt: bool = False,
+        ) -> bool:
+        r""" Serves the axon at its bound address, or on the local host if it binds all interfaces.
+        """
+        ip = '127.0.0.1' if axon.ip in WILDCARD_IPS else axon.ip
+        return self.serve( axon.wallet, ip, axon.port, axon.modality )
+
+    def add_stake(
+            self,
+            wallet: 'bittensor.wallet',
+            amount: Union[Balance, float] = None,
+            wait_for_inclusion: bool = True,
+            wait_for_finalization: bool = False,
+            prompt: bool = False,
+        ) -> bool:
+        with self.lock:
+            uid = self._uids.get( wallet.hotkey.ss58_address )
+            coldkey = wallet.coldkeypub.ss58_address
+            balance = self._balances.get( coldkey, 0 )
+            rao = balance if amount == None else self._to_rao( amount )
+            if uid == None or rao > balance:
+                return False
+            self._balances[ coldkey ] = balance - rao
+            self._neurons[ uid ].stake += rao / RAOPERTAO
+            return True
+
+    def unstake(
+            self,
+            wallet: 'bittensor.wallet',
+            amount: Union[Balance, float] = None,
+            wait_for_inclusion: bool = True,
+            wait_for_finalization: bool = False,
+            prompt: bool = False,
+        ) -> bool:
+        with self.lock:
+            uid = self._uids.get( wallet.hotkey.ss58_address )
+            if uid == None:
+                return False
+            stake = int( round( self._neurons[ uid ].stake * RAOPERTAO ) )
+            rao = stake if amount == None else self._to_rao( amount )
+            if rao > stake:
+                return False
+            self._neurons[ uid ].stake = ( stake - rao ) / RAOPERTAO
+            coldkey = wallet.coldkeypub.ss58_address
+            self._balances[ coldkey ] = self._balances.get( coldkey, 0 ) + rao
+            return True
+
+    def transfer(
+            self,
+            wallet: 'bittensor.wallet',
+            dest: str,
+            amount: Union[Balance, float],
+            wait_for_inclusion: bool = True,
+            wait_for_finalization: bool = False,
+            prompt: bool = False,
+        ) -> bool:
+        with self.lock:
+            source = wallet.coldkeypub.ss58_address
+            rao = self._to_rao( amount )
+            if rao > self._balances.get( source, 0 ):
+                return False
+            self._balances[ source ] -= rao
+            self._balances[ dest ] = self._balances.get( dest, 0 ) + rao
+            return True
+
+    def set_weights(
+            self,
+            wallet: 'bittensor.wallet',
+            uids: Union[torch.LongTensor, list],
+            weights: Union[torch.FloatTensor, list],
+            wait_for_inclusion: bool = False,
+            wait_for_finalization: bool = False,
+            prompt: bool = False
+        ) -> bool:
+        r""" Sets the normalized weights of the wallet hotkey, fails if the hotkey is not registered or a uid does not exist.
+        """
+        if isinstance( uids, list ):
+            uids = torch.tensor( uids, dtype = torch.int64 )
+        if isinstance( weights, list ):
+            weights = torch.tensor( weights, dtype = torch.float32 )
+        try:
+            weight_uids, weight_vals = weight_utils.convert_weights_and_uids_for_emit( uids, weights )
+        except ValueError:
+            return False
+        with self.lock:
+            uid = self._uids.get( wallet.hotkey.ss58_address )
+            if uid == None or any( dest >= len( self._neurons ) for dest in weight_uids ):
+                return False
+            neuron = self._neurons[ uid ]
+            neuron.weights = list( zip( weight_uids, weight_vals ) )
+            neuron.last_update = self.get_current_block()
+            return True
+
+    # ---- Test helpers ----
+
+    def set_balance( self, address: str, amount: Union[Balance, float] ):
+        r""" Sets the free balance of the address, in tao or as a Balance.
+        """
+        with self.lock:
+            rao = self._to_rao( amount )
+            self._issuance += rao - self._balances.get( address, 0 )
+            self._balances[ address ] = rao
+
+    def add_synthetic_neurons(
+            self,
+            n: int,
+            stake: float = 0.0,
+            ip: str = '127.0.0.1',
+            port: int = 8091,
+            weights_per_neuron: int = 0,
+            seed: int = None,
+        ) -> List[int]:
+        r""" Registers n neurons with random hotkeys and coldkeys, served on consecutive ports from port.
+            Their keys cannot sign, they stand in for the remote peers of a network.
+            Args:
+                n (:type:`int`, `required`):
+                    Number of neurons to add, max_n is raised if needed.
+                stake (:type:`float`, `optional`):
+                    Stake in tao of each neuron.
+                ip (:type:`str`, `optional`):
+                    Ip served by the neurons, if None they are not served.
+                port (:type:`int`, `optional`):
+                    Port of the first neuron.
+                weights_per_neuron (:type:`int`, `optional`):
+                    Number of random uids each neuron sets weights on.
+                seed (:type:`int`, `optional`):
+                    Seed of the keys, ports and weights.
+            Returns:
+                uids (:obj:`List[int]`):
+                    uids of the added neurons.
+        """
+        rng = np.random.default_rng( seed )
+        with self.lock:
+            self.hyperparameters.max_n = max( self.hyperparameters.max_n, len( self._neurons ) + n )
+            block = self.get_current_block()
+            uids = []
+            for i in range( n ):
+                hotkey = ss58_encode( rng.bytes( 32 ), ss58_format = bittensor.__ss58_format__ )
+                coldkey = ss58_encode( rng.bytes( 32 ), ss58_format = bittensor.__ss58_format__ )
+                uid = self._register( hotkey, coldkey, block )
+                neuron = self._neurons[ uid ]
+                neuron.stake = stake
+                if ip != None:
+                    neuron.ip = net.ip_to_int( ip )
+                    neuron.ip_type = net.ip_version( ip )
+                    neuron.port = port + i
+                    neuron.version = bittensor.__version_as_int__
+                uids.append( uid )
+            if weights_per_neuron > 0:
+                for uid in uids:
+                    dests = rng.choice( len( self._neurons ), size = min( weights_per_neuron, len( self._neurons ) ), replace = False )
+                    values = rng.random( len( dests ) )
+                    self._neurons[ uid ].weights = list( zip( *weight_utils.convert_weights_and_uids_for_emit( torch.tensor( dests ), torch.tensor( values, dtype = torch.float32 ) ) ) )
+            return uids
+
+    # ---- Internals ----
+
+    @staticmethod
+    def _to_rao( amount: Union[Balance, float] ) -> int:
+        return amount.rao if isinstance( amount, Balance ) else int( round( amount * RAOPERTAO ) )
+
+    def _new_neuron( self, uid: int, hotkey: str, coldkey: str, block: int ) -> SimpleNamespace:
+        neuron = subtensor_impl.Subtensor._null_neuron()
+        neuron.uid = uid
+        neuron.hotkey = hotkey
+        neuron.coldkey = coldkey
+        neuron.active = 1
+        neuron.last_update = block
+        neuron.is_null = False
+        return neuron
+
+    def _register( self, hotkey: str, coldkey: str, block: int ) -> int:
+        r""" Appends the neuron, or replaces the lowest emission neuron out of its immunity period when the chain is full.
+            Returns the uid, or None if every neuron is immune.
+        """
+        if len( self._neurons ) < self.hyperparameters.max_n:
+            uid = len( self._neurons )
+            self._neurons.append( None )
+            self._registration_blocks.append( block )
+        else:
+            prunable = [ neuron for neuron, registered in zip( self._neurons, self._registration_blocks ) if block - registered >= self.immunity_period ]
+            if len( prunable ) == 0:
+                return None
+            pruned = min( prunable, key = lambda neuron: neuron.emission )
+            uid = pruned.uid
+            # The stake of the pruned neuron returns to its coldkey.
+            self._balances[ pruned.coldkey ] = self._balances.get( pruned.coldkey, 0 ) + int( round( pruned.stake * RAOPERTAO ) )
+            del self._uids[ pruned.hotkey ]
+            self._registration_blocks[ uid ] = block
+        self._neurons[ uid ] = self._new_neuron( uid, hotkey, coldkey, block )
+        self._uids[ hotkey ] = uid
+        return uid
+
+    def _run_epochs( self, block: int ):
+        epochs = ( block - self._epoch_block ) // self.blocks_per_epoch
+        if epochs <= 0:
+            return
+        self._epoch_block += epochs * self.blocks_per_epoch
+        self._epoch( epochs )
+
+    def _epoch( self, epochs: int ):
+        r""" Simplified Yuma consensus: ranks are the stake weighted sums of the normalized weights, trust is the share of
+            stake setting a weight on the neuron, consensus a sigmoid of trust around kappa and incentive the normalized
+            rank times consensus. Dividends are the weights of each neuron on the incentive. Half of the emission of the
+            epochs goes to incentive, half to dividends, and is added to the stake.
+        """
+        n = len( self._neurons )
+        if n == 0:
+            return
+        stake = np.array( [ neuron.stake for neuron in self._neurons ], dtype = np.float64 )
+        rows, cols, values = [], [], []
+        for neuron in self._neurons:
+            for dest, value in neuron.weights:
+                if dest < n:
+                    rows.append( neuron.uid )
+                    cols.append( dest )
+                    values.append( value )
+        rows = np.array( rows, dtype = np.int64 )
+        cols = np.array( cols, dtype = np.int64 )
+        values = np.array( values, dtype = np.float64 )
+        row_sums = np.bincount( rows, weights = values, minlength = n )
+        if len( values ) > 0:
+            values = values / row_sums[ rows ]
+
+        normalize = lambda vector: vector / vector.sum() if vector.sum() > 0 else vector
+        rank = normalize( np.bincount( cols, weights = stake[ rows ] * values, minlength = n ) )
+        trust = np.bincount( cols, weights = stake[ rows ], minlength = n ) / stake.sum() if stake.sum() > 0 else np.zeros( n )
+        consensus = 1 / ( 1 + np.exp( -self.rho * ( trust - self.kappa / U16MAX ) ) )
+        incentive = normalize( rank * consensus )
+        dividends = normalize( np.bincount( rows, weights = values * incentive[ cols ], minlength = n ) )
+        emission = self.hyperparameters.block_emission * self.blocks_per_epoch * epochs * ( 0.5 * incentive + 0.5 * dividends )
+        self._issuance += int( round( emission.sum() * RAOPERTAO ) )
+
+        for uid, neuron in enumerate( self._neurons ):
+            neuron.rank = float( rank[ uid ] )
+            neuron.trust = float( trust[ uid ] )
+            neuron.consensus = float( consensus[ uid ] )
+            neuron.incentive = float( incentive[ uid ] )
+            neuron.dividends = float( dividends[ uid ] )
+            neuron.emission = float( emission[ uid ] )
+            neuron.stake = float( stake[ uid ] + emission[ uid ] )
@@ -14,9 +14,12 @@ import itertools
 import queue
 import random
 import threading
+import time
 import weakref
+from types import SimpleNamespace
 
 from loguru import logger
+import bittensor.utils.stats as stat_utils
 
 # Workers are created as daemon threads. This is done to allow the interpreter
 # to exit when there are still idle threads in a ThreadPoolExecutor's thread
@@ -36,11 +39,13 @@ _threads_queues = weakref.WeakKeyDictionary()
 _shutdown = False
 
 class _WorkItem(object):
-    def __init__(self, future, fn, args, kwargs):
+    def __init__(self, future, fn, args, kwargs, stats = None):
         self.future = future
         self.fn = fn
         self.args = args
         self.kwargs = kwargs
+        self.stats = stats
+        self.submit_time = time.time()
 
     def run(self):
         """ Run the given work item
@@ -48,13 +53,21 @@ class _WorkItem(object):
         if not self.future.set_running_or_notify_cancel():
             return
 
+        stats = self.stats
+        start_time = time.time()
+        if stats != None:
+            stats.queue_latency.record(start_time - self.submit_time)
         try:
             result = self.fn(*self.args, **self.kwargs)
         except BaseException as exc:
+            if stats != None:
+                stats.run_latency.record(time.time() - start_time)
             self.future.set_exception(exc)
             # Break a reference cycle with the exception 'exc'
             self = None
         else:
+            if stats != None:
+                stats.run_latency.record(time.time() - start_time)
             self.future.set_result(result)
 
 
@@ -145,6 +158,14 @@ class PriorityThreadPoolExecutor(_base.Executor):
                                     ("ThreadPoolExecutor-%d" % self._counter()))
         self._initializer = initializer
         self._initargs = initargs
+        self.stats = SimpleNamespace(
+            # Time between the submission of a work item and the start of its run.
+            queue_latency = stat_utils.LatencyHistogram(),
+            # Run time of the work items.
+            run_latency = stat_utils.LatencyHistogram(),
+            # Work items rejected because the queue was full.
+            shed = 0,
+        )
 
     def submit(self, fn, *args, **kwargs):
         with self._shutdown_lock:
@@ -165,9 +186,13 @@ class PriorityThreadPoolExecutor(_base.Executor):
                 del kwargs['priority']
 
             f = _base.Future()
-            w = _WorkItem(f, fn, args, kwargs)
+            w = _WorkItem(f, fn, args, kwargs, self.stats)
 
-            self._work_queue.put((-float(priority + eplison), w), block=False)
+            try:
+                self._work_queue.put((-float(priority + eplison), w), block=False)
+            except queue.Full:
+                self.stats.shed += 1
+                raise
             self._adjust_thread_count()
             return f
     submit.__doc__ = _base.Executor.submit.__doc__
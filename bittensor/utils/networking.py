@@ -40,6 +40,9 @@ def int_to_ip(int_val: int) -> str:
             netaddr.core.AddrFormatError (Exception):
                 Raised when the passed int_vals is not a valid ip int value.
     """
+    # Decimal strings are no longer parsed as integers by netaddr >= 1.0.
+    if isinstance(int_val, str) and int_val.isdigit():
+        int_val = int(int_val)
     return str(netaddr.IPAddress(int_val))
  
 def ip_to_int(str_val: str) -> int:
@@ -17,7 +17,15 @@
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER 
 # DEALINGS IN THE SOFTWARE.
 
+import functools
+import math
+import threading
 import time
+from threading import Lock
+from types import SimpleNamespace
+
+import numpy as np
+import pandas
 
 class timed_rolling_avg():
     """ A exponential moving average that updates values based on time since last update.
@@ -82,3 +90,331 @@ class EventsPerSecondRollingAverage():
     
     def get(self) -> float:
         return float(self.value)
+
+class PeerStats():
+    """ Per peer request statistics held in columnar numpy arrays, one row per peer pubkey.
+        Rows are assigned the first time a pubkey is seen and the arrays double in size when full,
+        updates for a batch of peers are applied with vectorized operations.
+    """
+    # Columns holding one value per row.
+    columns = [ 'requests', 'successes', 'in_bytes', 'out_bytes', 'query_time', 'qps', 'in_bytes_per_second', 'out_bytes_per_second', 'last_update' ]
+
+    def __init__(self, n_codes: int, capacity: int = 64, alpha: float = 0.05, success_code: int = 1):
+        self.n_codes = n_codes
+        self.alpha = alpha
+        self.success_code = success_code
+        self.pubkeys = []
+        self.rows = {}
+        self.lock = Lock()
+        # Totals.
+        self.requests = np.zeros( capacity, dtype = np.int64 )
+        self.successes = np.zeros( capacity, dtype = np.int64 )
+        self.in_bytes = np.zeros( capacity, dtype = np.int64 )
+        self.out_bytes = np.zeros( capacity, dtype = np.int64 )
+        # Exponential moving averages of the query time, queries per second and bytes per second.
+        self.query_time = np.zeros( capacity, dtype = np.float64 )
+        self.qps = np.zeros( capacity, dtype = np.float64 )
+        self.in_bytes_per_second = np.zeros( capacity, dtype = np.float64 )
+        self.out_bytes_per_second = np.zeros( capacity, dtype = np.float64 )
+        self.last_update = np.zeros( capacity, dtype = np.float64 )
+        # Return codes per row.
+        self.codes = np.zeros( ( capacity, n_codes ), dtype = np.int64 )
+
+    def __len__(self):
+        return len(self.pubkeys)
+
+    def _resize(self, capacity: int):
+        for name in self.columns:
+            column = np.zeros( capacity, dtype = getattr( self, name ).dtype )
+            column[ :len(self.pubkeys) ] = getattr( self, name )[ :len(self.pubkeys) ]
+            setattr( self, name, column )
+        codes = np.zeros( ( capacity, self.n_codes ), dtype = np.int64 )
+        codes[ :len(self.pubkeys) ] = self.codes[ :len(self.pubkeys) ]
+        self.codes = codes
+
+    def rows_for(self, pubkeys) -> np.ndarray:
+        """ Returns the rows of the pubkeys, assigning rows to the new ones. Must hold the lock.
+        """
+        rows = np.empty( len(pubkeys), dtype = np.int64 )
+        for i, pubkey in enumerate( pubkeys ):
+            row = self.rows.get( pubkey )
+            if row == None:
+                row = len(self.pubkeys)
+                if row == len(self.requests):
+                    self._resize( 2 * len(self.requests) )
+                self.rows[ pubkey ] = row
+                self.pubkeys.append( pubkey )
+            rows[i] = row
+        return rows
+
+    def update(self, pubkeys, codes, query_times, in_bytes, out_bytes):
+        """ Records one request per pubkey.
+            Args:
+                pubkeys (:obj:`List[str]`): Peer pubkeys, may contain duplicates.
+                codes (:obj:`List[int]`): Return code of each request.
+                query_times (:obj:`List[float]`): Duration of each request in seconds.
+                in_bytes (:obj:`List[int]`): Bytes recieved for each request.
+                out_bytes (:obj:`List[int]`): Bytes sent for each request.
+        """
+        codes = np.asarray( codes, dtype = np.int64 )
+        query_times = np.asarray( query_times, dtype = np.float64 )
+        in_bytes = np.asarray( in_bytes, dtype = np.int64 )
+        out_bytes = np.asarray( out_bytes, dtype = np.int64 )
+        now = time.time()
+        with self.lock:
+            rows = self.rows_for( pubkeys )
+            np.add.at( self.requests, rows, 1 )
+            np.add.at( self.successes, rows, codes == self.success_code )
+            np.add.at( self.in_bytes, rows, in_bytes )
+            np.add.at( self.out_bytes, rows, out_bytes )
+            valid = ( codes >= 0 ) & ( codes < self.n_codes )
+            np.add.at( self.codes, ( rows[valid], codes[valid] ), 1 )
+
+            # The first request of a row sets the query time and starts the rates.
+            last_update = self.last_update[ rows ]
+            seen = last_update > 0
+            delta = np.maximum( now - last_update, 1e-6 )
+            alpha = self.alpha
+            self.query_time[ rows ] = np.where( seen, ( 1 - alpha ) * self.query_time[ rows ] + alpha * query_times, query_times )
+            self.qps[ rows ] = np.where( seen, ( 1 - alpha ) * self.qps[ rows ] + alpha / delta, 0 )
+            self.in_bytes_per_second[ rows ] = np.where( seen, ( 1 - alpha ) * self.in_bytes_per_second[ rows ] + alpha * in_bytes / delta, 0 )
+            self.out_bytes_per_second[ rows ] = np.where( seen, ( 1 - alpha ) * self.out_bytes_per_second[ rows ] + alpha * out_bytes / delta, 0 )
+            self.last_update[ rows ] = now
+
+    def to_dataframe(self, metagraph, prefix: str) -> pandas.DataFrame:
+        """ Returns the stats of the peers in the metagraph as a dataframe indexed by uid.
+        """
+        uid_for_hotkey = { hotkey: uid for uid, hotkey in enumerate( metagraph.hotkeys ) }
+        with self.lock:
+            pairs = [ ( row, uid_for_hotkey[pubkey] ) for row, pubkey in enumerate( self.pubkeys ) if pubkey in uid_for_hotkey ]
+            rows = np.array( [ row for row, _ in pairs ], dtype = np.int64 )
+            return pandas.DataFrame( {
+                prefix + '_n_requested': self.requests[ rows ],
+                prefix + '_n_success': self.successes[ rows ],
+                prefix + '_query_time': self.query_time[ rows ],
+                prefix + '_avg_inbytes': self.in_bytes_per_second[ rows ],
+                prefix + '_avg_outbytes': self.out_bytes_per_second[ rows ],
+                prefix + '_qps': self.qps[ rows ],
+            }, index = [ uid for _, uid in pairs ] )
+
+    def codes_for(self, pubkey: str) -> np.ndarray:
+        """ Returns the count of each return code for the pubkey.
+        """
+        with self.lock:
+            if pubkey not in self.rows:
+                return np.zeros( self.n_codes, dtype = np.int64 )
+            return self.codes[ self.rows[ pubkey ] ].copy()
+
+@functools.total_ordering
+class ShardedCounter():
+    """ Counter with one shard per thread, increments never contend and value() sums the shards.
+        Behaves as its int value in comparisons and formatting, and += increments it, so it can replace a plain int stat.
+    """
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._lock = Lock()
+
+    def _shard(self) -> list:
+        shard = getattr( self._local, 'shard', None )
+        if shard == None:
+            shard = self._local.shard = [ 0 ]
+            with self._lock:
+                self._shards.append( shard )
+        return shard
+
+    def inc(self, amount = 1):
+        self._shard()[0] += amount
+
+    def value(self):
+        with self._lock:
+            return sum( shard[0] for shard in self._shards )
+
+    def __iadd__(self, amount):
+        self.inc( amount )
+        return self
+
+    def __int__(self):
+        return int( self.value() )
+
+    def __index__(self):
+        return int( self.value() )
+
+    def __float__(self):
+        return float( self.value() )
+
+    def __eq__(self, other):
+        return self.value() == ( other.value() if isinstance( other, ShardedCounter ) else other )
+
+    def __lt__(self, other):
+        return self.value() < ( other.value() if isinstance( other, ShardedCounter ) else other )
+
+    __hash__ = None
+
+    def __format__(self, format_spec):
+        return format( self.value(), format_spec )
+
+    def __str__(self):
+        return str( self.value() )
+
+    def __repr__(self):
+        return self.__str__()
+
+class LatencyHistogram():
+    """ Log-bucketed (HDR style) histogram of latencies in seconds, safe to record from many threads.
+        Bucket i holds the values in [min_value * growth ** (i - 1), min_value * growth ** i), so percentiles
+        are exact up to the relative bucket width. Each thread records into its own shard of counts,
+        queries and merges sum the shards.
+    """
+    def __init__(self, min_value: float = 1e-5, max_value: float = 1e3, growth: float = 1.02):
+        self.min_value = min_value
+        self.max_value = max_value
+        self.growth = growth
+        self._inv_log_growth = 1 / math.log( growth )
+        # Bucket 0 holds the values under min_value, the last one those over max_value.
+        self.n_buckets = int( math.ceil( math.log( max_value / min_value ) * self._inv_log_growth ) ) + 2
+        self._local = threading.local()
+        self._shards = []
+        self._lock = Lock()
+
+    def __str__(self):
+        return "LatencyHistogram({} values, p50={:.4f}, p99={:.4f})".format( self.count(), self.percentile( 50 ), self.percentile( 99 ) )
+
+    def __repr__(self):
+        return self.__str__()
+
+    def _shard(self) -> SimpleNamespace:
+        shard = getattr( self._local, 'shard', None )
+        if shard == None:
+            shard = self._local.shard = SimpleNamespace( counts = np.zeros( self.n_buckets, dtype = np.int64 ), total = 0.0 )
+            with self._lock:
+                self._shards.append( shard )
+        return shard
+
+    def bucket(self, value: float) -> int:
+        if value < self.min_value:
+            return 0
+        return min( int( math.log( value / self.min_value ) * self._inv_log_growth ) + 1, self.n_buckets - 1 )
+
+    def bucket_value(self, bucket: int) -> float:
+        """ Returns the geometric center of the bucket.
+        """
+        if bucket == 0:
+            return self.min_value
+        return self.min_value * self.growth ** ( bucket - 0.5 )
+
+    def record(self, value: float):
+        shard = self._shard()
+        shard.counts[ self.bucket( value ) ] += 1
+        shard.total += value
+
+    def counts(self) -> np.ndarray:
+        """ Returns the count of each bucket summed over the shards.
+        """
+        with self._lock:
+            counts = np.zeros( self.n_buckets, dtype = np.int64 )
+            for shard in self._shards:
+                counts += shard.counts
+            return counts
+
+    def count(self) -> int:
+        return int( self.counts().sum() )
+
+    def cumulative_counts(self, bounds) -> list:
+        """ Returns the number of values up to each bound, counting the whole bucket a bound falls in.
+        """
+        cumulative = np.cumsum( self.counts() )
+        return [ int( cumulative[ self.bucket( bound ) ] ) for bound in bounds ]
+
+    def total(self) -> float:
+        with self._lock:
+            return sum( shard.total for shard in self._shards )
+
+    def mean(self) -> float:
+        count = self.count()
+        return self.total() / count if count > 0 else 0.0
+
+    def percentile(self, q: float) -> float:
+        """ Returns the q-th percentile, q in [0, 100], or 0 if nothing was recorded.
+        """
+        return self.percentiles( [ q ] )[ q ]
+
+    def percentiles(self, qs = ( 50, 90, 99 ) ) -> dict:
+        """ Returns { q: q-th percentile } for each q, computed from a single pass over the counts.
+        """
+        counts = self.counts()
+        cumulative = np.cumsum( counts )
+        if len(cumulative) == 0 or cumulative[-1] == 0:
+            return { q: 0.0 for q in qs }
+        result = {}
+        for q in qs:
+            rank = max( 1, int( math.ceil( cumulative[-1] * q / 100 ) ) )
+            result[q] = self.bucket_value( int( np.searchsorted( cumulative, rank ) ) )
+        return result
+
+    def summary(self, prefix: str) -> dict:
+        """ Returns the count, mean, p50, p90 and p99 keyed by prefix, for wandb logging.
+        """
+        percentiles = self.percentiles( ( 50, 90, 99 ) )
+        return {
+            prefix + '_count': self.count(),
+            prefix + '_mean': self.mean(),
+            prefix + '_p50': percentiles[50],
+            prefix + '_p90': percentiles[90],
+            prefix + '_p99': percentiles[99],
+        }
+
+    def merge(self, other: 'LatencyHistogram') -> 'LatencyHistogram':
+        """ Adds the counts of an histogram with the same buckets into this one.
+        """
+        if ( other.min_value, other.max_value, other.growth ) != ( self.min_value, self.max_value, self.growth ):
+            raise ValueError('Cannot merge histograms with different buckets, got {} and {}'.format( ( self.min_value, self.max_value, self.growth ), ( other.min_value, other.max_value, other.growth ) ))
+        counts = other.counts()
+        total = other.total()
+        shard = self._shard()
+        shard.counts += counts
+        shard.total += total
+        return self
+
+    def reset(self):
+        with self._lock:
+            for shard in self._shards:
+                shard.counts[:] = 0
+                shard.total = 0.0
+
+class WindowedRate():
+    """ Sum of the amounts recorded over the last window seconds, kept in a ring of time slots.
+    """
+    def __init__(self, window: float = 60, slots: int = 60):
+        self.window = window
+        self.slots = slots
+        self.slot_width = window / slots
+        self.amounts = np.zeros( slots, dtype = np.float64 )
+        self.slot_ids = np.full( slots, -1, dtype = np.int64 )
+        self._lock = Lock()
+
+    def event(self, amount: float = 1.0, now: float = None):
+        slot_id = int( ( time.time() if now == None else now ) / self.slot_width )
+        index = slot_id % self.slots
+        with self._lock:
+            if self.slot_ids[ index ] != slot_id:
+                self.slot_ids[ index ] = slot_id
+                self.amounts[ index ] = 0
+            self.amounts[ index ] += amount
+
+    def sum(self, now: float = None) -> float:
+        """ Returns the sum of the amounts recorded in the window.
+        """
+        slot_id = int( ( time.time() if now == None else now ) / self.slot_width )
+        with self._lock:
+            return float( self.amounts[ self.slot_ids > slot_id - self.slots ].sum() )
+
+    def rate(self, now: float = None) -> float:
+        """ Returns the amount per second over the window.
+        """
+        return self.sum( now ) / self.window
+
+    def get(self) -> float:
+        """ Returns the rate, as the rolling averages it replaces.
+        """
+        return self.rate()
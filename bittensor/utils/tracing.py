@@ -0,0 +1,243 @@
+""" Stage level tracing of the requests between dendrites and axons.
+"""
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import contextvars
+import functools
+import json
+import os
+import time
+import zlib
+from collections import OrderedDict, deque
+from threading import Lock
+from typing import Callable, List, Tuple
+
+# Metadata key of the trace id, sent by the receptor after the authentication metadata.
+TRACE_ID_KEY = 'bittensor-trace-id'
+# Trailing metadata key of the server stage timings returned by a tracing axon.
+SERVER_TIMING_KEY = 'bittensor-server-timing'
+
+# Span of the request handled by the current thread or coroutine.
+current_span = contextvars.ContextVar( 'bittensor_current_span', default = None )
+
+def new_trace_id() -> str:
+    return os.urandom( 8 ).hex()
+
+def trace_id_from_metadata( metadata ) -> str:
+    r""" Returns the trace id of the grpc invocation metadata or None if the request is not traced.
+    """
+    if metadata == None:
+        return None
+    for item in metadata:
+        if item[0] == TRACE_ID_KEY:
+            return item[1]
+    return None
+
+def lap( name: str ):
+    r""" Closes the stage of the current span, if any, see :obj:`Span.lap`.
+    """
+    span = current_span.get()
+    if span != None:
+        span.lap( name )
+
+def wrap( callback: Callable, queue_stage: str = 'queue', run_stage: str = 'model' ) -> Callable:
+    r""" Wraps a callback submitted to a thread pool so that the wait before it runs and its run time
+        are recorded as stages of the current span. Returns the callback unchanged if there is no current span.
+    """
+    span = current_span.get()
+    if span == None:
+        return callback
+
+    @functools.wraps( callback )
+    def traced( *args, **kwargs ):
+        span.lap( queue_stage )
+        try:
+            return callback( *args, **kwargs )
+        finally:
+            span.lap( run_stage )
+    return traced
+
+def format_server_timing( stages: List[Tuple[str, float, float]] ) -> str:
+    r""" Formats (name, start, duration) stages as a Server-Timing style header, durations in milliseconds.
+    """
+    return ','.join( '{};dur={:.3f}'.format( name, duration * 1000 ) for name, _, duration in stages )
+
+def parse_server_timing( header: str ) -> List[Tuple[str, float]]:
+    r""" Parses a Server-Timing style header into (name, duration in seconds) pairs, malformed entries are skipped.
+    """
+    timings = []
+    for entry in header.split( ',' ):
+        name, _, duration = entry.partition( ';dur=' )
+        try:
+            timings.append( ( name.strip(), float( duration ) / 1000 ) )
+        except ValueError:
+            continue
+    return timings
+
+class Span():
+    r""" Timings of the stages of a single request, identified by the trace id shared by the receptor and the axon.
+        Stages are (name, start time, duration) tuples, with start times in seconds since the epoch.
+    """
+    def __init__( self, trace_id: str, name: str, pubkey: str = None, start_time: float = None ):
+        self.trace_id = trace_id
+        self.name = name
+        self.pubkey = pubkey
+        self.start_time = start_time if start_time != None else time.time()
+        self.end_time = None
+        self.code = None
+        self.stages = []
+        self._mark = self.start_time
+        self._lock = Lock()
+
+    def __str__(self):
+        return "Span({}, {}, {})".format( self.name, self.trace_id, ', '.join( '{}={:.4f}'.format( name, duration ) for name, _, duration in self.stages ) )
+
+    def __repr__(self):
+        return self.__str__()
+
+    @property
+    def finished( self ) -> bool:
+        return self.end_time != None
+
+    def lap( self, name: str ):
+        r""" Records the stage that ran since the previous lap, or the start of the span. Ignored once the span is finished.
+        """
+        now = time.time()
+        with self._lock:
+            if self.end_time == None:
+                self.stages.append( ( name, self._mark, now - self._mark ) )
+                self._mark = now
+
+    def add( self, name: str, start: float, duration: float ):
+        r""" Records a stage timed elsewhere, i.e. by the auth interceptor or the remote axon.
+        """
+        with self._lock:
+            if self.end_time == None:
+                self.stages.append( ( name, start, duration ) )
+                self.start_time = min( self.start_time, start )
+
+    def finish( self, code: int = None ):
+        with self._lock:
+            if self.end_time == None:
+                self.end_time = time.time()
+                self.code = code
+
+    def duration( self ) -> float:
+        end_time = self.end_time if self.end_time != None else time.time()
+        return end_time - self.start_time
+
+    def server_timing( self ) -> str:
+        return format_server_timing( self.stages )
+
+    def to_dict( self ) -> dict:
+        return {
+            'trace_id': self.trace_id,
+            'name': self.name,
+            'pubkey': self.pubkey,
+            'start_time': self.start_time,
+            'duration': self.duration(),
+            'code': self.code,
+            'stages': [ { 'name': name, 'start': start, 'duration': duration } for name, start, duration in self.stages ],
+        }
+
+class Tracer():
+    r""" Ring buffer of the last finished spans, dumped as json or in the chrome trace event format.
+        Also holds the auth stages timed by the server interceptor until the axon picks them up.
+    """
+    def __init__( self, capacity: int = 4096 ):
+        self.capacity = capacity
+        self.spans = deque( maxlen = capacity )
+        self.pending = OrderedDict()
+        self.lock = Lock()
+
+    def __str__(self):
+        return "Tracer({}/{})".format( len( self.spans ), self.capacity )
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __len__(self):
+        return len( self.spans )
+
+    def start( self, name: str, trace_id: str = None, pubkey: str = None, start_time: float = None ) -> Span:
+        r""" Creates a span, with a new trace id if none is passed.
+        """
+        return Span( trace_id if trace_id != None else new_trace_id(), name, pubkey = pubkey, start_time = start_time )
+
+    def record( self, span: Span ):
+        r""" Finishes the span if needed and pushes it to the buffer, evicting the oldest span when full.
+        """
+        span.finish( span.code )
+        with self.lock:
+            self.spans.append( span )
+
+    def add_pending( self, trace_id: str, name: str, start: float, duration: float ):
+        r""" Keeps a stage timed before the span of the trace id is created.
+        """
+        with self.lock:
+            self.pending.setdefault( trace_id, [] ).append( ( name, start, duration ) )
+            # Stages of requests that never reached the axon are evicted.
+            while len( self.pending ) > self.capacity:
+                self.pending.popitem( last = False )
+
+    def pop_pending( self, trace_id: str ) -> List[Tuple[str, float, float]]:
+        with self.lock:
+            return self.pending.pop( trace_id, [] )
+
+    def snapshot( self ) -> List[Span]:
+        with self.lock:
+            return list( self.spans )
+
+    def clear( self ):
+        with self.lock:
+            self.spans.clear()
+            self.pending.clear()
+
+    def to_json( self ) -> list:
+        return [ span.to_dict() for span in self.snapshot() ]
+
+    def to_chrome_trace( self ) -> dict:
+        r""" Returns the spans in the chrome trace event format (chrome://tracing, perfetto), one row per trace id.
+        """
+        events = []
+        pid = os.getpid()
+        for span in self.snapshot():
+            tid = zlib.crc32( span.trace_id.encode() )
+            args = { 'trace_id': span.trace_id, 'pubkey': span.pubkey, 'code': span.code }
+            events.append( { 'name': span.name, 'cat': 'span', 'ph': 'X', 'ts': span.start_time * 1e6, 'dur': span.duration() * 1e6, 'pid': pid, 'tid': tid, 'args': args } )
+            for name, start, duration in span.stages:
+                events.append( { 'name': name, 'cat': span.name, 'ph': 'X', 'ts': start * 1e6, 'dur': duration * 1e6, 'pid': pid, 'tid': tid, 'args': args } )
+        return { 'traceEvents': events, 'displayTimeUnit': 'ms' }
+
+    def dump( self, path: str, chrome: bool = False ) -> str:
+        r""" Writes the buffered spans to path, as a json list or in the chrome trace format.
+            Args:
+                path (:type:`str`, `required`):
+                    File the spans are written to, its directory is created if needed.
+                chrome (:type:`bool`, `optional`):
+                    If true, writes the chrome trace event format instead of the list of spans.
+            Returns:
+                path (:type:`str`, `required`):
+                    The written file.
+        """
+        path = os.path.expanduser( path )
+        if os.path.dirname( path ) != '':
+            os.makedirs( os.path.dirname( path ), exist_ok = True )
+        with open( path, 'w' ) as file:
+            json.dump( self.to_chrome_trace() if chrome else self.to_json(), file )
+        return path
@@ -240,6 +240,27 @@ def test_dendrite_forward_tensor():
     assert ops[0].item() == bittensor.proto.ReturnCode.Unavailable
     assert list(out[0].shape) == [3, 3, bittensor.__network_dim__]
 
+def test_dendrite_forward_text_stacked():
+    x = torch.tensor([[1,2,3,4],[5,6,7,8]], dtype=torch.long)
+    out, ops, times = dendrite.forward_text( [neuron_obj, neuron_obj], x, stack_responses = True )
+    assert ops[0].item() == bittensor.proto.ReturnCode.Unavailable
+    assert isinstance(out, torch.Tensor)
+    assert list(out.shape) == [2, 2, 4, bittensor.__network_dim__]
+    assert out.sum().item() == 0
+    out.sum().backward()
+    with pytest.raises(ValueError):
+        dendrite.forward_text( [neuron_obj, neuron_obj], [x, x[:, :2]], stack_responses = True )
+
+def test_dendrite_forward_text_no_grad():
+    x = torch.tensor([[1,2,3,4],[5,6,7,8]], dtype=torch.long)
+    out, ops, times = dendrite.forward_text( [neuron_obj, neuron_obj], x, requires_grad = False )
+    assert ops[0].item() == bittensor.proto.ReturnCode.Unavailable
+    assert all( o.grad_fn == None and not o.requires_grad for o in out )
+    assert list(torch.stack(out, dim=0).shape) == [2, 2, 4, bittensor.__network_dim__]
+    out, ops, times = dendrite.forward_text( [neuron_obj, neuron_obj], x, requires_grad = False, stack_responses = True )
+    assert out.grad_fn == None
+    assert list(out.shape) == [2, 2, 4, bittensor.__network_dim__]
+
 def test_dendrite_backoff():
     _dendrite = bittensor.dendrite( wallet = wallet )
     _endpoint_obj = bittensor.endpoint(
@@ -770,6 +770,133 @@ def test_grpc_backward_fails():
 
     axon.stop()
 
+# -- asyncio axon:
+
+def test_asyncio_forward_tensor_success():
+    def forward( inputs_x: torch.FloatTensor):
+        return torch.zeros( [inputs_x.shape[0], inputs_x.shape[1], bittensor.__network_dim__])
+    axon = bittensor.axon( wallet = wallet, port = get_random_unused_port(), asyncio = True )
+    axon.attach_forward_callback( forward, modality=2)
+    inputs_raw = torch.rand(3, 3, bittensor.__network_dim__)
+    serializer = bittensor.serializer( serialzer_type = bittensor.proto.Serializer.MSGPACK )
+    inputs_serialized = serializer.serialize(inputs_raw, modality = bittensor.proto.Modality.TENSOR, from_type = bittensor.proto.TensorType.TORCH)
+    request = bittensor.proto.TensorMessage(
+        version = bittensor.__version_as_int__,
+        tensors=[inputs_serialized]
+    )
+    response, code, call_time, message = axon.event_loop.run_coroutine( axon._async_forward( request ) )
+    assert code == bittensor.proto.ReturnCode.Success
+    axon.stop()
+
+def test_asyncio_forward_tensor_timeout():
+    def forward( inputs_x: torch.FloatTensor):
+        time.sleep(2)
+        return torch.zeros( [inputs_x.shape[0], inputs_x.shape[1], bittensor.__network_dim__])
+    axon = bittensor.axon( wallet = wallet, port = get_random_unused_port(), asyncio = True, forward_timeout = 1 )
+    axon.attach_forward_callback( forward, modality=2)
+    inputs_raw = torch.rand(3, 3, bittensor.__network_dim__)
+    serializer = bittensor.serializer( serialzer_type = bittensor.proto.Serializer.MSGPACK )
+    inputs_serialized = serializer.serialize(inputs_raw, modality = bittensor.proto.Modality.TENSOR, from_type = bittensor.proto.TensorType.TORCH)
+    request = bittensor.proto.TensorMessage(
+        version = bittensor.__version_as_int__,
+        tensors=[inputs_serialized]
+    )
+    response, code, call_time, message = axon.event_loop.run_coroutine( axon._async_forward( request ) )
+    assert code == bittensor.proto.ReturnCode.Timeout
+    axon.stop()
+
+def test_asyncio_backward_response_success_text_priority():
+    def priority(pubkey:str, request_type:str, inputs_x):
+        return 100
+    def backward( inputs_x:torch.FloatTensor, grads_dy:torch.FloatTensor):
+        return torch.zeros( [1, 1])
+    axon = bittensor.axon( wallet = wallet, port = get_random_unused_port(), asyncio = True, priority = priority )
+    axon.attach_backward_callback( backward,modality = bittensor.proto.Modality.TEXT )
+    inputs_raw = torch.ones((1, 1))
+    grads_raw = torch.zeros((1, 1, bittensor.__network_dim__))
+    serializer = bittensor.serializer( serialzer_type = bittensor.proto.Serializer.MSGPACK )
+    inputs_serialized = serializer.serialize(inputs_raw, modality = bittensor.proto.Modality.TEXT, from_type = bittensor.proto.TensorType.TORCH)
+    grads_serialized = serializer.serialize(grads_raw, modality = bittensor.proto.Modality.TEXT, from_type = bittensor.proto.TensorType.TORCH)
+    request = bittensor.proto.TensorMessage(
+        version=bittensor.__version_as_int__,
+        hotkey = axon.wallet.hotkey.ss58_address,
+        tensors=[ inputs_serialized, grads_serialized]
+    )
+    response, code, call_time, message = axon.event_loop.run_coroutine( axon._async_backward( request ) )
+    assert code == bittensor.proto.ReturnCode.Success
+    axon.stop()
+
+def test_asyncio_grpc_forward_fails():
+    def forward( inputs_x:torch.FloatTensor):
+        return torch.zeros( [1, 1, 1])
+    port = get_random_unused_port()
+    axon = bittensor.axon (
+        port = port,
+        ip = '127.0.0.1',
+        wallet = wallet,
+        asyncio = True,
+    )
+    axon.attach_forward_callback( forward,  modality = bittensor.proto.Modality.TENSOR )
+    axon.start()
+
+    channel = grpc.insecure_channel(
+            '127.0.0.1:{}'.format(port),
+            options=[('grpc.max_send_message_length', -1),
+                     ('grpc.max_receive_message_length', -1)])
+    stub = bittensor.grpc.BittensorStub( channel )
+
+    inputs_raw = torch.rand(3, 3, bittensor.__network_dim__)
+    serializer = bittensor.serializer( serialzer_type = bittensor.proto.Serializer.MSGPACK )
+    inputs_serialized = serializer.serialize(inputs_raw, modality = bittensor.proto.Modality.TENSOR, from_type = bittensor.proto.TensorType.TORCH)
+    request = bittensor.proto.TensorMessage(
+        version = bittensor.__version_as_int__,
+        hotkey = '1092310312914',
+        tensors = [inputs_serialized]
+    )
+    with pytest.raises(grpc.RpcError) as rpc_error_call:
+        stub.Forward(request)
+    assert rpc_error_call.value.code() == grpc.StatusCode.UNAUTHENTICATED
+    axon.stop()
+
+# -- forward cache:
+
+def test_forward_cache():
+    calls = []
+    def forward( inputs_x: torch.FloatTensor):
+        calls.append( inputs_x )
+        return torch.zeros( [inputs_x.shape[0], inputs_x.shape[1], bittensor.__network_dim__])
+    axon = bittensor.axon( wallet = wallet, port = get_random_unused_port(), forward_cache_bytes = 1024 * 1024 )
+    axon.attach_forward_callback( forward, modality=2)
+    # Attaching checks the callback on a sample input.
+    calls.clear()
+    inputs_raw = torch.rand(3, 3, bittensor.__network_dim__)
+    serializer = bittensor.serializer( serialzer_type = bittensor.proto.Serializer.MSGPACK )
+    inputs_serialized = serializer.serialize(inputs_raw, modality = bittensor.proto.Modality.TENSOR, from_type = bittensor.proto.TensorType.TORCH)
+    request = bittensor.proto.TensorMessage(
+        version = bittensor.__version_as_int__,
+        tensors=[inputs_serialized]
+    )
+    response, code, call_time, message = axon._forward( request )
+    cached_response, code, call_time, message = axon._forward( request )
+    assert code == bittensor.proto.ReturnCode.Success
+    assert cached_response == response
+    assert len( calls ) == 1
+    assert axon.stats.forward_cache_hits.value() == 1 and axon.stats.forward_cache_misses.value() == 1
+
+    # Updated weights invalidate the cached responses.
+    axon.update_model_version()
+    axon._forward( request )
+    assert len( calls ) == 2
+
+def test_forward_cache_eviction():
+    cache = bittensor._axon.forward_cache.ForwardCache( max_bytes = 100 )
+    serializer = bittensor.serializer( serialzer_type = bittensor.proto.Serializer.MSGPACK )
+    response = serializer.serialize( torch.zeros( 5 ), modality = bittensor.proto.Modality.TENSOR, from_type = bittensor.proto.TensorType.TORCH )
+    for version in range( 200 // response.ByteSize() + 1 ):
+        cache.put( ( b'key', version ), response )
+    assert cache.total_bytes <= 100
+    assert cache.get( ( b'key', 0 ) ) == None
+
 def is_port_in_use(port):
     import socket
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
@@ -0,0 +1,95 @@
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import pytest
+import torch
+
+import bittensor
+from bittensor._dendrite import shared_memory_pool
+
+pytestmark = pytest.mark.skipif( not shared_memory_pool.is_available(), reason = 'requires multiprocessing.shared_memory' )
+
+class EchoReceptorPool:
+    r""" Stands in for the receptor pool behind the manager, returns the inputs broadcast to the network dim.
+    """
+    def __init__( self, shape = None ):
+        self.shape = shape
+        self.total_requests = 0
+
+    def get_total_requests( self ):
+        return self.total_requests
+
+    def forward( self, endpoints, inputs, modality, timeout ):
+        self.total_requests += len( inputs )
+        outputs = []
+        for x in inputs:
+            if self.shape != None:
+                outputs.append( torch.ones( self.shape ) )
+            else:
+                outputs.append( x[ ..., None ].float().expand( x.size(0), x.size(1), bittensor.__network_dim__ ).clone() )
+        return outputs, [ bittensor.proto.ReturnCode.Success ] * len( inputs ), [ 0.0 ] * len( inputs )
+
+    def backward( self, endpoints, inputs_x, grads_dy, modality, timeout ):
+        return [ dy * 2 for dy in grads_dy ], [ bittensor.proto.ReturnCode.Success ] * len( inputs_x ), [ 0.0 ] * len( inputs_x )
+
+def test_ring_roundtrip_and_overlap():
+    ring = shared_memory_pool.TensorRingBuffer( size = 1024 )
+    x = torch.arange( 64, dtype = torch.int64 ).view( 8, 8 )
+    slot = ring.allocate( tuple( x.shape ), x.dtype )
+    ring.write( slot, x )
+    assert torch.equal( ring.read( slot ), x )
+    # The rest of the ring is too small, the reserved slot is not overwritten.
+    assert ring.allocate( ( 128, ), torch.int64 ) == None
+    ring.free( slot )
+    assert ring.allocate( ( 128, ), torch.int64 ) != None
+    ring.close()
+
+def test_shared_memory_forward_backward():
+    server = shared_memory_pool.SharedMemoryReceptorPoolServer( EchoReceptorPool() )
+    pool = shared_memory_pool.SharedMemoryReceptorPool( proxy = server, receptor_pool = server.receptor_pool, size = 4 * 1024 * 1024 )
+    inputs = [ torch.randint( 0, 100, ( 2, 3 ) ) for _ in range(3) ]
+    outputs, codes, times = pool.forward( [ None ] * 3, inputs, bittensor.proto.Modality.TEXT, 1 )
+    for x, y in zip( inputs, outputs ):
+        assert list( y.shape ) == [ 2, 3, bittensor.__network_dim__ ]
+        assert torch.equal( y[ ..., 0 ], x.float() )
+    assert codes == [ bittensor.proto.ReturnCode.Success ] * 3
+    assert pool.get_total_requests() == 3
+    # Every slot is released after the call.
+    assert pool.ring.reserved == {}
+
+    grads = [ torch.ones( 2, 3, bittensor.__network_dim__ ) for _ in range(3) ]
+    outputs, codes, times = pool.backward( [ None ] * 3, inputs, grads, bittensor.proto.Modality.TEXT, 1 )
+    assert all( torch.equal( y, dy * 2 ) for y, dy in zip( outputs, grads ) )
+    pool.close()
+    assert server.rings == {}
+
+def test_shared_memory_fallback_to_proxy():
+    # Outputs that do not match their slot and inputs that do not fit the ring travel over the proxy.
+    server = shared_memory_pool.SharedMemoryReceptorPoolServer( EchoReceptorPool( shape = ( 1, 1, 1 ) ) )
+    pool = shared_memory_pool.SharedMemoryReceptorPool( proxy = server, receptor_pool = server.receptor_pool, size = 4096 )
+    inputs = [ torch.zeros( 4, 1000, dtype = torch.int64 ) ]
+    outputs, _, _ = pool.forward( [ None ], inputs, bittensor.proto.Modality.TEXT, 1 )
+    assert list( outputs[0].shape ) == [ 1, 1, 1 ]
+    pool.close()
+
+def test_ring_checks_free_space( monkeypatch ):
+    # A ring larger than the free space of /dev/shm is refused rather than crashing on write.
+    monkeypatch.setattr( shared_memory_pool, 'free_bytes', lambda: 1024 )
+    with pytest.raises( RuntimeError ):
+        shared_memory_pool.TensorRingBuffer( size = 4096 )
+    ring = shared_memory_pool.TensorRingBuffer( size = 1024 )
+    ring.close()
@@ -24,6 +24,7 @@ from torch.autograd import Variable
 
 import bittensor
 from bittensor._endpoint import endpoint
+from bittensor._dendrite.response_cache import ResponseCache
 from bittensor.utils.test_utils import get_random_unused_port
 
 wallet = bittensor.wallet.mock()
@@ -246,6 +247,36 @@ def test_dendrite_call_time():
     total_time = time.time() - start_time
     axon.stop()
 
+def test_dendrite_forward_response_cache():
+    dendrite_cache = bittensor.dendrite( wallet = wallet, requires_grad = False, cache_bytes = 1024 * 1024, cache_ttl = 60 )
+    x = torch.tensor([[1,2,3,4],[5,6,7,8]], dtype=torch.long)
+    y = torch.rand([2, 4, bittensor.__network_dim__])
+    dendrite_cache.receptor_pool.forward = MagicMock(return_value = [ [y], [1], [0.1]])
+    tensors, codes, times = dendrite_cache.forward_text( endpoints=[endpoint], inputs=[x])
+    assert torch.equal( tensors[0], y )
+    # Same inputs to the same endpoint are served without a network call.
+    tensors, codes, times = dendrite_cache.forward_text( endpoints=[endpoint], inputs=[x])
+    assert dendrite_cache.receptor_pool.forward.call_count == 1
+    assert torch.equal( tensors[0], y )
+    assert codes[0].item() == bittensor.proto.ReturnCode.Success
+    assert dendrite_cache.stats.cache_hits == 1 and dendrite_cache.stats.cache_misses == 1
+    # A new port invalidates the cached response.
+    moved = bittensor.endpoint.from_tensor( endpoint.to_tensor() )
+    moved.port = 8081
+    dendrite_cache.forward_text( endpoints=[moved], inputs=[x])
+    assert dendrite_cache.receptor_pool.forward.call_count == 2
+
+def test_response_cache_eviction_and_ttl():
+    cache = ResponseCache( max_bytes = 2 * 4 * 10, ttl = 60 )
+    key = ResponseCache.input_hash( torch.tensor([1]) )
+    cache.put( endpoint, 0, key, torch.zeros( 10 ) )
+    cache.put( endpoint, 1, key, torch.zeros( 10 ) )
+    cache.put( endpoint, 2, key, torch.zeros( 10 ) )
+    assert len( cache ) == 2 and cache.get( endpoint, 0, key ) == None
+    cache.ttl = -1
+    cache.put( endpoint, 0, key, torch.zeros( 10 ) )
+    assert cache.get( endpoint, 0, key ) == None
+
 def test_dendrite_del():
     global dendrite, dendrite_no_grad, dendrite_mock
     del dendrite
@@ -0,0 +1,260 @@
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import multiprocessing
+import os
+import time
+import warnings
+
+import torch
+import bittensor
+from bittensor._metagraph import metagraph_snapshot
+from bittensor._subtensor.subtensor_inprocess import InProcessSubtensor
+
+def synced_metagraph( n: int = 8 ):
+    subtensor = InProcessSubtensor( block_time = 0 )
+    subtensor.add_synthetic_neurons( n, stake = 1.0, port = 9000, seed = 0 )
+    return subtensor, bittensor.metagraph( subtensor = subtensor ).sync()
+
+def test_hotkey_index():
+    subtensor, metagraph = synced_metagraph()
+    neurons = subtensor.neurons()
+    assert metagraph.hotkeys == [ neuron.hotkey for neuron in neurons ]
+    assert metagraph.coldkeys == [ neuron.coldkey for neuron in neurons ]
+    assert metagraph.addresses[3] == '/ipv4/127.0.0.1:9003'
+    assert metagraph.hotkeys is metagraph.hotkeys
+    for uid, neuron in enumerate( neurons ):
+        assert metagraph.hotkey_to_uid( neuron.hotkey ) == uid
+    assert metagraph.hotkey_to_uid( 'unknown' ) == -1
+    assert metagraph.uids_for_hotkeys( [ neurons[5].hotkey, 'unknown', neurons[0].hotkey ] ).tolist() == [ 5, -1, 0 ]
+
+def test_hotkey_index_rebuilt_on_sync():
+    subtensor, metagraph = synced_metagraph()
+    hotkeys = metagraph.hotkeys
+    subtensor.add_synthetic_neurons( 2, seed = 1 )
+    metagraph.sync()
+    assert len( metagraph.hotkeys ) == 10
+    assert hotkeys != metagraph.hotkeys
+    assert metagraph.hotkey_to_uid( subtensor.neuron_for_uid( 9 ).hotkey ) == 9
+
+    metagraph.clear()
+    assert metagraph.hotkeys == []
+    assert metagraph.hotkey_to_uid( hotkeys[0] ) == -1
+    assert metagraph.uids_for_hotkeys( hotkeys[:2] ).tolist() == [ -1, -1 ]
+
+def test_snapshot_round_trip( tmp_path ):
+    subtensor = InProcessSubtensor( block_time = 0 )
+    subtensor.add_synthetic_neurons( 16, stake = 1.0, weights_per_neuron = 3, seed = 0 )
+    subtensor.advance( 100 )
+    metagraph = bittensor.metagraph( subtensor = subtensor ).sync()
+    path = str( tmp_path / 'snapshot' )
+    metagraph.save_snapshot( path )
+
+    loaded = bittensor.metagraph( subtensor = subtensor ).load_from_path( path )
+    assert 'weights' not in loaded._parameters
+    assert loaded.hotkeys == metagraph.hotkeys
+    assert torch.equal( loaded.W, metagraph.W )
+    state_dict = metagraph.state_dict()
+    for name, tensor in loaded.state_dict().items():
+        assert tensor.shape == state_dict[ name ].shape
+        assert torch.equal( tensor, state_dict[ name ] )
+
+    # Snapshots are replaced in place, and an empty metagraph round trips.
+    loaded.save_snapshot( path )
+    assert torch.equal( bittensor.metagraph( subtensor = subtensor ).load_snapshot( path ).B, metagraph.B )
+    bittensor.metagraph( subtensor = subtensor ).save_snapshot( path )
+    empty = bittensor.metagraph( subtensor = subtensor ).load_snapshot( path )
+    assert empty.n.item() == 0 and empty.hotkeys == []
+
+def _save_snapshots( path, barrier, errors ):
+    metagraph = synced_metagraph()[1]
+    barrier.wait()
+    try:
+        for _ in range( 5 ):
+            metagraph.save_snapshot( path )
+            assert bittensor.metagraph( subtensor = metagraph.subtensor ).load_snapshot( path ).n.item() == 8
+    except Exception as e:
+        errors.put( repr( e ) )
+
+def test_snapshot_concurrent_saves( tmp_path, monkeypatch ):
+    # Saves of many processes to one path never fail and the path always holds a whole snapshot.
+    context = multiprocessing.get_context( 'fork' )
+    path = str( tmp_path / 'snapshot' )
+    barrier, errors = context.Barrier( 8 ), context.Queue()
+    processes = [ context.Process( target = _save_snapshots, args = ( path, barrier, errors ) ) for _ in range( 8 ) ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join( 120 )
+    assert [ process.exitcode for process in processes ] == [ 0 ] * 8
+    assert errors.empty(), errors.get()
+
+    # Replaced versions and staging left by the other processes are removed by the next save.
+    monkeypatch.setattr( metagraph_snapshot, 'CLEANUP_GRACE', 0 )
+    subtensor, metagraph = synced_metagraph()
+    metagraph.save_snapshot( path )
+    assert os.path.islink( path )
+    assert sorted( os.listdir( str( tmp_path ) ) ) == sorted( [ 'snapshot', os.readlink( path ) ] )
+    assert bittensor.metagraph( subtensor = subtensor ).load_snapshot( path ).n.item() == 8
+
+def test_endpoint_table():
+    subtensor, metagraph = synced_metagraph()
+    table = metagraph.endpoint_table
+    assert 'endpoints' not in metagraph._parameters
+    assert table.ports.tolist() == [ 9000 + uid for uid in range( 8 ) ]
+    assert metagraph.is_serving.all()
+
+    # Endpoint objects are built for the selected uids only, and match the legacy json export.
+    endpoints = metagraph.endpoints_for_uids( torch.tensor([ 6, 1 ]) )
+    assert [ endpoint.uid for endpoint in endpoints ] == [ 6, 1 ]
+    assert metagraph._endpoint_objs == None
+    assert endpoints[0] == bittensor.endpoint.from_tensor( metagraph.endpoints[6] )
+    assert metagraph.endpoints.shape == ( 8, 250 )
+
+    # The state dict keeps the json tensor, and loading it rebuilds the columns.
+    loaded = bittensor.metagraph( subtensor = subtensor ).load_from_state_dict( metagraph.state_dict() )
+    assert loaded.endpoint_objs == metagraph.endpoint_objs
+    assert loaded.hotkeys == metagraph.hotkeys
+
+def test_endpoint_table_ipv6_and_missing_uids():
+    from bittensor._metagraph.endpoint_table import EndpointTable
+    ip = bittensor.utils.networking.ip_to_int( 'ffff:db8::ff00:42:8329' )
+    neuron = bittensor.endpoint.dummy()
+    neuron.uid, neuron.ip, neuron.ip_type, neuron.port, neuron.version = 2, ip, 6, 8091, 1
+    neuron.hotkey = neuron.coldkey = 'a' * 48
+    table = EndpointTable.from_neurons( [ neuron ], 3 )
+    assert table.is_serving.tolist() == [ False, False, True ]
+    assert table.registered.tolist() == [ 0, 0, 1 ]
+    assert table.ip( 2 ) == ip
+    assert table.endpoint( 2 ).ip == 'ffff:db8::ff00:42:8329'
+    assert table.endpoint( 0 ) == bittensor.endpoint.dummy()
+    assert table.addresses() == [ '', '', '/ipv6/ffff:db8::ff00:42:8329:8091' ]
+    restored = EndpointTable.from_arrays( table.to_arrays() )
+    assert torch.equal( restored.to_tensor(), table.to_tensor() )
+    assert restored.hotkeys == table.hotkeys
+
+def test_sync_delta():
+    subtensor = InProcessSubtensor( block_time = 0, blocks_per_epoch = 5 )
+    subtensor.add_synthetic_neurons( 8, stake = 1.0, port = 9000, weights_per_neuron = 3, seed = 0 )
+    wallet = bittensor.wallet.mock()
+    wallet._hotkey = bittensor.Keypair.create_from_mnemonic( bittensor.Keypair.generate_mnemonic() )
+    wallet.register( subtensor = subtensor )
+    subtensor.advance( 5 )
+    metagraph = bittensor.metagraph( subtensor = subtensor )
+    changes = metagraph.sync_delta()
+    assert changes.full and changes.new_uids.tolist() == list( range( 9 ) )
+    endpoint_objs = metagraph.endpoint_objs
+
+    # Serve and set weights from uid 8, add neurons, then advance through an epoch.
+    subtensor.serve( wallet, '10.0.0.1', 8091, 0 )
+    subtensor.set_weights( wallet, uids = torch.tensor([ 0, 1 ]), weights = torch.tensor([ 0.5, 0.5 ]) )
+    subtensor.add_synthetic_neurons( 2, seed = 1 )
+    subtensor.advance( 5 )
+    changes = metagraph.sync_delta()
+    assert not changes.full
+    assert changes.new_uids.tolist() == [ 9, 10 ]
+    assert changes.replaced_uids.tolist() == []
+    assert changes.endpoint_uids.tolist() == [ 8, 9, 10 ]
+    assert 8 in changes.updated_uids.tolist()
+    assert metagraph.endpoint_objs is endpoint_objs and endpoint_objs[8].port == 8091
+
+    # The patched state equals a full sync of the same block.
+    full = bittensor.metagraph( subtensor = subtensor ).sync()
+    for name, tensor in full.state_dict().items():
+        assert torch.allclose( metagraph.state_dict()[ name ].float(), tensor.float() ), name
+    assert metagraph.hotkeys == full.hotkeys
+    assert metagraph.endpoint_objs == full.endpoint_objs
+
+def test_sync_delta_replaced_uid():
+    subtensor = InProcessSubtensor( block_time = 0, max_n = 2, immunity_period = 0 )
+    subtensor.add_synthetic_neurons( 2, stake = 1.0, seed = 0 )
+    metagraph = bittensor.metagraph( subtensor = subtensor )
+    metagraph.sync_delta()
+    old_hotkeys = list( metagraph.hotkeys )
+    wallet = bittensor.wallet.mock()
+    wallet._hotkey = bittensor.Keypair.create_from_mnemonic( bittensor.Keypair.generate_mnemonic() )
+    wallet.register( subtensor = subtensor )
+    changes = metagraph.sync_delta()
+    uid = metagraph.hotkey_to_uid( wallet.hotkey.ss58_address )
+    assert changes.replaced_uids.tolist() == [ uid ] and changes.new_uids.tolist() == []
+    assert metagraph.hotkeys[ 1 - uid ] == old_hotkeys[ 1 - uid ]
+
+def test_refresher_publishes_new_graph():
+    subtensor, metagraph = synced_metagraph()
+    published = []
+    refresher = bittensor.MetagraphRefresher( metagraph, blocks = 5, poll_interval = 0.01, on_refresh = lambda graph, changes: published.append( changes ) )
+    assert refresher.metagraph is metagraph
+    # The in process chain is shared, other chains get a connection of their own.
+    assert refresher.subtensor is subtensor
+
+    # A new graph is synced, the published graph is left as is.
+    subtensor.add_synthetic_neurons( 2, seed = 1 )
+    changes = refresher.refresh()
+    assert changes.new_uids.tolist() == [ 8, 9 ]
+    assert refresher.metagraph is not metagraph
+    assert metagraph.n.item() == 8 and len( metagraph.hotkeys ) == 8
+    assert refresher.metagraph.n.item() == 10
+
+    with refresher:
+        subtensor.advance( 5 )
+        for _ in range( 500 ):
+            if refresher.stats.refreshes == 2:
+                break
+            time.sleep( 0.01 )
+    assert not refresher.is_running
+    assert refresher.stats.refreshes == 2 and refresher.stats.failures == 0
+    assert refresher.metagraph.block.item() == subtensor.get_current_block()
+    assert len( published ) == 2
+
+def dense_dividends( metagraph, uid, row_weight ):
+    # The incentive function computed densely, one row at a time.
+    n = metagraph.n.item()
+    row_weight = torch.nn.functional.normalize( row_weight, p=1, dim=0 )
+    weight = metagraph.W.detach().clone()
+    weight[ uid ] = row_weight
+    S = metagraph.S.view( n, 1 )
+    R = torch.matmul( weight.t(), S ).view( n )
+    T = torch.matmul( ( weight.t() != 0 ).float(), S ).view( n )
+    C = torch.sigmoid( 10 * ( T / torch.sum( S ) - 0.5 ) )
+    inflation = metagraph.tau * R * C
+    B = torch.nn.functional.normalize( metagraph.B.float(), p=1, dim=1 )
+    return torch.matmul( B, inflation.view( n, 1 ) ).view( n ) + 0.5 * inflation
+
+def test_forward_batch( tmp_path, capsys ):
+    subtensor = InProcessSubtensor( block_time = 0 )
+    subtensor.add_synthetic_neurons( 12, stake = 1.0, weights_per_neuron = 4, seed = 0 )
+    subtensor.advance( 100 )
+    metagraph = bittensor.metagraph( subtensor = subtensor ).sync()
+    candidates = torch.rand( 5, 12 )
+    candidates[ 0, :6 ] = 0
+    with warnings.catch_warnings():
+        warnings.simplefilter( 'error' )
+        dividends = metagraph( 3, candidates )
+    assert dividends.shape == ( 5, 12 )
+    for candidate, row in zip( candidates, dividends ):
+        assert torch.allclose( row, dense_dividends( metagraph, 3, candidate ), atol = 1e-6 )
+    assert torch.allclose( metagraph( 3, candidates[1] ), dividends[1], atol = 1e-6 )
+    # A single row keeps the unbatched shape, as before batching.
+    assert metagraph( 3, candidates[1:2] ).shape == ( 12, )
+    assert capsys.readouterr().out == ''
+
+    # A loaded snapshot is evaluated from its sparse rows, without densifying them.
+    path = str( tmp_path / 'snapshot' )
+    metagraph.save_snapshot( path )
+    loaded = bittensor.metagraph( subtensor = subtensor ).load_snapshot( path )
+    assert torch.allclose( loaded( 3, candidates ), dividends, atol = 1e-6 )
+    assert 'weights' not in loaded._parameters and 'bonds' not in loaded._parameters
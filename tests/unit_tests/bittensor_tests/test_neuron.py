@@ -55,6 +55,127 @@ def test_set_fine_tuning_params():
     adv_server.config.neuron.finetune.layer_name = None
     assert adv_server.set_fine_tuning_params() == (False, None) 
 
+def test_activation_cache():
+    from bittensor._neuron.text.neuron_utilities import ActivationCache
+    cache = ActivationCache( max_entries = 2, ttl = 60 )
+    weight = torch.ones( 3, requires_grad = True )
+    inputs = [ torch.tensor([ i, i + 1 ]) for i in range(3) ]
+    keys = [ ActivationCache.key( x ) for x in inputs ]
+    assert keys[0] == ActivationCache.key( torch.tensor([ 0, 1 ]) )
+    assert keys[0] != ActivationCache.key( torch.tensor([ 0, 1 ], dtype = torch.int32) )
+
+    for key in keys:
+        cache.put( key, weight * 2, cache.generation )
+    assert len( cache ) == 2
+    assert cache.pop( keys[0] ) == None
+    outputs = cache.pop( keys[1] )
+    outputs.backward( torch.ones( 3 ) )
+    assert torch.all( weight.grad == 2 )
+    assert cache.pop( keys[1] ) == None
+
+    # -- outputs computed before a parameter update are rejected
+    generation = cache.generation
+    cache.clear()
+    cache.put( keys[0], weight * 2, generation )
+    assert len( cache ) == 0
+
+    # -- expired and graph-less outputs are not returned
+    cache.ttl = -1
+    cache.put( keys[0], weight * 2, cache.generation )
+    assert cache.pop( keys[0] ) == None
+    cache.put( keys[0], torch.ones( 3 ), cache.generation )
+    assert len( cache ) == 0
+
+def test_activation_cache_max_bytes():
+    from bittensor._neuron.text.neuron_utilities import ActivationCache
+    frozen = torch.ones( 4, 4 )
+    weight = torch.ones( 4, requires_grad = True )
+    with ActivationCache.graph_bytes() as graph:
+        outputs = ( ( frozen * 2 ).exp() * weight ).sum()
+    # -- only the activations saved for the trainable tail are counted, not the weight itself
+    assert graph.nbytes == 4 * 4 * frozen.element_size()
+
+    cache = ActivationCache( max_entries = 256, ttl = 60, max_bytes = 2 * graph.nbytes )
+    keys = [ ActivationCache.key( torch.tensor([ i ]) ) for i in range(3) ]
+    for key in keys:
+        cache.put( key, outputs, cache.generation, graph.nbytes )
+    assert len( cache ) == 2 and cache.nbytes == 2 * graph.nbytes
+    assert cache.pop( keys[0] ) == None
+    assert cache.pop( keys[2] ) is outputs
+    assert cache.nbytes == graph.nbytes
+
+    # -- a graph larger than the whole budget is never cached
+    cache.put( keys[0], outputs, cache.generation, 3 * graph.nbytes )
+    assert len( cache ) == 1
+    cache.clear()
+    assert cache.nbytes == 0
+
+def test_gradient_accumulator():
+    import time
+    from threading import Lock
+    from bittensor._neuron.text.neuron_utilities import ActivationCache, GradientAccumulator
+    class Model(nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.embedding = torch.nn.Embedding( 10, 4 )
+        def encode_forward(self, inputs):
+            return self.embedding( inputs ) * 2
+
+    model = Model()
+    cache = ActivationCache( max_entries = 4, ttl = 60 )
+    accumulator = GradientAccumulator( model, Lock(), queue_size = 2, batch_size = 4, outputs_cache = cache )
+    requests = [ ( torch.randint( 0, 10, (2, 3) ), torch.rand( 2, 3, 4 ) ) for _ in range(2) ] + [ ( torch.randint( 0, 10, (1, 5) ), torch.rand( 1, 5, 4 ) ) ]
+    cache.put( ActivationCache.key( requests[0][0] ), model.encode_forward( requests[0][0] ), cache.generation )
+
+    # -- gradients go to the buffer, not the parameters, until applied.
+    accumulator.backward( requests )
+    assert model.embedding.weight.grad == None
+    assert len( cache ) == 0
+    assert accumulator.apply() == 5
+    accumulated = model.embedding.weight.grad.clone()
+
+    model.zero_grad()
+    for inputs_x, grads_dy in requests:
+        torch.autograd.backward( model.encode_forward( inputs_x ), grads_dy )
+    assert torch.allclose( accumulated, model.embedding.weight.grad )
+    assert accumulator.apply() == 0
+
+    # -- requests over the queue size are dropped.
+    assert accumulator.submit( *requests[0] ) and accumulator.submit( *requests[1] )
+    assert not accumulator.submit( *requests[2] )
+    assert accumulator.dropped == 1
+
+    accumulator.start()
+    for _ in range(50):
+        if accumulator.accumulated == 4:
+            break
+        time.sleep( 0.1 )
+    accumulator.stop()
+    assert accumulator.accumulated == 4
+
+def test_gradient_accumulator_per_request_forward():
+    from threading import Lock
+    from bittensor._neuron.text.neuron_utilities import GradientAccumulator
+    class Model(nn.Module):
+        # -- outputs depend on the other rows of the batch, as with the servers' padding of remapped tokens.
+        def __init__(self):
+            super().__init__()
+            self.embedding = torch.nn.Embedding( 10, 4 )
+        def encode_forward(self, inputs):
+            embedded = self.embedding( inputs )
+            return embedded + embedded.mean( dim = 0, keepdim = True )
+
+    model = Model()
+    accumulator = GradientAccumulator( model, Lock(), queue_size = 4, batch_size = 4 )
+    requests = [ ( torch.randint( 0, 10, (2, 3) ), torch.rand( 2, 3, 4 ) ) for _ in range(3) ]
+    accumulator.backward( requests )
+    assert accumulator.apply() == 6
+    accumulated = model.embedding.weight.grad.clone()
+
+    model.zero_grad()
+    for inputs_x, grads_dy in requests:
+        torch.autograd.backward( model.encode_forward( inputs_x ), grads_dy )
+    assert torch.allclose( accumulated, model.embedding.weight.grad )
 
 if __name__ == '__main__':
     test_set_fine_tuning_params()
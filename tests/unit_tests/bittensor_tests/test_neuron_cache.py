@@ -0,0 +1,167 @@
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import hashlib
+import json
+import os
+import struct
+import zlib
+
+import pytest
+import bittensor
+from bittensor._metagraph import neuron_cache
+from bittensor._subtensor.subtensor_impl import Subtensor
+from bittensor._subtensor.subtensor_inprocess import InProcessSubtensor
+
+def chain_neurons():
+    subtensor = InProcessSubtensor( block_time = 0 )
+    subtensor.add_synthetic_neurons( 6, stake = 1.5, port = 9000, weights_per_neuron = 3, seed = 0 )
+    subtensor.advance( 100 )
+    neurons = subtensor.neurons()
+    neurons[1].ip = bittensor.utils.networking.ip_to_int( 'ffff:db8::ff00:42:8329' )
+    neurons.append( Subtensor._null_neuron() )
+    return neurons
+
+class FakeIpfs:
+    r""" Serves files by hash, failing the first download of each hash half way through.
+    """
+    latest_neurons_ipns = 'latest'
+    historical_neurons_ipns = 'historical'
+
+    def __init__( self, files ):
+        self.files = files
+        self.names = {}
+        self.downloads = []
+
+    def resolve_ipns( self, ipns_hash ):
+        return self.names[ ipns_hash ]
+
+    def list_directory( self, ipfs_hash ):
+        return self.files[ ipfs_hash ]
+
+    def download( self, ipfs_hash, path, prefix = None ):
+        offset = os.path.getsize( path ) if os.path.exists( path ) else 0
+        self.downloads.append( ( ipfs_hash, offset ) )
+        content = self.files[ ipfs_hash ]
+        with open( path, 'ab' ) as file:
+            if prefix != None and not content.startswith( prefix ):
+                raise ValueError( 'prefix' )
+            if offset == 0:
+                file.write( content[ :len( content ) // 2 ] )
+                raise ConnectionError( 'interrupted' )
+            file.write( content[ offset: ] )
+        return path
+
+def test_encode_decode():
+    neurons = chain_neurons()
+    block, decoded = neuron_cache.decode_neurons( neuron_cache.encode_neurons( neurons, 100 ) )
+    assert block == 100
+    assert [ vars( neuron ) for neuron in decoded ] == [ { **vars( neuron ), 'weights': [ list( edge ) for edge in neuron.weights ], 'bonds': [ list( edge ) for edge in neuron.bonds ] } for neuron in neurons ]
+
+def test_decode_rejects_corrupt_and_pickle():
+    buffer = neuron_cache.encode_neurons( chain_neurons(), 100 )
+    with pytest.raises( ValueError ):
+        neuron_cache.decode_neurons( buffer[:-1] + bytes([ buffer[-1] ^ 1 ]) )
+    with pytest.raises( ValueError ):
+        neuron_cache.decode_neurons( b'\x80\x04\x95' + buffer )
+
+def test_cache_resumes_and_reuses_downloads( tmp_path ):
+    neurons = chain_neurons()
+    ipfs = FakeIpfs( {
+        'hash100': neuron_cache.encode_neurons( neurons, 100 ),
+        'hash200': neuron_cache.encode_neurons( neurons[:3], 200 ),
+        'directory': [ { 'Name': 'nakamoto-100.neurons', 'Hash': 'hash100' }, { 'Name': 'nakamoto-100.pkl', 'Hash': 'pickle' } ],
+    } )
+    ipfs.names = { 'latest': 'hash200', 'historical': 'directory' }
+    cache = neuron_cache.NeuronCache( ipfs = ipfs, root = str( tmp_path ) )
+
+    with pytest.raises( ConnectionError ):
+        cache.latest()
+    block, latest = cache.latest()
+    assert block == 200 and len( latest ) == 3
+    assert ipfs.downloads[-1][1] > 0
+
+    # Historical blocks go through the index, and a second cache on the same directory downloads nothing.
+    assert cache.load_index()[ 'blocks' ] == { '200': 'hash200' }
+    with pytest.raises( ConnectionError ):
+        cache.at_block( 100 )
+    assert len( cache.at_block( 100 ) ) == 7
+    with pytest.raises( KeyError ):
+        cache.at_block( 150 )
+    downloads = len( ipfs.downloads )
+    other = neuron_cache.NeuronCache( ipfs = ipfs, root = str( tmp_path ) )
+    assert other.latest()[0] == 200
+    assert other.at_block( 100 )[1].ip == neurons[1].ip
+    assert len( ipfs.downloads ) == downloads
+
+def test_cache_rejects_other_formats( tmp_path ):
+    ipfs = FakeIpfs( { 'pickle': b'\x80\x04\x95' + bytes( 64 ) } )
+    ipfs.names = { 'latest': 'pickle' }
+    cache = neuron_cache.NeuronCache( ipfs = ipfs, root = str( tmp_path ) )
+    with pytest.raises( ValueError ):
+        cache.latest()
+    assert 'pickle' in cache.load_index()[ 'rejected' ]
+    assert os.listdir( os.path.join( cache.root, 'downloads' ) ) == []
+
+    # A rejected hash is not downloaded again.
+    with pytest.raises( ValueError ):
+        cache.latest()
+    assert len( ipfs.downloads ) == 1
+
+def test_cache_keeps_truncated_downloads( tmp_path ):
+    class ShortIpfs( FakeIpfs ):
+        # The first stream ends early without an error, within the header.
+        def download( self, ipfs_hash, path, prefix = None ):
+            if self.downloads:
+                return super().download( ipfs_hash, path, prefix )
+            self.downloads.append( ( ipfs_hash, 0 ) )
+            with open( path, 'ab' ) as file:
+                file.write( self.files[ ipfs_hash ][ :len( neuron_cache.MAGIC ) + 8 ] )
+            return path
+    ipfs = ShortIpfs( { 'hash100': neuron_cache.encode_neurons( chain_neurons(), 100 ) } )
+    ipfs.names = { 'latest': 'hash100' }
+    cache = neuron_cache.NeuronCache( ipfs = ipfs, root = str( tmp_path ) )
+    with pytest.raises( ValueError ) as error:
+        cache.latest()
+    assert not isinstance( error.value, neuron_cache.UnsupportedNeuronCache )
+    assert cache.load_index()[ 'rejected' ] == {}
+    assert len( os.listdir( os.path.join( cache.root, 'downloads' ) ) ) == 1
+
+    # The next call resumes the download after the bytes already on disk.
+    assert cache.latest()[0] == 100
+    assert ipfs.downloads[-1] == ( 'hash100', len( neuron_cache.MAGIC ) + 8 )
+
+def test_cache_takes_over_stopped_downloads( tmp_path ):
+    cache = neuron_cache.NeuronCache( ipfs = FakeIpfs( {} ), root = str( tmp_path ) )
+    downloads = os.path.join( cache.root, 'downloads' )
+    running = os.path.join( downloads, 'hash.part-{}'.format( os.getppid() ) )
+    open( running, 'wb' ).close()
+    assert cache._part_path( 'hash' ) == os.path.join( downloads, 'hash.part-{}'.format( os.getpid() ) )
+    assert os.path.exists( running )
+    os.replace( running, os.path.join( downloads, 'hash.part-999999999' ) )
+    part = cache._part_path( 'hash' )
+    assert os.path.exists( part ) and os.listdir( downloads ) == [ os.path.basename( part ) ]
+
+def test_decode_bounds_decompressed_size():
+    buffer = neuron_cache.encode_neurons( chain_neurons(), 100 )
+    header, start = neuron_cache._read_header( buffer )
+    # A payload inflating past the size in the header is rejected.
+    payload = zlib.compress( bytes( header[ 'size' ] + 1024 ) )
+    header.update( payload_size = len( payload ), sha256 = hashlib.sha256( payload ).hexdigest() )
+    encoded = json.dumps( header ).encode()
+    with pytest.raises( ValueError ):
+        neuron_cache.decode_neurons( neuron_cache.MAGIC + struct.pack( '<I', len( encoded ) ) + encoded + payload )
@@ -0,0 +1,122 @@
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated 
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation 
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, 
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of 
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL 
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION 
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER 
+# DEALINGS IN THE SOFTWARE.
+
+import json
+import os
+import signal
+import time
+import urllib.request
+import urllib.error
+
+import pytest
+import torch
+
+import bittensor
+
+def busy( seconds ):
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        sum( range( 1000 ) )
+
+def test_profiler_sections( tmp_path ):
+    profiler = bittensor.profiler( root_dir = str( tmp_path ) )
+    @profiler.timed( 'forward' )
+    def forward( inputs_x ):
+        return inputs_x
+    # The signature is kept, the axon checks it.
+    bittensor.axon.check_forward_callback( forward, bittensor.proto.Modality.TEXT )
+    for _ in range( 3 ):
+        with profiler.section( 'step' ):
+            pass
+    summary = profiler.summary()
+    assert summary['forward']['forward_count'] == 1
+    assert summary['step']['step_count'] == 3
+    assert profiler.to_wandb()['profiler/step_count'] == 3
+
+def test_profiler_sample_capture( tmp_path ):
+    profiler = bittensor.profiler( root_dir = str( tmp_path ), interval = 0.001 )
+    path = profiler.capture( seconds = 0.3, block = False )
+    assert profiler.capture( seconds = 0.3 ) == None
+    busy( 0.4 )
+    deadline = time.time() + 5
+    while profiler.last_capture != path and time.time() < deadline:
+        time.sleep( 0.05 )
+    assert os.path.dirname( path ) == os.path.join( str( tmp_path ), 'profiles' )
+    folded = open( path + '.folded' ).read()
+    assert 'busy (test_profiler.py' in folded
+    assert 'Top functions by self samples' in open( path + '.txt' ).read()
+
+def test_profiler_cprofile_capture( tmp_path ):
+    profiler = bittensor.profiler( root_dir = str( tmp_path ) )
+    path = profiler.capture( seconds = 0.5, mode = 'cprofile' )
+    time.sleep( 0.1 )
+    with profiler.section( 'step' ):
+        busy( 0.1 )
+    deadline = time.time() + 5
+    while profiler.last_capture != path and time.time() < deadline:
+        time.sleep( 0.05 )
+    assert os.path.exists( path + '.prof' )
+    assert 'busy' in open( path + '.txt' ).read()
+
+def test_profiler_torch_capture( tmp_path ):
+    profiler = bittensor.profiler( root_dir = str( tmp_path ) )
+    path = profiler.capture( seconds = 0.5, mode = 'torch' )
+    time.sleep( 0.1 )
+    with profiler.section( 'step' ):
+        torch.matmul( torch.rand( 64, 64 ), torch.rand( 64, 64 ) )
+    deadline = time.time() + 10
+    while profiler.last_capture != path and time.time() < deadline:
+        time.sleep( 0.05 )
+    assert 'step' in open( path + '.json' ).read()
+
+def test_profiler_admin_endpoint( tmp_path ):
+    profiler = bittensor.profiler( root_dir = str( tmp_path ), port = 0, ip = '127.0.0.1' ).start()
+    try:
+        url = 'http://127.0.0.1:{}'.format( profiler.port )
+        response = json.loads( urllib.request.urlopen( url + '/profile?seconds=0.1&mode=sample', timeout = 5 ).read() )
+        assert response['path'].startswith( os.path.join( str( tmp_path ), 'profiles', 'sample-' ) )
+        with pytest.raises( urllib.error.HTTPError ):
+            urllib.request.urlopen( url + '/profile?mode=other', timeout = 5 )
+        with pytest.raises( urllib.error.HTTPError ):
+            urllib.request.urlopen( url + '/other', timeout = 5 )
+        with profiler.section( 'step' ):
+            pass
+        assert 'step' in json.loads( urllib.request.urlopen( url + '/sections', timeout = 5 ).read() )
+    finally:
+        profiler.stop()
+
+def test_profiler_port_in_use( tmp_path ):
+    profiler = bittensor.profiler( root_dir = str( tmp_path ), port = 0, ip = '127.0.0.1' ).start()
+    try:
+        # A second profiler on the same port keeps running without the admin endpoint.
+        other = bittensor.profiler( root_dir = str( tmp_path ), port = profiler.port, ip = '127.0.0.1' ).start()
+        assert other.server == None
+        other.stop()
+    finally:
+        profiler.stop()
+
+def test_profiler_signal( tmp_path ):
+    profiler = bittensor.profiler( root_dir = str( tmp_path ), seconds = 0.1, port = 0, ip = '127.0.0.1' ).start()
+    try:
+        os.kill( os.getpid(), signal.SIGUSR1 )
+        deadline = time.time() + 5
+        while profiler.last_capture == None and time.time() < deadline:
+            time.sleep( 0.05 )
+        assert os.path.exists( profiler.last_capture + '.folded' )
+    finally:
+        profiler.stop()
+    assert signal.getsignal( signal.SIGUSR1 ) == signal.SIG_DFL
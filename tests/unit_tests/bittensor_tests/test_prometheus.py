@@ -0,0 +1,84 @@
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated 
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation 
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, 
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of 
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL 
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION 
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER 
+# DEALINGS IN THE SOFTWARE.
+
+import urllib.request
+import urllib.error
+
+import pytest
+
+import bittensor
+from bittensor._prometheus import prometheus_impl
+
+wallet = bittensor.wallet.mock()
+
+def test_metric_render():
+    metric = prometheus_impl.Metric( 'bittensor_test_total', 'counter', 'Test counter.' )
+    metric.add( 3, code = 'Success' ).add( 1.5, code = 'say "hi"\n' )
+    assert metric.render() == '# HELP bittensor_test_total Test counter.\n# TYPE bittensor_test_total counter\n' \
+        'bittensor_test_total{code="Success"} 3\nbittensor_test_total{code="say \\"hi\\"\\n"} 1.5\n'
+
+def test_histogram_render():
+    histogram = bittensor.utils.stats.LatencyHistogram()
+    for value in [ 0.002, 0.02, 0.2, 100 ]:
+        histogram.record( value )
+    lines = prometheus_impl.Metric( 'latency_seconds', 'histogram', 'Latency.' ).add_histogram( histogram, type = 'forward' ).render().split( '\n' )
+    assert 'latency_seconds_bucket{le="0.001",type="forward"} 0' in lines
+    assert 'latency_seconds_bucket{le="0.025",type="forward"} 2' in lines
+    assert 'latency_seconds_bucket{le="60",type="forward"} 3' in lines
+    assert 'latency_seconds_bucket{le="+Inf",type="forward"} 4' in lines
+    assert 'latency_seconds_count{type="forward"} 4' in lines
+
+def test_prometheus_serves_axon_metrics():
+    axon = bittensor.axon( wallet = wallet, priority = lambda pubkey, request_type, inputs_x: 0 )
+    request = bittensor.proto.TensorMessage( version = bittensor.__version_as_int__, hotkey = 'peer' )
+    axon.update_stats_for_request( request, None, 0.1, bittensor.proto.ReturnCode.Success )
+    axon.update_stats_for_request( request, None, 0.2, bittensor.proto.ReturnCode.Timeout, request_type = bittensor.proto.RequestType.BACKWARD )
+
+    prometheus = bittensor.prometheus( port = 0, ip = '127.0.0.1' )
+    prometheus.register( axon = axon, collector = lambda: [ prometheus_impl.Metric( 'custom', 'gauge', 'Custom.' ).add( 1 ) ] )
+    prometheus.register( collector = lambda: 1 / 0 )
+    prometheus.start()
+    try:
+        body = urllib.request.urlopen( 'http://127.0.0.1:{}/metrics'.format( prometheus.port ), timeout = 5 ).read().decode()
+        lines = body.split( '\n' )
+        assert 'bittensor_axon_requests_total 2' in lines
+        assert 'bittensor_axon_responses_total{code="Success"} 1' in lines
+        assert 'bittensor_axon_responses_total{code="Timeout"} 1' in lines
+        assert 'bittensor_axon_request_duration_seconds_count{type="backward"} 1' in lines
+        assert 'bittensor_threadpool_shed_total 0' in lines
+        assert 'custom 1' in lines
+        with pytest.raises( urllib.error.HTTPError ):
+            urllib.request.urlopen( 'http://127.0.0.1:{}/other'.format( prometheus.port ), timeout = 5 )
+    finally:
+        prometheus.stop()
+        axon.stop()
+
+def test_subtensor_rpc_metrics():
+    class Substrate:
+        def rpc_request( self, method, params, result_handler = None ):
+            if method == 'fail':
+                raise ConnectionError()
+            return { 'result': params }
+    subtensor = bittensor.Subtensor( substrate = Substrate(), network = 'local', chain_endpoint = 'local' )
+    subtensor.substrate.rpc_request( 'chain_getHead', [] )
+    subtensor.substrate.rpc_request( 'chain_getHead', [] )
+    with pytest.raises( ConnectionError ):
+        subtensor.substrate.rpc_request( 'fail', [] )
+    body = ''.join( metric.render() for metric in prometheus_impl.subtensor_metrics( subtensor ) )
+    assert 'bittensor_subtensor_rpc_requests_total{method="chain_getHead"} 2' in body
+    assert 'bittensor_subtensor_rpc_errors_total 1' in body
+    assert 'bittensor_subtensor_rpc_duration_seconds_count 3' in body
@@ -111,5 +111,30 @@ def test_receptor_pool_backward_hang():
     receptor_pool.receptors[neuron_obj.hotkey].stub.Backward.future = MagicMock( return_value = future )
     receptor_pool.backward( endpoints, x,x, bittensor.proto.Modality.TENSOR, timeout=1)
 
+def test_receptor_pool_forward_into_buffer():
+    endpoints = [neuron_obj,neuron_obj]
+    x = torch.ones( (2,2,2) )
+    y = torch.rand(2, 2, bittensor.__network_dim__)
+    y[0,0,0] = float('nan')
+    serializer = bittensor.serializer( serialzer_type = bittensor.proto.Serializer.MSGPACK )
+    y_serialized = serializer.serialize(y, modality = bittensor.proto.Modality.TENSOR, from_type = bittensor.proto.TensorType.TORCH)
+
+    mock_return_val = bittensor.proto.TensorMessage(
+            version = bittensor.__version_as_int__,
+            hotkey = wallet.hotkey.ss58_address,
+            return_code = bittensor.proto.ReturnCode.Success,
+            tensors = [y_serialized])
+
+    future = asyncio.Future()
+    future.set_result(mock_return_val)
+    receptor_pool._get_or_create_receptor_for_endpoint(neuron_obj)
+    receptor_pool.receptors[neuron_obj.hotkey].stub.Forward.future = MagicMock( return_value = future )
+    outputs_buffer = torch.zeros( (2, 2, 2, bittensor.__network_dim__) )
+    resp1, codes, _ = receptor_pool.forward( endpoints, [x[0], x[1]], bittensor.proto.Modality.TENSOR, timeout=1, outputs_buffer = outputs_buffer)
+    assert codes == [bittensor.proto.ReturnCode.Success, bittensor.proto.ReturnCode.Success]
+    assert all( r.data_ptr() == b.data_ptr() for r, b in zip(resp1, outputs_buffer) )
+    assert outputs_buffer[0,0,0,0] == 0
+    assert torch.equal( outputs_buffer[1,0,1:], y[0,1:] )
+
 if __name__ == "__main__":
     test_receptor_pool_backward_hang()
\ No newline at end of file
@@ -0,0 +1,119 @@
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated 
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation 
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, 
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of 
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL 
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION 
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER 
+# DEALINGS IN THE SOFTWARE.
+
+
+import os
+import tempfile
+
+import torch
+
+import bittensor
+from bittensor._axon.request_log import RequestRecorder, RequestLog, Replayer, ReplayContext, segment_paths
+
+wallet = bittensor.wallet.mock()
+
+def forward_request( hotkey: str = 'peer' ) -> bittensor.proto.TensorMessage:
+    inputs = torch.tensor( [ [ 1, 2, 3 ] ], dtype = torch.int64 )
+    serializer = bittensor.serializer( serialzer_type = bittensor.proto.Serializer.MSGPACK )
+    tensor = serializer.serialize( inputs, modality = bittensor.proto.Modality.TEXT, from_type = bittensor.proto.TensorType.TORCH )
+    return bittensor.proto.TensorMessage( version = bittensor.__version_as_int__, hotkey = hotkey, tensors = [ tensor ] )
+
+def backward_request( hotkey: str = 'peer' ) -> bittensor.proto.TensorMessage:
+    serializer = bittensor.serializer( serialzer_type = bittensor.proto.Serializer.MSGPACK )
+    inputs = serializer.serialize( torch.tensor( [ [ 1, 2, 3 ] ], dtype = torch.int64 ), modality = bittensor.proto.Modality.TEXT, from_type = bittensor.proto.TensorType.TORCH )
+    grads = serializer.serialize( torch.ones( 1, 3, bittensor.__network_dim__ ), modality = bittensor.proto.Modality.TENSOR, from_type = bittensor.proto.TensorType.TORCH )
+    return bittensor.proto.TensorMessage( version = bittensor.__version_as_int__, hotkey = hotkey, tensors = [ inputs, grads ] )
+
+def test_recorder_round_trip():
+    with tempfile.TemporaryDirectory() as directory:
+        recorder = RequestRecorder( directory )
+        recorder.record( forward_request( 'alice' ), bittensor.proto.RequestType.FORWARD, timestamp = 10.0 )
+        recorder.record( backward_request( 'bob' ), bittensor.proto.RequestType.BACKWARD, timestamp = 10.5 )
+        recorder.flush()
+
+        records = list( RequestLog( directory ) )
+        assert [ ( record.timestamp, record.request_type, record.hotkey ) for record in records ] == [
+            ( 10.0, bittensor.proto.RequestType.FORWARD, 'alice' ),
+            ( 10.5, bittensor.proto.RequestType.BACKWARD, 'bob' )
+        ]
+        assert records[0].request() == forward_request( 'alice' )
+        assert len( records[1].request().tensors ) == 2
+
+        # A record cut by a crash is skipped and capture resumes in a new segment.
+        recorder.close()
+        with open( segment_paths( directory )[0], 'ab' ) as file:
+            file.write( b'\x00' * 7 )
+        recorder = RequestRecorder( directory )
+        recorder.record( forward_request( 'carol' ), bittensor.proto.RequestType.FORWARD )
+        recorder.close()
+        assert len( segment_paths( directory ) ) == 2
+        assert [ record.hotkey for record in RequestLog( directory ) ] == [ 'alice', 'bob', 'carol' ]
+
+def test_recorder_rotation_and_cap():
+    with tempfile.TemporaryDirectory() as directory:
+        size = len( forward_request().SerializeToString() )
+        recorder = RequestRecorder( directory, segment_bytes = 3 * size, max_bytes = 9 * size )
+        for i in range( 40 ):
+            recorder.record( forward_request(), bittensor.proto.RequestType.FORWARD, timestamp = i )
+        recorder.close()
+        paths = segment_paths( directory )
+        assert len( paths ) > 1
+        assert sum( os.path.getsize( path ) for path in paths ) == recorder.total_bytes <= 9 * size
+        timestamps = [ record.timestamp for record in RequestLog( directory ) ]
+        # The oldest segments were dropped, the latest requests are kept in order.
+        assert timestamps[-1] == 39 and timestamps == sorted( timestamps ) and timestamps[0] > 0
+
+def test_replay_into_nucleus():
+    with tempfile.TemporaryDirectory() as directory:
+        recorder = RequestRecorder( directory )
+        for i in range( 10 ):
+            recorder.record( forward_request(), bittensor.proto.RequestType.FORWARD, timestamp = 100 + i * 0.02 )
+        recorder.record( backward_request(), bittensor.proto.RequestType.BACKWARD, timestamp = 100.2 )
+        recorder.close()
+
+        calls = []
+        def forward( inputs_x ):
+            calls.append( inputs_x.shape )
+            return torch.zeros( 1, 3, bittensor.__network_dim__ )
+
+        stats = Replayer( forward = forward, speed = 2 ).run( RequestLog( directory ) )
+        assert stats.requests == 11 and stats.forward == 10 and stats.backward == 1
+        assert stats.codes == { 'Success': 10, 'NotImplemented': 1 }
+        assert calls == [ torch.Size( [ 1, 3 ] ) ] * 10
+        # Half of the 0.2s captured.
+        assert 0.09 < stats.duration < 1
+        assert stats.latency.count() == 11
+
+        stats = Replayer( forward = forward, speed = 0 ).run( RequestLog( directory ), limit = 5 )
+        assert stats.requests == 5
+
+def test_replay_into_axon():
+    with tempfile.TemporaryDirectory() as directory:
+        def forward( inputs_x ):
+            return torch.zeros( [ inputs_x.shape[0], inputs_x.shape[1], bittensor.__network_dim__ ] )
+        axon = bittensor.axon( wallet = wallet, forward_text = forward, capture_dir = directory )
+        response = axon.Forward( forward_request( 'alice' ), ReplayContext() )
+        assert response.return_code == bittensor.proto.ReturnCode.Success
+        axon.stop()
+
+        records = list( RequestLog( directory ) )
+        assert len( records ) == 1 and records[0].hotkey == 'alice'
+
+        replay_axon = bittensor.axon( wallet = wallet, forward_text = forward )
+        stats = Replayer( axon = replay_axon, speed = 0 ).run( records * 4 )
+        assert stats.codes == { 'Success': 4 }
+        assert replay_axon.stats.total_requests.value() == 4
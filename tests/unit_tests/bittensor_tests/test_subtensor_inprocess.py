@@ -0,0 +1,112 @@
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import time
+
+import pytest
+import torch
+import bittensor
+from bittensor._subtensor.subtensor_inprocess import InProcessSubtensor
+
+def new_wallet():
+    wallet = bittensor.wallet.mock()
+    wallet._hotkey = bittensor.Keypair.create_from_mnemonic( bittensor.Keypair.generate_mnemonic() )
+    return wallet
+
+def test_factory():
+    assert isinstance( bittensor.subtensor( _mock = 'inprocess' ), InProcessSubtensor )
+    assert isinstance( bittensor.subtensor( network = 'inprocess' ), InProcessSubtensor )
+    with pytest.raises( ValueError ):
+        InProcessSubtensor( not_a_parameter = 1 )
+
+def test_register_serve_stake_and_weights():
+    subtensor = InProcessSubtensor( block_time = 0 )
+    wallet = new_wallet()
+    assert not wallet.is_registered( subtensor = subtensor )
+    wallet.register( subtensor = subtensor )
+    assert wallet.is_registered( subtensor = subtensor )
+    assert subtensor.n == 1
+
+    assert subtensor.serve( wallet, '127.0.0.1', 8091, 0 )
+    neuron = subtensor.neuron_for_pubkey( wallet.hotkey.ss58_address )
+    assert bittensor.utils.networking.int_to_ip( neuron.ip ) == '127.0.0.1'
+    assert neuron.port == 8091
+
+    subtensor.set_balance( wallet.coldkeypub.ss58_address, 10 )
+    assert subtensor.add_stake( wallet, 4 )
+    assert not subtensor.add_stake( wallet, 7 )
+    assert subtensor.get_balance( wallet.coldkeypub.ss58_address ) == bittensor.Balance.from_tao( 6 )
+    assert subtensor.unstake( wallet, 1 )
+    assert subtensor.neuron_for_uid( 0 ).stake == pytest.approx( 3 )
+
+    other = new_wallet()
+    other.register( subtensor = subtensor )
+    assert subtensor.set_weights( wallet, uids = torch.tensor([ 0, 1 ]), weights = torch.tensor([ 0.25, 0.75 ]) )
+    assert not subtensor.set_weights( wallet, uids = torch.tensor([ 5 ]), weights = torch.tensor([ 1.0 ]) )
+    assert [ uid for uid, _ in subtensor.neuron_for_uid( 0 ).weights ] == [ 0, 1 ]
+    assert subtensor.neuron_for_uid( 5 ).is_null
+
+def test_blocks_and_epochs():
+    now = [ 0.0 ]
+    subtensor = InProcessSubtensor( block_time = 12, clock = lambda: now[0], blocks_per_epoch = 10 )
+    assert subtensor.get_current_block() == 0
+    now[0] = 120
+    assert subtensor.get_current_block() == 10
+    assert subtensor.advance( 5 ) == 15
+    assert subtensor.blocks_since_epoch == 5
+
+    uids = subtensor.add_synthetic_neurons( 4, stake = 1.0, seed = 0 )
+    wallet = new_wallet()
+    wallet.register( subtensor = subtensor )
+    subtensor.set_balance( wallet.coldkeypub.ss58_address, 1 )
+    subtensor.add_stake( wallet, 1 )
+    assert subtensor.set_weights( wallet, uids = torch.tensor( uids ), weights = torch.tensor([ 0.1, 0.2, 0.3, 0.4 ]) )
+    subtensor.advance( 5 )
+    neurons = subtensor.neurons()
+    assert sum( neuron.emission for neuron in neurons ) == pytest.approx( 10 )
+    assert neurons[3].incentive > neurons[0].incentive
+    assert neurons[4].dividends == pytest.approx( 1 )
+    assert subtensor.total_stake.tao == pytest.approx( 15, abs = 1e-6 )
+
+def test_register_prunes_when_full():
+    subtensor = InProcessSubtensor( block_time = 0, max_n = 2, immunity_period = 10 )
+    subtensor.add_synthetic_neurons( 2, seed = 0 )
+    wallet = new_wallet()
+    wallet.register( subtensor = subtensor )
+    assert not wallet.is_registered( subtensor = subtensor )
+    subtensor.advance( 10 )
+    wallet.register( subtensor = subtensor )
+    assert wallet.is_registered( subtensor = subtensor )
+    assert subtensor.n == 2
+
+def test_metagraph_sync():
+    subtensor = InProcessSubtensor( block_time = 0 )
+    subtensor.add_synthetic_neurons( 10, stake = 1.0, port = 9000, weights_per_neuron = 3, seed = 0 )
+    metagraph = bittensor.metagraph( subtensor = subtensor ).sync()
+    assert metagraph.n.item() == 10
+    assert metagraph.S.sum().item() == pytest.approx( 10 )
+    assert metagraph.endpoint_objs[2].port == 9002
+    assert metagraph.hotkeys[2] == subtensor.neuron_for_uid( 2 ).hotkey
+
+def test_large_network():
+    subtensor = InProcessSubtensor( block_time = 0, blocks_per_epoch = 1 )
+    start = time.time()
+    subtensor.add_synthetic_neurons( 10000, stake = 1.0, weights_per_neuron = 2, seed = 0 )
+    subtensor.advance( 1 )
+    assert subtensor.n == 10000
+    assert len( subtensor.neurons() ) == 10000
+    assert time.time() - start < 60
@@ -0,0 +1,94 @@
+import pytest
+import bittensor
+import bittensor.utils.stats as stat_utils
+from types import SimpleNamespace
+
+def test_peer_stats_update():
+    stats = stat_utils.PeerStats( n_codes = 4, capacity = 2 )
+    stats.update( [ 'a', 'b', 'a' ], [ 1, 2, 1 ], [ 0.5, 1.0, 0.5 ], [ 10, 0, 30 ], [ 1, 2, 3 ] )
+    stats.update( [ 'c' ], [ 7 ], [ 2.0 ], [ 0 ], [ 4 ] )
+    assert len( stats ) == 3 and len( stats.requests ) == 4
+    assert stats.requests[:3].tolist() == [ 2, 1, 1 ]
+    assert stats.successes[:3].tolist() == [ 2, 0, 0 ]
+    assert stats.in_bytes[:3].tolist() == [ 40, 0, 0 ]
+    assert stats.out_bytes[:3].tolist() == [ 4, 2, 4 ]
+    assert stats.query_time[1] == 1.0
+    assert stats.codes_for( 'a' ).tolist() == [ 0, 2, 0, 0 ]
+    # Codes out of range are counted as requests only.
+    assert stats.codes_for( 'c' ).tolist() == [ 0, 0, 0, 0 ]
+    assert stats.codes_for( 'd' ).tolist() == [ 0, 0, 0, 0 ]
+
+    stats.update( [ 'b' ], [ 1 ], [ 2.0 ], [ 8 ], [ 8 ] )
+    assert stats.query_time[1] == ( 1 - stats.alpha ) * 1.0 + stats.alpha * 2.0
+    assert stats.qps[1] > 0
+
+def test_peer_stats_to_dataframe():
+    stats = stat_utils.PeerStats( n_codes = 4 )
+    stats.update( [ 'a', 'b', 'c' ], [ 1, 1, 2 ], [ 0.1, 0.2, 0.3 ], [ 1, 1, 0 ], [ 1, 1, 1 ] )
+    metagraph = SimpleNamespace( hotkeys = [ 'c', 'x', 'a' ] )
+    dataframe = stats.to_dataframe( metagraph, prefix = 'axon' )
+    assert sorted( dataframe.index.tolist() ) == [ 0, 2 ]
+    assert dataframe.loc[ 2, 'axon_n_success' ] == 1
+    assert dataframe.loc[ 0, 'axon_n_success' ] == 0
+    assert list( dataframe.columns ) == [ 'axon_n_requested', 'axon_n_success', 'axon_query_time', 'axon_avg_inbytes', 'axon_avg_outbytes', 'axon_qps' ]
+    assert len( stats.to_dataframe( SimpleNamespace( hotkeys = [] ), prefix = 'axon' ) ) == 0
+
+def test_latency_histogram_percentiles():
+    histogram = stat_utils.LatencyHistogram()
+    assert histogram.percentile( 50 ) == 0.0
+    for i in range( 1, 1001 ):
+        histogram.record( i / 1000 )
+    assert histogram.count() == 1000
+    assert abs( histogram.mean() - 0.5005 ) < 1e-9
+    percentiles = histogram.percentiles( ( 50, 90, 99 ) )
+    for q, expected in [ ( 50, 0.5 ), ( 90, 0.9 ), ( 99, 0.99 ) ]:
+        assert abs( percentiles[q] - expected ) / expected < histogram.growth - 1
+    summary = histogram.summary( 'axon/forward_latency' )
+    assert summary[ 'axon/forward_latency_count' ] == 1000
+    assert summary[ 'axon/forward_latency_p99' ] == percentiles[99]
+
+    # Values out of range land in the first and last buckets.
+    histogram.reset()
+    histogram.record( 0 )
+    histogram.record( 1e9 )
+    assert histogram.counts()[0] == 1 and histogram.counts()[-1] == 1
+
+def test_latency_histogram_threads_and_merge():
+    import threading
+    histogram = stat_utils.LatencyHistogram()
+    counter = stat_utils.ShardedCounter()
+    def record():
+        for _ in range( 1000 ):
+            histogram.record( 0.01 )
+            counter.inc()
+    threads = [ threading.Thread( target = record ) for _ in range( 8 ) ]
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+    assert histogram.count() == 8000
+    assert counter.value() == 8000
+
+    other = stat_utils.LatencyHistogram()
+    other.record( 1.0 )
+    merged = stat_utils.LatencyHistogram().merge( histogram ).merge( other )
+    assert merged.count() == 8001
+    assert abs( merged.percentile( 100 ) - 1.0 ) < 0.02
+    with pytest.raises( ValueError ):
+        merged.merge( stat_utils.LatencyHistogram( growth = 1.1 ) )
+
+def test_windowed_rate():
+    rate = stat_utils.WindowedRate( window = 10, slots = 10 )
+    for second in range( 20 ):
+        rate.event( 2.0, now = 1000 + second )
+    assert rate.sum( now = 1019 ) == 20.0
+    assert rate.rate( now = 1019 ) == 2.0
+    assert rate.sum( now = 1025 ) == 8.0
+    assert rate.sum( now = 1100 ) == 0.0
+
+def test_sharded_counter_as_int():
+    counter = stat_utils.ShardedCounter()
+    counter += 2
+    counter.inc()
+    assert counter == 3 and counter.value() == 3
+    assert counter > 2 and counter <= 3
+    assert int( counter ) == 3 and [ 0, 1, 2, 3 ][ counter ] == 3
+    assert '{:04d}'.format( counter ) == '0003' and str( counter ) == '3'
@@ -0,0 +1,104 @@
+import json
+import time
+import torch
+import bittensor
+import bittensor.utils.tracing as tracing
+from types import SimpleNamespace
+
+wallet = bittensor.wallet.mock()
+
+class Context():
+    def __init__( self, metadata ):
+        self.metadata = metadata
+        self.trailing_metadata = None
+    def invocation_metadata( self ):
+        return self.metadata
+    def set_trailing_metadata( self, metadata ):
+        self.trailing_metadata = metadata
+
+def test_span_laps():
+    span = tracing.Span( 'a', 'test', start_time = time.time() - 1 )
+    span.lap( 'first' )
+    span.add( 'remote', span.start_time - 1, 0.5 )
+    span.lap( 'second' )
+    span.finish( 1 )
+    span.lap( 'ignored' )
+    assert [ stage[0] for stage in span.stages ] == [ 'first', 'remote', 'second' ]
+    assert span.stages[0][2] >= 1
+    assert span.finished and span.code == 1 and span.duration() >= 2
+    assert tracing.parse_server_timing( span.server_timing() + ',bad' )[1] == ( 'remote', 0.5 )
+
+def test_tracer_ring_buffer_and_dump( tmp_path ):
+    tracer = tracing.Tracer( capacity = 2 )
+    for name in [ 'a', 'b', 'c' ]:
+        span = tracer.start( name )
+        span.lap( 'stage' )
+        tracer.record( span )
+    assert [ span.name for span in tracer.snapshot() ] == [ 'b', 'c' ]
+    spans = json.load( open( tracer.dump( str( tmp_path / 'spans.json' ) ) ) )
+    assert [ span['name'] for span in spans ] == [ 'b', 'c' ] and spans[0]['stages'][0]['name'] == 'stage'
+    events = json.load( open( tracer.dump( str( tmp_path / 'trace.json' ), chrome = True ) ) )['traceEvents']
+    assert len( events ) == 4 and all( event['ph'] == 'X' for event in events )
+
+def test_tracer_pending_is_bounded():
+    tracer = tracing.Tracer( capacity = 2 )
+    for trace_id in [ 'a', 'b', 'c' ]:
+        tracer.add_pending( trace_id, 'auth', 0, 1 )
+    assert tracer.pop_pending( 'a' ) == []
+    assert tracer.pop_pending( 'c' ) == [ ( 'auth', 0, 1 ) ]
+
+def test_axon_records_traced_requests():
+    def forward( inputs_x ):
+        return torch.zeros( [ 3, 3, bittensor.__network_dim__ ] )
+    axon = bittensor.axon( wallet = wallet, forward_tensor = forward, tracing = True )
+    serializer = bittensor.serializer( serialzer_type = bittensor.proto.Serializer.MSGPACK )
+    inputs = serializer.serialize( torch.rand( 3, 3, bittensor.__network_dim__ ), modality = bittensor.proto.Modality.TENSOR, from_type = bittensor.proto.TensorType.TORCH )
+    request = bittensor.proto.TensorMessage( version = bittensor.__version_as_int__, hotkey = 'peer', tensors = [ inputs ] )
+
+    # Untraced requests are not recorded.
+    axon.Forward( request, Context( ( ( 'rpc-auth-header', 'Bittensor' ), ) ) )
+    assert len( axon.tracer ) == 0
+
+    axon.tracer.add_pending( 'abc', 'auth', time.time(), 0.001 )
+    context = Context( ( ( 'rpc-auth-header', 'Bittensor' ), ( tracing.TRACE_ID_KEY, 'abc' ) ) )
+    response = axon.Forward( request, context )
+    assert response.return_code == bittensor.proto.ReturnCode.Success
+    span = axon.tracer.snapshot()[0]
+    assert span.trace_id == 'abc' and span.pubkey == 'peer' and span.code == bittensor.proto.ReturnCode.Success
+    assert [ stage[0] for stage in span.stages ] == [ 'auth', 'dispatch', 'deserialize', 'queue', 'model', 'serialize' ]
+    assert context.trailing_metadata[0][0] == tracing.SERVER_TIMING_KEY
+    assert [ name for name, _ in tracing.parse_server_timing( context.trailing_metadata[0][1] ) ] == [ 'auth', 'dispatch', 'deserialize', 'queue', 'model', 'serialize' ]
+    assert tracing.current_span.get() == None
+    axon.stop()
+
+def test_receptor_traces_requests():
+    class Future():
+        def __init__( self, request, metadata ):
+            self.metadata = metadata
+            self.response = bittensor.proto.TensorMessage( version = bittensor.__version_as_int__, hotkey = 'axon', return_code = bittensor.proto.ReturnCode.Success, tensors = [ request.tensors[0] ] )
+        def result( self ):
+            return self.response
+        def done( self ):
+            return True
+        def cancelled( self ):
+            return False
+        def trailing_metadata( self ):
+            return ( ( tracing.SERVER_TIMING_KEY, 'auth;dur=1.000,model;dur=2.000' ), )
+        def add_done_callback( self, callback ):
+            pass
+    sent = []
+    def future( request, timeout, metadata ):
+        sent.append( metadata )
+        return Future( request, metadata )
+    stub = SimpleNamespace( Forward = SimpleNamespace( future = future ) )
+    endpoint = bittensor.endpoint( version = bittensor.__version_as_int__, uid = 0, ip = '127.0.0.1', ip_type = 4, port = 8080, hotkey = wallet.hotkey.ss58_address, coldkey = wallet.coldkey.ss58_address, modality = 2 )
+    tracer = tracing.Tracer()
+    receptor = bittensor.Receptor( wallet = wallet, endpoint = endpoint, channel = None, stub = stub, max_processes = 1, tracer = tracer )
+
+    outputs, code, _ = receptor.forward( torch.rand( 3, 3, bittensor.__network_dim__ ), bittensor.proto.Modality.TENSOR, timeout = 1 )
+    assert code == bittensor.proto.ReturnCode.Success
+    span = tracer.snapshot()[0]
+    # The trace id is appended after the positional authentication metadata.
+    assert sent[0][0] == ( 'rpc-auth-header', 'Bittensor' ) and sent[0][-1] == ( tracing.TRACE_ID_KEY, span.trace_id )
+    assert [ stage[0] for stage in span.stages ] == [ 'serialize', 'pending', 'sign', 'network', 'check', 'deserialize', 'server.auth', 'server.model' ]
+    assert span.stages[-1][2] == 0.002